@@ -0,0 +1,125 @@
+"""
+Сравнение режимов подписки binance.py: subscribe / combined / all.
+
+    python -m bench.bench_binance_modes --market futures --seconds 30
+
+Нужен доступ к Binance (или эмулятор: WS_OVERRIDE, как у коллекторов). Для каждого режима поднимаются те же соединения,
+что строит binance.plan_connections, и меряется:
+    - время до полного покрытия: когда по каждому символу пришло хотя бы
+      одно сообщение (и до 50% / 95%)
+    - задержка сообщения: локальное время приёма - E (время события Binance;
+      есть только у futures, у spot bookTicker его нет)
+    - сообщений/с, в том числе отброшенных локальным фильтром (режим "all")
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+import binance
+from connection import WS_OVERRIDE, override_url, ssl_context
+from latency import Histogram
+from sharding import RateBook
+
+MODES = ("subscribe", "combined", "all")
+
+
+async def run_mode(mode: str, market_type: str, seconds: float, n_connections: int) -> dict:
+    path = binance.SPOT_SYMBOLS_FILE if market_type == "spot" else binance.FUTURES_SYMBOLS_FILE
+    symbols = binance.load_symbols(path)
+    wanted = set(symbols)
+    rates = RateBook("BINANCE", market_type).rates
+    plan = binance.plan_connections(market_type, symbols, mode, n_connections, rates)
+
+    first_seen: dict[str, float] = {}
+    latencies = Histogram()
+    lat_values: list[int] = []
+    counters = {"messages": 0, "filtered": 0}
+    start = time.perf_counter()
+
+    async def one(url: str, subscribe: list[str]) -> None:
+        if WS_OVERRIDE:
+            url = override_url(url)
+        tls = ssl_context() if url.startswith("wss://") else None
+        async with websockets.connect(url, ssl=tls, max_queue=None) as ws:
+            request_id = 1
+            for batch in binance.chunk_list(subscribe, binance.BATCH_SIZE):
+                await ws.send(binance.build_subscribe_message(batch, request_id))
+                request_id += 1
+                await asyncio.sleep(0.2)
+            async for raw in ws:
+                recv_ms = time.time() * 1000
+                parsed = binance.process_bookticker_message(raw)
+                if parsed is None:
+                    continue
+                symbol, _, _, _, _, ts_ms = parsed
+                if symbol not in wanted:
+                    counters["filtered"] += 1
+                    continue
+                counters["messages"] += 1
+                if symbol not in first_seen:
+                    first_seen[symbol] = time.perf_counter() - start
+                if ts_ms:
+                    lat_values.append(int((recv_ms - ts_ms) * 1_000_000))
+                if len(lat_values) >= 10_000:
+                    latencies.record_many(np.asarray(lat_values, dtype=np.int64))
+                    lat_values.clear()
+
+    tasks = [asyncio.create_task(one(url, sub)) for url, _, sub in plan]
+    await asyncio.sleep(seconds)
+    for t in tasks:
+        t.cancel()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = sorted({repr(o) for o in outcomes if isinstance(o, Exception) and not isinstance(o, asyncio.CancelledError)})
+    latencies.record_many(np.asarray(lat_values, dtype=np.int64))
+
+    times = sorted(first_seen.values())
+
+    def coverage(fraction: float) -> float | None:
+        need = int(len(wanted) * fraction + 0.999999)
+        return round(times[need - 1], 3) if need and len(times) >= need else None
+
+    lat = latencies.summary()
+    return {
+        "mode": mode,
+        "market": market_type,
+        "connections": len(plan),
+        "symbols": len(wanted),
+        "covered": len(first_seen),
+        "coverage_50_s": coverage(0.5),
+        "coverage_95_s": coverage(0.95),
+        "coverage_100_s": coverage(1.0),
+        "messages_per_s": round(counters["messages"] / seconds, 1),
+        "filtered_per_s": round(counters["filtered"] / seconds, 1),
+        "latency_ms": {k: lat[k] / 1e6 for k in ("p50", "p99", "p99.9", "max")} if lat["count"] else None,
+        "errors": errors,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--market", choices=("spot", "futures"), default="futures")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", help="куда сохранить результаты")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        print(f"[{mode}] {args.market}, {args.seconds:.0f} c ...")
+        result = await run_mode(mode, args.market, args.seconds, args.connections)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
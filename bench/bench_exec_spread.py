@@ -0,0 +1,80 @@
+"""
+Бенчмарк исполнимых спредов (VWAP по стаканам) в spread_engine.
+
+    python -m bench.bench_exec_spread
+
+Стаканы DEPTH_LEVELS уровней заводятся по всем слотам, которые есть в
+ногах unique pairs. Дальше пачки обновлений стаканов случайных слотов
+(как приходят за одно пробуждение prices.py) прогоняются через
+DepthStore.update_records + SpreadEngine.on_depth_slots. Итог — мкс на
+пачку, ног/с и сколько стоит пересчитать всю таблицу разом.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from price_store import DEPTH_DTYPE, DepthStore, PriceStore
+from publisher import DEPTH_LEVELS, load_symbol_ids
+from spread_engine import SpreadEngine
+
+
+def make_records(store: PriceStore, slots: np.ndarray, rng: np.random.Generator, ts: int) -> np.ndarray:
+    records = np.zeros(len(slots), dtype=DEPTH_DTYPE)
+    per_exchange = store.n_markets * store.n_symbols
+    records["exchange"] = slots // per_exchange
+    records["market"] = (slots % per_exchange) // store.n_symbols
+    records["symbol"] = slots % store.n_symbols
+    records["exch_ts"] = ts
+    mid = rng.uniform(1.0, 1000.0, size=(len(slots), 1))
+    steps = np.arange(1, DEPTH_LEVELS + 1) * mid * 1e-4
+    records["bid_px"] = mid - steps
+    records["ask_px"] = mid + steps
+    # объём уровня ~ 50..5000 USDT
+    records["bid_qty"] = rng.uniform(50.0, 5000.0, size=(len(slots), DEPTH_LEVELS)) / mid
+    records["ask_qty"] = rng.uniform(50.0, 5000.0, size=(len(slots), DEPTH_LEVELS)) / mid
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=200, help="стаканов в одной пачке приёма")
+    parser.add_argument("--batches", type=int, default=2000)
+    parser.add_argument("--notional", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    store = PriceStore(load_symbol_ids())
+    depth = DepthStore(store)
+    engine = SpreadEngine.from_pair_files(store, depth=depth)
+    engine.notional = args.notional
+    rng = np.random.default_rng(1)
+
+    slots = np.unique(np.concatenate([engine.leg_spot_slot, engine.leg_fut_slot]))
+    depth.update_records(make_records(store, slots, rng, 1))
+    print(f"ног={engine.n_legs}, слотов со стаканом={len(slots)}, уровней={DEPTH_LEVELS}, сумма=${args.notional:.0f}")
+
+    t0 = time.perf_counter()
+    engine.recalc_exec(np.arange(engine.n_legs))
+    full = time.perf_counter() - t0
+    live = np.count_nonzero(~np.isnan(engine.exec_entry))
+    print(f"  вся таблица:  {full * 1e3:8.2f} мс  ({live} ног с достаточной глубиной)")
+
+    batches = [
+        make_records(store, rng.choice(slots, size=args.batch), rng, 2 + i)
+        for i in range(args.batches)
+    ]
+    legs_before = engine.recalculated_exec
+    t0 = time.perf_counter()
+    for records in batches:
+        engine.on_depth_slots(depth.update_records(records))
+    elapsed = time.perf_counter() - t0
+    legs = engine.recalculated_exec - legs_before
+    print(
+        f"  пачки по {args.batch}: {elapsed / args.batches * 1e6:8.0f} мкс/пачку"
+        f"  {args.batches * args.batch / elapsed:12,.0f} стаканов/с  {legs / elapsed:12,.0f} ног/с"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Бенчмарк парсеров fastjson по бэкендам (msgspec / orjson / json).
+
+    python -m bench.bench_json
+    python -m bench.bench_json --json bench_json.json
+
+Кадры — образцы в формате, который реально шлют биржи (со всеми полями,
+которые парсер должен пропустить), push.tickers MEXC — на все контракты
+из mexc_futures_all.txt, как приходит живой кадр. Кадры подаются как
+bytes — так их отдаёт fastjson.frames(ws). Для каждого парсера и бэкенда:
+нс на кадр и ускорение относительно stdlib json.
+"""
+
+import argparse
+import json
+import time
+
+import fastjson
+
+MEXC_FUTURES_FILE = "dif type of pairs/actually all pomenshe/mexc_futures_all.txt"
+
+
+def _mexc_push_tickers(broken: dict[int, dict] | None = None) -> bytes:
+    try:
+        with open(MEXC_FUTURES_FILE, "r", encoding="utf-8") as f:
+            symbols = [s.strip() for s in f if s.strip()]
+    except OSError:
+        symbols = [f"SYM{i}_USDT" for i in range(800)]
+    items = [
+        {
+            "symbol": s,
+            "lastPrice": 1.2345 + i,
+            "riseFallRate": -0.0123,
+            "fairPrice": 1.2346 + i,
+            "indexPrice": 1.2344 + i,
+            "volume24": 123456789,
+            "amount24": 98765432.1,
+            "maxBidPrice": 1.35 + i,
+            "minAskPrice": 1.11 + i,
+            "lower24Price": 1.2,
+            "high24Price": 1.3,
+            "timestamp": 1710000000000 + i,
+            "bid1": 1.2344 + i,
+            "ask1": 1.2346 + i,
+            "holdVol": 1234567,
+            "riseFallValue": -0.015,
+            "fundingRate": 0.0001,
+            "zone": "UTC+8",
+            "riseFallRates": [],
+            "riseFallRatesOfTimezone": [-0.01, -0.02, -0.03],
+        }
+        for i, s in enumerate(symbols)
+    ]
+    for i, fields in (broken or {}).items():
+        items[i].update(fields)
+    return json.dumps({"channel": "push.tickers", "data": items, "ts": 1710000000000}).encode()
+
+
+FRAMES = {
+    "binance": (
+        b'{"stream":"btcusdt@bookTicker","data":{"e":"bookTicker","u":400900217,"s":"BTCUSDT",'
+        b'"b":"65000.10","B":"31.21000000","a":"65000.20","A":"40.66000000","T":1710000000123,"E":1710000000125}}'
+    ),
+    "binance_depth": (
+        b'{"stream":"btcusdt@depth5@100ms","data":{"e":"depthUpdate","E":1710000000125,"T":1710000000123,'
+        b'"s":"BTCUSDT","U":390497796,"u":390497878,"pu":390497794,'
+        b'"b":[["65000.10","0.512"],["65000.00","1.201"],["64999.90","0.050"],["64999.80","2.500"],["64999.70","0.730"]],'
+        b'"a":[["65000.20","0.301"],["65000.30","0.800"],["65000.40","1.100"],["65000.50","0.002"],["65000.60","3.000"]]}}'
+    ),
+    "bybit": (
+        b'{"topic":"orderbook.1.BTCUSDT","type":"snapshot","ts":1710000000125,"data":{"s":"BTCUSDT",'
+        b'"b":[["65000.10","0.512"]],"a":[["65000.20","0.301"]],"u":18521288,"seq":7961638724},"cts":1710000000120}'
+    ),
+    "okx": (
+        b'{"arg":{"channel":"tickers","instId":"BTC-USDT"},"data":[{"instType":"SPOT","instId":"BTC-USDT",'
+        b'"last":"65000.1","lastSz":"0.0011","askPx":"65000.2","askSz":"1.2345","bidPx":"65000.1","bidSz":"0.4321",'
+        b'"open24h":"64000","high24h":"65500","low24h":"63800","sodUtc0":"64100","sodUtc8":"64200",'
+        b'"volCcy24h":"123456789.12","vol24h":"1890.12","ts":"1710000000125"}]}'
+    ),
+    "okx_books5": (
+        b'{"arg":{"channel":"books5","instId":"BTC-USDT-SWAP"},"data":[{'
+        b'"asks":[["65000.2","12","0","3"],["65000.3","40","0","5"],["65000.4","7","0","1"],["65000.5","90","0","9"],["65000.6","3","0","1"]],'
+        b'"bids":[["65000.1","25","0","4"],["65000","11","0","2"],["64999.9","60","0","6"],["64999.8","2","0","1"],["64999.7","75","0","8"]],'
+        b'"instId":"BTC-USDT-SWAP","ts":"1710000000125","seqId":123456789}]}'
+    ),
+    "bingx": (
+        b'{"code":0,"dataType":"BTC-USDT@ticker","data":{"e":"24hTicker","E":1710000000125,"s":"BTC-USDT",'
+        b'"p":"100.5","P":"0.15%","o":"64899.6","h":"65500.0","l":"63800.0","c":"65000.1","v":"1890.12",'
+        b'"q":"122850000.5","O":1709913600000,"C":1710000000125,"B":"0.4321","b":"65000.1","A":"1.2345","a":"65000.2"}}'
+    ),
+    "bingx_book": (
+        b'{"code":0,"dataType":"BTC-USDT@bookTicker","data":{"e":"bookTicker","u":1234567,"E":1710000000125,'
+        b'"T":1710000000123,"s":"BTC-USDT","b":"65000.1","B":"0.4321","a":"65000.2","A":"1.2345"},"success":true}'
+    ),
+    "mexc_futures": _mexc_push_tickers(),
+    "mexc_depth": (
+        b'{"channel":"push.depth.full","data":{"asks":[[65000.2,1200,3],[65000.3,4000,5],[65000.4,700,1],'
+        b'[65000.5,9000,9],[65000.6,300,1]],"bids":[[65000.1,2500,4],[65000,1100,2],[64999.9,6000,6],'
+        b'[64999.8,200,1],[64999.7,7500,8]],"version":987654321},"symbol":"BTC_USDT","ts":1710000000125}'
+    ),
+    "mexc_book": (
+        b'{"c":"spot@public.allBookTicker.v3.api","d":['
+        + b",".join(
+            b'{"s":"SYM%dUSDT","b":"1.2345","B":"100.5","a":"1.2346","A":"200.25"}' % i for i in range(50)
+        )
+        + b'],"t":1710000000125}'
+    ),
+}
+
+# Кадры с битыми полями — только сверка бэкендов, без замера:
+# пропускается один тикер (или берётся запасная цена), а не весь кадр
+BROKEN_FRAMES = {
+    "mexc_futures": _mexc_push_tickers({3: {"lastPrice": "abc"}, 5: {"maxBidPrice": "x"}, 7: {"minAskPrice": None}}),
+}
+
+# кадр -> парсер, если имя кадра не совпадает с именем парсера
+PARSER_OF = {"okx_books5": "okx"}
+
+
+def time_parser(parse, frame: bytes, min_seconds: float) -> float:
+    """
+    нс на кадр: повторяем пачками, пока не наберётся min_seconds.
+    """
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            parse(frame)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_seconds:
+            return elapsed / n * 1e9
+        n *= 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.3, help="минимальное время замера одного парсера")
+    parser.add_argument("--json", help="куда сохранить результаты")
+    args = parser.parse_args()
+
+    parsers = {backend: fastjson.make_parsers(backend) for backend in fastjson.BACKENDS}
+    results = []
+    print(f"бэкенды: {', '.join(fastjson.BACKENDS)} (по умолчанию {fastjson.BACKEND})")
+    for name, frame in BROKEN_FRAMES.items():
+        parser_name = PARSER_OF.get(name, name)
+        reference = parsers["json"][parser_name](frame)
+        for backend in fastjson.BACKENDS:
+            if parsers[backend][parser_name](frame) != reference:
+                raise SystemExit(f"{name}/{backend}, битый кадр: результат расходится с stdlib json")
+        print(f"  {name:13} битый кадр: все бэкенды совпадают ({len(reference or ())} строк)")
+    for name, frame in FRAMES.items():
+        parser_name = PARSER_OF.get(name, name)
+        # все бэкенды обязаны давать одинаковый результат
+        reference = parsers["json"][parser_name](frame)
+        baseline = None
+        for backend in ("json",) + tuple(b for b in fastjson.BACKENDS if b != "json"):
+            parse = parsers[backend][parser_name]
+            if parse(frame) != reference:
+                raise SystemExit(f"{name}/{backend}: результат расходится с stdlib json")
+            ns = time_parser(parse, frame, args.seconds)
+            if baseline is None:
+                baseline = ns
+            results.append({
+                "parser": name,
+                "backend": backend,
+                "frame_bytes": len(frame),
+                "ns_per_frame": round(ns, 1),
+                "speedup": round(baseline / ns, 2),
+            })
+            print(f"  {name:13} {backend:8} {len(frame):7} B  {ns:10.0f} нс/кадр  x{baseline / ns:.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Бенчмарк лидерборда спредов.
+
+    python -m bench.bench_leaderboard
+
+Гоняет случайные обновления по всем ногам unique pairs (как при живом
+потоке котировок) и меряет стоимость update() и top(k). Итог — сколько
+процессорного времени в секунду уйдёт на 100k обновлений/с.
+"""
+
+import random
+import time
+
+from leaderboard import Leaderboard
+from spread_engine import load_pair_files
+
+N_UPDATES = 500_000
+TARGET_RATE = 100_000
+TOP_K = 20
+
+
+def main() -> None:
+    n_legs = len(load_pair_files()) or 18_000
+    board = Leaderboard(n_legs)
+
+    rng = random.Random(1)
+    for leg in range(n_legs):
+        board.update(leg, rng.gauss(0.0, 0.5))
+
+    legs = [rng.randrange(n_legs) for _ in range(N_UPDATES)]
+    # спреды двигаются на малые доли процента от тика к тику
+    steps = [rng.gauss(0.0, 0.02) for _ in range(N_UPDATES)]
+    keys = board.keys
+
+    t0 = time.perf_counter()
+    for leg, step in zip(legs, steps):
+        board.update(leg, keys[leg] + step)
+    elapsed = time.perf_counter() - t0
+    per_update_ns = elapsed / N_UPDATES * 1e9
+
+    n_reads = 10_000
+    t0 = time.perf_counter()
+    for _ in range(n_reads):
+        board.top(TOP_K)
+    per_read_us = (time.perf_counter() - t0) / n_reads * 1e6
+
+    # проверка: top(k) совпадает с полной сортировкой
+    expected = sorted(range(n_legs), key=lambda i: -keys[i])[:TOP_K]
+    assert [leg for leg, _ in board.top(TOP_K)] == expected
+
+    print(f"ног: {n_legs}, обновлений: {N_UPDATES}")
+    print(f"update():  {per_update_ns:,.0f} нс")
+    print(f"top({TOP_K}):   {per_read_us:,.1f} мкс")
+    print(f"CPU на {TARGET_RATE:,} обновлений/с: {per_update_ns * TARGET_RATE / 1e7:.1f}% ядра")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Бенчмарк protobuf-декодера MEXC spot (mexc_pb.py).
+
+    python -m bench.bench_mexc_pb
+    python -m bench.bench_mexc_pb --json bench_mexc_pb.json
+
+Кадры собираются mexc_pb.encode_* по всем парам из mexc_spot_all.txt:
+    aggre.bookTicker   один кадр на символ (основной режим mexc.py)
+    bookTicker.batch   пачка из нескольких котировок одного символа
+    miniTickers        все пары в одном кадре, как приходит живой кадр
+Для сравнения — та же котировка в старом JSON-канале allBookTicker
+через fastjson (лучший доступный бэкенд). Итог — нс на кадр и на
+котировку; перед замером каждый кадр сверяется с исходными значениями.
+"""
+
+import argparse
+import itertools
+import json
+import random
+
+import fastjson
+import mexc_pb
+from bench.bench_json import time_parser
+
+SPOT_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/mexc_spot_all.txt"
+
+
+def load_symbols() -> list[str]:
+    try:
+        with open(SPOT_SYMBOLS_FILE, "r", encoding="utf-8") as f:
+            return [s.strip() for s in f if s.strip()]
+    except OSError:
+        return [f"SYM{i}USDT" for i in range(2000)]
+
+
+def make_quotes(symbols: list[str], seed: int = 1) -> list[tuple]:
+    rng = random.Random(seed)
+    quotes = []
+    for s in symbols:
+        mid = rng.uniform(0.0001, 1000.0)
+        quotes.append((s, f"{mid * 0.9995:.6g}", f"{mid * 1.0005:.6g}", f"{rng.uniform(1, 1e5):.2f}", f"{rng.uniform(1, 1e5):.2f}"))
+    return quotes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.3, help="минимальное время замера одного кадра")
+    parser.add_argument("--json", help="куда сохранить результаты")
+    args = parser.parse_args()
+
+    symbols = load_symbols()
+    quotes = make_quotes(symbols)
+    ts = 1710000000125
+
+    aggre = [
+        mexc_pb.encode_book_ticker(f"spot@public.aggre.bookTicker.v3.api.pb@100ms@{s}", s, b, a, bq, aq, ts)
+        for s, b, a, bq, aq in quotes
+    ]
+    for frame, (s, b, a, bq, aq) in zip(aggre, quotes):
+        assert mexc_pb.parse_book_ticker(frame) == (s, float(b), float(a), float(bq), float(aq), ts)
+
+    s, b, a, bq, aq = quotes[0]
+    batch_items = b"".join(
+        mexc_pb._encode_len(1, mexc_pb._encode_strings((b, bq, a, aq))) for _ in range(5)
+    )
+    batch = mexc_pb.encode_wrapper(
+        f"spot@public.bookTicker.batch.v3.api.pb@{s}", mexc_pb.BOOK_TICKER_BATCH, batch_items, s, ts
+    )
+    assert mexc_pb.parse_book_ticker(batch) == (s, float(b), float(a), float(bq), float(aq), ts)
+
+    minis = mexc_pb.encode_mini_tickers(
+        "spot@public.miniTickers.v3.api.pb@UTC+3", [(q[0], q[1]) for q in quotes], ts
+    )
+    assert mexc_pb.parse_mini_tickers(minis) == [(q[0], float(q[1]), ts) for q in quotes]
+
+    book_json = json.dumps({
+        "c": "spot@public.allBookTicker.v3.api",
+        "d": [{"s": s, "b": b, "B": bq, "a": a, "A": aq}],
+        "t": ts,
+    }).encode()
+
+    cases = [
+        ("aggre.bookTicker", mexc_pb.parse_book_ticker, aggre, 1),
+        ("bookTicker.batch", mexc_pb.parse_book_ticker, [batch], 1),
+        ("miniTickers", mexc_pb.parse_mini_tickers, [minis], len(quotes)),
+        (f"allBookTicker json/{fastjson.BACKEND}", fastjson.parse_mexc_all_book_ticker, [book_json], 1),
+    ]
+
+    print(f"пар={len(quotes)}")
+    results = []
+    for name, parse, frames, per_frame in cases:
+        # по кругу по всем кадрам, чтобы не мерить один и тот же символ
+        next_frame = itertools.cycle(frames).__next__
+        ns = time_parser(lambda _: parse(next_frame()), None, args.seconds)
+        size = sum(len(f) for f in frames) / len(frames)
+        results.append({
+            "frame": name,
+            "frame_bytes": round(size),
+            "ns_per_frame": round(ns, 1),
+            "ns_per_quote": round(ns / per_frame, 1),
+        })
+        print(f"  {name:28} {size:8.0f} B  {ns:10.0f} нс/кадр  {ns / per_frame:8.0f} нс/котировку")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
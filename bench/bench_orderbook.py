@@ -0,0 +1,137 @@
+"""
+Бенчмарк локальных стаканов (orderbook.py) на всех символах Bybit.
+
+    python -m bench.bench_orderbook --depth 50
+
+Стаканы заводятся по всем spot + linear символам из bybit_*_all.txt
+снапшотами заданной глубины, затем идут случайные дельты как у Bybit:
+1-6 уровней на сообщение, часть — удаления (размер 0), часть — новые
+уровни, дельты часто касаются только одной стороны. Меряется:
+    apply        — только BookSet.apply (уже разобранные уровни)
+    parse+apply  — fastjson.parse_bybit_orderbook + apply на байтах кадра
+В конце стаканы сверяются с эталоном на dict (сортировка на каждый запрос).
+"""
+
+import argparse
+import json
+import random
+import time
+
+import bybit
+from fastjson import BACKEND, parse_bybit_orderbook
+from orderbook import BookSet
+
+TICK = 0.01
+
+
+def make_stream(symbols: list[str], depth: int, n_deltas: int, seed: int = 1):
+    rng = random.Random(seed)
+    mids = {s: rng.uniform(1.0, 1000.0) for s in symbols}
+    messages = []
+    for s in symbols:
+        mid = round(mids[s], 2)
+        bids = [(round(mid - TICK * (i + 1), 2), rng.uniform(0.1, 10.0)) for i in range(depth)]
+        asks = [(round(mid + TICK * (i + 1), 2), rng.uniform(0.1, 10.0)) for i in range(depth)]
+        messages.append((s, True, 1, bids, asks, 0))
+    u = {s: 1 for s in symbols}
+    for n in range(n_deltas):
+        s = rng.choice(symbols)
+        u[s] += 1
+        mid = round(mids[s], 2)
+        sides = rng.choice(("b", "a", "ba"))
+        bids, asks = [], []
+        for _ in range(rng.randint(1, 6)):
+            offset = TICK * rng.randint(1, depth + 5)
+            qty = 0.0 if rng.random() < 0.3 else rng.uniform(0.1, 10.0)
+            if "b" in sides:
+                bids.append((round(mid - offset, 2), qty))
+            if "a" in sides:
+                asks.append((round(mid + offset, 2), qty))
+        messages.append((s, False, u[s], bids, asks, n))
+    return messages
+
+
+def encode(msg, depth: int) -> bytes:
+    symbol, is_snapshot, u, bids, asks, ts = msg
+    return json.dumps({
+        "topic": f"orderbook.{depth}.{symbol}",
+        "type": "snapshot" if is_snapshot else "delta",
+        "ts": ts,
+        "data": {
+            "s": symbol,
+            "b": [[repr(p), repr(q)] for p, q in bids],
+            "a": [[repr(p), repr(q)] for p, q in asks],
+            "u": u,
+            "seq": u,
+        },
+        "cts": ts,
+    }).encode()
+
+
+def reference(messages, depth: int) -> dict:
+    books: dict[str, tuple[dict, dict]] = {}
+    for symbol, is_snapshot, _, bids, asks, _ in messages:
+        if is_snapshot:
+            books[symbol] = ({p: q for p, q in bids if q}, {p: q for p, q in asks if q})
+            continue
+        b, a = books[symbol]
+        for side, levels in ((b, bids), (a, asks)):
+            for p, q in levels:
+                if q:
+                    side[p] = q
+                else:
+                    side.pop(p, None)
+        # биржа держит в стакане только depth лучших уровней
+        for side, reverse in ((b, True), (a, False)):
+            for p in sorted(side, reverse=reverse)[depth:]:
+                del side[p]
+    return {
+        s: (sorted(b.items(), reverse=True), sorted(a.items()))
+        for s, (b, a) in books.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=50, choices=(1, 50, 200))
+    parser.add_argument("--deltas", type=int, default=300_000)
+    args = parser.parse_args()
+
+    symbols = bybit.load_symbols(bybit.SPOT_SYMBOLS_FILE) + bybit.load_symbols(bybit.FUTURES_SYMBOLS_FILE)
+    # spot и linear ведут разные стаканы: у одинаковых имён разный суффикс
+    symbols = [f"S:{s}" for s in symbols[:len(symbols) // 2]] + symbols[len(symbols) // 2:]
+    messages = make_stream(symbols, args.depth, args.deltas)
+    raw = [encode(m, args.depth) for m in messages]
+    n_snap = len(symbols)
+    print(f"символов={len(symbols)}, глубина={args.depth}, дельт={args.deltas}, json={BACKEND}")
+
+    books = BookSet(args.depth)
+    apply = books.apply
+    for m in messages[:n_snap]:
+        apply(*m)
+    t0 = time.perf_counter()
+    for m in messages[n_snap:]:
+        apply(*m)
+    elapsed = time.perf_counter() - t0
+    print(f"  apply:        {args.deltas / elapsed:12,.0f} дельт/с  {elapsed / args.deltas * 1e9:8.0f} нс/дельта")
+
+    expected = reference(messages, args.depth)
+    for s, (bids, asks) in expected.items():
+        view = books.books[s].view()
+        assert view["bids"] == bids and view["asks"] == asks, f"стакан {s} расходится с эталоном"
+    assert books.gaps == 0 and books.stale == 0
+
+    books = BookSet(args.depth)
+    apply = books.apply
+    for r in raw[:n_snap]:
+        apply(*parse_bybit_orderbook(r))
+    t0 = time.perf_counter()
+    for r in raw[n_snap:]:
+        apply(*parse_bybit_orderbook(r))
+    elapsed = time.perf_counter() - t0
+    print(f"  parse+apply:  {args.deltas / elapsed:12,.0f} дельт/с  {elapsed / args.deltas * 1e9:8.0f} нс/дельта")
+    print("  стаканы совпадают с эталоном")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Бенчмарк горячих путей коллекторов на синтетических кадрах.
+
+    python -m bench.bench_parsers
+    python -m bench.bench_parsers --json parsers.json
+    python -m bench.bench_parsers --json parsers_new.json --compare parsers.json
+
+В отличие от bench_json (один парсер fastjson на одном кадре) здесь
+меряется то, что коллектор делает с кадром целиком, на потоке разных
+кадров из bench.generators: разбор, разжатие, стакан, цикл по элементам
+с поиском id символа и handle_price. Для каждого случая:
+
+    ns_per_msg          нс на сообщение (кадр)
+    ns_per_quote        нс на котировку, если в кадре их много
+    blocks_per_msg      сколько блоков памяти остаётся живыми после
+                        разбора (результат: кортежи, float, str) — по
+                        sys.getallocatedblocks
+    peak_bytes_per_msg  пик памяти во время разбора одного кадра
+                        (tracemalloc) — временные объекты, которые
+                        живыми не остаются
+
+С --compare печатается изменение нс/сообщение относительно прошлого
+прогона: изменение парсера сопровождается этими цифрами.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from bench import generators as g
+from fastjson import (
+    BACKEND, parse_bingx_book_ticker, parse_bingx_ticker, parse_bybit_orderbook, parse_mexc_all_book_ticker,
+    parse_mexc_depth, parse_mexc_futures_tickers, parse_okx,
+)
+from mexc_pb import parse_book_ticker
+from orderbook import BookSet
+from publisher import FUTURES, SPOT, Publisher
+
+# Кадров в потоке каждого случая
+FRAMES = 4000
+
+# Кадров для замера пика памяти (tracemalloc медленный)
+PEAK_SAMPLES = 200
+
+
+def case(name: str, frames: list, fn, quotes_per_msg: float = 1.0, reset=None) -> dict:
+    return {"name": name, "frames": frames, "fn": fn, "quotes": quotes_per_msg, "reset": reset}
+
+
+def build_cases(n: int) -> list[dict]:
+    import binance
+    import bingx
+    import mexc
+    import prices
+
+    cases = []
+
+    # ---------- Binance ----------
+    q = g.Quotes(g.exchange_symbols("binance", "futures"))
+    cases.append(case("binance futures bookTicker", [g.binance_book_ticker(q, q.step()) for _ in range(n)],
+                      binance.process_bookticker_message))
+    q = g.Quotes(g.exchange_symbols("binance", "spot"))
+    cases.append(case("binance spot bookTicker", [g.binance_book_ticker(q, q.step(), futures=False) for _ in range(n)],
+                      binance.process_bookticker_message))
+
+    # ---------- Bybit: parse + локальный стакан ----------
+    for depth in (1, 50):
+        q = g.Quotes(g.exchange_symbols("bybit", "futures", 200))
+        snapshots = [g.bybit_orderbook(q, s, True, depth) for s in q.symbols]
+        deltas = [g.bybit_orderbook(q, q.step(), False, depth) for _ in range(n)]
+        books = BookSet(depth)
+
+        def apply(raw, books=books):
+            msg = parse_bybit_orderbook(raw)
+            if msg is None:
+                return None
+            symbol, is_snapshot, u, bids, asks, ts = msg
+            book = books.apply(symbol, is_snapshot, u, bids, asks, ts)
+            return None if book is None else book.top()
+
+        def reset(books=books, snapshots=snapshots):
+            books.reset()
+            for raw in snapshots:
+                apply(raw)
+
+        cases.append(case(f"bybit orderbook.{depth} snapshot", snapshots, apply, reset=books.reset))
+        cases.append(case(f"bybit orderbook.{depth} delta", deltas, apply, reset=reset))
+
+    # ---------- OKX ----------
+    q = g.Quotes(g.exchange_symbols("okx", "futures"))
+    cases.append(case("okx bbo-tbt", [g.okx_book(q, q.step(), "bbo-tbt") for _ in range(n)], parse_okx))
+    cases.append(case("okx books5", [g.okx_book(q, q.step(), "books5") for _ in range(n)], parse_okx))
+    cases.append(case("okx tickers", [g.okx_tickers(q, q.step()) for _ in range(n)], parse_okx))
+
+    # ---------- BingX: gzip + разбор ----------
+    q = g.Quotes(g.exchange_symbols("bingx", "futures"))
+    decoder = bingx.FrameDecoder()
+
+    def bingx_book(raw, decompress=decoder.decompress):
+        return parse_bingx_book_ticker(decompress(raw))
+
+    def bingx_ticker(raw, decompress=decoder.decompress):
+        return parse_bingx_ticker(decompress(raw))
+
+    cases.append(case("bingx bookTicker gzip", [g.bingx_book_ticker(q, q.step()) for _ in range(n)], bingx_book))
+    cases.append(case("bingx 24h ticker gzip", [g.bingx_ticker(q, q.step()) for _ in range(n)], bingx_ticker))
+
+    # ---------- MEXC ----------
+    null_publisher = Publisher("MEXC", udp_enabled=False)
+
+    q = g.Quotes(g.exchange_symbols("mexc", "futures"))
+    contracts = {s: i for i, s in enumerate(q.symbols)}
+
+    def mexc_futures(raw):
+        # как в mexc.run_futures_connection: разбор + цикл по контрактам
+        rows = parse_mexc_futures_tickers(raw)
+        for symbol, bid, ask, ts in rows:
+            symbol_id = contracts.get(symbol)
+            if symbol_id is None:
+                continue
+            mexc.handle_price(null_publisher, FUTURES, symbol_id, bid, ask, ts, 0, 1)
+        return rows
+
+    frames = []
+    for _ in range(max(n // 200, 5)):
+        for _ in range(len(q.symbols)):
+            q.step()
+        frames.append(g.mexc_futures_tickers(q))
+    cases.append(case("mexc push.tickers + loop", frames, mexc_futures, len(q.symbols)))
+
+    q = g.Quotes(g.exchange_symbols("mexc", "spot"))
+    spot = {s: i for i, s in enumerate(q.symbols)}
+
+    def mexc_book(raw):
+        # как в mexc2-0.run_spot_connection
+        rows = parse_mexc_all_book_ticker(raw)
+        for symbol, bid, ask, ts in rows:
+            symbol_id = spot.get(symbol)
+            if symbol_id is None:
+                continue
+            mexc.handle_price(null_publisher, SPOT, symbol_id, bid, ask, ts, 0, 1)
+        return rows
+
+    batch = 50
+    frames = [g.mexc_all_book_ticker(q, [q.step() for _ in range(batch)]) for _ in range(n // 10)]
+    cases.append(case("mexc allBookTicker + loop", frames, mexc_book, batch))
+    cases.append(case("mexc aggre.bookTicker pb", [g.mexc_aggre_book_ticker(q, q.step()) for _ in range(n)],
+                      parse_book_ticker))
+
+    q = g.Quotes(g.exchange_symbols("mexc", "futures"))
+    cases.append(case("mexc depth.full", [g.mexc_depth(q, q.step()) for _ in range(n)], parse_mexc_depth))
+
+    # ---------- prices.py: старая CSV-строка ----------
+    q = g.Quotes(g.exchange_symbols("mexc", "futures"))
+    cases.append(case("prices.py CSV line", [g.price_line(q, "MEXC", "FUTURES", q.step()) for _ in range(n)],
+                      prices.store_legacy_line))
+    return cases
+
+
+def time_case(c: dict, min_seconds: float) -> float:
+    """
+    нс на сообщение: проходы по всему потоку, пока не наберётся min_seconds.
+    """
+    fn = c["fn"]
+    frames = c["frames"]
+    reset = c["reset"]
+    elapsed = 0.0
+    count = 0
+    while elapsed < min_seconds:
+        if reset is not None:
+            reset()
+        t0 = time.perf_counter()
+        for frame in frames:
+            fn(frame)
+        elapsed += time.perf_counter() - t0
+        count += len(frames)
+    return elapsed / count * 1e9
+
+
+def allocations(c: dict) -> tuple[float, float]:
+    """
+    (живых блоков после разбора, пик байт во время разбора) на сообщение.
+    """
+    fn = c["fn"]
+    frames = c["frames"]
+    if c["reset"] is not None:
+        c["reset"]()
+    results = [None] * len(frames)
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        for i, frame in enumerate(frames):
+            results[i] = fn(frame)
+        blocks = (sys.getallocatedblocks() - before) / len(frames)
+    finally:
+        gc.enable()
+    del results
+
+    if c["reset"] is not None:
+        c["reset"]()
+    samples = frames[:PEAK_SAMPLES]
+    peak = 0
+    tracemalloc.start()
+    try:
+        for frame in samples:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = fn(frame)
+            peak += tracemalloc.get_traced_memory()[1] - base
+            del result
+    finally:
+        tracemalloc.stop()
+    return blocks, peak / len(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.5, help="минимальное время замера одного случая")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="кадров в потоке случая")
+    parser.add_argument("--only", help="только случаи, в имени которых есть эта подстрока")
+    parser.add_argument("--json", help="куда сохранить результаты")
+    parser.add_argument("--compare", help="прошлый --json для сравнения")
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = {r["name"]: r for r in json.load(f)}
+
+    print(f"бэкенд fastjson: {BACKEND}, Python {sys.version.split()[0]}")
+    results = []
+    for c in build_cases(args.frames):
+        if args.only and args.only not in c["name"]:
+            continue
+        ns = time_case(c, args.seconds)
+        blocks, peak = allocations(c)
+        size = sum(len(f) for f in c["frames"]) / len(c["frames"])
+        row = {
+            "name": c["name"],
+            "backend": BACKEND,
+            "frame_bytes": round(size),
+            "quotes_per_msg": c["quotes"],
+            "ns_per_msg": round(ns, 1),
+            "ns_per_quote": round(ns / c["quotes"], 1),
+            "blocks_per_msg": round(blocks, 2),
+            "peak_bytes_per_msg": round(peak),
+        }
+        results.append(row)
+        line = (f"  {c['name']:30} {size:8.0f} B  {ns:10.0f} нс/сообщ  {ns / c['quotes']:7.0f} нс/котир"
+                f"  блоков {blocks:7.1f}  пик {peak:8.0f} B")
+        old = previous.get(c["name"])
+        if old:
+            line += f"  {(ns / old['ns_per_msg'] - 1) * 100:+6.1f}%"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
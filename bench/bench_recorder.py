@@ -0,0 +1,104 @@
+"""
+Бенчмарк записи и чтения сегментов recorder.py.
+
+    python -m bench.bench_recorder
+    python -m bench.bench_recorder --records 4000000 --compress
+
+Синтетический поток котировок (символы с неравной частотой, все биржи
+и рынки, recv_ns растёт) подаётся в TickRecorder пачками, как из
+BatchReceiver.drain. Итог — записей/с на запись, время закрытия
+сегмента (индекс, сжатие), размер на диске и сколько стоит запрос
+"один символ на всех биржах за десятую часть записи" против полного
+прохода по сегменту.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from price_store import RECORD_DTYPE
+from publisher import EXCHANGES, MARKETS
+from recorder import Segment, TickRecorder, read_range, segment_paths
+
+
+def make_records(n: int, n_symbols: int, start_ns: int, rate: float, rng: np.random.Generator) -> np.ndarray:
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records["exchange"] = rng.integers(0, len(EXCHANGES), n)
+    records["market"] = rng.integers(0, len(MARKETS), n)
+    # частоты по символам ~ Zipf: горячие пары дают большую часть потока
+    weights = 1.0 / np.arange(1, n_symbols + 1)
+    records["symbol"] = rng.choice(n_symbols, size=n, p=weights / weights.sum())
+    mid = 1.0 + records["symbol"] * 0.5
+    records["bid"] = mid - 0.001
+    records["ask"] = mid + 0.001
+    records["bid_qty"] = rng.uniform(1, 100, n).round(2)
+    records["ask_qty"] = rng.uniform(1, 100, n).round(2)
+    recv = start_ns + (np.arange(n) * (1e9 / rate)).astype(np.int64)
+    records["recv_ns"] = recv
+    records["exch_ts"] = recv // 1_000_000 - rng.integers(1, 50, n)
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2_000_000)
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=50_000, help="котировок/с в синтетическом потоке")
+    parser.add_argument("--batch", type=int, default=200, help="записей в пачке submit")
+    parser.add_argument("--compress", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    start_ns = 1_710_000_000 * 10**9
+    records = make_records(args.records, args.symbols, start_ns, args.rate, rng)
+    batches = [records[i:i + args.batch] for i in range(0, len(records), args.batch)]
+    directory = tempfile.mkdtemp(prefix="ticks-bench-")
+    try:
+        recorder = TickRecorder(directory, segment_records=args.records + 1, compress=args.compress,
+                                queue_batches=len(batches) + 1)
+        t0 = time.perf_counter()
+        for batch in batches:
+            recorder.submit(batch)
+        submitted = time.perf_counter() - t0
+        while recorder.recorded + recorder.dropped < args.records:
+            time.sleep(0.001)
+        written = time.perf_counter() - t0
+        t1 = time.perf_counter()
+        recorder.close()
+        sealed = time.perf_counter() - t1
+        print(f"записей {args.records:,}, символов {args.symbols}, пачки по {args.batch}, сжатие {args.compress}")
+        print(f"  submit:  {submitted / args.records * 1e9:8.0f} нс/запись  (поток приёма)")
+        print(f"  запись:  {args.records / written:12,.0f} записей/с  (поток записи, вместе с submit)")
+        print(f"  seal:    {sealed * 1e3:8.0f} мс  (индекс{' + сжатие' if args.compress else ''})")
+
+        paths = segment_paths(directory)
+        size = sum(p.stat().st_size for p in paths)
+        print(f"  на диске: {size / 2**20:.1f} МБ, {size / args.records:.1f} байт/запись, dropped {recorder.dropped}")
+
+        # символ на всех биржах за десятую часть записи, из середины
+        segment = Segment(paths[0])
+        span_ns = int(args.records / args.rate * 1e9)
+        lo = start_ns + span_ns // 2
+        hi = lo + span_ns // 10
+        for symbol in (0, args.symbols // 2):
+            t0 = time.perf_counter()
+            got = read_range(directory, [symbol], lo, hi)
+            indexed = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            all_records = segment.records()
+            mask = (all_records["symbol"] == symbol) & (all_records["recv_ns"] >= lo) & (all_records["recv_ns"] < hi)
+            expected = all_records[mask]
+            scan = time.perf_counter() - t0
+            if len(got) != len(expected) or not np.array_equal(got, expected):
+                raise SystemExit(f"символ {symbol}: запрос по индексу расходится с полным проходом")
+            print(f"  символ {symbol:5}: {len(got):7} записей  индекс {indexed * 1e3:7.2f} мс"
+                  f"  полный проход {scan * 1e3:7.2f} мс")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Сквозной нагрузочный прогон коллектора на локальном эмуляторе бирж.
+
+    python -m bench.e2e binance --rates 2000,5000,10000,20000
+    python -m bench.e2e bybit --rates 5000 --duration 60 --disconnect-every 20
+    python -m bench.e2e okx --rates 1000,4000,16000 --json okx_e2e.json
+
+На каждой ступени нагрузки запускаются bench.emulator с --rate и сам
+коллектор (binance.py, bybit.py, ...) с WS_OVERRIDE на эмулятор.
+Датаграммы коллектора принимаются здесь же, вместо prices.py: его нужно
+остановить, порт UDP_PORT общий. После прогрева (--warmup с) меряется
+--duration с:
+
+    отправлено/с   обновлений/с, разосланных эмулятором (его счётчики)
+    принято/с      котировок/с, дошедших по UDP
+    доля           принято / отправлено. У Bybit delta, не сдвинувшая
+                   верх стакана, не публикуется, у MEXC реплики
+                   сливаются — сравнивать стоит ступени между собой
+    CPU            коллектора и эмулятора, % одного ядра (/proc/<pid>/stat)
+    задержки       p50/p99 по этапам latency.py: биржа → коллектор
+                   (очередь эмулятора + ожидание коллектора), коллектор →
+                   ядро, ядро → приём
+
+Потолок коллектора — последняя ступень, где доля просела не больше чем
+на CEILING_LOSS от первой ступени, p99 биржа → коллектор меньше
+CEILING_P99_MS и CPU коллектора ниже CEILING_CPU. Если в ядро упёрся сам
+эмулятор, ступень помечается: до потолка коллектора не дошли.
+
+Коллектор работает в папке репозитория со своими настройками, его вывод
+пишется в --log-dir. RateBook коллекторов сохраняет частоты раз в 60 с,
+так что ступени длиннее этого перепишут rates/ частотами эмулятора.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from latency import LatencyMonitor, format_summary
+from publisher import UDP_HOST, UDP_PORT
+from receiver import BatchReceiver, RCVBUF_BYTES
+
+# ================== НАСТРОЙКИ ==================
+
+COLLECTORS = ("binance", "bybit", "okx", "bingx", "mexc")
+
+EMULATOR_PORT = 9000
+WARMUP = 10.0
+DURATION = 20.0
+
+# Критерии потолка
+CEILING_LOSS = 0.05
+CEILING_P99_MS = 100.0
+CEILING_CPU = 95.0
+
+# Период статистики эмулятора, с: отправлено/с считается по его строкам,
+# граница окна замера точна до этого шага
+STATS_INTERVAL = 0.2
+
+ROOT = Path(__file__).resolve().parent.parent
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(pid: int) -> float:
+    """
+    user + system время процесса (всех потоков), с.
+    """
+    with open(f"/proc/{pid}/stat", "r", encoding="ascii") as f:
+        fields = f.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def wait_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def stop(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+class EmulatorProcess:
+    """
+    bench.emulator в отдельном процессе; последняя строка его статистики — в .stats.
+    Ждать свежую строку нельзя: пока ждём, датаграммы копятся в ядре и
+    попадают в окно замера.
+    """
+
+    def __init__(self, port: int, rate: float, extra: list[str]):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", "-m", "bench.emulator", "--port", str(port), "--rate", str(rate),
+             "--json", "--stats-interval", str(STATS_INTERVAL), *extra],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True,
+        )
+        self.stats: dict = {}
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self) -> None:
+        for line in self.proc.stdout:
+            if line.startswith("{"):
+                self.stats = json.loads(line)
+
+
+def drain(receiver: BatchReceiver, seconds: float, latency: LatencyMonitor | None) -> int:
+    """
+    Принимает seconds секунд; возвращает число котировок.
+    """
+    records_total = 0
+    deadline = time.monotonic() + seconds
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return records_total
+        if receiver.wait(timeout=min(left, 0.2)):
+            records, kernel_ns, _, _ = receiver.drain()
+            records_total += len(records)
+            if latency is not None:
+                latency.observe(records, kernel_ns, time.time_ns())
+
+
+def run_step(collector: str, rate: float, args, receiver: BatchReceiver, log_dir: Path) -> dict:
+    extra = []
+    if args.symbols:
+        extra += ["--symbols", str(args.symbols)]
+    if args.disconnect_every:
+        extra += ["--disconnect-every", str(args.disconnect_every), "--disconnect-mode", args.disconnect_mode]
+    emulator = EmulatorProcess(args.port, rate, extra)
+    log_path = log_dir / f"{collector}_{rate:.0f}.log"
+    collector_proc = None
+    try:
+        wait_port("127.0.0.1", args.port)
+        env = dict(os.environ, WS_OVERRIDE=f"ws://127.0.0.1:{args.port}", PYTHONUNBUFFERED="1")
+        with open(log_path, "w", encoding="utf-8") as log:
+            collector_proc = subprocess.Popen(
+                [sys.executable, f"{collector}.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        drain(receiver, args.warmup, None)
+
+        latency = LatencyMonitor()
+        drops0, gaps0 = receiver.kernel_drops() or 0, receiver.seq_gaps
+        emu0 = emulator.stats
+        cpu0 = cpu_seconds(collector_proc.pid), cpu_seconds(emulator.proc.pid)
+        t0 = time.monotonic()
+        received = drain(receiver, args.duration, latency)
+        elapsed = time.monotonic() - t0
+        cpu1 = cpu_seconds(collector_proc.pid), cpu_seconds(emulator.proc.pid)
+        emu1 = emulator.stats
+        alive = collector_proc.poll() is None
+    finally:
+        if collector_proc is not None:
+            stop(collector_proc)
+        stop(emulator.proc)
+
+    emu_dt = (emu1.get("t", 0) - emu0.get("t", 0)) or elapsed
+    sent = (emu1.get("updates", 0) - emu0.get("updates", 0)) / emu_dt
+    summary = latency.summary()
+    p99 = max((s["exchange→collector"]["p99"] for s in summary.values() if "exchange→collector" in s), default=0)
+    return {
+        "collector": collector,
+        "rate": rate,
+        "sent_per_s": round(sent),
+        "received_per_s": round(received / elapsed),
+        "ratio": round(received / elapsed / sent, 3) if sent else 0.0,
+        "collector_cpu": round((cpu1[0] - cpu0[0]) / elapsed * 100, 1),
+        "emulator_cpu": round((cpu1[1] - cpu0[1]) / elapsed * 100, 1),
+        "p99_exchange_ms": round(p99 / 1e6, 2),
+        "kernel_drops": (receiver.kernel_drops() or 0) - drops0,
+        "seq_gaps": receiver.seq_gaps - gaps0,
+        "emulator": {k: emu1.get(k, 0) - emu0.get(k, 0) for k in ("connections", "disconnects", "slow_clients")},
+        "collector_alive": alive,
+        "latency": {" ".join(str(x) for x in key): stages for key, stages in summary.items()},
+        "latency_lines": format_summary(summary),
+        "log": str(log_path),
+    }
+
+
+def print_row(row: dict) -> None:
+    print(
+        f"  {row['rate']:>9,.0f} {row['sent_per_s']:>11,} {row['received_per_s']:>11,} {row['ratio']:>6.2f}"
+        f" {row['collector_cpu']:>7.0f}% {row['emulator_cpu']:>7.0f}% {row['p99_exchange_ms']:>9.1f}"
+        f"  потери ядро {row['kernel_drops']} seq {row['seq_gaps']},"
+        f" переподключений {row['emulator']['connections']}, медленных {row['emulator']['slow_clients']}"
+        f"{'' if row['collector_alive'] else '  КОЛЛЕКТОР УПАЛ, см. ' + row['log']}",
+        flush=True,
+    )
+    for line in row["latency_lines"]:
+        print(f"    {line}")
+
+
+def ceiling(rows: list[dict]) -> tuple[dict | None, str]:
+    """
+    Последняя ступень, которую коллектор держит, и почему следующая — нет.
+    """
+    if not rows:
+        return None, ""
+    base = rows[0]["ratio"]
+    best = None
+    for row in rows:
+        if not row["collector_alive"]:
+            return best, f"коллектор упал на {row['rate']:,.0f}"
+        if row["emulator_cpu"] >= CEILING_CPU:
+            return best, f"эмулятор упёрся в ядро на {row['rate']:,.0f} — до потолка коллектора не дошли"
+        if row["ratio"] < base * (1 - CEILING_LOSS):
+            return best, f"на {row['rate']:,.0f} доля принятого упала до {row['ratio']:.2f}"
+        if row["p99_exchange_ms"] >= CEILING_P99_MS:
+            return best, f"на {row['rate']:,.0f} p99 биржа → коллектор {row['p99_exchange_ms']:.0f} мс"
+        if row["collector_cpu"] >= CEILING_CPU:
+            return best, f"на {row['rate']:,.0f} CPU коллектора {row['collector_cpu']:.0f}%"
+        best = row
+    return best, "все ступени пройдены — потолок выше"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("collectors", nargs="+", choices=COLLECTORS)
+    parser.add_argument("--rates", default="2000,5000,10000,20000", help="ступени, обновлений/с через запятую")
+    parser.add_argument("--warmup", type=float, default=WARMUP)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--symbols", type=int, default=0, help="активных символов на рынок")
+    parser.add_argument("--disconnect-every", type=float, default=0.0)
+    parser.add_argument("--disconnect-mode", choices=("abort", "close", "stall"), default="abort")
+    parser.add_argument("--port", type=int, default=EMULATOR_PORT)
+    parser.add_argument("--log-dir", help="куда писать вывод коллекторов (по умолчанию временная папка)")
+    parser.add_argument("--json", help="куда сохранить результаты")
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",")]
+    log_dir = Path(args.log_dir or tempfile.mkdtemp(prefix="e2e-"))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    receiver = BatchReceiver(UDP_HOST, UDP_PORT, rcvbuf=RCVBUF_BYTES, timestamps=True)
+    print(f"приём {UDP_HOST}:{UDP_PORT} (prices.py должен быть остановлен), логи коллекторов: {log_dir}")
+    print("задержки, мс: p50/p99/p99.9 по этапам")
+
+    results = []
+    try:
+        for collector in args.collectors:
+            print(f"\n{collector}.py:")
+            print(f"  {'ступень':>9} {'отправлено':>11} {'принято':>11} {'доля':>6} {'CPU':>8} {'CPU эмул':>8}"
+                  f" {'p99 мс':>9}")
+            rows = []
+            for rate in rates:
+                row = run_step(collector, rate, args, receiver, log_dir)
+                print_row(row)
+                rows.append(row)
+            best, reason = ceiling(rows)
+            held = f"{best['received_per_s']:,} котировок/с (ступень {best['rate']:,.0f})" if best else "ни одной ступени"
+            print(f"  потолок {collector}.py: {held}; {reason}")
+            results += rows
+    finally:
+        receiver.close()
+
+    if args.json:
+        for row in results:
+            row.pop("latency_lines", None)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,718 @@
+"""
+Локальный эмулятор WS-бирж для нагрузочных прогонов коллекторов.
+
+    python -m bench.emulator --port 9000 --rate 20000
+    WS_OVERRIDE=ws://127.0.0.1:9000 python binance.py
+
+Один сервер изображает все биржи. Коллектор с WS_OVERRIDE (connection.py)
+приходит на ws://127.0.0.1:9000/<хост биржи>/<путь>, и по хосту и пути
+выбирается протокол:
+
+    Binance   /stream?streams=... (combined), /ws + SUBSCRIBE/UNSUBSCRIBE,
+              /ws/!bookTicker; bookTicker и depth5
+    Bybit     op subscribe/unsubscribe/ping, orderbook.{depth}: snapshot
+              сразу после подписки, дальше delta
+    OKX       op subscribe/unsubscribe, "ping" -> "pong"; bbo-tbt, books5,
+              tickers; рынок определяется по instId (-SWAP)
+    BingX     reqType sub/unsub, все кадры gzip; сервер сам шлёт Ping
+              (futures) или {"ping": ...} (spot) и рвёт соединение без Pong
+    MEXC      spot: SUBSCRIPTION/UNSUBSCRIPTION, PING, protobuf
+              aggre.bookTicker и miniTickers, не больше 30 подписок на
+              соединение; futures: sub.tickers (push.tickers всеми
+              контрактами раз в TICKERS_INTERVAL), sub.depth.full, ping
+
+Поток: --rate обновлений/с на весь эмулятор. Он делится между рынками по
+числу подписанных символов, а внутри рынка — по Zipf (bench.generators).
+Одно обновление рассылается всем соединениям, подписанным на символ
+(реплики MEXC получают одно и то же). Снимковые каналы (push.tickers,
+miniTickers) идут по своему расписанию, --rate на них не влияет.
+Время биржи в кадрах — текущее, поэтому задержка биржа → коллектор в
+prices.py и bench.e2e — это очередь эмулятора, сеть и ожидание коллектора.
+
+--symbols N: в каждом рынке обновляются только первые N подписанных
+символов, остальные подписки принимаются и молчат.
+
+--disconnect-every S: каждое соединение в среднем раз в S секунд
+(экспоненциально) обрывается (--disconnect-mode abort), закрывается
+биржей (close, код 1001) или замолкает, оставаясь открытым (stall).
+Так проверяются переподключение и замена зависших соединений.
+
+Клиента, который не успевает читать (SEND_QUEUE кадров в очереди),
+эмулятор, как и биржи, отключает.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+import uuid
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+from websockets.protocol import State
+
+from bench import generators as g
+from mexc_pb import encode_mini_tickers
+
+# ================== НАСТРОЙКИ ==================
+
+HOST = "127.0.0.1"
+PORT = 9000
+
+# Обновлений/с на весь эмулятор по умолчанию
+RATE = 5000
+
+# Шаг генератора, с: за шаг уходит rate * шаг обновлений
+TICK = 0.002
+
+# Кадров в очереди отправки одного соединения — дальше клиент отключается
+SEND_QUEUE = 20000
+
+# Кадров за одну запись в сокет
+WRITE_BATCH = 256
+
+# Снимковые каналы MEXC, с
+TICKERS_INTERVAL = 1.0
+MINI_TICKERS_INTERVAL = 3.0
+
+# BingX: Ping от сервера и сколько ждать Pong
+BINGX_PING_INTERVAL = 5.0
+BINGX_PONG_TIMEOUT = 15.0
+
+# MEXC spot: подписок на соединение
+MEXC_SPOT_SUBS = 30
+
+STATS_INTERVAL = 5.0
+
+# Хост биржи -> (биржа, рынок); None — рынок по пути или по символу
+HOSTS = {
+    "stream.binance.com": ("binance", "spot"),
+    "fstream.binance.com": ("binance", "futures"),
+    "stream.bybit.com": ("bybit", None),
+    "ws.okx.com": ("okx", None),
+    "open-api-ws.bingx.com": ("bingx", "spot"),
+    "open-api-swap.bingx.com": ("bingx", "futures"),
+    "wbs-api.mexc.com": ("mexc", "spot"),
+    "contract.mexc.com": ("mexc", "futures"),
+}
+
+
+# ================== КАДРЫ ==================
+
+def _render_binance(q, symbol, market, channel, combined):
+    if channel == "bookTicker":
+        return g.binance_book_ticker(q, symbol, combined=combined, futures=market == "futures")
+    return g.binance_depth(q, symbol, int(channel[5:]))
+
+
+def _render_bybit(q, symbol, market, channel, combined):
+    # orderbook.1 Bybit шлёт целиком (snapshot), глубже — delta
+    depth = int(channel)
+    return g.bybit_orderbook(q, symbol, depth == 1, depth)
+
+
+def _render_okx(q, symbol, market, channel, combined):
+    if channel == "tickers":
+        return g.okx_tickers(q, symbol)
+    return g.okx_book(q, symbol, channel)
+
+
+def _render_bingx(q, symbol, market, channel, combined):
+    if channel == "bookTicker":
+        return g.bingx_book_ticker(q, symbol)
+    return g.bingx_ticker(q, symbol)
+
+
+def _render_mexc(q, symbol, market, channel, combined):
+    if channel == "depth.full":
+        return g.mexc_depth(q, symbol)
+    return g.mexc_aggre_book_ticker(q, symbol, channel)
+
+
+# биржа -> (кадр по (quotes, символ, рынок, канал, combined), текстовый кадр?)
+RENDER = {
+    "binance": (_render_binance, True),
+    "bybit": (_render_bybit, True),
+    "okx": (_render_okx, True),
+    "bingx": (_render_bingx, False),
+    "mexc": (_render_mexc, None),  # spot — protobuf, futures — JSON
+}
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+# ================== РЫНОК ==================
+
+class Feed:
+    """
+    Один рынок одной биржи: котировки, подписчики по символам и каналам.
+    """
+
+    def __init__(self, exchange: str, market: str, limit: int):
+        self.exchange = exchange
+        self.market = market
+        self.limit = limit
+        self.quotes = g.Quotes([], seed=zlib.crc32(f"{exchange}/{market}".encode()))
+        # символ -> канал -> соединения
+        self.subscribers: dict[str, dict[str, set]] = {}
+        # снимковый канал -> соединения
+        self.snapshots: dict[str, set] = {}
+        render, text = RENDER[exchange]
+        self.render = render
+        self.text = text if text is not None else market == "futures"
+        self.credit = 0.0
+        self.updates = 0
+
+    def subscribe(self, session, channel: str, symbol: str) -> None:
+        quotes = self.quotes
+        if symbol not in quotes.mid and (not self.limit or len(quotes.symbols) < self.limit):
+            quotes.add(symbol)
+        self.subscribers.setdefault(symbol, {}).setdefault(channel, set()).add(session)
+
+    def unsubscribe(self, session, channel: str, symbol: str) -> None:
+        channels = self.subscribers.get(symbol)
+        if not channels:
+            return
+        sessions = channels.get(channel)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                del channels[channel]
+        if not channels:
+            del self.subscribers[symbol]
+
+    def subscribe_snapshot(self, session, channel: str) -> None:
+        if not self.snapshots:
+            for symbol in g.exchange_symbols(self.exchange, self.market, self.limit or None):
+                self.quotes.add(symbol)
+        self.snapshots.setdefault(channel, set()).add(session)
+
+    def drop(self, session) -> None:
+        for symbol in list(self.subscribers):
+            for channel in list(self.subscribers.get(symbol, ())):
+                self.unsubscribe(session, channel, symbol)
+        for sessions in self.snapshots.values():
+            sessions.discard(session)
+
+    def push(self, n: int) -> int:
+        """
+        n обновлений по Zipf; каждое — всем подписанным соединениям.
+        Возвращает число отправленных кадров.
+        """
+        q = self.quotes
+        now_ms = _now_ms()
+        subscribers = self.subscribers
+        render = self.render
+        market = self.market
+        text = self.text
+        frames = 0
+        for _ in range(n):
+            symbol = q.step()
+            q.ts_ms = now_ms  # step() двигает время вперёд, а здесь нужно текущее
+            channels = subscribers.get(symbol)
+            if not channels:
+                continue
+            self.updates += 1
+            for channel, sessions in channels.items():
+                rendered = {}
+                for session in sessions:
+                    frame = rendered.get(session.combined)
+                    if frame is None:
+                        frame = rendered[session.combined] = render(q, symbol, market, channel, session.combined)
+                    session.push(frame, text)
+                    frames += 1
+        return frames
+
+
+# ================== СОЕДИНЕНИЕ ==================
+
+class Session:
+    """
+    Одно клиентское соединение. Протокол биржи — в подклассах:
+    on_open (разбор URL), on_message (подписки, ping), background (Ping сервера).
+    """
+
+    combined = False
+
+    def __init__(self, emulator: "Emulator", ws, exchange: str, market: str | None, path: str):
+        self.emulator = emulator
+        self.ws = ws
+        self.exchange = exchange
+        self.market = market
+        self.path = path
+        self.queue: asyncio.Queue = asyncio.Queue(SEND_QUEUE)
+        self.feeds: set[Feed] = set()
+        self.stalled = False
+        self.conn_id = uuid.uuid4().hex[:8]
+
+    def feed(self, market: str | None = None) -> Feed:
+        feed = self.emulator.feed(self.exchange, market or self.market)
+        self.feeds.add(feed)
+        return feed
+
+    def push(self, frame, text: bool) -> None:
+        if self.stalled:
+            return
+        try:
+            self.queue.put_nowait((frame, text))
+        except asyncio.QueueFull:
+            # медленный клиент: биржа бы тоже отключила
+            self.stalled = True
+            self.emulator.slow_clients += 1
+            self.ws.transport.abort()
+
+    def reply(self, obj) -> None:
+        self.push(_dumps(obj).encode(), True)
+
+    async def run(self) -> None:
+        tasks = [asyncio.create_task(self._writer())]
+        tasks += [asyncio.create_task(c) for c in self.background()]
+        if self.emulator.disconnect_every:
+            tasks.append(asyncio.create_task(self._chaos()))
+        try:
+            self.on_open()
+            async for message in self.ws:
+                if not self.stalled:
+                    self.on_message(message)
+        except ConnectionClosed:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for feed in self.feeds:
+                feed.drop(self)
+
+    async def _writer(self) -> None:
+        """
+        Всё, что накопилось в очереди, — одной записью в сокет. ws.send
+        делает системный вызов на каждый кадр, и на десятках тысяч кадров/с
+        эмулятор упирается в него раньше, чем коллектор в разбор.
+        """
+        queue = self.queue
+        ws = self.ws
+        protocol = ws.protocol
+        while True:
+            batch = [await queue.get()]
+            while queue.qsize() and len(batch) < WRITE_BATCH:
+                batch.append(queue.get_nowait())
+            if protocol.state is not State.OPEN:
+                return
+            for frame, text in batch:
+                if text:
+                    protocol.send_text(frame)
+                else:
+                    protocol.send_binary(frame)
+            ws.transport.write(b"".join(protocol.data_to_send()))
+            await ws.drain()
+
+    async def _chaos(self) -> None:
+        emulator = self.emulator
+        await asyncio.sleep(random.expovariate(1.0 / emulator.disconnect_every))
+        emulator.disconnects += 1
+        if emulator.disconnect_mode == "abort":
+            self.ws.transport.abort()
+        elif emulator.disconnect_mode == "close":
+            await self.ws.close(1001, "going away")
+        else:
+            self.stalled = True
+
+    # ---------- протокол ----------
+
+    def on_open(self) -> None:
+        pass
+
+    def on_message(self, message: str | bytes) -> None:
+        pass
+
+    def background(self) -> list:
+        return []
+
+
+class BinanceSession(Session):
+
+    def on_open(self) -> None:
+        parts = urlsplit(self.path)
+        if parts.path == "/stream":
+            self.combined = True
+            streams = parse_qs(parts.query).get("streams", [""])[0]
+            self._streams(streams.split("/") if streams else [], True)
+        elif parts.path.startswith("/ws/"):
+            self._streams([parts.path[4:]], True)
+
+    def on_message(self, message) -> None:
+        msg = json.loads(message)
+        method = msg.get("method")
+        if method in ("SUBSCRIBE", "UNSUBSCRIBE"):
+            self._streams(msg.get("params") or [], method == "SUBSCRIBE")
+            self.reply({"result": None, "id": msg.get("id")})
+
+    def _streams(self, streams: list[str], on: bool) -> None:
+        feed = self.feed()
+        for stream in streams:
+            name, _, channel = stream.partition("@")
+            channel = channel.split("@")[0]
+            if name == "!bookTicker":
+                symbols = g.exchange_symbols("binance", self.market, feed.limit or None)
+                channel = "bookTicker"
+            else:
+                symbols = [name.upper()]
+            for symbol in symbols:
+                if on:
+                    feed.subscribe(self, channel, symbol)
+                else:
+                    feed.unsubscribe(self, channel, symbol)
+
+
+class BybitSession(Session):
+
+    def on_open(self) -> None:
+        self.market = "futures" if self.path.endswith("/linear") else "spot"
+
+    def on_message(self, message) -> None:
+        msg = json.loads(message)
+        op = msg.get("op")
+        if op == "ping":
+            self.reply({"success": True, "ret_msg": "pong", "conn_id": self.conn_id,
+                        "req_id": msg.get("req_id", ""), "op": "ping"})
+            return
+        if op not in ("subscribe", "unsubscribe"):
+            return
+        self.reply({"success": True, "ret_msg": "", "conn_id": self.conn_id,
+                    "req_id": msg.get("req_id", ""), "op": op})
+        feed = self.feed()
+        for topic in msg.get("args") or []:
+            _, depth, symbol = topic.split(".", 2)
+            if op == "subscribe":
+                feed.subscribe(self, depth, symbol)
+                feed.quotes.ts_ms = _now_ms()
+                if symbol in feed.quotes.mid:
+                    self.push(g.bybit_orderbook(feed.quotes, symbol, True, int(depth)), True)
+            else:
+                feed.unsubscribe(self, depth, symbol)
+
+
+class OkxSession(Session):
+
+    def on_message(self, message) -> None:
+        if message == "ping":
+            self.push(b"pong", True)
+            return
+        msg = json.loads(message)
+        op = msg.get("op")
+        if op not in ("subscribe", "unsubscribe"):
+            return
+        for arg in msg.get("args") or []:
+            inst_id = arg.get("instId", "")
+            feed = self.feed("futures" if inst_id.endswith("-SWAP") else "spot")
+            if op == "subscribe":
+                feed.subscribe(self, arg.get("channel", ""), inst_id)
+            else:
+                feed.unsubscribe(self, arg.get("channel", ""), inst_id)
+            self.reply({"event": op, "arg": arg, "connId": self.conn_id})
+
+
+class BingxSession(Session):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.last_pong = time.monotonic()
+
+    def on_message(self, message) -> None:
+        if message == "Pong" or (isinstance(message, str) and message.startswith('{"pong"')):
+            self.last_pong = time.monotonic()
+            return
+        msg = json.loads(message)
+        req_type = msg.get("reqType")
+        if req_type not in ("sub", "unsub"):
+            return
+        symbol, _, channel = msg.get("dataType", "").partition("@")
+        feed = self.feed()
+        if req_type == "sub":
+            feed.subscribe(self, channel, symbol)
+        else:
+            feed.unsubscribe(self, channel, symbol)
+        reply = {"id": msg.get("id"), "code": 0, "msg": "", "dataType": "", "data": None}
+        self.push(gzip.compress(_dumps(reply).encode(), 6), False)
+
+    def background(self) -> list:
+        return [self._ping_loop()]
+
+    async def _ping_loop(self) -> None:
+        while True:
+            await asyncio.sleep(BINGX_PING_INTERVAL)
+            if self.stalled:
+                continue
+            if time.monotonic() - self.last_pong > BINGX_PONG_TIMEOUT:
+                self.emulator.pong_timeouts += 1
+                await self.ws.close(1000, "pong timeout")
+                return
+            if self.market == "spot":
+                ping = _dumps({"ping": uuid.uuid4().hex, "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")})
+                self.push(gzip.compress(ping.encode(), 6), False)
+            else:
+                self.push(g.bingx_ping(), False)
+
+
+class MexcSpotSession(Session):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.channels: set[str] = set()
+
+    def on_message(self, message) -> None:
+        msg = json.loads(message)
+        method = msg.get("method")
+        if method == "PING":
+            self.reply({"id": 0, "code": 0, "msg": "PONG"})
+            return
+        if method not in ("SUBSCRIPTION", "UNSUBSCRIPTION"):
+            return
+        feed = self.feed()
+        accepted, rejected = [], []
+        for channel in msg.get("params") or []:
+            if method == "SUBSCRIPTION" and channel not in self.channels and len(self.channels) >= MEXC_SPOT_SUBS:
+                rejected.append(channel)
+                continue
+            accepted.append(channel)
+            parts = channel.split("@")
+            if method == "SUBSCRIPTION":
+                self.channels.add(channel)
+            else:
+                self.channels.discard(channel)
+            if parts[1].startswith("public.miniTickers"):
+                if method == "SUBSCRIPTION":
+                    feed.subscribe_snapshot(self, channel)
+                else:
+                    feed.snapshots.get(channel, set()).discard(self)
+            elif len(parts) == 4:
+                # spot@public.aggre.bookTicker.v3.api.pb@100ms@BTCUSDT
+                if method == "SUBSCRIPTION":
+                    feed.subscribe(self, parts[2], parts[3])
+                else:
+                    feed.unsubscribe(self, parts[2], parts[3])
+        if accepted:
+            self.reply({"id": msg.get("id", 0), "code": 0, "msg": ",".join(accepted)})
+        if rejected:
+            self.reply({"id": msg.get("id", 0), "code": 0,
+                        "msg": f"Not Subscribed successfully! [{','.join(rejected)}].  Reason： Blocked! "})
+
+
+class MexcFuturesSession(Session):
+
+    def on_message(self, message) -> None:
+        msg = json.loads(message)
+        method = msg.get("method", "")
+        if method == "ping":
+            self.reply({"channel": "pong", "data": _now_ms()})
+            return
+        feed = self.feed()
+        param = msg.get("param") or {}
+        if method == "sub.tickers":
+            feed.subscribe_snapshot(self, "push.tickers")
+        elif method == "unsub.tickers":
+            feed.snapshots.get("push.tickers", set()).discard(self)
+        elif method == "sub.depth.full":
+            feed.subscribe(self, "depth.full", param.get("symbol", ""))
+        elif method == "unsub.depth.full":
+            feed.unsubscribe(self, "depth.full", param.get("symbol", ""))
+        else:
+            return
+        self.reply({"channel": f"rs.{method}", "data": "success", "ts": _now_ms()})
+
+
+SESSIONS = {
+    "binance": BinanceSession,
+    "bybit": BybitSession,
+    "okx": OkxSession,
+    "bingx": BingxSession,
+    ("mexc", "spot"): MexcSpotSession,
+    ("mexc", "futures"): MexcFuturesSession,
+}
+
+
+# ================== ЭМУЛЯТОР ==================
+
+class Emulator:
+
+    def __init__(
+        self,
+        rate: float = RATE,
+        symbols: int = 0,
+        disconnect_every: float = 0.0,
+        disconnect_mode: str = "abort",
+        tickers_interval: float = TICKERS_INTERVAL,
+    ):
+        self.rate = rate
+        self.limit = symbols
+        self.disconnect_every = disconnect_every
+        self.disconnect_mode = disconnect_mode
+        self.tickers_interval = tickers_interval
+        self.feeds: dict[tuple[str, str], Feed] = {}
+        self.sessions: set[Session] = set()
+
+        # Счётчики
+        self.connections = 0
+        self.frames = 0
+        self.disconnects = 0
+        self.slow_clients = 0
+        self.pong_timeouts = 0
+
+    def feed(self, exchange: str, market: str) -> Feed:
+        feed = self.feeds.get((exchange, market))
+        if feed is None:
+            feed = self.feeds[(exchange, market)] = Feed(exchange, market, self.limit)
+        return feed
+
+    @property
+    def updates(self) -> int:
+        return sum(f.updates for f in self.feeds.values())
+
+    async def handler(self, ws) -> None:
+        host, _, rest = ws.request.path.lstrip("/").partition("/")
+        route = HOSTS.get(host)
+        if route is None:
+            await ws.close(1008, f"unknown exchange host {host!r}")
+            return
+        exchange, market = route
+        cls = SESSIONS.get(exchange) or SESSIONS[(exchange, market)]
+        session = cls(self, ws, exchange, market, "/" + rest)
+        self.connections += 1
+        self.sessions.add(session)
+        try:
+            await session.run()
+        finally:
+            self.sessions.discard(session)
+
+    async def generate(self) -> None:
+        """
+        Поток по символам: за каждый шаг rate * dt обновлений, поровну
+        на подписанный символ.
+        """
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            dt, last = now - last, now
+            feeds = [f for f in self.feeds.values() if f.subscribers]
+            total = sum(len(f.subscribers) for f in feeds)
+            for feed in feeds:
+                feed.credit += self.rate * dt * len(feed.subscribers) / total
+                n = int(feed.credit)
+                if n:
+                    feed.credit -= n
+                    self.frames += feed.push(n)
+
+    async def snapshots(self) -> None:
+        """
+        Снимковые каналы MEXC: push.tickers и miniTickers всеми символами рынка.
+        """
+        next_tickers = next_mini = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= next_tickers:
+                next_tickers += self.tickers_interval
+                self._snapshot(("mexc", "futures"), self._tickers_frame)
+            if now >= next_mini:
+                next_mini += MINI_TICKERS_INTERVAL
+                self._snapshot(("mexc", "spot"), self._mini_frame)
+            await asyncio.sleep(max(0.0, min(next_tickers, next_mini) - time.monotonic()))
+
+    def _snapshot(self, key: tuple[str, str], build) -> None:
+        feed = self.feeds.get(key)
+        if feed is None or not any(feed.snapshots.values()):
+            return
+        q = feed.quotes
+        for symbol in q.symbols:
+            q.step(symbol)
+        q.ts_ms = _now_ms()
+        feed.updates += len(q.symbols)
+        for channel, sessions in feed.snapshots.items():
+            if not sessions:
+                continue
+            frame, text = build(q, channel)
+            for session in sessions:
+                session.push(frame, text)
+                self.frames += 1
+
+    @staticmethod
+    def _tickers_frame(q, channel):
+        return g.mexc_futures_tickers(q), True
+
+    @staticmethod
+    def _mini_frame(q, channel):
+        rows = [(s, f"{q.mid[s]:.6g}") for s in q.symbols]
+        return encode_mini_tickers(channel, rows, q.ts_ms), False
+
+    def stats(self) -> dict:
+        return {
+            "t": time.time(),
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "updates": self.updates,
+            "frames": self.frames,
+            "disconnects": self.disconnects,
+            "slow_clients": self.slow_clients,
+            "pong_timeouts": self.pong_timeouts,
+            "symbols": {f"{ex}/{mk}": len(f.quotes.symbols) for (ex, mk), f in sorted(self.feeds.items())},
+        }
+
+    async def stats_loop(self, interval: float, as_json: bool) -> None:
+        last = self.stats()
+        while True:
+            await asyncio.sleep(interval)
+            s = self.stats()
+            if as_json:
+                print(_dumps(s), flush=True)
+            else:
+                dt = s["t"] - last["t"]
+                print(
+                    f"[EMU] соединений {s['sessions']} | {(s['updates'] - last['updates']) / dt:,.0f} обновлений/с,"
+                    f" {(s['frames'] - last['frames']) / dt:,.0f} кадров/с | обрывов {s['disconnects']},"
+                    f" медленных {s['slow_clients']}, без Pong {s['pong_timeouts']}"
+                    f" | символов {', '.join(f'{k} {v}' for k, v in s['symbols'].items())}",
+                    flush=True,
+                )
+            last = s
+
+    async def serve(self, host: str, port: int, stats_interval: float = STATS_INTERVAL, as_json: bool = False):
+        async with websockets.serve(self.handler, host, port, compression=None, max_size=None):
+            if not as_json:
+                print(f"[EMU] ws://{host}:{port}, {self.rate:,.0f} обновлений/с"
+                      f"{f', символов на рынок {self.limit}' if self.limit else ''}"
+                      f"{f', обрыв раз в ~{self.disconnect_every:g} с ({self.disconnect_mode})' if self.disconnect_every else ''}",
+                      flush=True)
+            await asyncio.gather(self.generate(), self.snapshots(), self.stats_loop(stats_interval, as_json))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--rate", type=float, default=RATE, help="обновлений/с на весь эмулятор")
+    parser.add_argument("--symbols", type=int, default=0, help="активных символов на рынок (0 — все подписанные)")
+    parser.add_argument("--disconnect-every", type=float, default=0.0, help="средний интервал обрыва соединения, с")
+    parser.add_argument("--disconnect-mode", choices=("abort", "close", "stall"), default="abort")
+    parser.add_argument("--tickers-interval", type=float, default=TICKERS_INTERVAL, help="период push.tickers, с")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL)
+    parser.add_argument("--json", action="store_true", help="статистика JSON-строками (для bench.e2e)")
+    args = parser.parse_args()
+
+    emulator = Emulator(args.rate, args.symbols, args.disconnect_every, args.disconnect_mode, args.tickers_interval)
+    try:
+        asyncio.run(emulator.serve(args.host, args.port, args.stats_interval, args.json))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Синтетические кадры бирж для бенчмарков и эмулятора.
+
+Кадры — в том виде, в котором их шлют биржи: все служебные поля, цены
+строками там, где биржа шлёт строки, сжатие у BingX, protobuf у MEXC
+spot. Цены идут случайным блужданием (Quotes), частоты по символам —
+как в жизни неравные (Zipf): несколько горячих пар дают большую часть
+потока.
+
+    q = Quotes(exchange_symbols("binance", "futures"))
+    symbol = q.step()                       # следующее обновление
+    frame = binance_book_ticker(q, symbol)
+
+Символы — в формате биржи (BTCUSDT / BTC-USDT / BTC-USDT-SWAP / BTC_USDT),
+exchange_symbols берёт их из тех же *_all.txt, что и коллекторы.
+"""
+
+import gzip
+import json
+import random
+from pathlib import Path
+
+import mexc_pb
+from symbols import SYMBOLS_DIR
+
+# Символов, если файла со списком нет
+FALLBACK_SYMBOLS = 500
+
+# Показатель Zipf для частот по символам
+ZIPF_S = 1.1
+
+
+def exchange_symbols(exchange: str, market: str, limit: int | None = None) -> list[str]:
+    """
+    Символы биржи из <exchange>_<market>_all.txt (или синтетические).
+    """
+    path = Path(SYMBOLS_DIR) / f"{exchange.lower()}_{market.lower()}_all.txt"
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            symbols = [s.strip() for s in f if s.strip() and not s.startswith("#")]
+    except OSError:
+        symbols = [_synthetic(exchange, market, i) for i in range(FALLBACK_SYMBOLS)]
+    return symbols[:limit] if limit else symbols
+
+
+def _synthetic(exchange: str, market: str, i: int) -> str:
+    base = f"SYM{i}"
+    exchange = exchange.lower()
+    if exchange == "okx":
+        return f"{base}-USDT-SWAP" if market == "futures" else f"{base}-USDT"
+    if exchange == "bingx":
+        return f"{base}-USDT"
+    if exchange == "mexc" and market == "futures":
+        return f"{base}_USDT"
+    return f"{base}USDT"
+
+
+class Quotes:
+    """
+    Котировки по символам со случайным блужданием и счётчиками обновлений.
+    """
+
+    def __init__(self, symbols: list[str], seed: int = 1, ts_ms: int = 1710000000000):
+        self.symbols = list(symbols)
+        self.rng = random.Random(seed)
+        self.ts_ms = ts_ms
+        self.mid = {s: self.rng.uniform(0.001, 1000.0) for s in self.symbols}
+        self.update_id = {s: 1 for s in self.symbols}
+        weights = [1.0 / (i + 1) ** ZIPF_S for i in range(len(self.symbols))]
+        self._cum = list(_accumulate(weights))
+
+    def add(self, symbol: str) -> None:
+        """
+        Новый символ в конец списка (самый редкий по Zipf); цены и
+        счётчики остальных не трогаются.
+        """
+        if symbol in self.mid:
+            return
+        self.symbols.append(symbol)
+        self.mid[symbol] = self.rng.uniform(0.001, 1000.0)
+        self.update_id[symbol] = 1
+        total = self._cum[-1] if self._cum else 0.0
+        self._cum.append(total + 1.0 / len(self.symbols) ** ZIPF_S)
+
+    def step(self, symbol: str | None = None) -> str:
+        """
+        Следующее обновление: символ (по частотам Zipf, если не задан)
+        сдвигается на случайный шаг, время идёт вперёд на 0-2 мс.
+        """
+        rng = self.rng
+        if symbol is None:
+            symbol = rng.choices(self.symbols, cum_weights=self._cum)[0]
+        self.mid[symbol] *= 1.0 + rng.uniform(-2e-4, 2e-4)
+        self.update_id[symbol] += 1
+        self.ts_ms += rng.randint(0, 2)
+        return symbol
+
+    def quote(self, symbol: str) -> tuple[str, str, str, str]:
+        """
+        (bid, ask, bid_qty, ask_qty) строками, как у бирж.
+        """
+        mid = self.mid[symbol]
+        rng = self.rng
+        return (
+            f"{mid * 0.9999:.6g}", f"{mid * 1.0001:.6g}",
+            f"{rng.uniform(0.01, 5000):.4f}", f"{rng.uniform(0.01, 5000):.4f}",
+        )
+
+    def levels(self, symbol: str, n: int, side: int) -> list[tuple[str, str]]:
+        """
+        n уровней стакана от лучшей цены: side=+1 — asks, -1 — bids.
+        """
+        mid = self.mid[symbol]
+        rng = self.rng
+        return [
+            (f"{mid * (1 + side * 1e-4 * (i + 1)):.6g}", f"{rng.uniform(0.01, 5000):.4f}")
+            for i in range(n)
+        ]
+
+
+def _accumulate(values):
+    total = 0.0
+    for v in values:
+        total += v
+        yield total
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+# ================== BINANCE ==================
+
+def binance_book_ticker(q: Quotes, symbol: str, combined: bool = True, futures: bool = True) -> bytes:
+    bid, ask, bid_qty, ask_qty = q.quote(symbol)
+    data = {"u": q.update_id[symbol], "s": symbol, "b": bid, "B": bid_qty, "a": ask, "A": ask_qty}
+    if futures:
+        data = {"e": "bookTicker", **data, "T": q.ts_ms - 2, "E": q.ts_ms}
+    if combined:
+        return _dumps({"stream": f"{symbol.lower()}@bookTicker", "data": data})
+    return _dumps(data)
+
+
+def binance_depth(q: Quotes, symbol: str, levels: int = 5) -> bytes:
+    return _dumps({"stream": f"{symbol.lower()}@depth{levels}@100ms", "data": {
+        "e": "depthUpdate", "E": q.ts_ms, "T": q.ts_ms - 2, "s": symbol,
+        "U": q.update_id[symbol] - 1, "u": q.update_id[symbol], "pu": q.update_id[symbol] - 2,
+        "b": [list(x) for x in q.levels(symbol, levels, -1)],
+        "a": [list(x) for x in q.levels(symbol, levels, +1)],
+    }})
+
+
+# ================== BYBIT ==================
+
+def bybit_orderbook(q: Quotes, symbol: str, snapshot: bool, depth: int = 1, changes: int = 3) -> bytes:
+    """
+    orderbook.{depth}.{symbol}: snapshot — весь стакан, delta — changes
+    уровней (часть с размером 0 — удаление).
+    """
+    if snapshot:
+        bids = q.levels(symbol, depth, -1)
+        asks = q.levels(symbol, depth, +1)
+    else:
+        rng = q.rng
+        n = min(changes, depth)
+        bids = [(p, "0" if rng.random() < 0.3 else s) for p, s in rng.sample(q.levels(symbol, depth, -1), n)]
+        asks = [(p, "0" if rng.random() < 0.3 else s) for p, s in rng.sample(q.levels(symbol, depth, +1), n)]
+    return _dumps({
+        "topic": f"orderbook.{depth}.{symbol}",
+        "type": "snapshot" if snapshot else "delta",
+        "ts": q.ts_ms,
+        "data": {"s": symbol, "b": [list(x) for x in bids], "a": [list(x) for x in asks],
+                 "u": q.update_id[symbol], "seq": q.update_id[symbol] * 7},
+        "cts": q.ts_ms - 3,
+    })
+
+
+# ================== OKX ==================
+
+def okx_tickers(q: Quotes, symbol: str) -> bytes:
+    bid, ask, bid_qty, ask_qty = q.quote(symbol)
+    return _dumps({"arg": {"channel": "tickers", "instId": symbol}, "data": [{
+        "instType": "SWAP" if symbol.endswith("-SWAP") else "SPOT", "instId": symbol,
+        "last": bid, "lastSz": "0.1", "askPx": ask, "askSz": ask_qty, "bidPx": bid, "bidSz": bid_qty,
+        "open24h": bid, "high24h": ask, "low24h": bid, "sodUtc0": bid, "sodUtc8": bid,
+        "volCcy24h": "123456789.12", "vol24h": "1890.12", "ts": str(q.ts_ms),
+    }]})
+
+
+def okx_book(q: Quotes, symbol: str, channel: str = "bbo-tbt") -> bytes:
+    """
+    bbo-tbt (1 уровень) или books5.
+    """
+    n = 1 if channel == "bbo-tbt" else 5
+    return _dumps({"arg": {"channel": channel, "instId": symbol}, "data": [{
+        "asks": [[p, s, "0", "3"] for p, s in q.levels(symbol, n, +1)],
+        "bids": [[p, s, "0", "2"] for p, s in q.levels(symbol, n, -1)],
+        "ts": str(q.ts_ms), "seqId": q.update_id[symbol],
+    }]})
+
+
+# ================== BINGX ==================
+
+def bingx_book_ticker(q: Quotes, symbol: str, compress: bool = True) -> bytes:
+    bid, ask, bid_qty, ask_qty = q.quote(symbol)
+    frame = _dumps({"code": 0, "dataType": f"{symbol}@bookTicker", "data": {
+        "e": "bookTicker", "u": q.update_id[symbol], "E": q.ts_ms, "T": q.ts_ms - 2,
+        "s": symbol, "b": bid, "B": bid_qty, "a": ask, "A": ask_qty,
+    }, "success": True})
+    return gzip.compress(frame, 6) if compress else frame
+
+
+def bingx_ticker(q: Quotes, symbol: str, compress: bool = True) -> bytes:
+    bid, ask, bid_qty, ask_qty = q.quote(symbol)
+    frame = _dumps({"code": 0, "dataType": f"{symbol}@ticker", "data": {
+        "e": "24hTicker", "E": q.ts_ms, "s": symbol, "p": "0.5", "P": "0.15%", "o": bid, "h": ask,
+        "l": bid, "c": bid, "v": "1890.12", "q": "122850000.5", "O": q.ts_ms - 86400000, "C": q.ts_ms,
+        "B": bid_qty, "b": bid, "A": ask_qty, "a": ask,
+    }})
+    return gzip.compress(frame, 6) if compress else frame
+
+
+def bingx_ping(compress: bool = True) -> bytes:
+    return gzip.compress(b"Ping", 6) if compress else b"Ping"
+
+
+# ================== MEXC ==================
+
+def mexc_futures_tickers(q: Quotes, symbols: list[str] | None = None) -> bytes:
+    """
+    push.tickers: все контракты одним кадром (раз в ~1 с у MEXC).
+    """
+    items = []
+    for s in symbols or q.symbols:
+        mid = q.mid[s]
+        items.append({
+            "symbol": s, "lastPrice": round(mid, 6), "riseFallRate": -0.0123,
+            "fairPrice": round(mid, 6), "indexPrice": round(mid, 6), "volume24": 123456789,
+            "amount24": 98765432.1, "maxBidPrice": round(mid * 1.1, 6), "minAskPrice": round(mid * 0.9, 6),
+            "lower24Price": round(mid * 0.95, 6), "high24Price": round(mid * 1.05, 6),
+            "timestamp": q.ts_ms, "bid1": round(mid * 0.9999, 6), "ask1": round(mid * 1.0001, 6),
+            "holdVol": 1234567, "riseFallValue": -0.015, "fundingRate": 0.0001, "zone": "UTC+8",
+            "riseFallRates": [], "riseFallRatesOfTimezone": [-0.01, -0.02, -0.03],
+        })
+    return _dumps({"channel": "push.tickers", "data": items, "ts": q.ts_ms})
+
+
+def mexc_all_book_ticker(q: Quotes, symbols: list[str]) -> bytes:
+    """
+    Старый JSON-канал spot@public.allBookTicker.v3.api (mexc2-0.py).
+    """
+    rows = []
+    for s in symbols:
+        bid, ask, bid_qty, ask_qty = q.quote(s)
+        rows.append({"s": s, "b": bid, "B": bid_qty, "a": ask, "A": ask_qty})
+    return _dumps({"c": "spot@public.allBookTicker.v3.api", "d": rows, "t": q.ts_ms})
+
+
+def mexc_aggre_book_ticker(q: Quotes, symbol: str, interval: str = "100ms") -> bytes:
+    bid, ask, bid_qty, ask_qty = q.quote(symbol)
+    return mexc_pb.encode_book_ticker(
+        f"spot@public.aggre.bookTicker.v3.api.pb@{interval}@{symbol}", symbol, bid, ask, bid_qty, ask_qty, q.ts_ms,
+    )
+
+
+def mexc_depth(q: Quotes, symbol: str, levels: int = 5) -> bytes:
+    return _dumps({"channel": "push.depth.full", "data": {
+        "asks": [[float(p), int(float(s)), 1] for p, s in q.levels(symbol, levels, +1)],
+        "bids": [[float(p), int(float(s)), 1] for p, s in q.levels(symbol, levels, -1)],
+        "version": q.update_id[symbol],
+    }, "symbol": symbol, "ts": q.ts_ms})
+
+
+# ================== PRICES.PY ==================
+
+def price_line(q: Quotes, exchange: str, market: str, symbol: str) -> bytes:
+    """
+    Старая CSV-строка EXCHANGE,MARKET,SYMBOL,BID,ASK,TS для prices.py.
+    """
+    bid, ask, _, _ = q.quote(symbol)
+    return f"{exchange},{market},{symbol},{bid},{ask},{q.ts_ms}".encode()
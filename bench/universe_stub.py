@@ -0,0 +1,180 @@
+"""
+Локальная подставка REST-ов бирж со списками инструментов для universe.py.
+
+    python -m bench.universe_stub --delay 0.2
+    HTTP_OVERRIDE=http://127.0.0.1:9100 python universe.py --out /tmp/universe --no-overlap
+
+Отвечает на те же 10 запросов, что делает universe.py, в форматах бирж;
+символы — из списков коллекторов (bench.generators.exchange_symbols).
+Первый сегмент пути — хост биржи, как у HTTP_OVERRIDE / WS_OVERRIDE.
+
+    --delay     задержка каждого ответа, с — изображает сетевой круг:
+                видно, что universe.py ждёт один круг, а не их сумму
+    --page      страница Bybit instruments-info (проверка пагинации)
+
+Ответы с ETag и Last-Modified, на If-None-Match отвечает 304, по
+Accept-Encoding сжимает gzip — как настоящие биржи (не все).
+"""
+
+import argparse
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from bench.generators import exchange_symbols
+
+# ================== НАСТРОЙКИ ==================
+
+HOST = "127.0.0.1"
+PORT = 9100
+
+# Задержка ответа, с
+DELAY = 0.0
+
+# Страница Bybit instruments-info по умолчанию (limit в запросе может её уменьшить)
+BYBIT_PAGE = 1000
+
+
+def build_routes() -> dict[str, object]:
+    """
+    «хост/путь» -> тело ответа (dict) или функция query -> dict.
+    """
+    binance_spot = exchange_symbols("binance", "spot")
+    binance_futures = exchange_symbols("binance", "futures")
+    bybit = {"spot": exchange_symbols("bybit", "spot"), "linear": exchange_symbols("bybit", "futures"), "inverse": []}
+    okx = {"SPOT": exchange_symbols("okx", "spot"), "SWAP": exchange_symbols("okx", "futures"), "FUTURES": []}
+
+    def bybit_instruments(query: dict) -> dict:
+        category = query.get("category", "spot")
+        items = bybit.get(category, [])
+        limit = min(int(query.get("limit", BYBIT_PAGE)), BYBIT_PAGE)
+        start = int(query.get("cursor") or 0)
+        page = items[start:start + limit]
+        cursor = str(start + limit) if start + limit < len(items) else ""
+        return {"retCode": 0, "retMsg": "OK", "result": {
+            "category": category, "list": [{"symbol": s, "status": "Trading"} for s in page],
+            "nextPageCursor": cursor,
+        }}
+
+    def okx_instruments(query: dict) -> dict:
+        items = okx.get(query.get("instType", ""), [])
+        return {"code": "0", "msg": "", "data": [{"instId": s, "state": "live"} for s in items]}
+
+    return {
+        "api.binance.com/api/v3/exchangeInfo": {"symbols": [
+            {"symbol": s, "status": "TRADING", "isSpotTradingAllowed": True} for s in binance_spot
+        ]},
+        "fapi.binance.com/fapi/v1/exchangeInfo": {"symbols": [
+            {"symbol": s, "pair": s, "status": "TRADING", "contractType": "PERPETUAL"} for s in binance_futures
+        ]},
+        "api.bybit.com/v5/market/instruments-info": bybit_instruments,
+        "www.okx.com/api/v5/public/instruments": okx_instruments,
+        "open-api.bingx.com/openApi/spot/v1/common/symbols": {"code": 0, "data": {"symbols": [
+            {"symbol": s, "status": 1} for s in exchange_symbols("bingx", "spot")
+        ]}},
+        "open-api.bingx.com/openApi/swap/v2/quote/contracts": {"code": 0, "data": [
+            {"symbol": s} for s in exchange_symbols("bingx", "futures")
+        ]},
+        "api.mexc.com/api/v3/exchangeInfo": {"symbols": [
+            {"symbol": s, "status": "1", "isSpotTradingAllowed": True, "permissions": ["SPOT"]}
+            for s in exchange_symbols("mexc", "spot")
+        ]},
+        "contract.mexc.com/api/v1/contract/detail": {"success": True, "code": 0, "data": [
+            {"symbol": s, "state": 0} for s in exchange_symbols("mexc", "futures")
+        ]},
+    }
+
+
+class Stub:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.routes = build_routes()
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = 0
+
+    def respond(self, target: str, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        parts = urlsplit(target)
+        route = self.routes.get(parts.path.lstrip("/"))
+        if route is None:
+            return 404, {}, b'{"msg":"not found"}'
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        payload = route(query) if callable(route) else route
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        out = {"ETag": etag, "Last-Modified": self.last_modified, "Content-Type": "application/json"}
+        if headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return 304, out, b""
+        if "gzip" in headers.get("accept-encoding", ""):
+            body = gzip.compress(body, 1)
+            out["Content-Encoding"] = "gzip"
+        return 200, out, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line = await reader.readuntil(b"\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readuntil(b"\r\n")
+                    if line == b"\r\n":
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                target = request_line.split()[1].decode("latin-1")
+                status, out, body = self.respond(target, headers)
+                self.requests += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                head = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Modified' if status == 304 else 'Error'}",
+                        f"Content-Length: {len(body)}", f"Date: {email.utils.formatdate(usegmt=True)}"]
+                head += [f"{k}: {v}" for k, v in out.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                print(f"[STUB] {status} {target} {len(body)} B")
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, delay: float) -> None:
+    stub = Stub(delay)
+    server = await asyncio.start_server(stub.handle, host, port)
+    print(f"[STUB] http://{host}:{port}, маршрутов {len(stub.routes)}, задержка {delay * 1e3:.0f} мс")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(f"[STUB] запросов {stub.requests} (304: {stub.not_modified}), соединений {stub.connections}")
+
+
+def main() -> None:
+    global BYBIT_PAGE
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--delay", type=float, default=DELAY)
+    parser.add_argument("--page", type=int, default=BYBIT_PAGE)
+    args = parser.parse_args()
+    BYBIT_PAGE = args.page
+    try:
+        asyncio.run(serve(args.host, args.port, args.delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,55 @@
 import asyncio
+import itertools
 import json
-import ssl
 import time
 from pathlib import Path
 
-import certifi
-import websockets
+from connection import WarmConnection, report_loop
+from fastjson import parse_binance_bookticker, parse_binance_depth
+from publisher import FUTURES, SPOT, Publisher, conn_flags
+from sharding import RateBook, shard_by_rate
+from subscriptions import LiveShards, Shard, SymbolWatch, refresh_lookup
+from symbols import load_registry
 
 
 # ================= НАСТРОЙКИ =================
 
 # Binance Spot & Futures WS
-SPOT_URL = "wss://stream.binance.com:9443/ws"
-FUTURES_URL = "wss://fstream.binance.com/ws"
+SPOT_BASE_URL = "wss://stream.binance.com:9443"
+FUTURES_BASE_URL = "wss://fstream.binance.com"
+SPOT_URL = SPOT_BASE_URL + "/ws"
+FUTURES_URL = FUTURES_BASE_URL + "/ws"
+
+# Режим подписки:
+#   "subscribe" — /ws + SUBSCRIBE батчами по BATCH_SIZE (старый вариант, медленный холодный старт)
+#   "combined"  — /stream?streams=a@bookTicker/b@bookTicker/...: стримы заданы в URL,
+#                 данные идут сразу после handshake, без SUBSCRIBE
+#   "all"       — один стрим !bookTicker по всему рынку, лишние символы
+#                 отбрасываются локально по таблице symbol -> id
+MODE = "combined"
+
+# Где есть all-market !bookTicker. У spot его убрали — там "all" работает как "combined".
+ALL_MARKET_STREAM = {"spot": False, "futures": True}
+
+# Минимальное число WS на рынок (для "subscribe"/"combined")
+SPOT_CONNECTIONS = 2
+FUTURES_CONNECTIONS = 1
+
+# Сколько стримов держать в одном combined-URL (длина URL и лимит стримов на соединение)
+MAX_STREAMS_PER_CONN = 200
+
+# Лимит Binance на стримы одного /ws-соединения (режим "subscribe"):
+# дальше новые символы со списков уходят в новое соединение
+MAX_STREAMS_PER_WS = 1024
+
+# Дополнительно держать стаканы <symbol>@depth5@100ms (отдельные combined-соединения)
+# для исполнимых спредов в prices.py. Объёмы у Binance уже в базовой монете.
+DEPTH_ENABLED = False
+DEPTH_STREAM = "depth5@100ms"
+
+# Как часто сохранять наблюдаемые частоты сообщений по символам (сек),
+# по ним раскладываются символы по соединениям при следующем старте
+RATES_SAVE_INTERVAL = 60
 
 # Файлы со списками пар (по одной в строке: BTCUSDT, ETHUSDT, ...)
 SPOT_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/binance_spot_all.txt"
@@ -21,11 +58,14 @@ FUTURES_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/binance_futures_
 # Максимум символов в одном SUBSCRIBE-сообщении
 BATCH_SIZE = 300
 
-# Задержка перед переподключением при ошибке (сек)
-RECONNECT_DELAY = 5
+# Номера соединений стаканов в flags датаграмм — после соединений bookTicker
+DEPTH_CONN_OFFSET = 128
 
-# SSL-контекст
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# id запросов SUBSCRIBE/UNSUBSCRIBE на ходу (горячая перезагрузка списков)
+REQUEST_IDS = itertools.count(1000)
+
+# Переподключение, TLS и DNS — в connection.WarmConnection
+# (make-before-break, пауза только при повторных обрывах)
 
 
 # ================= ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ =================
@@ -55,75 +95,104 @@ def chunk_list(items: list[str], size: int) -> list[list[str]]:
     return [items[i:i + size] for i in range(0, len(items), size)]
 
 
-def split_spot_symbols(symbols: list[str]) -> tuple[list[str], list[str]]:
+def build_combined_url(base_url: str, symbols: list[str], stream: str = "bookTicker") -> str:
+    """
+    URL combined-стрима: стримы задаются прямо в пути, SUBSCRIBE не нужен.
+    """
+    streams = "/".join(f"{s.lower()}@{stream}" for s in symbols)
+    return f"{base_url}/stream?streams={streams}"
+
+
+def plan_connections(
+    market_type: str,  # "spot" или "futures"
+    symbols: list[str],
+    mode: str,
+    n_connections: int,
+    rates: dict[str, float],
+) -> list[tuple[str, list[str], list[str]]]:
     """
-    Делит спотовые пары на две примерно равные группы
-    для двух WebSocket-соединений.
+    Раскладка рынка по соединениям для выбранного режима.
+    Возвращает [(url, symbols_в_соединении, symbols_для_SUBSCRIBE), ...].
+    Символы делятся между соединениями по наблюдаемой частоте сообщений,
+    а не по позиции в файле.
     """
-    n = len(symbols)
-    mid = n // 2
-    part1 = symbols[:mid]
-    part2 = symbols[mid:]
-    return part1, part2
+    base_url = SPOT_BASE_URL if market_type == "spot" else FUTURES_BASE_URL
+
+    if mode == "all":
+        if ALL_MARKET_STREAM[market_type]:
+            return [(f"{base_url}/ws/!bookTicker", symbols, [])]
+        mode = "combined"
+
+    if mode == "combined":
+        shards = shard_by_rate(symbols, rates, n_connections, max_per_shard=MAX_STREAMS_PER_CONN)
+        return [(build_combined_url(base_url, shard), shard, []) for shard in shards]
 
+    shards = shard_by_rate(symbols, rates, n_connections)
+    return [(f"{base_url}/ws", shard, shard) for shard in shards]
 
-def build_subscribe_message(symbols: list[str], request_id: int) -> str:
+
+def build_subscribe_message(symbols: list[str], request_id: int,
+                            method: str = "SUBSCRIBE", stream: str = "bookTicker") -> str:
     """
-    Формирует JSON SUBSCRIBE на @bookTicker для списка символов.
+    Формирует JSON SUBSCRIBE (или UNSUBSCRIBE) на @bookTicker для списка символов.
     """
-    params = [f"{s.lower()}@bookTicker" for s in symbols]
+    params = [f"{s.lower()}@{stream}" for s in symbols]
     payload = {
-        "method": "SUBSCRIBE",
+        "method": method,
         "params": params,
         "id": request_id,
     }
     return json.dumps(payload)
 
 
-def process_bookticker_message(
-    raw_msg: str,
-    market_type: str,  # "spot" или "futures"
-) -> str | None:
+def live_shards(market_type: str, stream: str, groups: list[list[str]], combined: bool,
+                start, rates: dict[str, float]) -> LiveShards:
     """
-    Обрабатывает одно сообщение bookTicker.
-    Возвращает строку формата:
-    BINANCE,spot|futures,SYMBOL,BID,ASK,TS
-
-    Если это служебный ответ (result, id и т.п.) — возвращает None.
+    Соединения рынка для горячей перезагрузки списков: новые символы —
+    SUBSCRIBE в открытое соединение, удалённые — UNSUBSCRIBE. У combined
+    стримы ещё и в URL — он обновляется, чтобы переподключение подписало
+    текущий набор.
     """
-    try:
-        msg = json.loads(raw_msg)
-    except json.JSONDecodeError:
-        return None
-
-    # Пропускаем ответы на SUBSCRIBE:
-    # {"result": null, "id": 1}
-    if isinstance(msg, dict) and "result" in msg:
-        return None
-
-    # Некоторые сообщения могут приходить как объект, а не как список
-    data = msg
+    base_url = SPOT_BASE_URL if market_type == "spot" else FUTURES_BASE_URL
+
+    async def send(shard: Shard, symbols: list[str], method: str) -> None:
+        for batch in chunk_list(symbols, BATCH_SIZE):
+            await shard.send(build_subscribe_message(batch, next(REQUEST_IDS), method, stream))
+        if combined:
+            url = build_combined_url(base_url, shard.symbols, stream)
+            for conn in shard.conns:
+                conn.set_url(url)
+
+    return LiveShards(
+        f"BINANCE {market_type} {stream}", groups, start,
+        lambda shard, symbols: send(shard, symbols, "SUBSCRIBE"),
+        lambda shard, symbols: send(shard, symbols, "UNSUBSCRIBE"),
+        capacity=MAX_STREAMS_PER_CONN if combined else MAX_STREAMS_PER_WS,
+        rates=rates,
+    )
 
-    # Формат spot/futures bookTicker:
-    # {
-    #   "s": "BTCUSDT",
-    #   "b": "123.45",
-    #   "a": "123.46",
-    #   ...
-    # }
-    symbol = data.get("s")
-    bid = data.get("b")
-    ask = data.get("a")
 
-    if not symbol or bid is None or ask is None:
-        # Не bookTicker или странный формат — пропускаем
-        return None
+def process_bookticker_message(raw_msg: str | bytes):
+    """
+    Обрабатывает одно сообщение bookTicker.
+    Возвращает кортеж (SYMBOL, bid, ask, bid_qty, ask_qty, ts_ms).
+    ts_ms — время события Binance (E у futures), 0 если биржа его не прислала
+    (spot bookTicker времени не содержит).
 
-    # Локный timestamp (мс)
-    ts_ms = int(time.time() * 1000)
+    Если это служебный ответ (result, id и т.п.) — возвращает None.
 
-    line = f"BINANCE,{market_type},{symbol},{bid},{ask},{ts_ms}"
-    return line
+    Формат spot/futures bookTicker (combined-стрим оборачивает его в
+    {"stream": "btcusdt@bookTicker", "data": {...}}):
+    {
+      "s": "BTCUSDT",
+      "b": "123.45",   "B": "1.5",
+      "a": "123.46",   "A": "0.7",
+      "E": 1710000000000,   # только futures: время события
+      ...
+    }
+    Разбор — в fastjson (msgspec/orjson/json, что установлено).
+    """
+    return parse_binance_bookticker(raw_msg)
 
 
 # ================= ОСНОВНАЯ ЛОГИКА WS-ПОДКЛЮЧЕНИЙ =================
@@ -133,53 +202,114 @@ async def run_ws_connection(
     url: str,
     symbols: list[str],
     market_type: str,  # "spot" или "futures"
+    publisher: Publisher,
+    symbol_lookup: dict[str, int],
+    conn_id: int = 0,
+    subscribe: list[str] | None = None,
+    rate_book: RateBook | None = None,
+    shard: Shard | None = None,
 ):
     """
     Универсальная функция:
     - подключается к WS
-    - подписывается на @bookTicker по символам
-    - слушает сообщения и печатает их
-    - при ошибке переподключается
+    - подписывается на @bookTicker по символам subscribe (если стримы не заданы в URL);
+      subscribe — живой список шарда, переподключение берёт текущий состав
+    - слушает сообщения, отбрасывает символы вне symbol_lookup
+      и отправляет остальные в prices.py через publisher
+    - считает сообщения по символам в rate_book (для раскладки по соединениям)
+    - при обрыве/зависании переподключается через WarmConnection
+    """
+    market_id = SPOT if market_type == "spot" else FUTURES
+    flags = conn_flags(conn_id)
+
+    async def subscribe_streams(ws) -> None:
+        # Отправляем SUBSCRIBE батчами по BATCH_SIZE символов
+        request_id = 1
+        for batch in chunk_list(subscribe or [], BATCH_SIZE):
+            sub_msg = build_subscribe_message(batch, request_id)
+            await ws.send(sub_msg)
+            print(f"[{name}] SUBSCRIBE на {len(batch)} стримов (id={request_id})")
+            request_id += 1
+            # Небольшая пауза, чтобы не спамить лимиты Binance
+            await asyncio.sleep(0.2)
+
+    async def read(link) -> None:
+        async for raw_msg in link.frames():
+            recv_ns = time.time_ns()
+            parsed = process_bookticker_message(raw_msg)
+            if parsed is None:
+                continue
+            symbol, bid, ask, bid_qty, ask_qty, ts_ms = parsed
+            symbol_id = symbol_lookup.get(symbol)
+            if symbol_id is None:
+                continue
+            if rate_book is not None:
+                rate_book.observe(symbol)
+            # Минимальная работа: запись уходит в буфер publisher,
+            # датаграмма отправляется пачкой
+            publisher.publish(market_id, symbol_id, bid, ask, bid_qty, ask_qty, ts_ms, recv_ns, flags)
+
+    print(f"[{name}] Подключаемся к {url[:80]}, символов: {len(symbols)}")
+    conn = WarmConnection(
+        name, url, read, subscribe_streams,
+        ping_interval=20,
+        ping_timeout=20,
+        max_queue=None,  # не ограничиваем внутреннюю очередь
+    )
+    if shard is not None:
+        shard.conns.append(conn)
+    try:
+        await conn.run()
+    except asyncio.CancelledError:
+        # Корректное завершение таска
+        print(f"[{name}] Task cancelled, выходим.")
+
+
+async def run_depth_connection(
+    name: str,
+    url: str,
+    market_type: str,
+    publisher: Publisher,
+    symbol_lookup: dict[str, int],
+    conn_id: int = 0,
+    shard: Shard | None = None,
+):
     """
+    Combined-стрим @depth5@100ms: верх стакана каждые 100 мс -> publisher.publish_depth.
+    """
+    market_id = SPOT if market_type == "spot" else FUTURES
+    flags = conn_flags(conn_id)
+
+    async def read(link) -> None:
+        async for raw_msg in link.frames():
+            recv_ns = time.time_ns()
+            parsed = parse_binance_depth(raw_msg)
+            if parsed is None:
+                continue
+            symbol, bids, asks, ts_ms = parsed
+            symbol_id = symbol_lookup.get(symbol)
+            if symbol_id is None:
+                continue
+            publisher.publish_depth(market_id, symbol_id, bids, asks, ts_ms, recv_ns, flags)
+
+    print(f"[{name}] Подключаемся к {url[:80]}")
+    conn = WarmConnection(name, url, read, ping_interval=20, ping_timeout=20, max_queue=None)
+    if shard is not None:
+        shard.conns.append(conn)
+    try:
+        await conn.run()
+    except asyncio.CancelledError:
+        print(f"[{name}] Task cancelled, выходим.")
+
+
+async def save_rates_loop(rate_books: list[RateBook]) -> None:
     while True:
-        try:
-            print(f"[{name}] Подключаемся к {url}, символов: {len(symbols)}")
-            async with websockets.connect(
-                url,
-                ssl=SSL_CONTEXT,
-                ping_interval=20,
-                ping_timeout=20,
-                max_queue=None,  # не ограничиваем внутреннюю очередь
-            ) as ws:
-                print(f"[{name}] Подключено, отправляем SUBSCRIBE...")
-
-                # Отправляем SUBSCRIBE батчами по BATCH_SIZE символов
-                request_id = 1
-                for batch in chunk_list(symbols, BATCH_SIZE):
-                    sub_msg = build_subscribe_message(batch, request_id)
-                    await ws.send(sub_msg)
-                    print(f"[{name}] SUBSCRIBE на {len(batch)} стримов (id={request_id})")
-                    request_id += 1
-                    # Небольшая пауза, чтобы не спамить лимиты Binance
-                    await asyncio.sleep(0.2)
-
-                print(f"[{name}] Ожидаем сообщения bookTicker...")
-
-                async for raw_msg in ws:
-                    line = process_bookticker_message(raw_msg, market_type)
-                    if line is None:
-                        continue
-                    # Здесь минимальная работа: просто печатаем строку
-                    # В реальном проекте можно отправлять в очередь/локальный TCP и т.д.
-                    print(line)
-
-        except asyncio.CancelledError:
-            # Корректное завершение таска
-            print(f"[{name}] Task cancelled, выходим.")
-            return
-        except Exception as e:
-            print(f"[{name}] Ошибка: {e!r}, переподключение через {RECONNECT_DELAY} c")
-            await asyncio.sleep(RECONNECT_DELAY)
+        await asyncio.sleep(RATES_SAVE_INTERVAL)
+        for book in rate_books:
+            try:
+                book.save()
+            except OSError as e:
+                print(f"[RATES] Не удалось сохранить {book.path}: {e!r}")
 
 
 async def main():
@@ -189,40 +319,90 @@ async def main():
 
     print(f"[INIT] Futures символов: {len(futures_symbols)}")
     print(f"[INIT] Spot символов: {len(spot_symbols)}")
-
-    # Futures — один WS
-    futures_task = asyncio.create_task(
-        run_ws_connection(
-            name="FUTURES",
-            url=FUTURES_URL,
-            symbols=futures_symbols,
-            market_type="futures",
-        )
-    )
-
-    # Spot — два WS, делим список пополам
-    spot_part1, spot_part2 = split_spot_symbols(spot_symbols)
-
-    spot_task_1 = asyncio.create_task(
-        run_ws_connection(
-            name="SPOT-1",
-            url=SPOT_URL,
-            symbols=spot_part1,
-            market_type="spot",
-        )
-    )
-
-    spot_task_2 = asyncio.create_task(
-        run_ws_connection(
-            name="SPOT-2",
-            url=SPOT_URL,
-            symbols=spot_part2,
-            market_type="spot",
-        )
-    )
-
-    # Ждем все три таска (они по факту вечные)
-    await asyncio.gather(futures_task, spot_task_1, spot_task_2)
+    print(f"[INIT] Режим: {MODE}")
+
+    publisher = Publisher("BINANCE")
+    registry = load_registry()
+    watch = SymbolWatch()
+
+    tasks = []
+    rate_books = []
+    for market_type, path, symbols, n_connections in (
+        ("futures", FUTURES_SYMBOLS_FILE, futures_symbols, FUTURES_CONNECTIONS),
+        ("spot", SPOT_SYMBOLS_FILE, spot_symbols, SPOT_CONNECTIONS),
+    ):
+        # Отдельная таблица на рынок: в режиме "all" она же — локальный фильтр
+        symbol_lookup = registry.lookup("BINANCE", market_type, symbols)
+        rate_book = RateBook("BINANCE", market_type)
+        rate_books.append(rate_book)
+        base_url = SPOT_BASE_URL if market_type == "spot" else FUTURES_BASE_URL
+        all_market = MODE == "all" and ALL_MARKET_STREAM[market_type]
+        combined = MODE != "subscribe" and not all_market
+
+        def start_ticker(shard: Shard, market_type=market_type, base_url=base_url,
+                         symbol_lookup=symbol_lookup, rate_book=rate_book, combined=combined) -> None:
+            shard.tasks.append(asyncio.create_task(
+                run_ws_connection(
+                    name=f"{market_type.upper()}-{shard.index + 1}",
+                    url=build_combined_url(base_url, shard.symbols) if combined else f"{base_url}/ws",
+                    symbols=shard.symbols,
+                    market_type=market_type,
+                    publisher=publisher,
+                    symbol_lookup=symbol_lookup,
+                    conn_id=shard.index,
+                    subscribe=None if combined else shard.symbols,
+                    rate_book=rate_book,
+                    shard=shard,
+                )
+            ))
+
+        plan = plan_connections(market_type, symbols, MODE, n_connections, rate_book.rates)
+        books = []
+        if all_market:
+            # !bookTicker несёт весь рынок: новые символы — только в таблицу
+            url, conn_symbols, _ = plan[0]
+            tasks.append(asyncio.create_task(run_ws_connection(
+                name=f"{market_type.upper()}-1", url=url, symbols=conn_symbols, market_type=market_type,
+                publisher=publisher, symbol_lookup=symbol_lookup, rate_book=rate_book,
+            )))
+        else:
+            books.append(live_shards(market_type, "bookTicker", [conn_symbols for _, conn_symbols, _ in plan],
+                                     combined, start_ticker, rate_book.rates))
+
+        if DEPTH_ENABLED:
+            def start_depth(shard: Shard, market_type=market_type, base_url=base_url,
+                            symbol_lookup=symbol_lookup) -> None:
+                shard.tasks.append(asyncio.create_task(
+                    run_depth_connection(
+                        name=f"{market_type.upper()}-DEPTH-{shard.index + 1}",
+                        url=build_combined_url(base_url, shard.symbols, DEPTH_STREAM),
+                        market_type=market_type,
+                        publisher=publisher,
+                        symbol_lookup=symbol_lookup,
+                        conn_id=DEPTH_CONN_OFFSET + shard.index,
+                        shard=shard,
+                    )
+                ))
+
+            shards = shard_by_rate(symbols, rate_book.rates, 1, max_per_shard=MAX_STREAMS_PER_CONN)
+            books.append(live_shards(market_type, DEPTH_STREAM, shards, True, start_depth, rate_book.rates))
+
+        for book in books:
+            book.start_all()
+
+        async def reload(added, removed, market_type=market_type, symbol_lookup=symbol_lookup, books=books):
+            added = refresh_lookup(symbol_lookup, "BINANCE", market_type, added, removed)
+            for book in books:
+                await book.apply(added, removed)
+
+        watch.add(path, symbols, reload, reader=load_symbols)
+
+    tasks.append(asyncio.create_task(watch.run()))
+    tasks.append(asyncio.create_task(save_rates_loop(rate_books)))
+    tasks.append(asyncio.create_task(report_loop()))
+
+    # Ждем все таски (они по факту вечные; соединения шардов — в их shard.tasks)
+    await asyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,15 @@
 import asyncio
 import json
-import ssl
 import time
 import uuid
 import zlib
 from pathlib import Path
 
-import websockets
+from connection import WarmConnection, report_loop
+from fastjson import loads, parse_bingx_book_ticker
+from publisher import FUTURES, SPOT, Publisher, conn_flags
+from subscriptions import LiveShards, Shard, SymbolWatch, refresh_lookup
+from symbols import load_registry
 
 # ================== НАСТРОЙКИ ==================
 
@@ -23,6 +26,14 @@ FUTURES_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/bingx_futures_al
 # Максимум 200 dataType на одно WS для spot по правилам BingX
 MAX_SYMBOLS_PER_CONN = 200
 
+# Поток котировок: @bookTicker — лучшие bid/ask с объёмами при каждом
+# изменении (а не 24h @ticker, где bid/ask — побочные поля)
+STREAM = "bookTicker"
+
+# Раз в сколько секунд печатать стоимость разбора по соединениям
+# (0 — не мерить: минус два perf_counter_ns на сообщение)
+DECODE_STATS_INTERVAL = 60
+
 # ================== УТИЛИТЫ ==================
 
 def load_symbols(path: str) -> list[str]:
@@ -43,100 +54,136 @@ def chunk_list(items: list[str], size: int) -> list[list[str]]:
     return [items[i : i + size] for i in range(0, len(items), size)]
 
 
-def decompress_message(msg) -> str | None:
+def build_sub_message(sym: str, req_type: str = "sub") -> str:
     """
-    BingX шлёт gzip/zlib-сжатые payload'ы.
-    Пытаемся разжать разными вариантами, если не вышло — игнорируем.
+    Подписка ("sub") или отписка ("unsub") одного dataType.
     """
-    if isinstance(msg, str):
-        return msg
-    if not isinstance(msg, (bytes, bytearray)):
-        return None
-
-    data = bytes(msg)
-    for wbits in (16 + zlib.MAX_WBITS, zlib.MAX_WBITS, 0):
-        try:
-            text = zlib.decompress(data, wbits).decode("utf-8")
-            return text
-        except Exception:
-            continue
-    return None
+    return json.dumps({
+        "id": str(uuid.uuid4()),
+        "reqType": req_type,
+        "dataType": f"{sym}@{STREAM}",
+    })
 
 
-def parse_ticker_json(raw: str):
+class FrameDecoder:
     """
-    Пытаемся вытащить [symbol, bid, ask, ts] из JSON BingX.
-    Формат сообщений в стиле:
-    {
-      "id": "...",
-      "dataType": "BTC-USDT@ticker",
-      "data": {
-        "b": "12345.6",   # best bid
-        "a": "12346.1",   # best ask
-        "E": 1710000000000,
-        ...
-      }
-    }
-    Поля могут отличаться, поэтому берём несколько вариантов ключей.
+    Разжатие кадров одного соединения.
+
+    BingX сжимает каждый кадр отдельно (gzip у обоих рынков), поэтому
+    формат определяется один раз по первому бинарному кадру — по магическим
+    байтам, а не перебором с исключениями, — и дальше каждый кадр это
+    один zlib.decompress с известным wbits. Если кадр вдруг не разжался,
+    формат определяется заново (счётчик redetects).
+
+    Ping от биржи — всегда одинаковые байты (сжатое "Ping"): первый раз он
+    разжимается, дальше узнаётся по самим байтам без разжатия.
     """
-    obj = json.loads(raw)
-    data_type = obj.get("dataType", "") or obj.get("topic", "")
-    symbol = data_type.split("@", 1)[0] if "@" in data_type else data_type or obj.get("symbol", "")
-
-    data = obj.get("data") or obj
-
-    # bid / ask с несколькими вариантами ключей
-    def get_float(d: dict, *keys: str) -> float | None:
-        for k in keys:
-            if k in d and d[k] is not None:
-                try:
-                    return float(d[k])
-                except Exception:
-                    continue
-        return None
-
-    bid = get_float(data, "b", "bid", "bestBidPrice")
-    ask = get_float(data, "a", "ask", "bestAskPrice")
-
-    # timestamp
-    ts = None
-    for k in ("E", "time", "ts", "T"):
-        if k in data:
-            try:
-                ts = int(data[k])
-                break
-            except Exception:
-                continue
-    if ts is None:
-        ts = int(time.time() * 1000)
 
-    if not symbol or bid is None or ask is None:
-        return None
+    __slots__ = ("wbits", "ping_frames", "frames", "raw_bytes", "text_bytes",
+                 "decompress_ns", "parse_ns", "redetects")
+
+    def __init__(self):
+        self.wbits: int | None = None      # None — ещё не знаем, 0 — без сжатия
+        self.ping_frames: set[bytes] = set()
+        self.frames = 0
+        self.raw_bytes = 0
+        self.text_bytes = 0
+        self.decompress_ns = 0
+        self.parse_ns = 0
+        self.redetects = 0
+
+    @staticmethod
+    def detect(data: bytes) -> int:
+        if data[:2] == b"\x1f\x8b":
+            return 16 + zlib.MAX_WBITS      # gzip
+        if len(data) > 1 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+            return zlib.MAX_WBITS           # zlib
+        if data[:1] in (b"{", b"[") or data == b"Ping":
+            return 0                        # без сжатия
+        return -zlib.MAX_WBITS              # голый deflate
+
+    def decompress(self, data: bytes) -> bytes | None:
+        wbits = self.wbits
+        if wbits is None:
+            wbits = self.wbits = self.detect(data)
+        if not wbits:
+            return data
+        try:
+            return zlib.decompress(data, wbits)
+        except zlib.error:
+            pass
+        # формат сменился (или кадр не сжат) — определяем заново
+        self.redetects += 1
+        wbits = self.wbits = self.detect(data)
+        if not wbits:
+            return data
+        try:
+            return zlib.decompress(data, wbits)
+        except zlib.error:
+            return None
+
+    def summary(self) -> str:
+        n = self.frames or 1
+        ratio = self.text_bytes / self.raw_bytes if self.raw_bytes else 0.0
+        return (
+            f"кадров {self.frames}, разжатие {self.decompress_ns / n:.0f} нс,"
+            f" разбор {self.parse_ns / n:.0f} нс, сжатие x{ratio:.1f},"
+            f" wbits {self.wbits}, переопределений {self.redetects}"
+        )
 
-    return symbol, bid, ask, ts
+    def reset_stats(self) -> None:
+        self.frames = self.raw_bytes = self.text_bytes = 0
+        self.decompress_ns = self.parse_ns = 0
 
 
 # ================== ОСНОВНАЯ ЛОГИКА WS ==================
 
-async def run_ws_group(
+def start_ws_group(
     market: str,
     ws_url: str,
+    symbols_file: str,
     symbols: list[str],
-):
+    publisher: Publisher,
+    watch: SymbolWatch,
+) -> LiveShards:
     """
     Один тип рынка (spot / futures), много WS-подключений по 200 символов максимум.
+    Символы, добавленные в symbols_file на ходу, подписываются в соединения,
+    где есть место; новое соединение — только когда все заполнены.
     """
     batches = chunk_list(symbols, MAX_SYMBOLS_PER_CONN)
-    tasks = []
+    symbol_lookup = load_registry().lookup(EXCHANGE_NAME, market, symbols)
+
+    def start(shard: Shard) -> None:
+        shard.tasks.append(asyncio.create_task(
+            run_single_connection(
+                market=market,
+                ws_url=ws_url,
+                symbols=shard.symbols,
+                conn_id=shard.index,
+                publisher=publisher,
+                symbol_lookup=symbol_lookup,
+                shard=shard,
+            )
+        ))
 
-    for batch_idx, batch in enumerate(batches):
-        task = asyncio.create_task(
-            run_single_connection(market=market, ws_url=ws_url, symbols=batch, conn_id=batch_idx)
-        )
-        tasks.append(task)
+    async def subscribe(shard: Shard, added: list[str]) -> None:
+        for sym in added:
+            await shard.send(build_sub_message(sym))
+
+    async def unsubscribe(shard: Shard, removed: list[str]) -> None:
+        for sym in removed:
+            await shard.send(build_sub_message(sym, "unsub"))
+
+    shards = LiveShards(f"{EXCHANGE_NAME} {market}", batches, start, subscribe, unsubscribe,
+                        capacity=MAX_SYMBOLS_PER_CONN)
+    shards.start_all()
+
+    async def reload(added: list[str], removed: list[str]) -> None:
+        await shards.apply(refresh_lookup(symbol_lookup, EXCHANGE_NAME, market, added, removed), removed)
 
-    if tasks:
-        await asyncio.gather(*tasks)
+    watch.add(symbols_file, symbols, reload, reader=load_symbols)
+    return shards
 
 
 async def run_single_connection(
@@ -144,62 +191,107 @@ async def run_single_connection(
     ws_url: str,
     symbols: list[str],
     conn_id: int,
+    publisher: Publisher,
+    symbol_lookup: dict[str, int],
+    shard: Shard | None = None,
 ):
     """
-    Один WebSocket, подписка на группу символов.
-    Авто-reconnect бесконечным циклом.
+    Один WebSocket, подписка на группу символов (живой список шарда:
+    переподключение подписывает текущий состав).
+    Переподключение и замена соединения — WarmConnection.
     """
-    ssl_ctx = ssl.create_default_context()
-
-    while True:
-        try:
-            print(f"[{EXCHANGE_NAME}][{market}][conn={conn_id}] connecting to {ws_url} with {len(symbols)} symbols")
-            async with websockets.connect(ws_url, ssl=ssl_ctx) as ws:
-                # Подписки: по одному dataType на сообщение
-                for sym in symbols:
-                    sub = {
-                        "id": str(uuid.uuid4()),
-                        "reqType": "sub",
-                        # @ticker даёт 24h-тикер с bid/ask/last для perp; для spot формат аналогичный
-                        "dataType": f"{sym}@ticker",
-                    }
-                    await ws.send(json.dumps(sub))
-
-                print(f"[{EXCHANGE_NAME}][{market}][conn={conn_id}] subscribed")
+    market_id = SPOT if market == "SPOT" else FUTURES
+    flags = conn_flags(conn_id)
+    name = f"[{EXCHANGE_NAME}][{market}][conn={conn_id}]"
+    publish = publisher.publish
+    decoder = FrameDecoder()
+    stats_task = None
+    if DECODE_STATS_INTERVAL:
+        stats_task = asyncio.create_task(decode_stats_loop(name, decoder))
+
+    async def subscribe(ws) -> None:
+        # Подписки: по одному dataType на сообщение
+        for sym in list(symbols):
+            await ws.send(build_sub_message(sym))
+        print(f"{name} subscribed")
+
+    async def read(link) -> None:
+        await read_frames(link, decoder, market_id, flags, publish, symbol_lookup)
+
+    try:
+        print(f"{name} connecting to {ws_url} with {len(symbols)} symbols")
+        conn = WarmConnection(name, ws_url, read, subscribe)
+        if shard is not None:
+            shard.conns.append(conn)
+        await conn.run()
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+
+
+async def read_frames(link, decoder: FrameDecoder, market_id: int, flags: int, publish, symbol_lookup: dict[str, int]):
+    """
+    Цикл чтения одного соединения: Ping — до разжатия, дальше разжатие
+    известным форматом и разбор @bookTicker по фиксированной схеме.
+    """
+    decoder.wbits = None  # формат определяется заново на каждом соединении
+    ws = link.ws
+    ping_frames = decoder.ping_frames
+    decompress = decoder.decompress
+    measure = bool(DECODE_STATS_INTERVAL)
+    clock = time.perf_counter_ns
+
+    async for msg in link.frames():
+        recv_ns = time.time_ns()
+
+        # App-уровень Ping/Pong от BingX: знакомый кадр — без разжатия
+        if msg in ping_frames:
+            await ws.send("Pong")
+            continue
 
-                async for msg in ws:
-                    text = decompress_message(msg)
-                    if text is None:
-                        continue
+        t0 = clock() if measure else 0
+        text = decompress(msg)
+        if text is None:
+            continue
+        t1 = clock() if measure else 0
 
-                    # App-уровень Ping/Pong от BingX
-                    if text == "Ping":
-                        await ws.send("Pong")
-                        continue
+        if text == b"Ping":
+            if len(ping_frames) < 4:
+                ping_frames.add(msg)
+            await ws.send("Pong")
+            continue
 
-                    if not text or text[0] not in "{[":
-                        # игнорируем не-JSON
-                        continue
+        if text[:8] == b'{"ping":':
+            # spot: {"ping": id, "time": ...} -> {"pong": id, "time": ...}
+            ping = loads(text)
+            await ws.send(json.dumps({"pong": ping.get("ping"), "time": ping.get("time")}))
+            continue
 
-                    try:
-                        parsed = parse_ticker_json(text)
-                    except Exception:
-                        continue
+        parsed = parse_bingx_book_ticker(text)
+        if measure:
+            decoder.frames += 1
+            decoder.raw_bytes += len(msg)
+            decoder.text_bytes += len(text)
+            decoder.decompress_ns += t1 - t0
+            decoder.parse_ns += clock() - t1
+        if parsed is None:
+            continue
 
-                    if not parsed:
-                        continue
+        symbol, bid, ask, bid_qty, ask_qty, ts = parsed
 
-                    symbol, bid, ask, ts = parsed
+        # BTC-USDT -> id символа, без replace() на каждое сообщение
+        symbol_id = symbol_lookup.get(symbol)
+        if symbol_id is None:
+            continue
 
-                    # Модификация символа: убрать тире и SWAP
-                    symbol = symbol.replace('-SWAP', '').replace('SWAP', '').replace('-', '')
+        publish(market_id, symbol_id, bid, ask, bid_qty, ask_qty, ts, recv_ns, flags)
 
-                    # Формат вывода: без скобок, кавычек, через запятые
-                    print(f"{EXCHANGE_NAME}, {market}, {symbol}, {bid}, {ask}, {ts}")
 
-        except Exception as e:
-            print(f"[{EXCHANGE_NAME}][{market}][conn={conn_id}] error: {e!r}, reconnect in 3s")
-            await asyncio.sleep(3)
+async def decode_stats_loop(name: str, decoder: FrameDecoder) -> None:
+    while True:
+        await asyncio.sleep(DECODE_STATS_INTERVAL)
+        print(f"{name} decode: {decoder.summary()}")
+        decoder.reset_stats()
 
 
 # ================== ENTRYPOINT ==================
@@ -210,21 +302,16 @@ async def main():
 
     print(f"[INIT] Spot symbols: {len(spot_symbols)}, Futures symbols: {len(fut_symbols)}")
 
-    tasks = []
-    if spot_symbols:
-        tasks.append(asyncio.create_task(
-            run_ws_group("SPOT", SPOT_WS_URL, spot_symbols)
-        ))
-    if fut_symbols:
-        tasks.append(asyncio.create_task(
-            run_ws_group("FUTURES", FUTURES_WS_URL, fut_symbols)
-        ))
-
-    if not tasks:
+    if not spot_symbols and not fut_symbols:
         print("[INIT] No symbols loaded, nothing to do")
         return
 
-    await asyncio.gather(*tasks)
+    publisher = Publisher("BINGX")
+    watch = SymbolWatch()
+    start_ws_group("SPOT", SPOT_WS_URL, SPOT_SYMBOLS_FILE, spot_symbols, publisher, watch)
+    start_ws_group("FUTURES", FUTURES_WS_URL, FUTURES_SYMBOLS_FILE, fut_symbols, publisher, watch)
+
+    await asyncio.gather(watch.run(), report_loop())
 
 
 if __name__ == "__main__":
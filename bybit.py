@@ -1,10 +1,16 @@
 import asyncio
 import json
-import ssl
+import time
 from typing import List
 
 import websockets
-import certifi
+
+from connection import WarmConnection, report_loop
+from fastjson import parse_bybit_orderbook
+from orderbook import BookSet
+from publisher import DEPTH_LEVELS, FUTURES, SPOT, Publisher, conn_flags
+from subscriptions import LiveShards, Shard, SymbolWatch, pack, refresh_lookup
+from symbols import load_registry
 
 # ================== НАСТРОЙКИ ==================
 
@@ -23,12 +29,21 @@ FUTURES_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/bybit_futures_al
 # - Общая длина args по соединению <= 21000 символов
 SPOT_SUB_BATCH_SIZE = 10
 FUTURES_SUB_BATCH_SIZE = 100  # безопасное значение для linear
+# Общая длина args одного соединения: символы сверх неё (в том числе
+# добавленные в список на ходу) уходят в следующее соединение
+ARGS_MAX_CHARS = 21000
 
-PING_INTERVAL = 20  # сек, рекомендовано Bybit
-RECONNECT_DELAY = 5  # сек между попытками переподключения
+# Публиковать верх стакана (DEPTH_LEVELS уровней) для исполнимых спредов
+# в prices.py. Для этого нужна подписка orderbook.50.
+DEPTH_ENABLED = False
 
-# SSL-контекст с актуальными корневыми сертификатами
-SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# Глубина стакана orderbook.{depth}.{symbol}: 1, 50 или 200 (linear ещё 500).
+# Стакан ведётся локально по snapshot + delta (orderbook.py), в prices.py
+# уходит лучший bid/ask, когда он меняется.
+ORDERBOOK_DEPTH = 50 if DEPTH_ENABLED else 1
+
+PING_INTERVAL = 20  # сек, рекомендовано Bybit
+# Переподключение, TLS и DNS — в connection.WarmConnection
 
 
 # ================== УТИЛИТЫ ==================
@@ -44,8 +59,12 @@ def load_symbols(path: str) -> List[str]:
     return symbols
 
 
-def make_orderbook_batches(symbols: List[str], batch_size: int) -> List[List[str]]:
-    topics = [f"orderbook.1.{s}" for s in symbols]
+def orderbook_topic(symbol: str, depth: int = ORDERBOOK_DEPTH) -> str:
+    return f"orderbook.{depth}.{symbol}"
+
+
+def make_orderbook_batches(symbols: List[str], batch_size: int, depth: int = ORDERBOOK_DEPTH) -> List[List[str]]:
+    topics = [orderbook_topic(s, depth) for s in symbols]
     batches: List[List[str]] = []
     for i in range(0, len(topics), batch_size):
         batches.append(topics[i:i + batch_size])
@@ -63,33 +82,14 @@ async def send_periodic_ping(ws: websockets.WebSocketClientProtocol, name: str)
             break
 
 
-def parse_best_bid_ask(msg: dict):
-    # Ожидаем структуру orderbook.{depth}.{symbol}, type: snapshot (L1)
-    data = msg.get("data")
-    if not isinstance(data, dict):
-        return None
-
-    bids = data.get("b") or []
-    asks = data.get("a") or []
-    if not bids or not asks:
-        return None
-
-    symbol = data.get("s")
-    if not symbol:
-        return None
-
-    bid_price = bids[0][0]
-    ask_price = asks[0][0]
-
-    ts = msg.get("cts") or msg.get("ts")
-
-    return symbol, bid_price, ask_price, ts
-
-
-async def subscribe_batches(ws: websockets.WebSocketClientProtocol, batches: List[List[str]]) -> None:
+async def subscribe_batches(ws: websockets.WebSocketClientProtocol, batches: List[List[str]],
+                            op: str = "subscribe") -> None:
+    """
+    ws — соединение или subscriptions.Shard (подписка/отписка на ходу).
+    """
     for batch in batches:
         payload = {
-            "op": "subscribe",
+            "op": op,
             "args": batch,
         }
         await ws.send(json.dumps(payload))
@@ -100,67 +100,142 @@ async def subscribe_batches(ws: websockets.WebSocketClientProtocol, batches: Lis
 async def run_orderbook_stream(
     name: str,
     url: str,
-    symbols_file: str,
+    shard: Shard,
     sub_batch_size: int,
+    publisher: Publisher,
+    symbol_lookup: dict[str, int],
 ) -> None:
     """
     name: 'spot' или 'futures'
     url:  Bybit WS URL
-    symbols_file: путь к txt с символами
+    shard: символы соединения (живой список, см. start_market)
+    publisher: общий отправитель котировок в prices.py
     """
-    symbols = load_symbols(symbols_file)
-    batches = make_orderbook_batches(symbols, sub_batch_size)
-
-    print(f"{name.upper()}: всего символов={len(symbols)}, батчей={len(batches)}")
+    market_id = SPOT if name == "spot" else FUTURES
+    label = name.upper() if shard.index == 0 else f"{name.upper()}-{shard.index + 1}"
+    # шарды рынка — разные соединения в гистограммах задержек
+    flags = conn_flags(shard.index)
+
+    async def subscribe(ws) -> None:
+        # батчи — по текущему списку: после перезагрузки списков переподключение подписывает новый набор
+        batches = make_orderbook_batches(shard.symbols, sub_batch_size)
+        print(f"{label}: подключено, подписываемся на orderbook.{ORDERBOOK_DEPTH}.* ({len(shard.symbols)} символов)")
+        await subscribe_batches(ws, batches)
+        print(f"{label}: SUBSCRIBE отправлен")
+
+    async def read(link) -> None:
+        # стаканы — свои у каждого соединения: после подписки биржа заново
+        # пришлёт снапшоты, а при замене соединения старое ещё работает
+        books = BookSet(ORDERBOOK_DEPTH)
+        # последний отправленный (bid, ask, bid_qty, ask_qty) по символу
+        published: dict[str, tuple[float, float, float, float]] = {}
+        # последний отправленный верх стакана по символу (срезы array)
+        published_depth: dict[str, tuple] = {}
+
+        # Запускаем user-level ping по протоколу Bybit
+        ping_task = asyncio.create_task(send_periodic_ping(link.ws, name))
 
-    while True:
         try:
-            print(f"{name.upper()}: подключаемся к {url}")
-            async with websockets.connect(
-                url,
-                ssl=SSL_CONTEXT,
-                ping_interval=None,   # выключаем встроенный ping websockets
-                max_queue=None,       # не ограничивать очередь сообщений
-                compression=None,     # без компрессии для минимальной задержки
-            ) as ws:
-                print(f"{name.upper()}: подключено, подписываемся на orderbook.1.*")
+            async for raw in link.frames():
+                recv_ns = time.time_ns()
+                msg = parse_bybit_orderbook(raw)
+                if msg is None:
+                    # служебные ответы subscribe/ping — пропускаем
+                    continue
+
+                symbol, is_snapshot, u, bids, asks, ts = msg
+                symbol_id = symbol_lookup.get(symbol)
+                if symbol_id is None:
+                    continue
+
+                book = books.apply(symbol, is_snapshot, u, bids, asks, ts)
+                if book is None:
+                    continue
+
+                if DEPTH_ENABLED:
+                    bids, asks = book.bids, book.asks
+                    head = (
+                        bids.keys[:DEPTH_LEVELS], bids.qtys[:DEPTH_LEVELS],
+                        asks.keys[:DEPTH_LEVELS], asks.qtys[:DEPTH_LEVELS],
+                    )
+                    if head != published_depth.get(symbol):
+                        published_depth[symbol] = head
+                        publisher.publish_depth(
+                            market_id, symbol_id,
+                            bids.levels(DEPTH_LEVELS), asks.levels(DEPTH_LEVELS),
+                            ts, recv_ns, flags,
+                        )
+
+                top = book.top()
+                bid, ask = top[0], top[1]
+                if bid != bid or ask != ask or top == published.get(symbol):
+                    # пустая сторона стакана или лучшие уровни не изменились
+                    continue
+                published[symbol] = top
+
+                publisher.publish(market_id, symbol_id, bid, ask, top[2], top[3], ts, recv_ns, flags)
+
+        finally:
+            ping_task.cancel()
+            with contextlib.suppress(Exception):
+                await ping_task
+            print(
+                f"{label}: стаканы: snapshots={books.snapshots} deltas={books.deltas} "
+                f"gaps={books.gaps} stale={books.stale} orphans={books.orphans}"
+            )
+
+    print(f"{label}: подключаемся к {url}")
+    conn = WarmConnection(
+        label, url, read, subscribe,
+        ping_interval=None,   # выключаем встроенный ping websockets
+        max_queue=None,       # не ограничивать очередь сообщений
+        compression=None,     # без компрессии для минимальной задержки
+    )
+    shard.conns.append(conn)
+    await conn.run()
 
-                await subscribe_batches(ws, batches)
-                print(f"{name.upper()}: SUBSCRIBE отправлен")
 
-                # Запускаем user-level ping по протоколу Bybit
-                ping_task = asyncio.create_task(send_periodic_ping(ws, name))
+def start_market(
+    name: str,
+    url: str,
+    symbols_file: str,
+    sub_batch_size: int,
+    publisher: Publisher,
+    watch: SymbolWatch,
+) -> LiveShards:
+    """
+    Соединения рынка: символы делятся по ARGS_MAX_CHARS, изменения списка
+    symbols_file применяются подпиской/отпиской на ходу.
+    """
+    symbols = load_symbols(symbols_file)
+    symbol_lookup = load_registry().lookup("BYBIT", name, symbols)
 
-                try:
-                    async for raw in ws:
-                        msg = json.loads(raw)
+    def cost(symbol: str) -> int:
+        return len(orderbook_topic(symbol))
 
-                        topic = msg.get("topic")
-                        if not topic:
-                            # служебные ответы subscribe/ping — пропускаем
-                            continue
+    groups = pack(symbols, ARGS_MAX_CHARS, cost)
+    print(f"{name.upper()}: всего символов={len(symbols)}, соединений={len(groups)}")
 
-                        if not topic.startswith("orderbook.1."):
-                            continue
+    def start(shard: Shard) -> None:
+        shard.tasks.append(asyncio.create_task(
+            run_orderbook_stream(name, url, shard, sub_batch_size, publisher, symbol_lookup)
+        ))
 
-                        best = parse_best_bid_ask(msg)
-                        if not best:
-                            continue
+    async def subscribe(shard: Shard, added: List[str]) -> None:
+        await subscribe_batches(shard, make_orderbook_batches(added, sub_batch_size))
 
-                        symbol, bid, ask, ts = best
+    async def unsubscribe(shard: Shard, removed: List[str]) -> None:
+        await subscribe_batches(shard, make_orderbook_batches(removed, sub_batch_size), op="unsubscribe")
 
-                        # Здесь ЛЮБОЙ нужный формат: файл / TCP / очередь.
-                        # Сейчас просто вывод в консоль:
-                        print(f"bybit,{name},{symbol},{bid},{ask},{ts}")
+    shards = LiveShards(f"BYBIT {name}", groups, start, subscribe, unsubscribe,
+                        capacity=ARGS_MAX_CHARS, cost=cost)
+    shards.start_all()
 
-                finally:
-                    ping_task.cancel()
-                    with contextlib.suppress(Exception):
-                        await ping_task
+    async def reload(added: List[str], removed: List[str]) -> None:
+        await shards.apply(refresh_lookup(symbol_lookup, "BYBIT", name, added, removed), removed)
 
-        except Exception as e:
-            print(f"{name.upper()}: ошибка: {e}. Переподключение через {RECONNECT_DELAY} c...")
-            await asyncio.sleep(RECONNECT_DELAY)
+    watch.add(symbols_file, symbols, reload, reader=load_symbols)
+    return shards
 
 
 # ================== ТОЧКА ВХОДА ==================
@@ -169,25 +244,27 @@ import contextlib
 
 
 async def main():
-    spot_task = asyncio.create_task(
-        run_orderbook_stream(
-            name="spot",
-            url=SPOT_WS_URL,
-            symbols_file=SPOT_SYMBOLS_FILE,
-            sub_batch_size=SPOT_SUB_BATCH_SIZE,
-        )
+    publisher = Publisher("BYBIT")
+    watch = SymbolWatch()
+
+    start_market(
+        name="spot",
+        url=SPOT_WS_URL,
+        symbols_file=SPOT_SYMBOLS_FILE,
+        sub_batch_size=SPOT_SUB_BATCH_SIZE,
+        publisher=publisher,
+        watch=watch,
     )
-
-    futures_task = asyncio.create_task(
-        run_orderbook_stream(
-            name="futures",
-            url=FUTURES_WS_URL,
-            symbols_file=FUTURES_SYMBOLS_FILE,
-            sub_batch_size=FUTURES_SUB_BATCH_SIZE,
-        )
+    start_market(
+        name="futures",
+        url=FUTURES_WS_URL,
+        symbols_file=FUTURES_SYMBOLS_FILE,
+        sub_batch_size=FUTURES_SUB_BATCH_SIZE,
+        publisher=publisher,
+        watch=watch,
     )
 
-    await asyncio.gather(spot_task, futures_task)
+    await asyncio.gather(watch.run(), report_loop())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,501 @@
+"""
+Тёплые WS-соединения коллекторов: переподключение без холодного старта.
+
+Раньше каждый коллектор при обрыве спал фиксированные 3-5 с, заново
+резолвил DNS, делал полный TLS-handshake и переподписывался — всё это
+время котировки в prices.py молча старели. WarmConnection держит одно
+логическое соединение и прячет это:
+
+    DNS       адреса хоста резолвятся заранее и обновляются в фоне
+              (Endpoints, раз в DNS_REFRESH), при подключении DNS не ждём;
+              адрес, к которому не удалось подключиться, временно обходится
+    TLS       один SSL-контекст на процесс (ssl_context()), сессия прошлого
+              соединения с тем же хостом подставляется в новое — TLS
+              resumption вместо полного handshake
+    замена    соединение, которое молчит STALE_AFTER с или живёт дольше
+              MAX_AGE (биржи рвут соединения раз в сутки), меняется по
+              схеме make-before-break: новое подключается, подписывается и
+              получает первый кадр, и только потом старое закрывается
+    обрыв     первое переподключение — сразу, экспоненциальная пауза с
+              джиттером — только если соединения падают раз за разом
+    разрывы   время от последнего кадра старого соединения до первого
+              кадра нового — по каждому соединению (gaps, summary())
+
+Коллектор отдаёт две корутины: subscribe(ws) — отправить подписки и
+reader(link) — цикл `async for raw in link.frames(): ...`. Состояние,
+которое зависит от соединения (стаканы по снапшотам, ping-задачи),
+reader заводит у себя: во время замены два reader'а работают параллельно.
+subscribe читает текущий список символов при каждом подключении, а
+изменения списка на ходу отправляются в живые соединения через send()
+(subscriptions.py).
+
+Для нагрузочных прогонов все адреса процесса переводятся на локальный
+эмулятор бирж (bench/emulator.py) переменной окружения WS_OVERRIDE.
+"""
+
+import asyncio
+import os
+import random
+import socket
+import ssl
+import time
+from urllib.parse import urlsplit
+
+import certifi
+import numpy as np
+import websockets
+from websockets.exceptions import ConnectionClosedOK
+
+from latency import Histogram
+
+# ================== НАСТРОЙКИ ==================
+
+# Как часто перерезолвивать адреса бирж, с
+DNS_REFRESH = 300
+
+# Сколько не подключаться к адресу после неудачи, с
+BAD_ADDRESS_TTL = 60
+
+# Соединение без единого кадра столько секунд считается зависшим
+STALE_AFTER = 60
+
+# Плановая замена соединения (Binance/MEXC/OKX рвут их раз в сутки)
+MAX_AGE = 23 * 3600
+
+# Сколько ждать первого кадра на новом соединении перед закрытием старого
+HANDOFF_TIMEOUT = 10
+
+# Соединение прожило столько — счётчик неудач сбрасывается
+HEALTHY_AFTER = 60
+
+# Пауза при повторных неудачах: BACKOFF_BASE * 2^n, не больше BACKOFF_MAX, с джиттером
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Период проверки соединения на зависание/возраст, с
+WATCH_INTERVAL = 1.0
+
+# Как часто печатать сводку по соединениям с обрывами/заменами, с
+REPORT_INTERVAL = 300
+
+# Все WS-адреса коллектора — на локальный эмулятор бирж:
+#   WS_OVERRIDE=ws://127.0.0.1:9000 python binance.py
+# wss://fstream.binance.com/stream?... превращается в
+# ws://127.0.0.1:9000/fstream.binance.com/stream?... — по первому сегменту
+# пути эмулятор понимает, какую биржу и какой рынок изображать.
+WS_OVERRIDE = os.environ.get("WS_OVERRIDE", "")
+
+
+# ================== TLS ==================
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    SSL-контекст, который подставляет в новое соединение сессию прошлого
+    соединения с тем же хостом (remember()). asyncio создаёт SSLObject
+    через wrap_bio — здесь и подменяется аргумент session.
+    """
+
+    def remember(self, server_hostname: str, session) -> None:
+        sessions = self.__dict__.setdefault("_sessions", {})
+        if session is not None:
+            sessions[server_hostname] = session
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side and server_hostname:
+            session = self.__dict__.get("_sessions", {}).get(server_hostname)
+            if session is not None:
+                try:
+                    return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+                except ValueError:
+                    # сессия не подходит (другой контекст/протокол) — полный handshake
+                    self._sessions.pop(server_hostname, None)
+                    session = None
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+_SSL_CONTEXT: ResumingSSLContext | None = None
+
+
+def ssl_context() -> ResumingSSLContext:
+    """
+    Общий на процесс клиентский SSL-контекст с корнями certifi.
+    """
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        ctx = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        ctx.load_verify_locations(cafile=certifi.where())
+        _SSL_CONTEXT = ctx
+    return _SSL_CONTEXT
+
+
+# ================== DNS ==================
+
+class Endpoints:
+    """
+    Адреса одного хоста, заранее отрезолвленные и обновляемые в фоне.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.addresses: list[str] = []
+        self._bad: dict[str, float] = {}
+        self._next = 0
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(self.host, self.port, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except OSError as e:
+            # оставляем старые адреса: биржа не сменит их за минуты
+            print(f"[DNS] {self.host}: {e!r}")
+            return
+        addresses = []
+        for *_, sockaddr in infos:
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        if addresses:
+            self.addresses = addresses
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(DNS_REFRESH)
+            await self.refresh()
+
+    async def ready(self) -> None:
+        """
+        Первый резолв (один раз на хост) и запуск фонового обновления.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+            await self.refresh()
+
+    def pick(self) -> str | None:
+        """
+        Следующий адрес по кругу, пропуская недавно неудачные.
+        None — адресов нет, websockets резолвит сам.
+        """
+        addresses = self.addresses
+        if not addresses:
+            return None
+        now = time.monotonic()
+        for _ in range(len(addresses)):
+            address = addresses[self._next % len(addresses)]
+            self._next += 1
+            if self._bad.get(address, 0.0) <= now:
+                return address
+        return addresses[self._next % len(addresses)]
+
+    def failed(self, address: str | None) -> None:
+        if address is not None:
+            self._bad[address] = time.monotonic() + BAD_ADDRESS_TTL
+
+
+_ENDPOINTS: dict[tuple[str, int], Endpoints] = {}
+
+
+def override_url(url: str, base: str = WS_OVERRIDE) -> str:
+    """
+    Адрес биржи -> адрес на эмуляторе base (см. WS_OVERRIDE); без base — как есть.
+    """
+    if not base:
+        return url
+    parts = urlsplit(url)
+    path = f"/{parts.hostname}{parts.path}"
+    if parts.query:
+        path += f"?{parts.query}"
+    return base.rstrip("/") + path
+
+
+def endpoints_for(url: str) -> Endpoints:
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "wss" else 80)
+    key = (parts.hostname or "", port)
+    endpoints = _ENDPOINTS.get(key)
+    if endpoints is None:
+        endpoints = _ENDPOINTS[key] = Endpoints(*key)
+    return endpoints
+
+
+# ================== СОЕДИНЕНИЕ ==================
+
+# Все WarmConnection процесса — для report_loop
+CONNECTIONS: list["WarmConnection"] = []
+
+class Link:
+    """
+    Одно физическое WS-соединение внутри WarmConnection.
+    """
+
+    __slots__ = ("ws", "address", "opened_ns", "first_ns", "last_ns", "first", "retired", "task", "resumed")
+
+    def __init__(self, ws, address: str | None):
+        self.ws = ws
+        self.address = address
+        self.opened_ns = time.monotonic_ns()
+        self.first_ns = 0
+        self.last_ns = 0
+        self.first = asyncio.Event()
+        self.retired = False
+        self.task: asyncio.Task | None = None
+        ssl_object = ws.transport.get_extra_info("ssl_object") if ws.transport else None
+        self.resumed = bool(ssl_object is not None and ssl_object.session_reused)
+
+    async def frames(self):
+        """
+        Кадры соединения как bytes (как fastjson.frames) + отметка времени
+        последнего кадра для поиска зависших соединений и замера разрывов.
+        """
+        recv = self.ws.recv
+        clock = time.monotonic_ns
+        try:
+            raw = await recv(decode=False)
+            self.first_ns = self.last_ns = clock()
+            self.first.set()
+            yield raw
+            while True:
+                raw = await recv(decode=False)
+                self.last_ns = clock()
+                yield raw
+        except ConnectionClosedOK:
+            return
+
+
+class WarmConnection:
+    """
+    Логическое соединение коллектора: держит текущий Link, меняет его
+    без разрыва потока и считает разрывы.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        reader,
+        subscribe=None,
+        *,
+        stale_after: float | None = STALE_AFTER,
+        max_age: float | None = MAX_AGE,
+        **connect_kwargs,
+    ):
+        if WS_OVERRIDE:
+            url = override_url(url)
+            # IP реплик — от настоящего хоста биржи
+            connect_kwargs.pop("host", None)
+        self.name = name
+        self.url = url
+        self.reader = reader
+        self.subscribe = subscribe
+        self.stale_after_ns = int(stale_after * 1e9) if stale_after else 0
+        self.max_age_ns = int(max_age * 1e9) if max_age else 0
+        self.connect_kwargs = connect_kwargs
+        if url.startswith("wss:"):
+            connect_kwargs.setdefault("ssl", ssl_context())
+        # host= задан явно (реплики на разные IP) — DNS не трогаем
+        self.endpoints = None if "host" in connect_kwargs else endpoints_for(url)
+        self.server_hostname = urlsplit(url).hostname
+
+        # Счётчики
+        self.failures = 0       # подряд неудачных подключений/быстрых обрывов
+        self.reconnects = 0     # после обрыва
+        self.replacements = 0   # плановых замен (зависло / возраст)
+        self.resumed = 0        # подключений с TLS resumption
+        self.gaps = Histogram()
+        self.last_gap_ns = 0
+        # открытые Link: текущий и подключающийся на замену — для send()
+        self._links: set[Link] = set()
+        CONNECTIONS.append(self)
+
+    # ---------- публичное ----------
+
+    async def run(self) -> None:
+        """
+        Бесконечный цикл: подключиться, следить, заменить/переподключить.
+        """
+        if self.endpoints is not None:
+            await self.endpoints.ready()
+        current: Link | None = None
+        last_ns = 0  # последний кадр оборвавшегося соединения
+        try:
+            while True:
+                link = await self._open()
+                if current is not None:
+                    # make-before-break: старое закрываем, когда новое уже живое
+                    try:
+                        await asyncio.wait_for(link.first.wait(), HANDOFF_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        print(f"[{self.name}] новое соединение молчит {HANDOFF_TIMEOUT} с, всё равно переключаемся")
+                    self._record_gap(current.last_ns or current.opened_ns, link)
+                    await self._retire(current)
+                elif last_ns:
+                    asyncio.create_task(self._gap_after_first(last_ns, link))
+                current = link
+
+                reason = await self._watch(link)
+                if reason == "closed":
+                    self._links.discard(link)
+                    current = None
+                    last_ns = link.last_ns or link.opened_ns
+                    self.reconnects += 1
+                    if time.monotonic_ns() - link.opened_ns > HEALTHY_AFTER * 1_000_000_000:
+                        self.failures = 0
+                    self.failures += 1
+                    delay = self._backoff()
+                    print(f"[{self.name}] соединение оборвалось, переподключение через {delay:.1f} с")
+                    if delay:
+                        await asyncio.sleep(delay)
+                else:
+                    self.replacements += 1
+                    print(f"[{self.name}] замена соединения ({reason}), старое работает до переключения")
+        finally:
+            if current is not None:
+                await self._retire(current)
+            for link in list(self._links):
+                await self._retire(link)
+            if self in CONNECTIONS:
+                CONNECTIONS.remove(self)
+
+    async def send(self, message: str) -> int:
+        """
+        Сообщение (подписка/отписка на ходу) во все открытые соединения,
+        включая подключающееся на замену. Возвращает, в сколько ушло; без
+        живого соединения не страшно — подключение подпишется по текущему
+        списку в subscribe().
+        """
+        sent = 0
+        for link in list(self._links):
+            try:
+                await link.ws.send(message)
+                sent += 1
+            except Exception:
+                pass
+        return sent
+
+    def set_url(self, url: str) -> None:
+        """
+        Адрес следующих подключений — когда подписки зашиты в URL (combined-стримы Binance).
+        """
+        self.url = override_url(url) if WS_OVERRIDE else url
+
+    def summary(self) -> str:
+        gaps = self.gaps.summary()
+        return (
+            f"обрывов {self.reconnects}, замен {self.replacements}, TLS resumed {self.resumed},"
+            f" разрыв p50 {gaps['p50'] / 1e6:.0f} мс max {gaps['max'] / 1e6:.0f} мс"
+            f" (последний {self.last_gap_ns / 1e6:.0f} мс)"
+        )
+
+    # ---------- внутреннее ----------
+
+    def _backoff(self) -> float:
+        if self.failures <= 1:
+            return 0.0
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 2))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _open(self) -> Link:
+        """
+        Подключается и подписывается; при неудаче — пауза и новая попытка.
+        """
+        while True:
+            address = self.endpoints.pick() if self.endpoints is not None else None
+            kwargs = self.connect_kwargs
+            if address is not None:
+                kwargs = dict(kwargs, host=address)
+            ws = link = None
+            try:
+                ws = await websockets.connect(self.url, **kwargs)
+                link = Link(ws, address)
+                self._links.add(link)
+                self._remember_session(ws)
+                if self.subscribe is not None:
+                    await self.subscribe(ws)
+            except asyncio.CancelledError:
+                self._links.discard(link)
+                if ws is not None:
+                    await ws.close()
+                raise
+            except Exception as e:
+                self._links.discard(link)
+                if ws is not None:
+                    await ws.close()
+                if self.endpoints is not None:
+                    self.endpoints.failed(address)
+                self.failures += 1
+                delay = self._backoff()
+                print(f"[{self.name}] не удалось подключиться ({address or self.server_hostname}): {e!r},"
+                      f" повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+                continue
+            if link.resumed:
+                self.resumed += 1
+            link.task = asyncio.create_task(self._read(link))
+            return link
+
+    def _remember_session(self, ws) -> None:
+        ssl_object = ws.transport.get_extra_info("ssl_object") if ws.transport else None
+        ctx = self.connect_kwargs.get("ssl")
+        if ssl_object is not None and isinstance(ctx, ResumingSSLContext):
+            ctx.remember(self.server_hostname, ssl_object.session)
+
+    async def _read(self, link: Link) -> None:
+        try:
+            await self.reader(link)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not link.retired:
+                print(f"[{self.name}] ошибка: {e!r}")
+
+    async def _watch(self, link: Link) -> str:
+        """
+        Ждёт, пока соединение оборвётся ("closed"), замолчит ("stale")
+        или состарится ("aged").
+        """
+        while True:
+            done, _ = await asyncio.wait({link.task}, timeout=WATCH_INTERVAL)
+            if done:
+                return "closed"
+            now = time.monotonic_ns()
+            if self.stale_after_ns and now - (link.last_ns or link.opened_ns) > self.stale_after_ns:
+                return "stale"
+            if self.max_age_ns and now - link.opened_ns > self.max_age_ns:
+                return "aged"
+
+    async def _retire(self, link: Link) -> None:
+        link.retired = True
+        self._links.discard(link)
+        try:
+            await link.ws.close()
+        except Exception:
+            pass
+        if link.task is not None:
+            link.task.cancel()
+            try:
+                await link.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _gap_after_first(self, last_ns: int, link: Link) -> None:
+        await link.first.wait()
+        self._record_gap(last_ns, link)
+
+    def _record_gap(self, last_ns: int, link: Link) -> None:
+        if not link.first_ns:
+            return
+        gap = max(0, link.first_ns - last_ns)
+        self.last_gap_ns = gap
+        self.gaps.record_many(np.array([gap], dtype=np.int64))
+        print(f"[{self.name}] разрыв потока {gap / 1e6:.0f} мс{', TLS resumed' if link.resumed else ''}")
+
+
+async def report_loop(interval: float = REPORT_INTERVAL) -> None:
+    """
+    Периодическая сводка по соединениям, у которых были обрывы или замены.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for conn in CONNECTIONS:
+            if conn.reconnects or conn.replacements:
+                print(f"[CONN] {conn.name}: {conn.summary()}")
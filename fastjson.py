@@ -0,0 +1,807 @@
+"""
+Общий слой разбора JSON-сообщений бирж.
+
+json.loads + цепочка dict.get — самая дорогая часть обработки сообщения
+в каждом коллекторе. Здесь для каждого потока есть парсер, который
+сразу отдаёт готовый кортеж котировки, а бэкенд выбирается по тому,
+что установлено:
+
+    msgspec  типизированные схемы (msgspec.Struct): из кадра декодируются
+             только нужные поля, строки цен сразу превращаются в float
+             (strict=False), остальное пропускается без создания объектов
+    orjson   быстрый loads в dict + та же логика, что и у stdlib
+    json     stdlib, запасной вариант без зависимостей
+
+Бэкенд можно задать явно переменной окружения TRADEBOT_JSON
+(msgspec / orjson / json). Все парсеры принимают и bytes, и str;
+чтобы websockets не декодировал кадр в str, читайте через frames(ws).
+
+Парсеры (make_parsers(backend) собирает их для любого бэкенда — для бенчмарка):
+
+    binance  bookTicker (в т.ч. обёртка combined-стрима)
+             -> (symbol, bid, ask, bid_qty, ask_qty, ts) | None
+    bybit    orderbook.{depth}.* -> (symbol, is_snapshot, u, bids, asks, ts) | None,
+             bids/asks — [(цена, объём), ...] из сообщения (для orderbook.py)
+    binance_depth  depth5@100ms (combined-стрим) -> (symbol, bids, asks, ts) | None
+    okx      -> (event, note, channel, rows) | None:
+               tickers: rows = [(inst_id, bid, ask, bid_qty, ask_qty, ts), ...]
+               books5:  rows = [(inst_id, bids, asks, ts), ...]
+    bingx    @ticker -> (symbol, bid, ask, ts) | None
+    bingx_book  @bookTicker (фиксированная схема s/b/B/a/A/E)
+             -> (symbol, bid, ask, bid_qty, ask_qty, ts) | None
+    mexc_futures  push.tickers -> [(symbol, bid, ask, ts), ...] | None
+    mexc_spot     miniTickers (JSON) -> [(symbol, price, ts), ...] | None
+    mexc_book     allBookTicker (старый JSON-канал, mexc2-0.py) -> [(symbol, bid, ask, ts), ...] | None
+    mexc_depth    push.depth.full -> (symbol, bids, asks, ts) | None, объём в контрактах
+
+bids/asks у стаканов — [(цена, объём), ...] от лучшей цены.
+
+ts — время события биржи в мс, 0 если его нет. None — служебное или
+нераспознанное сообщение.
+"""
+
+import json
+import os
+from math import nan
+from typing import Any
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - зависит от окружения
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+from websockets.exceptions import ConnectionClosedOK
+
+# OKX-каналы со стаканом: уровни ["цена", "объём", "0", "число ордеров"]
+OKX_BOOK_CHANNELS = ("books5", "bbo-tbt", "books", "books-l2-tbt", "books50-l2-tbt")
+
+BACKENDS = tuple(
+    name for name, module in (("msgspec", msgspec), ("orjson", orjson), ("json", json)) if module is not None
+)
+
+
+def _pick_backend() -> str:
+    wanted = os.environ.get("TRADEBOT_JSON", "").strip().lower()
+    if wanted:
+        if wanted not in BACKENDS:
+            raise RuntimeError(f"TRADEBOT_JSON={wanted}: бэкенд недоступен, есть {BACKENDS}")
+        return wanted
+    return BACKENDS[0]
+
+
+# ================= ЧТЕНИЕ КАДРОВ =================
+
+async def frames(ws):
+    """
+    Как `async for raw in ws`, но текстовые кадры приходят как bytes,
+    без декодирования в str (websockets >= 13, recv(decode=False)).
+    На старых версиях websockets — обычные str.
+    """
+    recv = ws.recv
+    try:
+        raw = await recv(decode=False)
+    except TypeError:
+        # legacy-протокол websockets: параметра decode нет
+        async for raw in ws:
+            yield raw
+        return
+    except ConnectionClosedOK:
+        return
+    yield raw
+    try:
+        while True:
+            yield await recv(decode=False)
+    except ConnectionClosedOK:
+        return
+
+
+# ================= DICT-ПАРСЕРЫ (json / orjson) =================
+
+def _dict_parsers(loads) -> dict:
+    errors = (ValueError, TypeError, AttributeError, IndexError, KeyError)
+
+    def binance(raw):
+        try:
+            msg = loads(raw)
+            # {"result": null, "id": 1} — ответ на SUBSCRIBE
+            if "result" in msg:
+                return None
+            data = msg.get("data", msg)
+            symbol = data.get("s")
+            bid = data.get("b")
+            ask = data.get("a")
+            if not symbol or bid is None or ask is None:
+                return None
+            return (
+                symbol,
+                float(bid),
+                float(ask),
+                float(data.get("B", nan)),
+                float(data.get("A", nan)),
+                data.get("E") or 0,
+            )
+        except errors:
+            return None
+
+    def binance_depth(raw):
+        try:
+            msg = loads(raw)
+            data = msg.get("data")
+            if not data:
+                return None
+            # spot: {"lastUpdateId", "bids", "asks"}, futures: {"e": "depthUpdate", "s", "b", "a", "E"}
+            symbol = data.get("s") or msg.get("stream", "").split("@", 1)[0].upper()
+            bids = data.get("bids") or data.get("b") or ()
+            asks = data.get("asks") or data.get("a") or ()
+            if not symbol:
+                return None
+            return (
+                symbol,
+                [(float(p), float(q)) for p, q in bids],
+                [(float(p), float(q)) for p, q in asks],
+                data.get("E") or 0,
+            )
+        except errors:
+            return None
+
+    def bybit(raw):
+        try:
+            msg = loads(raw)
+            topic = msg.get("topic")
+            if not topic or not topic.startswith("orderbook."):
+                return None
+            data = msg["data"]
+            symbol = data.get("s")
+            if not symbol:
+                return None
+            return (
+                symbol,
+                msg.get("type") == "snapshot",
+                int(data.get("u") or 0),
+                [(float(p), float(q)) for p, q in data.get("b") or ()],
+                [(float(p), float(q)) for p, q in data.get("a") or ()],
+                int(msg.get("cts") or msg.get("ts") or 0),
+            )
+        except errors:
+            return None
+
+    def okx(raw):
+        try:
+            msg = loads(raw)
+            event = msg.get("event")
+            if event:
+                return event, f"{msg.get('code', '')} {msg.get('msg', '')}".strip(), "", []
+            arg = msg.get("arg") or {}
+            channel = arg.get("channel", "")
+            rows = []
+            if channel == "tickers":
+                for item in msg.get("data") or ():
+                    inst_id = item.get("instId")
+                    bid = item.get("bidPx")
+                    ask = item.get("askPx")
+                    if not inst_id or not bid or not ask:
+                        continue
+                    ts = item.get("ts")
+                    rows.append((
+                        inst_id,
+                        float(bid),
+                        float(ask),
+                        float(item.get("bidSz") or nan),
+                        float(item.get("askSz") or nan),
+                        int(ts) if ts else 0,
+                    ))
+            elif channel in OKX_BOOK_CHANNELS:
+                for item in msg.get("data") or ():
+                    ts = item.get("ts")
+                    rows.append((
+                        item.get("instId") or arg.get("instId", ""),
+                        [(float(level[0]), float(level[1])) for level in item.get("bids") or ()],
+                        [(float(level[0]), float(level[1])) for level in item.get("asks") or ()],
+                        int(ts) if ts else 0,
+                    ))
+            return "", "", channel, rows
+        except errors:
+            return None
+
+    def get_float(d: dict, *keys: str):
+        for k in keys:
+            v = d.get(k)
+            if v is not None:
+                try:
+                    return float(v)
+                except (TypeError, ValueError):
+                    continue
+        return None
+
+    def bingx(raw):
+        try:
+            obj = loads(raw)
+            data_type = obj.get("dataType", "") or obj.get("topic", "")
+            symbol = data_type.split("@", 1)[0] if "@" in data_type else data_type or obj.get("symbol", "")
+            data = obj.get("data") or obj
+            bid = get_float(data, "b", "bid", "bestBidPrice")
+            ask = get_float(data, "a", "ask", "bestAskPrice")
+            if not symbol or bid is None or ask is None:
+                return None
+            ts = 0
+            for k in ("E", "time", "ts", "T"):
+                if k in data:
+                    try:
+                        ts = int(data[k])
+                        break
+                    except (TypeError, ValueError):
+                        continue
+            return symbol, bid, ask, ts
+        except errors:
+            return None
+
+    def bingx_book(raw):
+        try:
+            msg = loads(raw)
+            data = msg.get("data")
+            if not isinstance(data, dict):
+                return None
+            bid = data.get("b")
+            ask = data.get("a")
+            symbol = data.get("s") or (msg.get("dataType") or "").split("@", 1)[0]
+            if not symbol or not bid or not ask:
+                return None
+            bid_qty = data.get("B")
+            ask_qty = data.get("A")
+            return (
+                symbol,
+                float(bid),
+                float(ask),
+                float(bid_qty) if bid_qty else nan,
+                float(ask_qty) if ask_qty else nan,
+                int(data.get("E") or data.get("T") or 0),
+            )
+        except errors:
+            return None
+
+    def mexc_futures(raw):
+        try:
+            msg = loads(raw)
+            if msg.get("channel") != "push.tickers":
+                return None
+            rows = []
+            for it in msg.get("data") or ():
+                symbol = it.get("symbol")
+                last = it.get("lastPrice")
+                if not symbol or last is None:
+                    continue
+                try:
+                    last = float(last)
+                except ValueError:
+                    continue
+                bid = get_float(it, "maxBidPrice")
+                ask = get_float(it, "minAskPrice")
+                ts = it.get("timestamp")
+                rows.append((
+                    symbol,
+                    last if bid is None else bid,
+                    last if ask is None else ask,
+                    int(ts) if ts else 0,
+                ))
+            return rows
+        except errors:
+            return None
+
+    def mexc_spot(raw):
+        try:
+            msg = loads(raw)
+            if not msg.get("channel", "").startswith("spot@public.miniTickers.v3.api"):
+                return None
+            send_time = msg.get("sendTime")
+            ts = int(send_time) if send_time else 0
+            rows = []
+            for it in (msg.get("publicMiniTickers") or {}).get("items") or ():
+                symbol = it.get("symbol")
+                price = it.get("price")
+                if not symbol or not price:
+                    continue
+                try:
+                    rows.append((symbol, float(price), ts))
+                except ValueError:
+                    continue
+            return rows
+        except errors:
+            return None
+
+    def mexc_book(raw):
+        try:
+            msg = loads(raw)
+            if msg.get("c") != "spot@public.allBookTicker.v3.api":
+                return None
+            ts = msg.get("t")
+            ts = int(ts) if ts else 0
+            rows = []
+            for it in msg.get("d") or ():
+                symbol = it.get("s")
+                bid = it.get("b")
+                ask = it.get("a")
+                if not symbol or not bid or not ask:
+                    continue
+                try:
+                    rows.append((symbol, float(bid), float(ask), ts))
+                except ValueError:
+                    continue
+            return rows
+        except errors:
+            return None
+
+    def mexc_depth(raw):
+        try:
+            msg = loads(raw)
+            if msg.get("channel") != "push.depth.full":
+                return None
+            data = msg["data"]
+            symbol = msg.get("symbol")
+            if not symbol:
+                return None
+            # уровень: [цена, объём в контрактах, число ордеров]
+            return (
+                symbol,
+                [(float(level[0]), float(level[1])) for level in data.get("bids") or ()],
+                [(float(level[0]), float(level[1])) for level in data.get("asks") or ()],
+                int(msg.get("ts") or 0),
+            )
+        except errors:
+            return None
+
+    return {
+        "binance": binance,
+        "binance_depth": binance_depth,
+        "bybit": bybit,
+        "okx": okx,
+        "bingx": bingx,
+        "bingx_book": bingx_book,
+        "mexc_futures": mexc_futures,
+        "mexc_spot": mexc_spot,
+        "mexc_book": mexc_book,
+        "mexc_depth": mexc_depth,
+    }
+
+
+# ================= ТИПИЗИРОВАННЫЕ СХЕМЫ (msgspec) =================
+
+if msgspec is not None:
+    Struct = msgspec.Struct
+    Level = tuple[float, float]
+
+    # --- Binance bookTicker ---
+    class BinanceBookTicker(Struct):
+        s: str = ""
+        b: float | None = None
+        a: float | None = None
+        B: float = nan
+        A: float = nan
+        E: int = 0
+
+    class BinanceFrame(BinanceBookTicker):
+        # combined-стрим: {"stream": "...", "data": {...}}
+        data: BinanceBookTicker | None = None
+
+    # --- Binance depth5 (spot: bids/asks без символа, futures: b/a + s) ---
+    class BinanceDepth(Struct):
+        s: str = ""
+        E: int = 0
+        bids: list[Level] = []
+        asks: list[Level] = []
+        b: list[Level] = []
+        a: list[Level] = []
+
+    class BinanceDepthFrame(Struct):
+        stream: str = ""
+        data: BinanceDepth | None = None
+
+    # --- Bybit orderbook ---
+    class BybitBook(Struct):
+        s: str = ""
+        b: list[Level] = []
+        a: list[Level] = []
+        u: int = 0
+
+    class BybitFrame(Struct):
+        topic: str = ""
+        type: str = ""
+        ts: int = 0
+        cts: int = 0
+        data: BybitBook | None = None
+
+    # --- OKX tickers ---
+    class OkxArg(Struct):
+        channel: str = ""
+        instId: str = ""
+
+    class OkxItem(Struct):
+        # tickers
+        instId: str = ""
+        bidPx: str = ""
+        askPx: str = ""
+        bidSz: str = ""
+        askSz: str = ""
+        ts: int = 0
+        # books5 / bbo-tbt
+        bids: list[list[float]] = []
+        asks: list[list[float]] = []
+
+    class OkxFrame(Struct):
+        event: str = ""
+        code: str = ""
+        msg: str = ""
+        arg: OkxArg | None = None
+        data: list[OkxItem] = []
+
+    # --- BingX ticker (ключи bid/ask у разных потоков разные) ---
+    class BingxTicker(Struct):
+        b: float | None = None
+        a: float | None = None
+        bid: float | None = None
+        ask: float | None = None
+        bestBidPrice: float | None = None
+        bestAskPrice: float | None = None
+        E: int | None = None
+        time: int | None = None
+        ts: int | None = None
+        T: int | None = None
+
+    class BingxFrame(BingxTicker):
+        dataType: str = ""
+        topic: str = ""
+        symbol: str = ""
+        data: BingxTicker | None = None
+
+    # --- BingX bookTicker (spot и swap в одном формате) ---
+    class BingxBookTicker(Struct):
+        s: str = ""
+        b: float | None = None
+        a: float | None = None
+        B: float = nan
+        A: float = nan
+        E: int = 0
+        T: int = 0
+
+    class BingxBookFrame(Struct):
+        dataType: str = ""
+        data: BingxBookTicker | None = None
+
+    # --- MEXC ---
+    class MexcFuturesTicker(Struct):
+        symbol: str = ""
+        lastPrice: float | None = None
+        maxBidPrice: float | None = None
+        minAskPrice: float | None = None
+        timestamp: int = 0
+
+    class MexcFuturesFrame(Struct):
+        channel: str = ""
+        data: list[MexcFuturesTicker] | dict | str | None = None
+
+    # те же тикеры с ценами как пришли — для кадра, где чья-то цена битая
+    class MexcFuturesTickerRaw(Struct):
+        symbol: str = ""
+        lastPrice: Any = None
+        maxBidPrice: Any = None
+        minAskPrice: Any = None
+        timestamp: int = 0
+
+    class MexcFuturesFrameRaw(Struct):
+        channel: str = ""
+        data: list[MexcFuturesTickerRaw] | dict | str | None = None
+
+    class MexcDepth(Struct):
+        bids: list[list[float]] = []
+        asks: list[list[float]] = []
+
+    class MexcDepthFrame(Struct):
+        channel: str = ""
+        symbol: str = ""
+        ts: int = 0
+        data: MexcDepth | list | int | str | None = None
+
+    class MexcMiniTicker(Struct):
+        symbol: str = ""
+        price: str = ""
+
+    class MexcMiniTickers(Struct):
+        items: list[MexcMiniTicker] = []
+
+    class MexcSpotFrame(Struct):
+        channel: str = ""
+        sendTime: int = 0
+        publicMiniTickers: MexcMiniTickers | None = None
+
+    class MexcBookTicker(Struct):
+        s: str = ""
+        b: str = ""
+        a: str = ""
+
+    class MexcBookFrame(Struct):
+        c: str = ""
+        t: int = 0
+        d: list[MexcBookTicker] = []
+
+
+def _first(*values):
+    for v in values:
+        if v is not None:
+            return v
+    return None
+
+
+def _float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _msgspec_parsers() -> dict:
+    def decoder(schema):
+        # strict=False: "123.45" -> float, "1710000000000" -> int
+        return msgspec.json.Decoder(schema, strict=False).decode
+
+    errors = (msgspec.DecodeError, ValueError)
+
+    decode_binance = decoder(BinanceFrame)
+    decode_binance_depth = decoder(BinanceDepthFrame)
+    decode_bybit = decoder(BybitFrame)
+    decode_mexc_depth = decoder(MexcDepthFrame)
+    decode_okx = decoder(OkxFrame)
+    decode_bingx = decoder(BingxFrame)
+    decode_bingx_book = decoder(BingxBookFrame)
+    decode_mexc_futures = decoder(MexcFuturesFrame)
+    decode_mexc_futures_raw = decoder(MexcFuturesFrameRaw)
+    decode_mexc_spot = decoder(MexcSpotFrame)
+    decode_mexc_book = decoder(MexcBookFrame)
+
+    def binance(raw):
+        try:
+            msg = decode_binance(raw)
+        except errors:
+            return None
+        data = msg.data or msg
+        if not data.s or data.b is None or data.a is None:
+            return None
+        return data.s, data.b, data.a, data.B, data.A, data.E
+
+    def binance_depth(raw):
+        try:
+            msg = decode_binance_depth(raw)
+        except errors:
+            return None
+        data = msg.data
+        if data is None:
+            return None
+        symbol = data.s or msg.stream.split("@", 1)[0].upper()
+        if not symbol:
+            return None
+        return symbol, data.bids or data.b, data.asks or data.a, data.E
+
+    def bybit(raw):
+        try:
+            msg = decode_bybit(raw)
+        except errors:
+            return None
+        data = msg.data
+        if data is None or not data.s or not msg.topic.startswith("orderbook."):
+            return None
+        return data.s, msg.type == "snapshot", data.u, data.b, data.a, msg.cts or msg.ts
+
+    def okx(raw):
+        try:
+            msg = decode_okx(raw)
+        except errors:
+            return None
+        if msg.event:
+            return msg.event, f"{msg.code} {msg.msg}".strip(), "", []
+        arg = msg.arg
+        if arg is None:
+            return "", "", "", []
+        channel = arg.channel
+        rows = []
+        try:
+            if channel == "tickers":
+                for it in msg.data:
+                    if not it.instId or not it.bidPx or not it.askPx:
+                        continue
+                    rows.append((
+                        it.instId,
+                        float(it.bidPx),
+                        float(it.askPx),
+                        float(it.bidSz or nan),
+                        float(it.askSz or nan),
+                        it.ts,
+                    ))
+            elif channel in OKX_BOOK_CHANNELS:
+                for it in msg.data:
+                    rows.append((
+                        it.instId or arg.instId,
+                        [(level[0], level[1]) for level in it.bids],
+                        [(level[0], level[1]) for level in it.asks],
+                        it.ts,
+                    ))
+        except (ValueError, IndexError):
+            return None
+        return "", "", channel, rows
+
+    def bingx(raw):
+        try:
+            obj = decode_bingx(raw)
+        except errors:
+            return None
+        data_type = obj.dataType or obj.topic
+        symbol = data_type.split("@", 1)[0] if "@" in data_type else data_type or obj.symbol
+        data = obj.data or obj
+        bid = _first(data.b, data.bid, data.bestBidPrice)
+        ask = _first(data.a, data.ask, data.bestAskPrice)
+        if not symbol or bid is None or ask is None:
+            return None
+        return symbol, bid, ask, _first(data.E, data.time, data.ts, data.T) or 0
+
+    def bingx_book(raw):
+        try:
+            msg = decode_bingx_book(raw)
+        except errors:
+            return None
+        data = msg.data
+        if data is None or not data.b or not data.a:
+            return None
+        symbol = data.s or msg.dataType.split("@", 1)[0]
+        if not symbol:
+            return None
+        return symbol, data.b, data.a, data.B, data.A, data.E or data.T
+
+    def mexc_futures(raw):
+        try:
+            msg = decode_mexc_futures(raw)
+        except errors:
+            # битая цена одного тикера не должна стоить всего кадра (~800
+            # контрактов): разбираем ещё раз с ценами как есть и пропускаем
+            # только этот тикер — как json/orjson
+            return mexc_futures_lenient(raw)
+        if msg.channel != "push.tickers" or not isinstance(msg.data, list):
+            return None
+        rows = []
+        for it in msg.data:
+            last = it.lastPrice
+            if not it.symbol or last is None:
+                continue
+            rows.append((
+                it.symbol,
+                last if it.maxBidPrice is None else it.maxBidPrice,
+                last if it.minAskPrice is None else it.minAskPrice,
+                it.timestamp,
+            ))
+        return rows
+
+    def mexc_futures_lenient(raw):
+        try:
+            msg = decode_mexc_futures_raw(raw)
+        except errors:
+            return None
+        if msg.channel != "push.tickers" or not isinstance(msg.data, list):
+            return None
+        rows = []
+        for it in msg.data:
+            last = _float(it.lastPrice)
+            if not it.symbol or last is None:
+                continue
+            bid = _float(it.maxBidPrice)
+            ask = _float(it.minAskPrice)
+            rows.append((
+                it.symbol,
+                last if bid is None else bid,
+                last if ask is None else ask,
+                it.timestamp,
+            ))
+        return rows
+
+    def mexc_spot(raw):
+        try:
+            msg = decode_mexc_spot(raw)
+        except errors:
+            return None
+        if not msg.channel.startswith("spot@public.miniTickers.v3.api") or msg.publicMiniTickers is None:
+            return None
+        ts = msg.sendTime
+        rows = []
+        for it in msg.publicMiniTickers.items:
+            if not it.symbol or not it.price:
+                continue
+            try:
+                rows.append((it.symbol, float(it.price), ts))
+            except ValueError:
+                continue
+        return rows
+
+    def mexc_book(raw):
+        try:
+            msg = decode_mexc_book(raw)
+        except errors:
+            return None
+        if msg.c != "spot@public.allBookTicker.v3.api":
+            return None
+        ts = msg.t
+        rows = []
+        for it in msg.d:
+            if not it.s or not it.b or not it.a:
+                continue
+            try:
+                rows.append((it.s, float(it.b), float(it.a), ts))
+            except ValueError:
+                continue
+        return rows
+
+    def mexc_depth(raw):
+        try:
+            msg = decode_mexc_depth(raw)
+        except errors:
+            return None
+        data = msg.data
+        if msg.channel != "push.depth.full" or not isinstance(data, MexcDepth) or not msg.symbol:
+            return None
+        try:
+            return (
+                msg.symbol,
+                [(level[0], level[1]) for level in data.bids],
+                [(level[0], level[1]) for level in data.asks],
+                msg.ts,
+            )
+        except IndexError:
+            return None
+
+    return {
+        "binance": binance,
+        "binance_depth": binance_depth,
+        "bybit": bybit,
+        "okx": okx,
+        "bingx": bingx,
+        "bingx_book": bingx_book,
+        "mexc_futures": mexc_futures,
+        "mexc_spot": mexc_spot,
+        "mexc_book": mexc_book,
+        "mexc_depth": mexc_depth,
+    }
+
+
+def make_parsers(backend: str) -> dict:
+    """
+    Набор парсеров {имя потока: функция} для заданного бэкенда.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"бэкенд {backend!r} недоступен, есть {BACKENDS}")
+    if backend == "msgspec":
+        return _msgspec_parsers()
+    if backend == "orjson":
+        return _dict_parsers(orjson.loads)
+    return _dict_parsers(json.loads)
+
+
+BACKEND = _pick_backend()
+PARSERS = make_parsers(BACKEND)
+
+parse_binance_bookticker = PARSERS["binance"]
+parse_binance_depth = PARSERS["binance_depth"]
+parse_bybit_orderbook = PARSERS["bybit"]
+parse_okx = PARSERS["okx"]
+parse_bingx_ticker = PARSERS["bingx"]
+parse_bingx_book_ticker = PARSERS["bingx_book"]
+parse_mexc_futures_tickers = PARSERS["mexc_futures"]
+parse_mexc_spot_minitickers = PARSERS["mexc_spot"]
+parse_mexc_all_book_ticker = PARSERS["mexc_book"]
+parse_mexc_depth = PARSERS["mexc_depth"]
+
+# Обычный loads выбранного бэкенда — для редких служебных сообщений
+if BACKEND == "msgspec":
+    loads = msgspec.json.decode
+elif BACKEND == "orjson":
+    loads = orjson.loads
+else:
+    loads = json.loads
@@ -0,0 +1,184 @@
+"""
+Гистограммы задержек по биржам/рынкам/соединениям.
+
+Гистограмма в стиле HDR: логарифмически-линейные корзины, 2^SUB_BITS
+корзин на каждую степень двойки, т.е. относительная ошибка квантиля
+не больше 1/2^SUB_BITS (~3%) на всём диапазоне от наносекунд до минут.
+Запись пачки значений — одна векторная операция (np.frexp + np.bincount).
+
+Этапы (все в нс, часы CLOCK_REALTIME — одинаковые у всех процессов хоста):
+
+    exchange→collector   recv_ns коллектора - exch_ts биржи
+    collector→kernel     SO_TIMESTAMPNS датаграммы в prices.py - recv_ns
+    kernel→store         момент применения пачки в prices.py - SO_TIMESTAMPNS
+    collector→store      момент применения пачки - recv_ns
+    total                момент применения пачки - exch_ts
+
+exchange→collector и total включают расхождение часов биржи и хоста,
+отрицательные значения (часы биржи впереди) считаются в negative и
+пишутся в нулевую корзину. Записи с FLAG_LOCAL_TS (биржа не прислала
+время события) в эти этапы не попадают, записи без recv_ns — в этапы
+от коллектора.
+"""
+
+import numpy as np
+
+from publisher import EXCHANGES, FLAG_LOCAL_TS, MARKETS
+
+SUB_BITS = 5
+SUB = 1 << SUB_BITS
+MAX_EXP = 42                       # до 2^42 нс ≈ 73 мин
+MAX_VALUE = (1 << MAX_EXP) - 1
+N_BUCKETS = (MAX_EXP - SUB_BITS + 1) * SUB
+
+STAGES = (
+    "exchange→collector",
+    "collector→kernel",
+    "kernel→store",
+    "collector→store",
+    "total",
+)
+
+QUANTILES = (("p50", 0.5), ("p99", 0.99), ("p99.9", 0.999))
+
+
+def bucket_indices(values: np.ndarray) -> np.ndarray:
+    v = np.clip(values, 0, MAX_VALUE).astype(np.int64)
+    _, bit_length = np.frexp(v.astype(np.float64))
+    shift = np.maximum(bit_length - 1 - SUB_BITS, 0)
+    # v < SUB: индекс = само значение; иначе блок по степени двойки + старшие SUB_BITS бит
+    return np.where(
+        v < SUB,
+        v,
+        (shift + 1) * SUB + ((v >> shift) - SUB),
+    )
+
+
+def bucket_upper(index: int) -> int:
+    if index < SUB:
+        return index
+    block, sub = divmod(index, SUB)
+    shift = block - 1
+    return ((sub + SUB + 1) << shift) - 1
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = np.zeros(N_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.negative = 0
+        self.max = 0
+
+    def record_many(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        self.negative += int(np.count_nonzero(values < 0))
+        self.counts += np.bincount(bucket_indices(values), minlength=N_BUCKETS)
+        self.count += len(values)
+        self.max = max(self.max, int(values.max()))
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts += other.counts
+        self.count += other.count
+        self.negative += other.negative
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        rank = int(np.ceil(q * self.count))
+        index = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        return min(bucket_upper(index), self.max)
+
+    def summary(self) -> dict:
+        out = {name: self.quantile(q) for name, q in QUANTILES}
+        out["max"] = self.max
+        out["count"] = self.count
+        out["negative"] = self.negative
+        return out
+
+
+class LatencyMonitor:
+    """
+    Гистограммы по ключу (этап, биржа, рынок, соединение).
+    Соединение — старший байт flags записи (publisher.conn_flags).
+    """
+
+    def __init__(self):
+        self.hists: dict[tuple[int, int, int, int], Histogram] = {}
+
+    def observe(self, records: np.ndarray, kernel_ns: np.ndarray | None, store_ns: int) -> None:
+        if not len(records):
+            return
+        flags = records["flags"].astype(np.int64)
+        group = (records["exchange"].astype(np.int64) * len(MARKETS) + records["market"]) * 256 + (flags >> 8)
+        recv_ns = records["recv_ns"]
+        exch_ns = records["exch_ts"] * 1_000_000
+        has_exch = (flags & FLAG_LOCAL_TS) == 0
+        has_recv = recv_ns > 0
+
+        # (этап, значения, какие записи учитывать)
+        stages = [
+            (0, recv_ns - exch_ns, has_exch & has_recv),
+            (3, store_ns - recv_ns, has_recv),
+            (4, store_ns - exch_ns, has_exch),
+        ]
+        if kernel_ns is not None:
+            stages.append((1, kernel_ns - recv_ns, has_recv))
+            stages.append((2, store_ns - kernel_ns, None))
+
+        uniq, inverse = np.unique(group, return_inverse=True)
+        for g_index, g in enumerate(uniq):
+            mask = inverse == g_index
+            rest, conn = divmod(int(g), 256)
+            ex, mk = divmod(rest, len(MARKETS))
+            for stage, values, valid in stages:
+                selected = values[mask if valid is None else mask & valid]
+                if len(selected):
+                    self._hist(stage, ex, mk, conn).record_many(selected)
+
+    def _hist(self, stage: int, ex: int, mk: int, conn: int) -> Histogram:
+        key = (stage, ex, mk, conn)
+        hist = self.hists.get(key)
+        if hist is None:
+            hist = self.hists[key] = Histogram()
+        return hist
+
+    def summary(self, per_connection: bool = False) -> dict:
+        """
+        {(EXCHANGE, market[, conn]): {этап: {"p50", "p99", "p99.9", "max", ...}}}, нс.
+        Без per_connection соединения одного рынка сливаются.
+        """
+        merged: dict[tuple, dict[str, Histogram]] = {}
+        for (stage, ex, mk, conn), hist in self.hists.items():
+            key = (EXCHANGES[ex], MARKETS[mk], conn) if per_connection else (EXCHANGES[ex], MARKETS[mk])
+            by_stage = merged.setdefault(key, {})
+            target = by_stage.get(STAGES[stage])
+            if target is None:
+                target = by_stage[STAGES[stage]] = Histogram()
+            target.merge(hist)
+        return {
+            key: {stage: hist.summary() for stage, hist in by_stage.items()}
+            for key, by_stage in sorted(merged.items())
+        }
+
+    def reset(self) -> None:
+        self.hists.clear()
+
+
+def format_summary(summary: dict) -> list[str]:
+    """
+    Строки для консоли: задержки в мс.
+    """
+    lines = []
+    for key, by_stage in summary.items():
+        parts = []
+        for stage in STAGES:
+            s = by_stage.get(stage)
+            if s is None:
+                continue
+            parts.append(
+                f"{stage} {s['p50'] / 1e6:.2f}/{s['p99'] / 1e6:.2f}/{s['p99.9'] / 1e6:.2f}"
+            )
+        lines.append(f"  {' '.join(str(k) for k in key):20} " + " | ".join(parts))
+    return lines
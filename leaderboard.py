@@ -0,0 +1,98 @@
+"""
+Лидерборд лучших спредов: индексированная max-куча по ногам.
+
+    update(leg, key)  — O(log n): значение ноги меняется на месте,
+                        элемент просеивается вверх/вниз по куче
+    top(k)            — O(k log k): обход кучи от корня с маленькой
+                        кучей кандидатов; при k в десятки это те же O(k)
+
+Позиция каждой ноги в куче хранится в pos, поэтому ни поиска, ни
+пересортировки всей таблицы на тик нет. NaN (нет котировки) = -inf,
+такие ноги лежат на дне кучи.
+"""
+
+import heapq
+import math
+
+NEG_INF = float("-inf")
+
+
+class Leaderboard:
+    def __init__(self, n: int):
+        self.n = n
+        self.keys = [NEG_INF] * n       # значение по ноге
+        self.heap = list(range(n))      # heap[i] = нога
+        self.pos = list(range(n))       # pos[нога] = i
+
+    def update(self, leg: int, key: float) -> None:
+        if key != key:  # NaN
+            key = NEG_INF
+        keys = self.keys
+        old = keys[leg]
+        if key == old:
+            return
+        keys[leg] = key
+        if key > old:
+            self._sift_up(self.pos[leg])
+        else:
+            self._sift_down(self.pos[leg])
+
+    def update_many(self, legs, values) -> None:
+        update = self.update
+        for leg, key in zip(legs, values):
+            update(leg, key)
+
+    def _sift_up(self, i: int) -> None:
+        heap, pos, keys = self.heap, self.pos, self.keys
+        leg = heap[i]
+        key = keys[leg]
+        while i:
+            parent = (i - 1) >> 1
+            p_leg = heap[parent]
+            if keys[p_leg] >= key:
+                break
+            heap[i] = p_leg
+            pos[p_leg] = i
+            i = parent
+        heap[i] = leg
+        pos[leg] = i
+
+    def _sift_down(self, i: int) -> None:
+        heap, pos, keys = self.heap, self.pos, self.keys
+        n = self.n
+        leg = heap[i]
+        key = keys[leg]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            right = child + 1
+            if right < n and keys[heap[right]] > keys[heap[child]]:
+                child = right
+            c_leg = heap[child]
+            if keys[c_leg] <= key:
+                break
+            heap[i] = c_leg
+            pos[c_leg] = i
+            i = child
+        heap[i] = leg
+        pos[leg] = i
+
+    def top(self, k: int) -> list[tuple[int, float]]:
+        """
+        k лучших [(нога, значение), ...] по убыванию, без ног с -inf.
+        """
+        heap, keys = self.heap, self.keys
+        out: list[tuple[int, float]] = []
+        if not self.n:
+            return out
+        candidates = [(-keys[heap[0]], 0)]
+        while candidates and len(out) < k:
+            neg_key, i = heapq.heappop(candidates)
+            if neg_key == math.inf:
+                break
+            out.append((heap[i], -neg_key))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < self.n:
+                    heapq.heappush(candidates, (-keys[heap[child]], child))
+        return out
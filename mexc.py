@@ -1,9 +1,19 @@
 import asyncio
 import json
 import time
+import urllib.request
 
 import websockets  # pip install websockets
 
+from connection import WarmConnection, report_loop
+from fastjson import loads, parse_mexc_depth, parse_mexc_futures_tickers
+from mexc_pb import parse_book_ticker, parse_mini_tickers
+from publisher import FUTURES, SPOT, Publisher, conn_flags
+from redundancy import FirstArrivalMerge, format_summary, replica_connect_kwargs
+from sharding import RateBook, shard_by_rate
+from subscriptions import LiveShards, Shard, SymbolWatch, refresh_lookup
+from symbols import load_registry
+
 # ================= БАЗОВЫЕ НАСТРОЙКИ =================
 
 SPOT_WS_URL = "wss://wbs-api.mexc.com/ws"
@@ -12,11 +22,42 @@ FUTURES_WS_URL = "wss://contract.mexc.com/edge"
 SPOT_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/mexc_spot_all.txt"       # 2059 пар, по одной в строке: BTCUSDT
 FUTURES_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/mexc_futures_all.txt" # 826 контрактов: BTC_USDT
 
+# Spot-каналы MEXC — protobuf (разбор в mexc_pb.py):
+#   "book"        — aggre.bookTicker по каждому символу: настоящие bid/ask
+#                   раз в SPOT_BOOK_INTERVAL; символы делятся на соединения
+#                   по SPOT_SUBS_PER_CONN (лимит MEXC — 30 подписок на соединение)
+#   "minitickers" — все пары одним каналом раз в ~3 с, только last (bid=ask)
+SPOT_MODE = "book"
+SPOT_BOOK_INTERVAL = "100ms"  # "10ms" или "100ms"
+SPOT_SUBS_PER_CONN = 30
+SPOT_CONNECT_DELAY = 0.2  # пауза между стартами spot-соединений, с
+
 SPOT_TIMEZONE = "UTC+3"  # для miniTickers, влияет только на % изменения, не на цену
 
+# Как часто сохранять частоты сообщений по символам (для раскладки по соединениям)
+RATES_SAVE_INTERVAL = 60
+
 SPOT_PING_INTERVAL = 20
 FUTURES_PING_INTERVAL = 20
 
+# Горячий резерв (redundancy.py): одинаковые соединения, наружу уходит
+# первая копия каждого обновления. REPLICAS — для futures tickers и
+# spot miniTickers, SPOT_BOOK_REPLICAS — для каждой группы aggre.bookTicker.
+# Реплики по возможности идут на разные IP из DNS.
+REPLICAS = 2
+SPOT_BOOK_REPLICAS = 1
+REPLICA_DISTINCT_IPS = True
+REPLICA_REPORT_INTERVAL = 60
+
+# Стаканы фьючерсов (sub.depth.full, DEPTH_LIMIT уровней) для исполнимых
+# спредов в prices.py. Подписка по одному контракту, контракты делятся
+# на соединения по DEPTH_SYMBOLS_PER_CONN. Объём у MEXC в контрактах —
+# переводится в базовую монету по contractSize из REST (один запрос на старте).
+DEPTH_ENABLED = False
+DEPTH_LIMIT = 5
+DEPTH_SYMBOLS_PER_CONN = 200
+CONTRACT_DETAIL_URL = "https://contract.mexc.com/api/v1/contract/detail"
+
 
 # ================= УТИЛИТЫ =================
 
@@ -30,31 +71,36 @@ def load_symbols(path: str) -> set[str]:
     return symbols
 
 
-def current_ts_ms() -> int:
-    return int(time.time() * 1000)
+def load_contract_sizes() -> dict[str, float]:
+    """
+    Контракт (BTC_USDT) -> contractSize, размер контракта в базовой монете.
+    """
+    with urllib.request.urlopen(CONTRACT_DETAIL_URL, timeout=10) as resp:
+        payload = json.load(resp)
+    data = payload.get("data") or []
+    if isinstance(data, dict):
+        data = [data]
+    return {c["symbol"]: float(c["contractSize"]) for c in data if c.get("symbol") and c.get("contractSize")}
 
 
-def handle_price(exchange: str,
-                 market: str,
-                 symbol: str,
+def handle_price(publisher: Publisher,
+                 market_id: int,
+                 symbol_id: int,
                  bid: float,
                  ask: float,
-                 ts: int | None) -> None:
+                 ts: int | None,
+                 recv_ns: int,
+                 conn_id: int) -> None:
     """
-    Здесь только формируем строку и печатаем.
-    Никаких файлов/сокетов внутри WS-цикла, чтобы не тормозить.
+    Здесь только кладём запись в буфер publisher.
+    Никаких файлов/print внутри WS-цикла, чтобы не тормозить:
+    датаграмма уйдёт пачкой после обработки всего фрейма.
+    Без ts биржи publisher подставит время приёма и пометит запись FLAG_LOCAL_TS.
     """
-    if ts is None or ts == 0:
-        ts = current_ts_ms()
-    line = f"{exchange},{market},{symbol},{bid},{ask},{ts}"
-    print(line, flush=True)
-    # Если нужно писать в файл — делай это в отдельном потоке/скрипте.
-    # Простой вариант (НЕ РЕКОМЕНДУЮ внутри WS-цикла):
-    # with open("mexc_prices.txt", "a", encoding="utf-8") as f:
-    #     f.write(line + "\n")
+    publisher.publish(market_id, symbol_id, bid, ask, exch_ts=ts or 0, recv_ns=recv_ns, flags=conn_flags(conn_id))
 
 
-# ================= SPOT: 2 WS, miniTickers =================
+# ================= SPOT =================
 
 async def spot_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int) -> None:
     while True:
@@ -66,69 +112,135 @@ async def spot_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int) -
             break
 
 
-async def run_spot_connection(conn_id: int, symbols: set[str]) -> None:
-    """
-    Один WS-коннект на miniTickers (все пары каждые ~3 с).
-    Мы держим два таких коннекта (conn_id=1 и 2) для резервирования.
-    """
-    while True:
-        try:
-            async with websockets.connect(
-                SPOT_WS_URL,
-                ping_interval=None,  # управляем PING сами
-            ) as ws:
-                sub_msg = {
-                    "method": "SUBSCRIPTION",
-                    "params": [f"spot@public.miniTickers.v3.api.pb@{SPOT_TIMEZONE}"],
-                }
-                await ws.send(json.dumps(sub_msg))
-
-                # отдельная задача для ping
-                asyncio.create_task(spot_ping_loop(ws, conn_id))
-
-                async for raw in ws:
-                    try:
-                        msg = json.loads(raw)
-                    except Exception:
-                        continue
-
-                    channel = msg.get("channel", "")
-                    if not channel.startswith("spot@public.miniTickers.v3.api.pb@"):
-                        continue
-
-                    send_time = msg.get("sendTime")
-                    items = msg.get("publicMiniTickers", {}).get("items", [])
+def spot_book_channel(symbol: str) -> str:
+    return f"spot@public.aggre.bookTicker.v3.api.pb@{SPOT_BOOK_INTERVAL}@{symbol}"
 
-                    for it in items:
-                        symbol = it.get("symbol")
-                        if symbol not in symbols:
-                            continue
 
-                        price_str = it.get("price")
-                        if not price_str:
-                            continue
-
-                        try:
-                            price = float(price_str)
-                        except ValueError:
-                            continue
-
-                        # У miniTickers нет bid/ask → считаем bid=ask=last
-                        handle_price(
-                            exchange="MEXC",
-                            market="SPOT",
-                            symbol=symbol,
-                            bid=price,
-                            ask=price,
-                            ts=int(send_time) if send_time else None,
-                        )
-
-        except Exception as e:
-            print(f"SPOT[{conn_id}] error: {e}, reconnect in 5s", flush=True)
-            await asyncio.sleep(5)
+def check_spot_reply(raw: bytes, name: str) -> None:
+    """
+    Текстовый ответ MEXC spot (подписка, PONG). Отказ в подписке печатаем:
+    без него соединение молча не получает часть символов.
+    """
+    try:
+        msg = loads(raw).get("msg", "")
+    except (ValueError, AttributeError):
+        return
+    if "Not Subscribed" in msg or "Blocked" in msg:
+        print(f"{name} subscription rejected: {msg}", flush=True)
+
+
+def spot_book_message(symbols: list[str], method: str = "SUBSCRIPTION") -> str:
+    return json.dumps({
+        "method": method,
+        "params": [spot_book_channel(s) for s in symbols],
+    })
+
+
+async def run_spot_book_connection(
+    conn_id: int,
+    shard: Shard,
+    symbols: dict[str, int],
+    publisher: Publisher,
+    rate_book: RateBook,
+    start_delay: float = 0.0,
+    connect_kwargs: dict | None = None,
+) -> None:
+    """
+    Один WS-коннект на aggre.bookTicker группы символов shard.symbols (не
+    больше SPOT_SUBS_PER_CONN): лучшие bid/ask по каждому символу.
+    symbols — таблица символ -> id всего рынка.
+    """
+    name = f"SPOT-BOOK[{conn_id}]"
+    flags = conn_flags(conn_id)
+    publish = publisher.publish
+    observe = rate_book.observe
 
+    async def subscribe(ws) -> None:
+        # текущий состав шарда: списки могли поменяться на ходу
+        await ws.send(spot_book_message(shard.symbols))
 
-# ================= FUTURES: 2 WS, sub.tickers =================
+    async def read(link) -> None:
+        ping_task = asyncio.create_task(spot_ping_loop(link.ws, conn_id))
+        try:
+            async for raw in link.frames():
+                recv_ns = time.time_ns()
+                parsed = parse_book_ticker(raw)
+                if parsed is None:
+                    if raw[:1] == b"{":
+                        check_spot_reply(raw, name)
+                    continue
+                symbol, bid, ask, bid_qty, ask_qty, ts = parsed
+                symbol_id = symbols.get(symbol)
+                if symbol_id is None:
+                    continue
+                observe(symbol)
+                publish(SPOT, symbol_id, bid, ask, bid_qty, ask_qty, ts, recv_ns, flags)
+        finally:
+            ping_task.cancel()
+
+    await asyncio.sleep(start_delay)
+    conn = WarmConnection(
+        name, SPOT_WS_URL, read, subscribe,
+        ping_interval=None,  # управляем PING сами
+        **(connect_kwargs or {}),
+    )
+    shard.conns.append(conn)
+    await conn.run()
+
+
+async def run_spot_connection(
+    conn_id: int,
+    symbols: dict[str, int],
+    publisher: Publisher,
+    connect_kwargs: dict | None = None,
+) -> None:
+    """
+    Один WS-коннект на miniTickers (все пары каждые ~3 с), SPOT_MODE = "minitickers".
+    Таких коннектов REPLICAS — реплики одного потока (redundancy.py).
+    """
+    async def subscribe(ws) -> None:
+        sub_msg = {
+            "method": "SUBSCRIPTION",
+            "params": [f"spot@public.miniTickers.v3.api.pb@{SPOT_TIMEZONE}"],
+        }
+        await ws.send(json.dumps(sub_msg))
+
+    async def read(link) -> None:
+        # отдельная задача для ping
+        ping_task = asyncio.create_task(spot_ping_loop(link.ws, conn_id))
+        try:
+            async for raw in link.frames():
+                recv_ns = time.time_ns()
+                rows = parse_mini_tickers(raw)
+                if not rows:
+                    continue
+
+                for symbol, price, ts in rows:
+                    symbol_id = symbols.get(symbol)
+                    if symbol_id is None:
+                        continue
+                    # У miniTickers нет bid/ask → считаем bid=ask=last
+                    handle_price(
+                        publisher,
+                        market_id=SPOT,
+                        symbol_id=symbol_id,
+                        bid=price,
+                        ask=price,
+                        ts=ts,
+                        recv_ns=recv_ns,
+                        conn_id=conn_id,
+                    )
+        finally:
+            ping_task.cancel()
+
+    await WarmConnection(
+        f"SPOT[{conn_id}]", SPOT_WS_URL, read, subscribe,
+        ping_interval=None,  # управляем PING сами
+        **(connect_kwargs or {}),
+    ).run()
+
+
+# ================= FUTURES: sub.tickers =================
 
 async def futures_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int) -> None:
     while True:
@@ -139,93 +251,253 @@ async def futures_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int
             break
 
 
-async def run_futures_connection(conn_id: int, contracts: set[str]) -> None:
+async def run_futures_connection(
+    conn_id: int,
+    contracts: dict[str, int],
+    publisher: Publisher,
+    connect_kwargs: dict | None = None,
+) -> None:
     """
     Один WS-коннект на sub.tickers (все контракты каждые ~1 с).
-    Два коннекта (1 и 2) – резерв/распараллеливание, но логика одинакова.
+    Таких коннектов REPLICAS — реплики одного потока, publisher у каждой
+    своя реплика FirstArrivalMerge.
     """
-    while True:
+    async def subscribe(ws) -> None:
+        sub_msg = {
+            "method": "sub.tickers",
+            "param": {},   # все контракты
+            "gzip": False  # удобнее парсить
+        }
+        await ws.send(json.dumps(sub_msg))
+
+    async def read(link) -> None:
+        ping_task = asyncio.create_task(futures_ping_loop(link.ws, conn_id))
         try:
-            async with websockets.connect(
-                FUTURES_WS_URL,
-                ping_interval=None,
-            ) as ws:
-                sub_msg = {
-                    "method": "sub.tickers",
-                    "param": {},   # все контракты
-                    "gzip": False  # удобнее парсить
-                }
-                await ws.send(json.dumps(sub_msg))
-
-                asyncio.create_task(futures_ping_loop(ws, conn_id))
-
-                async for raw in ws:
-                    try:
-                        msg = json.loads(raw)
-                    except Exception:
+            async for raw in link.frames():
+                recv_ns = time.time_ns()
+                rows = parse_mexc_futures_tickers(raw)
+                if not rows:
+                    continue
+
+                for symbol, bid, ask, ts in rows:
+                    symbol_id = contracts.get(symbol)
+                    if symbol_id is None:
                         continue
+                    handle_price(
+                        publisher,
+                        market_id=FUTURES,
+                        symbol_id=symbol_id,
+                        bid=bid,
+                        ask=ask,
+                        ts=ts,
+                        recv_ns=recv_ns,
+                        conn_id=conn_id,
+                    )
+        finally:
+            ping_task.cancel()
+
+    await WarmConnection(
+        f"FUTURES[{conn_id}]", FUTURES_WS_URL, read, subscribe,
+        ping_interval=None,
+        **(connect_kwargs or {}),
+    ).run()
+
+
+# ================= FUTURES: стаканы, sub.depth.full =================
+
+def depth_message(symbol: str, method: str = "sub.depth.full") -> str:
+    return json.dumps({
+        "method": method,
+        "param": {"symbol": symbol, "limit": DEPTH_LIMIT},
+    })
+
+
+async def run_futures_depth_connection(
+    conn_id: int,
+    shard: Shard,
+    contracts: dict[str, int],
+    sizes: dict[str, float],
+    publisher: Publisher,
+) -> None:
+    """
+    Один WS-коннект на стаканы группы контрактов shard.symbols (push.depth.full).
+    contracts — таблица контракт -> id всего рынка.
+    """
+    flags = conn_flags(conn_id)
 
-                    if msg.get("channel") != "push.tickers":
-                        continue
+    async def subscribe(ws) -> None:
+        for symbol in list(shard.symbols):
+            await ws.send(depth_message(symbol))
 
-                    data = msg.get("data", [])
-                    for it in data:
-                        symbol = it.get("symbol")
-                        if symbol not in contracts:
-                            continue
-
-                        last = it.get("lastPrice")
-                        bid = it.get("maxBidPrice")
-                        ask = it.get("minAskPrice")
-
-                        if last is None:
-                            continue
-
-                        try:
-                            last_f = float(last)
-                        except ValueError:
-                            continue
-
-                        try:
-                            bid_f = float(bid) if bid is not None else last_f
-                        except ValueError:
-                            bid_f = last_f
-
-                        try:
-                            ask_f = float(ask) if ask is not None else last_f
-                        except ValueError:
-                            ask_f = last_f
-
-                        ts = it.get("timestamp")
-                        handle_price(
-                            exchange="MEXC",
-                            market="FUTURES",
-                            symbol=symbol,
-                            bid=bid_f,
-                            ask=ask_f,
-                            ts=int(ts) if ts else None,
-                        )
-
-        except Exception as e:
-            print(f"FUTURES[{conn_id}] error: {e}, reconnect in 5s", flush=True)
-            await asyncio.sleep(5)
+    async def read(link) -> None:
+        ping_task = asyncio.create_task(futures_ping_loop(link.ws, conn_id))
+        try:
+            async for raw in link.frames():
+                recv_ns = time.time_ns()
+                parsed = parse_mexc_depth(raw)
+                if parsed is None:
+                    continue
+                symbol, bids, asks, ts = parsed
+                symbol_id = contracts.get(symbol)
+                size = sizes.get(symbol)
+                if symbol_id is None or size is None:
+                    continue
+                publisher.publish_depth(
+                    FUTURES,
+                    symbol_id,
+                    [(p, q * size) for p, q in bids],
+                    [(p, q * size) for p, q in asks],
+                    ts,
+                    recv_ns,
+                    flags,
+                )
+        finally:
+            ping_task.cancel()
+
+    conn = WarmConnection(f"FUTURES-DEPTH[{conn_id}]", FUTURES_WS_URL, read, subscribe, ping_interval=None)
+    shard.conns.append(conn)
+    await conn.run()
+
+
+async def replica_report_loop(merges: list[FirstArrivalMerge]) -> None:
+    while True:
+        await asyncio.sleep(REPLICA_REPORT_INTERVAL)
+        for merge in merges:
+            for line in format_summary(merge):
+                print(f"[REPLICA] {line}", flush=True)
+
+
+async def save_rates_loop(rate_book: RateBook) -> None:
+    while True:
+        await asyncio.sleep(RATES_SAVE_INTERVAL)
+        try:
+            rate_book.save()
+        except OSError as e:
+            print(f"[RATES] Не удалось сохранить {rate_book.path}: {e!r}")
 
 
 # ================= MAIN =================
 
 async def main() -> None:
-    spot_symbols = load_symbols(SPOT_SYMBOLS_FILE)          # 2059 пар
-    futures_contracts = load_symbols(FUTURES_SYMBOLS_FILE)  # 826 контрактов
-
-    tasks = [
-        # 2 WS на SPOT (miniTickers)
-        asyncio.create_task(run_spot_connection(1, spot_symbols)),
-        asyncio.create_task(run_spot_connection(2, spot_symbols)),
-
-        # 2 WS на FUTURES (sub.tickers)
-        asyncio.create_task(run_futures_connection(1, futures_contracts)),
-        asyncio.create_task(run_futures_connection(2, futures_contracts)),
-    ]
+    registry = load_registry()
+    spot_list = load_symbols(SPOT_SYMBOLS_FILE)
+    futures_list = load_symbols(FUTURES_SYMBOLS_FILE)
+    # символ в виде биржи -> id (BTCUSDT / BTC_USDT), заодно фильтр по списку;
+    # при изменении списков дополняется на месте (subscriptions.refresh_lookup)
+    spot_symbols = registry.lookup("MEXC", "spot", spot_list)               # 2059 пар
+    futures_contracts = registry.lookup("MEXC", "futures", futures_list)    # 826 контрактов
+
+    publisher = Publisher("MEXC")
+    watch = SymbolWatch()
+
+    tasks = []
+    merges = []
+    # на ходу меняются: спотовые bookTicker и стаканы — подписками;
+    # sub.tickers и miniTickers несут весь рынок — им хватает таблиц выше
+    spot_books: list[LiveShards] = []
+    futures_books: list[LiveShards] = []
+    starting = True
+
+    # FUTURES (sub.tickers): REPLICAS реплик одного потока
+    futures_merge = FirstArrivalMerge(publisher, "FUTURES", REPLICAS)
+    merges.append(futures_merge)
+    for r, kwargs in enumerate(replica_connect_kwargs(FUTURES_WS_URL, REPLICAS, REPLICA_DISTINCT_IPS)):
+        tasks.append(asyncio.create_task(
+            run_futures_connection(r + 1, futures_contracts, futures_merge.replica(r), kwargs)
+        ))
+
+    spot_kwargs = replica_connect_kwargs(
+        SPOT_WS_URL, REPLICAS if SPOT_MODE != "book" else SPOT_BOOK_REPLICAS, REPLICA_DISTINCT_IPS
+    )
+
+    if SPOT_MODE == "book":
+        # горячие символы разносятся по соединениям по сохранённым частотам
+        rate_book = RateBook("MEXC", "spot")
+        shards = shard_by_rate(list(spot_symbols), rate_book.rates, 1, max_per_shard=SPOT_SUBS_PER_CONN)
+        print(f"[INIT] SPOT aggre.bookTicker@{SPOT_BOOK_INTERVAL}: {len(spot_symbols)} пар, {len(shards)} соединений")
+        # символы у групп не пересекаются — одного слияния на все группы хватает
+        spot_merge = FirstArrivalMerge(publisher, "SPOT-BOOK", SPOT_BOOK_REPLICAS)
+        if SPOT_BOOK_REPLICAS > 1:
+            merges.append(spot_merge)
+
+        def start_spot_book(shard: Shard) -> None:
+            i = shard.index
+            for r, kwargs in enumerate(spot_kwargs):
+                replica = spot_merge.replica(r) if SPOT_BOOK_REPLICAS > 1 else publisher
+                delay = (i * SPOT_BOOK_REPLICAS + r if starting else r) * SPOT_CONNECT_DELAY
+                shard.tasks.append(asyncio.create_task(run_spot_book_connection(
+                    i * SPOT_BOOK_REPLICAS + r + 1, shard, spot_symbols, replica, rate_book, delay, kwargs,
+                )))
+
+        async def send_spot_book(shard: Shard, symbols: list[str], method: str) -> None:
+            await shard.send(spot_book_message(symbols, method))
+
+        spot_books.append(LiveShards(
+            "MEXC spot bookTicker", shards, start_spot_book,
+            lambda shard, symbols: send_spot_book(shard, symbols, "SUBSCRIPTION"),
+            lambda shard, symbols: send_spot_book(shard, symbols, "UNSUBSCRIPTION"),
+            capacity=SPOT_SUBS_PER_CONN, rates=rate_book.rates,
+        ))
+        tasks.append(asyncio.create_task(save_rates_loop(rate_book)))
+    else:
+        # SPOT (miniTickers): REPLICAS реплик одного потока
+        spot_merge = FirstArrivalMerge(publisher, "SPOT", REPLICAS)
+        merges.append(spot_merge)
+        for r, kwargs in enumerate(spot_kwargs):
+            tasks.append(asyncio.create_task(
+                run_spot_connection(r + 1, spot_symbols, spot_merge.replica(r), kwargs)
+            ))
+
+    sizes: dict[str, float] = {}
+    if DEPTH_ENABLED:
+        sizes.update(load_contract_sizes())
+        names = list(futures_contracts)
+        groups = [names[i:i + DEPTH_SYMBOLS_PER_CONN] for i in range(0, len(names), DEPTH_SYMBOLS_PER_CONN)]
+
+        def start_depth(shard: Shard) -> None:
+            conn_id = REPLICAS + 1 + shard.index
+            shard.tasks.append(asyncio.create_task(
+                run_futures_depth_connection(conn_id, shard, futures_contracts, sizes, publisher)
+            ))
+
+        async def send_depth(shard: Shard, symbols: list[str], method: str) -> None:
+            for symbol in symbols:
+                await shard.send(depth_message(symbol, method))
+
+        futures_books.append(LiveShards(
+            "MEXC futures depth", groups, start_depth,
+            lambda shard, symbols: send_depth(shard, symbols, "sub.depth.full"),
+            lambda shard, symbols: send_depth(shard, symbols, "unsub.depth.full"),
+            capacity=DEPTH_SYMBOLS_PER_CONN,
+        ))
+
+    for book in spot_books + futures_books:
+        book.start_all()
+    starting = False
+
+    async def reload_spot(added: list[str], removed: list[str]) -> None:
+        added = refresh_lookup(spot_symbols, "MEXC", "spot", added, removed)
+        for book in spot_books:
+            await book.apply(added, removed)
+
+    async def reload_futures(added: list[str], removed: list[str]) -> None:
+        added = refresh_lookup(futures_contracts, "MEXC", "futures", added, removed)
+        if added and futures_books:
+            # размер контракта новых — иначе их стакан не публикуется
+            try:
+                sizes.update(await asyncio.to_thread(load_contract_sizes))
+            except Exception as e:
+                print(f"[DEPTH] не удалось обновить размеры контрактов: {e!r}")
+        for book in futures_books:
+            await book.apply(added, removed)
+
+    watch.add(SPOT_SYMBOLS_FILE, spot_list, reload_spot, reader=load_symbols)
+    watch.add(FUTURES_SYMBOLS_FILE, futures_list, reload_futures, reader=load_symbols)
+    tasks.append(asyncio.create_task(watch.run()))
+
+    if merges:
+        tasks.append(asyncio.create_task(replica_report_loop(merges)))
+    tasks.append(asyncio.create_task(report_loop()))
 
     await asyncio.gather(*tasks)
 
@@ -4,6 +4,11 @@ import time
 
 import websockets  # pip install websockets
 
+from fastjson import frames, parse_mexc_all_book_ticker, parse_mexc_futures_tickers
+from publisher import FUTURES, SPOT, Publisher, conn_flags
+from subscriptions import SymbolWatch, refresh_lookup
+from symbols import load_registry
+
 # ================= БАЗОВЫЕ НАСТРОЙКИ =================
 
 SPOT_WS_URL = "wss://wbs-api.mexc.com/ws"
@@ -26,20 +31,15 @@ def load_symbols(path: str) -> set[str]:
                 symbols.add(s)
     return symbols
 
-def current_ts_ms() -> int:
-    return int(time.time() * 1000)
-
-def handle_price(exchange: str,
-                 market: str,
-                 symbol: str,
+def handle_price(publisher: Publisher,
+                 market_id: int,
+                 symbol_id: int,
                  bid: float,
                  ask: float,
-                 ts: int | None) -> None:
-    symbol = symbol.replace("_", "")  # Убираем "_" только перед выводом
-    if ts is None or ts == 0:
-        ts = current_ts_ms()
-    line = f"{exchange},{market},{symbol},{bid},{ask},{ts}"
-    print(line, flush=True)
+                 ts: int | None,
+                 recv_ns: int,
+                 conn_id: int) -> None:
+    publisher.publish(market_id, symbol_id, bid, ask, exch_ts=ts or 0, recv_ns=recv_ns, flags=conn_flags(conn_id))
 
 # ================= SPOT: 2 WS, allBookTicker =================
 
@@ -51,7 +51,7 @@ async def spot_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int) -
         except Exception:
             break
 
-async def run_spot_connection(conn_id: int, symbols: set[str]) -> None:
+async def run_spot_connection(conn_id: int, symbols: dict[str, int], publisher: Publisher) -> None:
     while True:
         try:
             async with websockets.connect(
@@ -66,42 +66,25 @@ async def run_spot_connection(conn_id: int, symbols: set[str]) -> None:
 
                 asyncio.create_task(spot_ping_loop(ws, conn_id))
 
-                async for raw in ws:
-                    try:
-                        msg = json.loads(raw)
-                    except Exception:
-                        continue
-
-                    if msg.get("c") != "spot@public.allBookTicker.v3.api":
+                async for raw in frames(ws):
+                    recv_ns = time.time_ns()
+                    rows = parse_mexc_all_book_ticker(raw)
+                    if not rows:
                         continue
 
-                    data = msg.get("d", [])
-                    ts = msg.get("t")
-
-                    for it in data:
-                        symbol = it.get("s")
-                        if symbol not in symbols:
-                            continue
-
-                        bid_str = it.get("b")
-                        ask_str = it.get("a")
-
-                        if not bid_str or not ask_str:
-                            continue
-
-                        try:
-                            bid = float(bid_str)
-                            ask = float(ask_str)
-                        except ValueError:
+                    for symbol, bid, ask, ts in rows:
+                        symbol_id = symbols.get(symbol)
+                        if symbol_id is None:
                             continue
-
                         handle_price(
-                            exchange="MEXC",
-                            market="SPOT",
-                            symbol=symbol,
+                            publisher,
+                            market_id=SPOT,
+                            symbol_id=symbol_id,
                             bid=bid,
                             ask=ask,
-                            ts=int(ts) if ts else None,
+                            ts=ts,
+                            recv_ns=recv_ns,
+                            conn_id=conn_id,
                         )
 
         except Exception as e:
@@ -118,7 +101,7 @@ async def futures_ping_loop(ws: websockets.WebSocketClientProtocol, conn_id: int
         except Exception:
             break
 
-async def run_futures_connection(conn_id: int, contracts: set[str]) -> None:
+async def run_futures_connection(conn_id: int, contracts: dict[str, int], publisher: Publisher) -> None:
     while True:
         try:
             async with websockets.connect(
@@ -134,51 +117,25 @@ async def run_futures_connection(conn_id: int, contracts: set[str]) -> None:
 
                 asyncio.create_task(futures_ping_loop(ws, conn_id))
 
-                async for raw in ws:
-                    try:
-                        msg = json.loads(raw)
-                    except Exception:
+                async for raw in frames(ws):
+                    recv_ns = time.time_ns()
+                    rows = parse_mexc_futures_tickers(raw)
+                    if not rows:
                         continue
 
-                    if msg.get("channel") != "push.tickers":
-                        continue
-
-                    data = msg.get("data", [])
-                    for it in data:
-                        symbol = it.get("symbol")
-                        if symbol not in contracts:
+                    for symbol, bid, ask, ts in rows:
+                        symbol_id = contracts.get(symbol)
+                        if symbol_id is None:
                             continue
-
-                        last = it.get("lastPrice")
-                        bid = it.get("maxBidPrice")
-                        ask = it.get("minAskPrice")
-
-                        if last is None:
-                            continue
-
-                        try:
-                            last_f = float(last)
-                        except ValueError:
-                            continue
-
-                        try:
-                            bid_f = float(bid) if bid is not None else last_f
-                        except ValueError:
-                            bid_f = last_f
-
-                        try:
-                            ask_f = float(ask) if ask is not None else last_f
-                        except ValueError:
-                            ask_f = last_f
-
-                        ts = it.get("timestamp")
                         handle_price(
-                            exchange="MEXC",
-                            market="FUTURES",
-                            symbol=symbol,
-                            bid=bid_f,
-                            ask=ask_f,
-                            ts=int(ts) if ts else None,
+                            publisher,
+                            market_id=FUTURES,
+                            symbol_id=symbol_id,
+                            bid=bid,
+                            ask=ask,
+                            ts=ts,
+                            recv_ns=recv_ns,
+                            conn_id=conn_id,
                         )
 
         except Exception as e:
@@ -188,14 +145,31 @@ async def run_futures_connection(conn_id: int, contracts: set[str]) -> None:
 # ================= MAIN =================
 
 async def main() -> None:
-    spot_symbols = load_symbols(SPOT_SYMBOLS_FILE)
-    futures_contracts = load_symbols(FUTURES_SYMBOLS_FILE)
+    registry = load_registry()
+    spot_list = load_symbols(SPOT_SYMBOLS_FILE)
+    futures_list = load_symbols(FUTURES_SYMBOLS_FILE)
+    spot_symbols = registry.lookup("MEXC", "spot", spot_list)
+    futures_contracts = registry.lookup("MEXC", "futures", futures_list)
+
+    publisher = Publisher("MEXC")
+
+    # потоки здесь по всему рынку: изменение списков — только таблицы символ -> id
+    async def reload_spot(added, removed) -> None:
+        refresh_lookup(spot_symbols, "MEXC", "spot", added, removed)
+
+    async def reload_futures(added, removed) -> None:
+        refresh_lookup(futures_contracts, "MEXC", "futures", added, removed)
+
+    watch = SymbolWatch()
+    watch.add(SPOT_SYMBOLS_FILE, spot_list, reload_spot, reader=load_symbols)
+    watch.add(FUTURES_SYMBOLS_FILE, futures_list, reload_futures, reader=load_symbols)
 
     tasks = [
-        asyncio.create_task(run_spot_connection(1, spot_symbols)),
-        asyncio.create_task(run_spot_connection(2, spot_symbols)),
-        asyncio.create_task(run_futures_connection(1, futures_contracts)),
-        asyncio.create_task(run_futures_connection(2, futures_contracts)),
+        asyncio.create_task(watch.run()),
+        asyncio.create_task(run_spot_connection(1, spot_symbols, publisher)),
+        asyncio.create_task(run_spot_connection(2, spot_symbols, publisher)),
+        asyncio.create_task(run_futures_connection(1, futures_contracts, publisher)),
+        asyncio.create_task(run_futures_connection(2, futures_contracts, publisher)),
     ]
 
     await asyncio.gather(*tasks)
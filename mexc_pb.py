@@ -0,0 +1,308 @@
+"""
+Разбор protobuf push-сообщений MEXC spot (каналы *.v3.api.pb).
+
+MEXC шлёт котировки spot только в protobuf: бинарный кадр — это
+PushDataV3ApiWrapper (схема — proto/PushDataV3ApiWrapper.proto), в
+котором канал, символ, время и одно тело-oneof. Служебные ответы
+(подписка, PONG) приходят текстом в JSON.
+
+Декодер написан вручную, без google.protobuf: нам нужны 3-4 строковых
+поля и пара varint, а общий рантайм создаёт объект на каждое вложенное
+сообщение. Здесь один проход по байтам кадра: ключ поля, длина,
+срез. Цены MEXC кладёт строками — float() принимает bytes, так что
+декодируется в str только символ.
+
+Парсеры:
+
+    parse_book_ticker   aggre.bookTicker / bookTicker / bookTicker.batch
+                        -> (symbol, bid, ask, bid_qty, ask_qty, ts) | None
+    parse_mini_tickers  miniTickers -> [(symbol, price, ts), ...] | None
+
+ts — createTime, если есть, иначе sendTime (мс). None — JSON-кадр,
+другое тело или битое сообщение.
+
+encode_* собирают такие же кадры — для бенчмарка и проверки декодера.
+"""
+
+# ================== НАСТРОЙКИ ==================
+
+# Номера полей PushDataV3ApiWrapper
+F_CHANNEL = 1
+F_SYMBOL = 3
+F_CREATE_TIME = 5
+F_SEND_TIME = 6
+
+# Тела (oneof body)
+BOOK_TICKER = 305
+MINI_TICKERS = 310
+BOOK_TICKER_BATCH = 311
+AGGRE_BOOK_TICKER = 315
+
+BOOK_TICKER_BODIES = (BOOK_TICKER, BOOK_TICKER_BATCH, AGGRE_BOOK_TICKER)
+
+# Типы провода protobuf
+_VARINT = 0
+_I64 = 1
+_LEN = 2
+_I32 = 5
+
+# Ключи полей обёртки (номер << 3 | тип) — сравниваются без разбора на части
+_SYMBOL_KEY = F_SYMBOL << 3 | _LEN
+_CREATE_TIME_KEY = F_CREATE_TIME << 3 | _VARINT
+_SEND_TIME_KEY = F_SEND_TIME << 3 | _VARINT
+_BODY_KEY_MIN = 300 << 3
+
+
+# ================== ДЕКОДЕР ==================
+
+def _varint(buf: bytes, i: int, value: int) -> tuple[int, int]:
+    """
+    Продолжение varint, первый байт (value >= 0x80) уже прочитан.
+    """
+    value &= 0x7F
+    shift = 7
+    while True:
+        b = buf[i]
+        i += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, i
+        shift += 7
+
+
+def _skip(buf: bytes, i: int, wire: int) -> int:
+    if wire == _VARINT:
+        while buf[i] >= 0x80:
+            i += 1
+        return i + 1
+    if wire == _I64:
+        return i + 8
+    if wire == _I32:
+        return i + 4
+    raise ValueError(f"тип провода {wire} не поддерживается")
+
+
+def _wrapper(buf: bytes):
+    """
+    Один проход по обёртке: (symbol, ts, тело, начало тела, конец тела).
+    Канал не читается — тип сообщения однозначно задаёт номер тела.
+    """
+    n = len(buf)
+    i = 0
+    symbol = b""
+    create_time = send_time = 0
+    body = body_start = body_end = 0
+    while i < n:
+        key = buf[i]
+        i += 1
+        if key >= 0x80:
+            # ключи тел 300+ — два байта
+            if buf[i] < 0x80:
+                key = (key & 0x7F) | buf[i] << 7
+                i += 1
+            else:
+                key, i = _varint(buf, i, key)
+        if key & 7 == _LEN:
+            length = buf[i]
+            i += 1
+            if length >= 0x80:
+                length, i = _varint(buf, i, length)
+            end = i + length
+            if key == _SYMBOL_KEY:
+                symbol = buf[i:end]
+            elif key > _BODY_KEY_MIN:
+                body, body_start, body_end = key >> 3, i, end
+            i = end
+        elif key & 7 == _VARINT:
+            value = buf[i]
+            i += 1
+            if value >= 0x80:
+                value, i = _varint(buf, i, value)
+            if key == _SEND_TIME_KEY:
+                send_time = value
+            elif key == _CREATE_TIME_KEY:
+                create_time = value
+        else:
+            i = _skip(buf, i, key & 7)
+    if i > n:
+        raise ValueError("обрезанное сообщение")
+    return symbol, create_time or send_time, body, body_start, body_end
+
+
+def _strings(buf: bytes, i: int, end: int, count: int) -> list:
+    """
+    Строковые поля 1..count вложенного сообщения как bytes (b"" если нет).
+    """
+    out = [b""] * count
+    while i < end:
+        key = buf[i]
+        i += 1
+        if key >= 0x80:
+            key, i = _varint(buf, i, key)
+        wire = key & 7
+        if wire != _LEN:
+            i = _skip(buf, i, wire)
+            continue
+        length = buf[i]
+        i += 1
+        if length >= 0x80:
+            length, i = _varint(buf, i, length)
+        field = key >> 3
+        if 0 < field <= count:
+            out[field - 1] = buf[i:i + length]
+        i += length
+    return out
+
+
+def _book(buf: bytes, i: int, end: int) -> list:
+    """
+    Тело котировки: [bid, bid_qty, ask, ask_qty] как bytes. MEXC пишет
+    поля по порядку с короткими длинами — этот случай разбирается без
+    цикла, всё остальное уходит в _strings.
+    """
+    try:
+        if buf[i] == 0x0A:
+            j = i + 2 + buf[i + 1]
+            if buf[j] == 0x12:
+                k = j + 2 + buf[j + 1]
+                if buf[k] == 0x1A:
+                    m = k + 2 + buf[k + 1]
+                    if buf[m] == 0x22 and m + 2 + buf[m + 1] == end:
+                        return [buf[i + 2:j], buf[j + 2:k], buf[k + 2:m], buf[m + 2:end]]
+    except IndexError:
+        pass
+    return _strings(buf, i, end, 4)
+
+
+def _last_item(buf: bytes, i: int, end: int) -> tuple[int, int]:
+    """
+    Границы последнего items (поле 1) в пачке — самая свежая котировка.
+    """
+    start = stop = 0
+    while i < end:
+        key = buf[i]
+        i += 1
+        if key >= 0x80:
+            key, i = _varint(buf, i, key)
+        wire = key & 7
+        if wire != _LEN:
+            i = _skip(buf, i, wire)
+            continue
+        length = buf[i]
+        i += 1
+        if length >= 0x80:
+            length, i = _varint(buf, i, length)
+        if key >> 3 == 1:
+            start, stop = i, i + length
+        i += length
+    return start, stop
+
+
+def parse_book_ticker(raw: bytes):
+    """
+    aggre.bookTicker / bookTicker / bookTicker.batch
+    -> (symbol, bid, ask, bid_qty, ask_qty, ts) | None.
+    """
+    if not raw or raw[0] == 0x7B:  # "{" — служебный JSON
+        return None
+    try:
+        symbol, ts, body, start, end = _wrapper(raw)
+        if body not in BOOK_TICKER_BODIES or not symbol:
+            return None
+        if body == BOOK_TICKER_BATCH:
+            start, end = _last_item(raw, start, end)
+            if start == end:
+                return None
+        bid, bid_qty, ask, ask_qty = _book(raw, start, end)
+        return symbol.decode(), float(bid), float(ask), float(bid_qty), float(ask_qty), ts
+    except (IndexError, ValueError):
+        return None
+
+
+def parse_mini_tickers(raw: bytes):
+    """
+    miniTickers -> [(symbol, price, ts), ...] | None.
+    """
+    if not raw or raw[0] == 0x7B:
+        return None
+    try:
+        _, ts, body, i, end = _wrapper(raw)
+        if body != MINI_TICKERS:
+            return None
+        rows = []
+        while i < end:
+            key = raw[i]
+            i += 1
+            if key >= 0x80:
+                key, i = _varint(raw, i, key)
+            wire = key & 7
+            if wire != _LEN:
+                i = _skip(raw, i, wire)
+                continue
+            length = raw[i]
+            i += 1
+            if length >= 0x80:
+                length, i = _varint(raw, i, length)
+            if key >> 3 == 1:
+                symbol, price = _strings(raw, i, i + length, 2)
+                if symbol and price:
+                    rows.append((symbol.decode(), float(price), ts))
+            i += length
+        return rows
+    except (IndexError, ValueError):
+        return None
+
+
+# ================== КОДИРОВАНИЕ (бенчмарк, проверка) ==================
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _encode_len(field: int, payload: bytes) -> bytes:
+    return _encode_varint(field << 3 | _LEN) + _encode_varint(len(payload)) + payload
+
+
+def _encode_strings(values) -> bytes:
+    return b"".join(_encode_len(i, str(v).encode()) for i, v in enumerate(values, 1) if v != "")
+
+
+def encode_wrapper(channel: str, body: int, payload: bytes, symbol: str = "", send_time: int = 0) -> bytes:
+    out = _encode_len(F_CHANNEL, channel.encode())
+    if symbol:
+        out += _encode_len(F_SYMBOL, symbol.encode())
+    if send_time:
+        out += _encode_varint(F_SEND_TIME << 3 | _VARINT) + _encode_varint(send_time)
+    return out + _encode_len(body, payload)
+
+
+def encode_book_ticker(
+    channel: str,
+    symbol: str,
+    bid: str,
+    ask: str,
+    bid_qty: str,
+    ask_qty: str,
+    send_time: int,
+    body: int = AGGRE_BOOK_TICKER,
+) -> bytes:
+    """
+    Кадр с котировкой; цены — строками, как их шлёт MEXC.
+    """
+    payload = _encode_strings((bid, bid_qty, ask, ask_qty))
+    if body == BOOK_TICKER_BATCH:
+        payload = _encode_len(1, payload)
+    return encode_wrapper(channel, body, payload, symbol, send_time)
+
+
+def encode_mini_tickers(channel: str, rows, send_time: int) -> bytes:
+    """
+    Кадр miniTickers из [(symbol, price), ...].
+    """
+    payload = b"".join(_encode_len(1, _encode_strings((s, p))) for s, p in rows)
+    return encode_wrapper(channel, MINI_TICKERS, payload, send_time=send_time)
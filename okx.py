@@ -1,10 +1,18 @@
 import asyncio
 import json
 import ssl
+import time
+import urllib.request
 from pathlib import Path
 
 import certifi
-import websockets
+
+from connection import WarmConnection, report_loop
+from fastjson import parse_okx
+from publisher import FUTURES, SPOT, Publisher, conn_flags
+from sharding import RateBook, shard_by_rate
+from subscriptions import LiveShards, Shard, SymbolWatch, refresh_lookup
+from symbols import load_registry
 
 # ================= НАСТРОЙКИ =================
 
@@ -19,16 +27,42 @@ SPOT_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/okx_spot_all.txt"
 #   ETH-USDT-SWAP
 FUTURES_SYMBOLS_FILE = "dif type of pairs/actually all pomenshe/okx_futures_all.txt"
 
+# Канал котировок:
+#   "bbo-tbt"  лучшие bid/ask тик-в-тик (каждые 10 мс при изменении)
+#   "books5"   5 уровней раз в 100 мс: котировка берётся с верха стакана,
+#              при DEPTH_ENABLED тот же канал идёт и в стакан (одна подписка)
+#   "tickers"  старый режим: агрегированный тикер, не чаще раза в 100 мс
+QUOTE_CHANNEL = "bbo-tbt"
+
+# Сколько WS-соединений на рынок. Инструменты раскладываются по ним по
+# наблюдаемой частоте сообщений (sharding.py, rates/okx_*.json).
+SPOT_CONNECTIONS = 3
+FUTURES_CONNECTIONS = 2
+
 # размер батча для одного subscribe (примерно 150–200 символов)
 BATCH_SIZE = 200
 
-# пауза между двумя subscribe-запросами (чтобы не упираться в лимит 3 req/sec)
-SUBSCRIBE_INTERVAL = 0.5
+# OKX: не больше 3 запросов subscribe в секунду на соединение и 3 новых
+# соединений в секунду на IP — держимся чуть ниже обоих лимитов
+SUBSCRIBE_RATE = 3
+SUBSCRIBE_INTERVAL = 1.0 / SUBSCRIBE_RATE + 0.02
+CONNECT_INTERVAL = 0.4
+
+# Как часто сохранять частоты сообщений по инструментам
+RATES_SAVE_INTERVAL = 60
 
 # интервалы ping/ping_timeout на уровне библиотеки websockets
 PING_INTERVAL = 20
 PING_TIMEOUT = 10
 
+# Дополнительно подписываться на стакан (5 уровней) для исполнимых спредов
+# в prices.py. Объём у SWAP/FUTURES — в контрактах, переводится в базовую
+# монету по ctVal из REST /api/v5/public/instruments (один запрос на старте).
+DEPTH_ENABLED = False
+DEPTH_CHANNEL = "books5"
+
+INSTRUMENTS_URL = "https://www.okx.com/api/v5/public/instruments?instType={}"
+
 
 # ================= ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ =================
 
@@ -62,106 +96,196 @@ def chunked(seq, size: int):
         yield seq[i:i + size]
 
 
-def build_subscribe_message(symbols_batch: list) -> dict:
+def load_contract_values() -> dict[str, float]:
+    """
+    instId -> размер контракта в базовой монете для линейных SWAP/FUTURES.
+    Инверсные контракты (ctVal в USD) не попадают — их стакан не публикуется.
+    """
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    values: dict[str, float] = {}
+    for inst_type in ("SWAP", "FUTURES"):
+        with urllib.request.urlopen(INSTRUMENTS_URL.format(inst_type), timeout=10, context=ssl_context) as resp:
+            payload = json.load(resp)
+        for item in payload.get("data") or ():
+            if item.get("ctType") == "linear" and item.get("ctVal"):
+                values[item["instId"]] = float(item["ctVal"])
+    return values
+
+
+def build_subscribe_message(symbols_batch: list, channel: str = "tickers", op: str = "subscribe") -> dict:
     """
-    Формирует одно сообщение subscribe для канала tickers с батчем инструментов.
+    Формирует одно сообщение subscribe (или unsubscribe) для канала channel с батчем инструментов.
     """
     return {
-        "op": "subscribe",
+        "op": op,
         "args": [
-            {"channel": "tickers", "instId": inst_id}
+            {"channel": channel, "instId": inst_id}
             for inst_id in symbols_batch
         ],
     }
 
 
-async def subscribe_in_batches(ws, symbols: list):
+async def subscribe_in_batches(ws, symbols: list, channels: tuple = ("tickers",), name: str = "",
+                               op: str = "subscribe"):
     """
-    Отправляет несколько subscribe-запросов батчами и делает паузу между ними.
+    Отправляет subscribe-запросы батчами не чаще SUBSCRIBE_RATE в секунду.
+    Пауза только между запросами: первый уходит сразу после подключения.
+    ws — соединение или subscriptions.Shard (подписка/отписка на ходу).
     """
     if not symbols:
         return
 
     total = len(symbols)
-    print(f"Подписка на {total} инструментов (батч {BATCH_SIZE})")
-
-    for batch in chunked(symbols, BATCH_SIZE):
-        msg = build_subscribe_message(batch)
-        await ws.send(json.dumps(msg))
-        await asyncio.sleep(SUBSCRIBE_INTERVAL)
+    print(f"{name}: {op} на {total} инструментов, каналы {', '.join(channels)} (батч {BATCH_SIZE})")
 
+    first = True
+    for channel in channels:
+        for batch in chunked(symbols, BATCH_SIZE):
+            if not first:
+                await asyncio.sleep(SUBSCRIBE_INTERVAL)
+            first = False
+            msg = build_subscribe_message(batch, channel, op)
+            await ws.send(json.dumps(msg))
 
-# ================= ГЛАВНЫЙ ЦИКЛ ДЛЯ ОДНОГО РЫНКА =================
 
-async def handle_okx_stream(url: str, symbols: list, market_type: str):
+def stream_channels() -> tuple:
     """
-    Одна WS-сессия для одного рынка (spot или futures).
-    Минимальная логика внутри цикла: только парсинг и print.
+    Каналы подписки: котировки и, если нужен стакан, DEPTH_CHANNEL
+    (если это не тот же канал).
     """
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    if DEPTH_ENABLED and DEPTH_CHANNEL != QUOTE_CHANNEL:
+        return QUOTE_CHANNEL, DEPTH_CHANNEL
+    return (QUOTE_CHANNEL,)
+
+
+# ================= ГЛАВНЫЙ ЦИКЛ ДЛЯ ОДНОГО СОЕДИНЕНИЯ =================
+
+async def handle_okx_stream(
+    url: str,
+    symbols: list,
+    market_type: str,
+    publisher: Publisher,
+    contract_values: dict[str, float] | None = None,
+    conn_id: int = 0,
+    symbol_lookup: dict[str, int] | None = None,
+    rate_book: RateBook | None = None,
+    shard: Shard | None = None,
+):
+    """
+    Одна WS-сессия для группы инструментов одного рынка (spot или futures).
+    symbols — живой список шарда: переподключение подписывает текущий состав.
+    Минимальная логика внутри цикла: только парсинг и publish.
+    contract_values — ctVal для перевода объёмов стакана фьючерсов из контрактов
+    в базовую монету; None — объёмы уже в базовой монете (spot).
+    """
+    name = f"{market_type.upper()}-{conn_id + 1}"
+
+    # instId -> id символа считаем один раз, а не replace() на каждое сообщение
+    if symbol_lookup is None:
+        symbol_lookup = load_registry().lookup("OKX", market_type, symbols)
+    market_id = SPOT if market_type == "spot" else FUTURES
+    flags = conn_flags(conn_id)
+    publish = publisher.publish
+    observe = rate_book.observe if rate_book is not None else None
+    depth_channel = DEPTH_CHANNEL if DEPTH_ENABLED else None
 
     if not symbols:
-        print(f"{market_type.upper()}: список символов пуст, поток не будет запущен")
+        print(f"{name}: список символов пуст, поток не будет запущен")
         return
 
-    while True:
-        try:
-            print(f"{market_type.upper()}: подключение к {url} ...")
-            async with websockets.connect(
-                url,
-                ssl=ssl_context,
-                ping_interval=PING_INTERVAL,
-                ping_timeout=PING_TIMEOUT,
-            ) as ws:
-                print(f"{market_type.upper()}: подключено, подписываемся...")
-
-                # подписка батчами
-                await subscribe_in_batches(ws, symbols)
-
-                # основной цикл чтения сообщений
-                async for raw_msg in ws:
-                    try:
-                        msg = json.loads(raw_msg)
-                    except json.JSONDecodeError:
-                        # некорректный JSON – пропускаем
-                        continue
+    async def subscribe(ws) -> None:
+        print(f"{name}: подключено, подписываемся...")
+        # подписка батчами; сообщения читаются только после неё, но
+        # websockets копит их в очереди, пока идут паузы
+        await subscribe_in_batches(ws, symbols, stream_channels(), name)
+
+    async def read(link) -> None:
+        # основной цикл чтения сообщений
+        async for raw_msg in link.frames():
+            recv_ns = time.time_ns()
+            parsed = parse_okx(raw_msg)
+            if parsed is None:
+                # некорректный JSON – пропускаем
+                continue
+            event, note, channel, rows = parsed
 
-                    # служебные события (подписка/ошибка и т.п.)
-                    if "event" in msg:
-                        event = msg.get("event")
-                        if event != "subscribe":
-                            # редкий лог, чтобы не спамить
-                            print(f"{market_type.upper()} EVENT:", msg)
-                        continue
+            # служебные события (подписка/ошибка и т.п.)
+            if event:
+                if event not in ("subscribe", "unsubscribe"):
+                    # редкий лог, чтобы не спамить
+                    print(f"{name} EVENT: {event} {note}")
+                continue
 
-                    # рабочие данные
-                    arg = msg.get("arg") or {}
-                    if arg.get("channel") != "tickers":
+            if channel == "tickers":
+                for inst_id, bid, ask, bid_qty, ask_qty, ts in rows:
+                    symbol_id = symbol_lookup.get(inst_id)
+                    if symbol_id is None:
                         continue
+                    if observe is not None:
+                        observe(inst_id)
+                    publish(market_id, symbol_id, bid, ask, bid_qty, ask_qty, ts, recv_ns, flags)
+                continue
 
-                    data_list = msg.get("data") or []
-                    for item in data_list:
-                        inst_id = item.get("instId")
-                        bid = item.get("bidPx")
-                        ask = item.get("askPx")
-                        ts = item.get("ts")
-
-                        if not inst_id or bid is None or ask is None:
+            # bbo-tbt / books5: [(instId, bids, asks, ts), ...]
+            for inst_id, bids, asks, ts in rows:
+                symbol_id = symbol_lookup.get(inst_id)
+                if symbol_id is None:
+                    continue
+
+                if channel == QUOTE_CHANNEL and bids and asks:
+                    if observe is not None:
+                        observe(inst_id)
+                    # объём у SWAP/FUTURES в контрактах, как у tickers
+                    (bid, bid_qty), (ask, ask_qty) = bids[0], asks[0]
+                    publish(market_id, symbol_id, bid, ask, bid_qty, ask_qty, ts, recv_ns, flags)
+
+                if channel == depth_channel:
+                    if contract_values is not None:
+                        ct_val = contract_values.get(inst_id)
+                        if ct_val is None:
                             continue
+                        bids = [(p, q * ct_val) for p, q in bids]
+                        asks = [(p, q * ct_val) for p, q in asks]
+                    publisher.publish_depth(market_id, symbol_id, bids, asks, ts, recv_ns, flags)
 
-                        # Очистка символа: удаляем тире и -SWAP для фьючерсов
-                        cleaned_inst_id = inst_id.replace("-", "").replace("SWAP", "")
+    print(f"{name}: подключение к {url} ...")
+    conn = WarmConnection(name, url, read, subscribe, ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT)
+    if shard is not None:
+        shard.conns.append(conn)
+    await conn.run()
 
-                        # Формируем строку вывода с запятыми
-                        out = f"OKX,{market_type},{cleaned_inst_id},{bid},{ask},{ts}"
 
-                        # Вывод строки
-                        print(out)
+async def start_stream(delay: float, **kwargs):
+    # OKX ограничивает частоту новых соединений с IP — стартуем по очереди
+    await asyncio.sleep(delay)
+    await handle_okx_stream(**kwargs)
 
-        except Exception as e:
-            # при любой ошибке – короткий лог и реконнект
-            print(f"{market_type.upper()}: ошибка: {e}. Переподключение через 5 секунд...")
-            await asyncio.sleep(5)
+
+async def save_rates_loop(rate_books: list[RateBook]) -> None:
+    while True:
+        await asyncio.sleep(RATES_SAVE_INTERVAL)
+        for book in rate_books:
+            try:
+                book.save()
+            except OSError as e:
+                print(f"[RATES] Не удалось сохранить {book.path}: {e!r}")
+
+
+def live_shards(market_type: str, groups: list[list[str]], start, rates: dict[str, float]) -> LiveShards:
+    """
+    Соединения рынка для горячей перезагрузки списков. Лимита на соединение
+    нет: новые инструменты — в наименее нагруженное по частотам.
+    """
+    channels = stream_channels()
+    name = f"OKX {market_type}"
+
+    async def subscribe(shard: Shard, added: list) -> None:
+        await subscribe_in_batches(shard, added, channels, name)
+
+    async def unsubscribe(shard: Shard, removed: list) -> None:
+        await subscribe_in_batches(shard, removed, channels, name, op="unsubscribe")
+
+    return LiveShards(name, groups, start, subscribe, unsubscribe, rates=rates)
 
 
 # ================= ТОЧКА ВХОДА =================
@@ -173,25 +297,76 @@ async def main():
 
     print(f"SPOT: {len(spot_symbols)} символов")
     print(f"FUTURES: {len(futures_symbols)} символов")
+    print(f"Каналы: {', '.join(stream_channels())}")
 
-    tasks = []
-
-    if spot_symbols:
-        tasks.append(asyncio.create_task(
-            handle_okx_stream(OKX_WS_URL, spot_symbols, "spot")
-        ))
-
-    if futures_symbols:
-        tasks.append(asyncio.create_task(
-            handle_okx_stream(OKX_WS_URL, futures_symbols, "futures")
-        ))
-
-    if not tasks:
+    if not spot_symbols and not futures_symbols:
         print("Нет символов для подписки. Проверь файлы okx_spot.txt и okx_futures.txt")
         return
 
+    publisher = Publisher("OKX")
+    registry = load_registry()
+    watch = SymbolWatch()
+    rate_books = []
+
+    contract_values = None
+    if DEPTH_ENABLED and futures_symbols:
+        contract_values = load_contract_values()
+        print(f"FUTURES: ctVal для {len(contract_values)} линейных контрактов")
+
+    n_streams = 0
+    starting = True
+    for market_type, path, symbols, n_connections, values in (
+        ("spot", SPOT_SYMBOLS_FILE, spot_symbols, SPOT_CONNECTIONS, None),
+        ("futures", FUTURES_SYMBOLS_FILE, futures_symbols, FUTURES_CONNECTIONS, contract_values or {}),
+    ):
+        rate_book = RateBook("OKX", market_type)
+        rate_books.append(rate_book)
+        symbol_lookup = registry.lookup("OKX", market_type, symbols)
+        groups = shard_by_rate(symbols, rate_book.rates, n_connections)
+        print(f"{market_type.upper()}: {len(groups)} соединений по {', '.join(str(len(x)) for x in groups)} инструментов")
+
+        def start(shard: Shard, market_type=market_type, values=values,
+                  symbol_lookup=symbol_lookup, rate_book=rate_book) -> None:
+            nonlocal n_streams
+            shard.tasks.append(asyncio.create_task(start_stream(
+                # на старте — по очереди; добавленные потом — без паузы
+                n_streams * CONNECT_INTERVAL if starting else 0.0,
+                url=OKX_WS_URL,
+                symbols=shard.symbols,
+                market_type=market_type,
+                publisher=publisher,
+                contract_values=values,
+                conn_id=shard.index,
+                symbol_lookup=symbol_lookup,
+                rate_book=rate_book,
+                shard=shard,
+            )))
+            n_streams += 1
+
+        shards = live_shards(market_type, groups, start, rate_book.rates)
+        shards.start_all()
+
+        async def reload(added, removed, market_type=market_type, symbol_lookup=symbol_lookup,
+                         shards=shards, values=values):
+            added = refresh_lookup(symbol_lookup, "OKX", market_type, added, removed)
+            if added and values is not None and DEPTH_ENABLED:
+                # ctVal новых контрактов, иначе их стакан не публикуется
+                try:
+                    values.update(await asyncio.to_thread(load_contract_values))
+                except Exception as e:
+                    print(f"FUTURES: не удалось обновить ctVal: {e!r}")
+            await shards.apply(added, removed)
+
+        watch.add(path, symbols, reload, reader=read_symbols)
+    starting = False
+
+    tasks = [
+        asyncio.create_task(watch.run()),
+        asyncio.create_task(save_rates_loop(rate_books)),
+        asyncio.create_task(report_loop()),
+    ]
     await asyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+"""
+Локальные стаканы по снапшотам и дельтам (Bybit orderbook.{depth}.{symbol}).
+
+Bybit после подписки шлёт snapshot, а затем только delta: изменённые
+уровни, размер 0 — уровень удалён. Дельта может касаться одной стороны,
+поэтому лучшую цену надо брать из своего стакана, а не из сообщения.
+
+Правила применения (по update id "u"):
+    snapshot          — стакан заменяется целиком
+    delta с u == 1    — биржа перезапустила сервис, это тоже снапшот
+    delta с u <= u_последний — повтор, пропускаем
+    delta с u > u_последний + 1 — пропуск обновлений, считаем в gaps
+                        (стакан продолжаем вести, Bybit пришлёт snapshot
+                        при переподписке)
+    delta до первого snapshot — пропускаем
+
+Сторона стакана — два array('d') (цены, объёмы), отсортированные от лучшей
+цены к худшей. Для bid хранится -цена, поэтому у обеих сторон ключи растут
+и поиск уровня — один bisect. Вставка/удаление — memmove в пределах
+глубины (1/50/200 уровней). Массивы можно без копирования смотреть из
+NumPy: np.frombuffer(side.qtys).
+"""
+
+from array import array
+from bisect import bisect_left
+from math import nan
+
+
+class BookSide:
+    __slots__ = ("sign", "keys", "qtys")
+
+    def __init__(self, sign: float):
+        # sign = 1 для ask (цены по возрастанию), -1 для bid (по убыванию)
+        self.sign = sign
+        self.keys = array("d")
+        self.qtys = array("d")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def replace(self, levels) -> None:
+        sign = self.sign
+        ordered = sorted((sign * p, q) for p, q in levels if q)
+        self.keys = array("d", [k for k, _ in ordered])
+        self.qtys = array("d", [q for _, q in ordered])
+
+    def update(self, price: float, qty: float) -> None:
+        keys = self.keys
+        key = self.sign * price
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if qty:
+                self.qtys[i] = qty
+            else:
+                del keys[i]
+                del self.qtys[i]
+        elif qty:
+            keys.insert(i, key)
+            self.qtys.insert(i, qty)
+
+    def trim(self, depth: int) -> None:
+        if len(self.keys) > depth:
+            del self.keys[depth:]
+            del self.qtys[depth:]
+
+    def best(self) -> tuple[float, float]:
+        if not self.keys:
+            return nan, nan
+        return self.sign * self.keys[0], self.qtys[0]
+
+    def levels(self, n: int) -> list[tuple[float, float]]:
+        sign = self.sign
+        return [(sign * k, q) for k, q in zip(self.keys[:n], self.qtys[:n])]
+
+
+class OrderBook:
+    __slots__ = ("symbol", "depth", "bids", "asks", "u", "ts", "ready")
+
+    def __init__(self, symbol: str, depth: int):
+        self.symbol = symbol
+        self.depth = depth
+        self.bids = BookSide(-1.0)
+        self.asks = BookSide(1.0)
+        self.u = 0
+        self.ts = 0
+        self.ready = False
+
+    def snapshot(self, bids, asks, u: int, ts: int) -> None:
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.bids.trim(self.depth)
+        self.asks.trim(self.depth)
+        self.u = u
+        self.ts = ts
+        self.ready = True
+
+    def delta(self, bids, asks, u: int, ts: int) -> None:
+        update = self.bids.update
+        for price, qty in bids:
+            update(price, qty)
+        update = self.asks.update
+        for price, qty in asks:
+            update(price, qty)
+        self.bids.trim(self.depth)
+        self.asks.trim(self.depth)
+        self.u = u
+        self.ts = ts
+
+    def top(self) -> tuple[float, float, float, float]:
+        """
+        (bid, ask, bid_qty, ask_qty); nan для пустой стороны.
+        """
+        bid, bid_qty = self.bids.best()
+        ask, ask_qty = self.asks.best()
+        return bid, ask, bid_qty, ask_qty
+
+    def view(self, n: int | None = None) -> dict:
+        """
+        Стакан глубиной n (по умолчанию вся глубина): {"bids": [(цена, объём), ...], "asks": [...]}.
+        """
+        n = self.depth if n is None else n
+        return {"bids": self.bids.levels(n), "asks": self.asks.levels(n)}
+
+
+class BookSet:
+    """
+    Стаканы всех символов одного потока (одного WS-соединения).
+    """
+
+    def __init__(self, depth: int = 1):
+        self.depth = depth
+        self.books: dict[str, OrderBook] = {}
+
+        # Счётчики
+        self.snapshots = 0
+        self.deltas = 0
+        self.stale = 0      # повторы/устаревшие дельты (u не растёт)
+        self.gaps = 0       # пропущенные update id
+        self.orphans = 0    # дельты до первого снапшота
+
+    def apply(self, symbol: str, is_snapshot: bool, u: int, bids, asks, ts: int) -> OrderBook | None:
+        """
+        Применяет сообщение к стакану символа. Возвращает стакан, если он
+        изменился, иначе None.
+        """
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, self.depth)
+
+        if is_snapshot or u == 1:
+            book.snapshot(bids, asks, u, ts)
+            self.snapshots += 1
+            return book
+
+        if not book.ready:
+            self.orphans += 1
+            return None
+        if u <= book.u:
+            self.stale += 1
+            return None
+        if u > book.u + 1:
+            self.gaps += u - book.u - 1
+
+        book.delta(bids, asks, u, ts)
+        self.deltas += 1
+        return book
+
+    def reset(self) -> None:
+        """
+        Сброс при переподключении: новые снапшоты придут после подписки.
+        """
+        self.books.clear()
@@ -0,0 +1,208 @@
+"""
+Пересечения списков площадок: какие символы торгуются на обеих ногах.
+
+    python overlap.py                       # пары spot×futures + списки коллекторов
+    python overlap.py --kinds sf,ss,ff      # ещё spot×spot и futures×futures
+    python overlap.py --quotes USDT,USDC    # только пары к этим валютам
+
+Каждый список <exchange>_<market>_all.txt из RAW_DIR — битовая маска
+над id канонических символов (symbols.canonical_symbol). Все попарные
+пересечения считаются одним векторным проходом: маски (V, W) AND
+(V, 1, W) -> popcount -> матрица V×V числа общих символов. Новая
+площадка или котируемая валюта — ещё одна строка маски, а не новые
+строки в списке комбинаций.
+
+Пишутся:
+    PAIRS_DIR/<a>_s_<b>_f.txt   общие символы spot a × futures b (spread_engine.py);
+                                с --kinds ss/ff ещё <a>_s_<b>_s.txt / <a>_f_<b>_f.txt
+    symbols.SYMBOLS_DIR/<exchange>_<market>_all.txt
+                                списки подписки коллекторов: символы площадки,
+                                попавшие хоть в одну пару, в написании биржи
+и пересобирается реестр symbols.py (id уже известных символов не меняются).
+Файлы без изменений не перезаписываются, опустевшие пары удаляются.
+
+Обычно запускается из universe.py после скачивания списков.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from symbols import SYMBOLS_DIR, canonical_symbol, load_registry, read_symbols, venue_files, write_symbols
+
+# ================== НАСТРОЙКИ ==================
+
+# Полные списки бирж (universe.OUTPUT_DIR)
+RAW_DIR = "dif type of pairs/really all doxuya"
+
+# Файлы пар для spread_engine.py
+PAIRS_DIR = "unique pairs"
+
+# Какие пересечения пишутся и определяют подписки:
+#   sf — spot одной биржи × futures другой, ss — spot × spot, ff — futures × futures
+KINDS = ("sf",)
+
+# Пары только к этим котируемым валютам, например symbols.QUOTES (пусто — все)
+PAIR_QUOTES = ()
+
+MARKET_LETTER = {"spot": "s", "futures": "f"}
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(a: np.ndarray) -> np.ndarray:
+    """
+    Число единичных бит в каждом байте uint8-массива.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+    return _POPCOUNT[a]
+
+
+class Overlap:
+    """
+    venues[i] = (EXCHANGE, market), names[id] — канонические символы,
+    bits[i] — упакованная маска символов площадки i (np.packbits),
+    raw[i] — {id: [написание биржи, ...]}.
+    """
+
+    def __init__(self, listings: dict[tuple[str, str], list[str]], quotes=PAIR_QUOTES):
+        self.venues = sorted(listings)
+        canon = {venue: [canonical_symbol(s) for s in listings[venue]] for venue in self.venues}
+        self.names = sorted({c for cs in canon.values() for c in cs})
+        ids = {name: i for i, name in enumerate(self.names)}
+
+        mask = np.zeros((len(self.venues), len(self.names)), dtype=bool)
+        self.raw: list[dict[int, list[str]]] = []
+        for row, venue in enumerate(self.venues):
+            raw = {}
+            for s, c in zip(listings[venue], canon[venue]):
+                raw.setdefault(ids[c], []).append(s)
+            mask[row, list(raw)] = True
+            self.raw.append(raw)
+        if quotes:
+            mask &= np.array([name.endswith(tuple(quotes)) for name in self.names], dtype=bool)
+        self.bits = np.packbits(mask, axis=1)
+        # counts[i, j] — общих символов у площадок i и j, диагональ — размер списка
+        self.counts = popcount(self.bits[:, None, :] & self.bits[None, :, :]).sum(axis=2, dtype=np.int64)
+
+    @classmethod
+    def from_dir(cls, directory: str = RAW_DIR, quotes=PAIR_QUOTES) -> "Overlap":
+        return cls({venue: read_symbols(path) for venue, path in venue_files(directory).items()}, quotes)
+
+    def index(self, exchange: str, market: str) -> int:
+        return self.venues.index((exchange.upper(), market.lower()))
+
+    def common(self, i: int, j: int) -> np.ndarray:
+        """
+        id символов, общих для площадок i и j, по возрастанию (= по алфавиту).
+        """
+        return np.flatnonzero(np.unpackbits(self.bits[i] & self.bits[j], count=len(self.names)))
+
+    def pairs(self, kinds=KINDS) -> list[tuple[int, int]]:
+        """
+        (i, j) площадок для нужных видов пересечений; одна биржа с собой не пересекается.
+        """
+        out = []
+        for i, (ex_a, mk_a) in enumerate(self.venues):
+            for j, (ex_b, mk_b) in enumerate(self.venues):
+                if ex_a == ex_b:
+                    continue
+                kind = MARKET_LETTER[mk_a] + MARKET_LETTER[mk_b]
+                # ss и ff симметричны — по одному файлу на пару бирж
+                if kind in kinds and (kind == "sf" or i < j):
+                    out.append((i, j))
+        return out
+
+    def pair_name(self, i: int, j: int) -> str:
+        (ex_a, mk_a), (ex_b, mk_b) = self.venues[i], self.venues[j]
+        return f"{ex_a.lower()}_{MARKET_LETTER[mk_a]}_{ex_b.lower()}_{MARKET_LETTER[mk_b]}.txt"
+
+    def subscriptions(self, pairs: list[tuple[int, int]]) -> dict[tuple[str, str], list[str]]:
+        """
+        Площадка -> символы для подписки (все, что есть хоть в одной паре) в написании биржи.
+        """
+        used = np.zeros_like(self.bits)
+        for i, j in pairs:
+            both = self.bits[i] & self.bits[j]
+            used[i] |= both
+            used[j] |= both
+        out = {}
+        for row, venue in enumerate(self.venues):
+            ids = np.flatnonzero(np.unpackbits(used[row], count=len(self.names)))
+            out[venue] = sorted(s for sid in ids.tolist() for s in self.raw[row][sid])
+        return out
+
+    def format_matrix(self, market_a: str, market_b: str) -> list[str]:
+        rows = [i for i, v in enumerate(self.venues) if v[1] == market_a]
+        cols = [j for j, v in enumerate(self.venues) if v[1] == market_b]
+        head = f"{market_a} \\ {market_b}"
+        lines = [f"  {head:>18}" + "".join(f"{self.venues[j][0]:>9}" for j in cols)]
+        for i in rows:
+            lines.append(f"  {self.venues[i][0]:>18}" + "".join(f"{self.counts[i, j]:>9}" for j in cols))
+        return lines
+
+
+def write_pairs(overlap: Overlap, pairs: list[tuple[int, int]], directory: str = PAIRS_DIR) -> tuple[int, int]:
+    """
+    Файлы пар; опустевшие удаляются. (записано, удалено)
+    """
+    directory = Path(directory)
+    written = removed = 0
+    for i, j in pairs:
+        path = directory / overlap.pair_name(i, j)
+        ids = overlap.common(i, j)
+        if len(ids) == 0:
+            if path.exists():
+                path.unlink()
+                removed += 1
+            continue
+        written += write_symbols(path, (overlap.names[k] for k in ids.tolist()))
+    return written, removed
+
+
+def run(raw_dir: str = RAW_DIR, pairs_dir: str = PAIRS_DIR, symbols_dir: str = SYMBOLS_DIR,
+        kinds=KINDS, quotes=PAIR_QUOTES, verbose: bool = True) -> Overlap:
+    """
+    Весь шаг целиком: маски, пересечения, файлы пар, списки коллекторов, реестр.
+    """
+    t0 = time.perf_counter()
+    overlap = Overlap.from_dir(raw_dir, quotes)
+    t1 = time.perf_counter()
+    pairs = overlap.pairs(kinds)
+    written, removed = write_pairs(overlap, pairs, pairs_dir)
+    changed = [venue for venue, symbols in overlap.subscriptions(pairs).items()
+               if write_symbols(Path(symbols_dir) / f"{venue[0].lower()}_{venue[1]}_all.txt", symbols)]
+    t2 = time.perf_counter()
+    registry = load_registry(symbols_dir)
+    t3 = time.perf_counter()
+
+    if verbose:
+        for market_a, market_b in (("spot", "futures"), ("spot", "spot"), ("futures", "futures")):
+            print("\n".join(overlap.format_matrix(market_a, market_b)))
+        print(f"площадок {len(overlap.venues)}, символов {len(overlap.names)}, пар {len(pairs)}:"
+              f" записано {written}, удалено {removed} в {pairs_dir}")
+        print(f"списки коллекторов: изменены {', '.join(f'{ex} {mk}' for ex, mk in changed) or 'нет'};"
+              f" реестр {len(registry)} символов")
+        print(f"чтение и маски {(t1 - t0) * 1e3:.1f} мс, пересечения и файлы {(t2 - t1) * 1e3:.1f} мс,"
+              f" реестр {(t3 - t2) * 1e3:.1f} мс")
+    return overlap
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--pairs-dir", default=PAIRS_DIR)
+    parser.add_argument("--symbols-dir", default=SYMBOLS_DIR)
+    parser.add_argument("--kinds", default=",".join(KINDS), help="sf,ss,ff через запятую")
+    parser.add_argument("--quotes", default=",".join(PAIR_QUOTES), help="котируемые валюты; пусто — все")
+    args = parser.parse_args()
+    run(args.raw_dir, args.pairs_dir, args.symbols_dir,
+        kinds=tuple(k for k in args.kinds.split(",") if k),
+        quotes=tuple(q for q in args.quotes.split(",") if q))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Колоночное хранилище котировок для prices.py на NumPy.
+
+Вместо dict (exchange, market, symbol) -> {"bid", "ask", "ts"} каждый
+инструмент получает постоянный целый слот:
+
+    slot = (exchange_id * n_markets + market_id) * n_symbols + symbol_id
+
+а bid/ask/qty/ts лежат в заранее выделенных массивах. Обновление пачкой
+записей из датаграммы — несколько векторных операций без создания
+объектов на каждую котировку, обход всего рынка — одна операция над массивом.
+
+n_symbols — с запасом (SYMBOL_HEADROOM) сверх реестра на старте: символы,
+которые коллекторы подхватили на ходу (subscriptions.py), получают
+следующие id и занимают запас без перекладки колонок (sync). Кончился
+запас — колонки перекладываются под новый n_symbols, слоты всех
+инструментов меняются, и подписчики on_resize (DepthStore, SpreadEngine)
+перестраиваются следом.
+"""
+
+import time
+
+import numpy as np
+
+from publisher import (
+    DEPTH_LEVELS,
+    DEPTH_RECORD_SIZE,
+    EXCHANGES,
+    EXCHANGE_IDS,
+    MARKETS,
+    MARKET_IDS,
+    RECORD_SIZE,
+)
+from symbols import canonical_symbol
+
+# ================== НАСТРОЙКИ ==================
+
+# Запас id символов сверх таблицы на старте — под новые листинги
+SYMBOL_HEADROOM = 256
+
+# Не чаще, с: перечитывать таблицу символов из-за записей с неизвестным id
+SYNC_INTERVAL = 1.0
+
+# Тот же layout, что publisher.RECORD (<BBHIddddqq), для np.frombuffer
+RECORD_DTYPE = np.dtype([
+    ("exchange", "<u1"),
+    ("market", "<u1"),
+    ("flags", "<u2"),
+    ("symbol", "<u4"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("bid_qty", "<f8"),
+    ("ask_qty", "<f8"),
+    ("exch_ts", "<i8"),
+    ("recv_ns", "<i8"),
+])
+assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+# publisher.DEPTH_RECORD (<BBHIqq + 4*DEPTH_LEVELS d)
+DEPTH_DTYPE = np.dtype([
+    ("exchange", "<u1"),
+    ("market", "<u1"),
+    ("flags", "<u2"),
+    ("symbol", "<u4"),
+    ("exch_ts", "<i8"),
+    ("recv_ns", "<i8"),
+    ("bid_px", "<f8", (DEPTH_LEVELS,)),
+    ("bid_qty", "<f8", (DEPTH_LEVELS,)),
+    ("ask_px", "<f8", (DEPTH_LEVELS,)),
+    ("ask_qty", "<f8", (DEPTH_LEVELS,)),
+])
+assert DEPTH_DTYPE.itemsize == DEPTH_RECORD_SIZE
+
+
+class PriceStore:
+    """
+    Все котировки в плоских массивах длины n_slots.
+    ts == 0 означает, что по слоту ещё не было ни одной котировки.
+    """
+
+    # колонка -> значение пустого слота
+    COLUMNS = {"bid": np.nan, "ask": np.nan, "bid_qty": np.nan, "ask_qty": np.nan, "ts": 0, "recv_ns": 0}
+
+    def __init__(self, symbol_ids: dict[str, int], headroom: int = 0, reload=None):
+        """
+        symbol_ids — канонический символ -> id (реестр symbols.py).
+        reload() — та же таблица, перечитанная сейчас: с ней хранилище
+        подхватывает id, появившиеся после старта (sync); без неё записи
+        с такими id отбрасываются. headroom — запас id (SYMBOL_HEADROOM).
+        """
+        self.symbol_ids = symbol_ids
+        self.symbol_names = sorted(symbol_ids, key=symbol_ids.get)
+        self.reload = reload
+        self.headroom = headroom
+
+        self.n_exchanges = len(EXCHANGES)
+        self.n_markets = len(MARKETS)
+        self.n_symbols = len(symbol_ids) + headroom
+        self.n_slots = self.n_exchanges * self.n_markets * self.n_symbols
+
+        n = self.n_slots
+        self.bid = np.full(n, np.nan)
+        self.ask = np.full(n, np.nan)
+        self.bid_qty = np.full(n, np.nan)
+        self.ask_qty = np.full(n, np.nan)
+        self.ts = np.zeros(n, dtype=np.int64)        # биржевое время, мс
+        self.recv_ns = np.zeros(n, dtype=np.int64)   # время приёма коллектором
+
+        # (EXCHANGE, market, SYMBOL) строками -> слот, для CSV и ручных запросов
+        self._interned: dict[tuple[str, str, str], int] = {}
+        # записей с id символа, которого нет в хранилище (см. known)
+        self.unknown = 0
+        # f(old_n_symbols) — после перекладки колонок под новый n_symbols
+        self.on_resize: list = []
+        self._synced = 0.0
+
+    # ---------- слоты ----------
+
+    def slot(self, exchange_id: int, market_id: int, symbol_id: int) -> int:
+        return (exchange_id * self.n_markets + market_id) * self.n_symbols + symbol_id
+
+    def slots(self, exchange_ids, market_ids, symbol_ids) -> np.ndarray:
+        return (
+            exchange_ids.astype(np.int64) * self.n_markets + market_ids
+        ) * self.n_symbols + symbol_ids
+
+    def intern(self, exchange: str, market: str, symbol: str) -> int | None:
+        """
+        Строковый ключ -> слот. Разбор строк делается один раз на ключ,
+        дальше это поиск в словаре.
+        """
+        key = (exchange, market, symbol)
+        slot = self._interned.get(key)
+        if slot is None:
+            ex_id = EXCHANGE_IDS.get(exchange.strip().upper())
+            mk_id = MARKET_IDS.get(market.strip().lower())
+            sym_id = self.symbol_ids.get(canonical_symbol(symbol))
+            if ex_id is None or mk_id is None or sym_id is None:
+                return None
+            slot = self.slot(ex_id, mk_id, sym_id)
+            self._interned[key] = slot
+        return slot
+
+    def describe(self, slot: int) -> tuple[str, str, str]:
+        rest, sym = divmod(int(slot), self.n_symbols)
+        ex, mk = divmod(rest, self.n_markets)
+        return EXCHANGES[ex], MARKETS[mk], self.symbol_names[sym]
+
+    def reslot(self, slot: int, old_n_symbols: int) -> int:
+        """
+        Слот до перекладки колонок (при old_n_symbols) -> слот сейчас.
+        """
+        rest, sym = divmod(int(slot), old_n_symbols)
+        return rest * self.n_symbols + sym
+
+    def known(self, records: np.ndarray) -> np.ndarray:
+        """
+        Записи с id символа из хранилища. Коллектор после горячей
+        перезагрузки списков (subscriptions.py) шлёт и id, появившиеся
+        позже, чем стартовал этот процесс: тогда таблица перечитывается
+        (sync, не чаще SYNC_INTERVAL). Что неизвестно и после этого,
+        отбрасывается и считается в unknown, а не пишется в чужой слот.
+        """
+        if not len(records):
+            return records
+        n = len(self.symbol_names)
+        top = int(records["symbol"].max())
+        if top < n:
+            return records
+        if self.reload is not None and time.monotonic() - self._synced >= SYNC_INTERVAL:
+            self.sync()
+            n = len(self.symbol_names)
+            if top < n:
+                return records
+        ok = records["symbol"] < n
+        self.unknown += len(ok) - int(np.count_nonzero(ok))
+        return records[ok]
+
+    def sync(self) -> bool:
+        """
+        Перечитать таблицу символов (reload). Новые id занимают запас, а
+        когда он кончился — колонки перекладываются под n_symbols с новым
+        запасом. True — появились новые символы.
+        """
+        self._synced = time.monotonic()
+        if self.reload is None:
+            return False
+        fresh = self.reload()
+        if len(fresh) <= len(self.symbol_names):
+            return False
+        self.symbol_ids = fresh
+        self.symbol_names = sorted(fresh, key=fresh.get)
+        if len(fresh) > self.n_symbols:
+            self._resize(len(fresh) + self.headroom)
+        return True
+
+    def _resize(self, n_symbols: int) -> None:
+        old = self.n_symbols
+        self.n_symbols = n_symbols
+        self.n_slots = self.n_exchanges * self.n_markets * n_symbols
+        for name, fill in self.COLUMNS.items():
+            setattr(self, name, self.widen(getattr(self, name), old, fill))
+        self._interned.clear()
+        for callback in self.on_resize:
+            callback(old)
+
+    def widen(self, column: np.ndarray, old_n_symbols: int, fill) -> np.ndarray:
+        """
+        Колонка (n_slots при old_n_symbols, ...) -> под текущий n_symbols:
+        инструменты переезжают в свои новые слоты, новые слоты — fill.
+        """
+        tail = column.shape[1:]
+        out = np.full((self.n_exchanges, self.n_markets, self.n_symbols) + tail, fill, dtype=column.dtype)
+        out[:, :, :old_n_symbols] = column.reshape((self.n_exchanges, self.n_markets, old_n_symbols) + tail)
+        return out.reshape((self.n_slots,) + tail)
+
+    # ---------- обновление ----------
+
+    def update_one(self, slot: int, bid: float, ask: float, ts: int,
+                   bid_qty: float = np.nan, ask_qty: float = np.nan, recv_ns: int = 0) -> bool:
+        # Обновляем только если пришедшие данные свежее или равны по времени
+        if ts < self.ts[slot]:
+            return False
+        self.bid[slot] = bid
+        self.ask[slot] = ask
+        self.bid_qty[slot] = bid_qty
+        self.ask_qty[slot] = ask_qty
+        self.ts[slot] = ts
+        self.recv_ns[slot] = recv_ns
+        return True
+
+    def update_records(self, records: np.ndarray) -> np.ndarray:
+        """
+        Пачка записей RECORD_DTYPE (например, np.frombuffer датаграммы).
+        Возвращает слоты, которые реально обновились.
+        """
+        records = self.known(records)
+        ts = records["exch_ts"]
+        if len(records) > 1 and (ts[1:] < ts[:-1]).any():
+            # при повторе слота в пачке побеждает последний — пусть это
+            # будет самый свежий
+            records = records[np.argsort(ts, kind="stable")]
+            ts = records["exch_ts"]
+        slots = self.slots(records["exchange"], records["market"], records["symbol"])
+        fresh = ts >= self.ts[slots]
+        if not fresh.all():
+            slots = slots[fresh]
+            records = records[fresh]
+            ts = ts[fresh]
+        self.bid[slots] = records["bid"]
+        self.ask[slots] = records["ask"]
+        self.bid_qty[slots] = records["bid_qty"]
+        self.ask_qty[slots] = records["ask_qty"]
+        self.ts[slots] = ts
+        self.recv_ns[slots] = records["recv_ns"]
+        return slots
+
+    # ---------- запросы ----------
+
+    def active_count(self) -> int:
+        return int(np.count_nonzero(self.ts))
+
+    def get(self, exchange_id: int, market_id: int, symbol_id: int):
+        s = self.slot(exchange_id, market_id, symbol_id)
+        if not self.ts[s]:
+            return None
+        return float(self.bid[s]), float(self.ask[s]), int(self.ts[s])
+
+    def venues(self, symbol_id: int) -> dict[tuple[str, str], tuple[float, float, int]]:
+        """
+        Все биржи и рынки по одному символу: {(EXCHANGE, market): (bid, ask, ts)}.
+        """
+        grid = (np.arange(self.n_exchanges * self.n_markets) * self.n_symbols) + symbol_id
+        live = grid[self.ts[grid] > 0]
+        out = {}
+        for s in live:
+            ex, mk, _ = self.describe(s)
+            out[(ex, mk)] = (float(self.bid[s]), float(self.ask[s]), int(self.ts[s]))
+        return out
+
+    def symbol_view(self, name: str) -> dict[tuple[str, str], tuple[float, float, int]]:
+        sym_id = self.symbol_ids.get(canonical_symbol(name))
+        return {} if sym_id is None else self.venues(sym_id)
+
+    def stale_slots(self, max_age_ms: int, now_ms: int | None = None) -> np.ndarray:
+        """
+        Слоты, по которым котировка есть, но старше max_age_ms.
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        ts = self.ts
+        return np.flatnonzero((ts > 0) & (ts < now_ms - max_age_ms))
+
+    def as_grid(self, column: np.ndarray) -> np.ndarray:
+        """
+        Вид на колонку формы (биржа, рынок, символ) — без копирования.
+        """
+        return column.reshape(self.n_exchanges, self.n_markets, self.n_symbols)
+
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self.bid, self.ask, self.bid_qty, self.ask_qty, self.ts, self.recv_ns))
+
+    def memory_per_instrument(self) -> float:
+        return self.memory_bytes() / max(self.n_slots, 1)
+
+
+class DepthStore:
+    """
+    Верх стакана (DEPTH_LEVELS уровней) по тем же слотам, что и PriceStore:
+    матрицы (n_slots, DEPTH_LEVELS), уровни от лучшей цены.
+    Пустой уровень — цена NaN, объём 0.
+    """
+
+    def __init__(self, store: PriceStore, levels: int = DEPTH_LEVELS):
+        self.store = store
+        self.levels = levels
+        shape = (store.n_slots, levels)
+        self.bid_px = np.full(shape, np.nan)
+        self.bid_qty = np.zeros(shape)
+        self.ask_px = np.full(shape, np.nan)
+        self.ask_qty = np.zeros(shape)
+        self.ts = np.zeros(store.n_slots, dtype=np.int64)
+        store.on_resize.append(self._widen)
+
+    def _widen(self, old_n_symbols: int) -> None:
+        widen = self.store.widen
+        self.bid_px = widen(self.bid_px, old_n_symbols, np.nan)
+        self.bid_qty = widen(self.bid_qty, old_n_symbols, 0.0)
+        self.ask_px = widen(self.ask_px, old_n_symbols, np.nan)
+        self.ask_qty = widen(self.ask_qty, old_n_symbols, 0.0)
+        self.ts = widen(self.ts, old_n_symbols, 0)
+
+    def update_records(self, records: np.ndarray) -> np.ndarray:
+        """
+        Пачка записей DEPTH_DTYPE. Возвращает слоты, которые обновились.
+        """
+        records = self.store.known(records)
+        ts = records["exch_ts"]
+        if len(records) > 1 and (ts[1:] < ts[:-1]).any():
+            records = records[np.argsort(ts, kind="stable")]
+            ts = records["exch_ts"]
+        slots = self.store.slots(records["exchange"], records["market"], records["symbol"])
+        fresh = ts >= self.ts[slots]
+        if not fresh.all():
+            slots = slots[fresh]
+            records = records[fresh]
+            ts = ts[fresh]
+        n = self.levels
+        self.bid_px[slots] = records["bid_px"][:, :n]
+        self.bid_qty[slots] = records["bid_qty"][:, :n]
+        self.ask_px[slots] = records["ask_px"][:, :n]
+        self.ask_qty[slots] = records["ask_qty"][:, :n]
+        self.ts[slots] = ts
+        return slots
+
+    def active_count(self) -> int:
+        return int(np.count_nonzero(self.ts))
+
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in (self.bid_px, self.bid_qty, self.ask_px, self.ask_qty, self.ts))
@@ -1,33 +1,85 @@
 # collector.py
 #!/usr/bin/env python3
-import socket
-from time import time
+import functools
+import signal
+import time
+
+from latency import LatencyMonitor, format_summary
+from price_store import SYMBOL_HEADROOM, DepthStore, PriceStore
+from publisher import UDP_PORT, load_symbol_ids
+from receiver import BatchReceiver, RCVBUF_BYTES
+from recorder import TickRecorder
+from spread_engine import SpreadEngine
 
 # ================== НАСТРОЙКИ ==================
 UDP_IP   = "0.0.0.0"      # слушать на всех интерфейсах
-UDP_PORT = 5555           # порт, на который шлют все твои скрипты
+# UDP_PORT = 5555 — общий с коллекторами, см. publisher.py
+
+STATS_INTERVAL = 5        # сек между строками статистики
+
+# Время приёма ядром (SO_TIMESTAMPNS) для гистограмм задержек.
+# Приём через recvmsg чуть дороже; False — только задержки по времени коллектора.
+KERNEL_TIMESTAMPS = True
+
+# Писать все принятые котировки в сегменты recorder.py (папка) — для
+# разбора событий и replay. None — не писать. Запись в отдельном потоке,
+# если диск не успевает — пачки выбрасываются (счётчик в статистике).
+RECORD_DIR = None
+
+# Как часто проверять файлы пар и реестр символов (новые листинги), с;
+# kill -HUP <pid> — сразу
+REFRESH_INTERVAL = 2.0
+
+# Хранилище: слот (exchange, market, symbol) → колонки bid/ask/qty/ts, см. price_store.py.
+# Символы, которые коллекторы подхватили на ходу, хранилище берёт из реестра само
+store = PriceStore(load_symbol_ids(), headroom=SYMBOL_HEADROOM,
+                   reload=functools.partial(load_symbol_ids, refresh=True))
+
+# Верх стакана по тем же слотам — если коллекторы шлют стаканы (publish_depth)
+depth = DepthStore(store)
+
+# Спреды спот × фьючерс по unique pairs/*_s_*_f.txt, пересчёт по мере обновлений;
+# по стаканам — ещё и исполнимые спреды на EXEC_NOTIONAL (spread_engine.py)
+spreads = SpreadEngine.from_pair_files(store, depth=depth)
 
-# Хранилище: (exchange, market, symbol) → {bid, ask, ts}
-prices = {}
-stats_last_print = 0
+# Гистограммы задержек биржа → коллектор → prices.py, см. latency.py
+latency = LatencyMonitor()
 
-# ================== UDP СЕРВЕР ==================
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-sock.bind((UDP_IP, UDP_PORT))
 
-print(f"UDP-коллектор запущен → {UDP_IP}:{UDP_PORT}")
-print("Ожидаю данные от бирж...\n")
+def store_batch(records, kernel_ns=None) -> int | None:
+    """
+    Все бинарные записи одной пачки приёма — прямо в массивы, без разбора.
+    Возвращает слот последней обновлённой записи или None, если обновлять нечего.
+    """
+    if not len(records):
+        return None
+    slots = store.update_records(records)
+    spreads.on_slots(slots)
+    latency.observe(records, kernel_ns, time.time_ns())
+    return int(slots[-1]) if len(slots) else None
 
-while True:
-    data, _ = sock.recvfrom(4096)                    # буфер больше любой строки
+
+def store_depth(records) -> None:
+    """
+    Стаканы пачки — в DepthStore, пересчёт исполнимых спредов затронутых ног.
+    """
+    if len(records):
+        spreads.on_depth_slots(depth.update_records(records))
+
+
+def store_legacy_line(data: bytes) -> int | None:
+    """
+    Старый текстовый формат EXCHANGE,market,SYMBOL,BID,ASK,TS —
+    оставлен для ручной отладки (nc -u) и скриптов, ещё не переведённых
+    на publisher.py.
+    """
     line = data.decode("utf-8", errors="ignore").strip()
     if not line:
-        continue
+        return None
 
     parts = line.split(",")
     if len(parts) != 6:
-        continue
+        return None
 
     exchange, market, symbol, bid_str, ask_str, ts_str = parts
 
@@ -36,23 +88,112 @@ while True:
         ask = float(ask_str)
         ts  = int(ts_str)
     except ValueError:
-        continue
-
-    key = (exchange.upper(), market.lower(), symbol.upper())
-
-    # Обновляем только если пришедшие данные свежее или равны по времени
-    old = prices.get(key, {})
-    if ts >= old.get("ts", 0):
-        prices[key] = {"bid": bid, "ask": ask, "ts": ts}
-
-    # Статистика каждые 5 секунд
-    now = time()
-    if now - stats_last_print >= 5:
-        total = len(prices)
-        print(f"Активных инструментов: {total} | Последнее: {exchange} {market} {symbol} → {bid} / ask:.6f}")
-        stats_last_print = now
-
-        # Пример: как получить цену BTC на всех биржах
-        # for (ex, mk, sym), val in prices.items():
-        #     if sym == "BTCUSDT":
-        #         print(f"  {ex:7} {mk:7} {val['bid']} / {val['ask']}")
\ No newline at end of file
+        return None
+
+    slot = store.intern(exchange, market, symbol)
+    if slot is None:
+        return None
+    if store.update_one(slot, bid, ask, ts):
+        spreads.on_slot(slot)
+    return slot
+
+
+def refresh() -> None:
+    """
+    Новые листинги без перезапуска: реестр и файлы пар перечитываются,
+    ноги спредов перестраиваются, котировки в хранилище остаются.
+    """
+    if spreads.refresh():
+        print(f"[PAIRS] ног спот × фьючерс: {spreads.n_legs} (пропущено {spreads.skipped}),"
+              f" символов {len(store.symbol_names)}, слотов {store.n_slots}")
+
+
+def main() -> None:
+    stats_last_print = time.time()
+    stats_records = 0
+    last = None
+    refresh_last = time.monotonic()
+    wake = []
+
+    def moved(old_n_symbols: int) -> None:
+        # колонки переложены под новые символы — слот последней котировки тоже
+        nonlocal last
+        if last is not None:
+            last = store.reslot(last, old_n_symbols)
+
+    store.on_resize.append(moved)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: wake.append(signum))
+
+    # ================== UDP СЕРВЕР ==================
+    receiver = BatchReceiver(UDP_IP, UDP_PORT, rcvbuf=RCVBUF_BYTES, timestamps=KERNEL_TIMESTAMPS)
+    recorder = TickRecorder(RECORD_DIR) if RECORD_DIR else None
+
+    print(f"UDP-коллектор запущен → {UDP_IP}:{UDP_PORT}, SO_RCVBUF={receiver.rcvbuf}")
+    print(f"Слотов: {store.n_slots}, {store.memory_per_instrument():.0f} байт на инструмент")
+    print(f"Ног спот × фьючерс: {spreads.n_legs} (пропущено {spreads.skipped})")
+    print("Ожидаю данные от бирж...\n")
+
+    while True:
+        if receiver.wait(timeout=1.0):
+            records, kernel_ns, depth_records, other = receiver.drain()  # всё, что накопилось в ядре
+            if recorder is not None:
+                recorder.submit(records)
+
+            slot = store_batch(records, kernel_ns)
+            store_depth(depth_records)
+            if slot is not None:
+                last = slot
+            for data in other:
+                slot = store_legacy_line(data)
+                if slot is not None:
+                    last = slot
+
+        if wake or time.monotonic() - refresh_last >= REFRESH_INTERVAL:
+            wake.clear()
+            refresh_last = time.monotonic()
+            refresh()
+
+        # Статистика каждые STATS_INTERVAL секунд
+        now = time.time()
+        if now - stats_last_print >= STATS_INTERVAL:
+            rate = (receiver.records - stats_records) / (now - stats_last_print)
+            stats_records = receiver.records
+            stats_last_print = now
+
+            total = store.active_count()
+            line = (
+                f"Активных инструментов: {total} | {rate:,.0f} котировок/с"
+                f" | пачек {receiver.batches}, датаграмм {receiver.datagrams}"
+                f" | потери: ядро {receiver.kernel_drops()}, seq {receiver.seq_gaps}"
+            )
+            if receiver.depth_records:
+                line += f" | стаканов: {depth.active_count()}"
+            if recorder is not None:
+                line += f" | запись: {recorder.recorded:,}, выброшено {recorder.dropped}"
+            if store.unknown:
+                # id, которых нет и в перечитанном реестре
+                line += f" | записей с неизвестным символом: {store.unknown}"
+            if last is not None:
+                exchange, market, symbol = store.describe(last)
+                line += f" | Последнее: {exchange} {market} {symbol} → {store.bid[last]} / {store.ask[last]:.6f}"
+            print(line)
+
+            # Задержки за интервал, мс: p50/p99/p99.9 по каждому этапу
+            for row in format_summary(latency.summary()):
+                print(row)
+            latency.reset()
+
+            # Пример: лучшие спреды спот × фьючерс
+            # for row in spreads.top(5):
+            #     print(f"  {row['symbol']:12} {row['spot']:7} → {row['futures']:7} {row['entry']:+.3f}%"
+            #           f"  (возраст {row['spot_age_ms']} / {row['fut_age_ms']} мс)"
+            #           f"  исполнимый на ${row['notional']:.0f}: {row['exec_entry']:+.3f}%")
+
+            # Пример: как получить цену BTC на всех биржах
+            # for (ex, mk), (bid, ask, ts) in store.symbol_view("BTCUSDT").items():
+            #     print(f"  {ex:7} {mk:7} {bid} / {ask}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Бинарный протокол коллекторы → prices.py.
+
+Каждый коллектор (binance.py, bybit.py, okx.py, bingx.py, mexc.py, mexc2-0.py)
+вместо print() CSV-строки пакует котировку в запись фиксированного формата
+и копит несколько записей в одной датаграмме. Датаграмма уходит по UDP,
+когда буфер заполнен, либо сразу после обработки текущего WS-фрейма
+(call_soon), либо по дедлайну FLUSH_DELAY_US — что наступит раньше.
+
+Формат датаграммы (little-endian):
+
+    заголовок  HEADER = <HBBII
+        magic      u16   0x5442 ("TB")
+        version    u8
+        count      u8    число записей
+        source     u32   id отправителя (pid процесса)
+        seq        u32   номер датаграммы у отправителя (для подсчёта потерь)
+
+    запись     RECORD = <BBHIddddqq  (56 байт)
+        exchange   u8    индекс в EXCHANGES
+        market     u8    индекс в MARKETS
+        flags      u16   младший байт — FLAG_*, старший — номер соединения
+                         коллектора (conn_flags), для задержек по соединениям
+        symbol     u32   id канонического символа (см. load_symbol_ids)
+        bid, ask   f64
+        bid_qty    f64   NaN, если биржа не прислала объём
+        ask_qty    f64
+        exch_ts    i64   время события на бирже, мс; если биржа его не прислала —
+                         локальное время приёма и флаг FLAG_LOCAL_TS
+        recv_ns    i64   локальное время приёма фрейма, time.time_ns()
+
+Стакан (publish_depth, для исполнимых спредов) идёт отдельными
+датаграммами с тем же заголовком, но magic DEPTH_MAGIC 0x5444 ("TD") и
+записями фиксированной ширины:
+
+    запись     DEPTH_RECORD = <BBHIqq + 4*DEPTH_LEVELS d  (344 байта)
+        exchange, market, flags, symbol   как в RECORD
+        exch_ts, recv_ns                  как в RECORD
+        bid_px[DEPTH_LEVELS]   от лучшей цены; недостающие уровни — NaN
+        bid_qty[DEPTH_LEVELS]  объём в базовой монете; недостающие — 0
+        ask_px[DEPTH_LEVELS]
+        ask_qty[DEPTH_LEVELS]
+
+seq у котировок и стаканов общий — потери считаются по обоим видам.
+
+Декодер на стороне prices.py ничего не парсит: struct.iter_unpack отдаёт
+готовые кортежи чисел.
+"""
+
+import asyncio
+import os
+import socket
+import struct
+import time
+from symbols import SYMBOLS_DIR, load_registry
+
+# ================== НАСТРОЙКИ ==================
+
+UDP_HOST = "127.0.0.1"
+UDP_PORT = 5555
+
+# Не больше одного Ethernet-кадра без фрагментации (1500 - IP - UDP)
+MAX_DATAGRAM_SIZE = 1472
+
+# Сколько максимум может лежать в буфере первая запись, мкс
+FLUSH_DELAY_US = 200
+
+# Дополнительно писать котировки в общую таблицу в shared memory
+# (quote_table.py), откуда их читают стратегии без UDP-хопа.
+# None — только UDP.
+QUOTE_TABLE_PATH = None
+
+# Отправлять ли датаграммы в prices.py. Можно выключить, если
+# все потребители читают из QUOTE_TABLE_PATH.
+UDP_ENABLED = True
+
+# Папка с *_all.txt, из которых строится общая таблица id символов, —
+# symbols.SYMBOLS_DIR. Коллекторы и prices.py должны читать одну и ту же папку.
+
+# ================== ПРОТОКОЛ ==================
+
+MAGIC = 0x5442
+VERSION = 1
+
+HEADER = struct.Struct("<HBBII")
+RECORD = struct.Struct("<BBHIddddqq")
+HEADER_SIZE = HEADER.size
+RECORD_SIZE = RECORD.size
+
+DEPTH_MAGIC = 0x5444
+DEPTH_LEVELS = 10
+DEPTH_RECORD = struct.Struct(f"<BBHIqq{4 * DEPTH_LEVELS}d")
+DEPTH_RECORD_SIZE = DEPTH_RECORD.size
+
+EXCHANGES = ("BINANCE", "BYBIT", "OKX", "BINGX", "MEXC")
+MARKETS = ("spot", "futures")
+
+EXCHANGE_IDS = {name: i for i, name in enumerate(EXCHANGES)}
+MARKET_IDS = {name: i for i, name in enumerate(MARKETS)}
+
+SPOT = MARKET_IDS["spot"]
+FUTURES = MARKET_IDS["futures"]
+
+NAN = float("nan")
+
+# exch_ts — не время биржи, а локальный штамп коллектора
+FLAG_LOCAL_TS = 0x0001
+
+# Заполнитель недостающих уровней стакана
+_EMPTY_LEVELS = [(NAN, 0.0)] * DEPTH_LEVELS
+
+
+def conn_flags(conn_id: int) -> int:
+    """
+    Номер соединения коллектора в старшем байте flags.
+    """
+    return (conn_id & 0xFF) << 8
+
+
+# ================== ТАБЛИЦА СИМВОЛОВ ==================
+
+def load_symbol_ids(directory: str = SYMBOLS_DIR, refresh: bool = False) -> dict[str, int]:
+    """
+    Канонический символ -> id из реестра symbols.py. id у всех процессов
+    совпадают и не сдвигаются, когда в списки добавляются символы.
+    refresh — перечитать реестр, если списки изменились после загрузки.
+    """
+    return load_registry(directory, refresh=refresh).ids
+
+
+# ================== ОТПРАВИТЕЛЬ ==================
+
+# Все Publisher процесса — счётчики для supervisor.py
+PUBLISHERS: list["Publisher"] = []
+
+
+class Publisher:
+    """
+    Копит записи в заранее выделенном буфере и отправляет их пачкой.
+
+    publish() ничего не аллоцирует: запись пакуется прямо в bytearray
+    через struct.pack_into. Сокет неблокирующий — если ядро не приняло
+    датаграмму, она считается потерянной (dropped), коллектор не ждёт.
+    """
+
+    def __init__(
+        self,
+        exchange: str,
+        host: str = UDP_HOST,
+        port: int = UDP_PORT,
+        max_datagram: int = MAX_DATAGRAM_SIZE,
+        flush_delay_us: int = FLUSH_DELAY_US,
+        quote_table_path: str | None = QUOTE_TABLE_PATH,
+        udp_enabled: bool = UDP_ENABLED,
+    ):
+        self.exchange_id = EXCHANGE_IDS[exchange]
+        self.max_records = min((max_datagram - HEADER_SIZE) // RECORD_SIZE, 255)
+        if self.max_records < 1:
+            raise ValueError(f"max_datagram={max_datagram} меньше одной записи")
+
+        self._buf = bytearray(HEADER_SIZE + self.max_records * RECORD_SIZE)
+        self._view = memoryview(self._buf)
+        self._count = 0
+        self.max_depth_records = min((max_datagram - HEADER_SIZE) // DEPTH_RECORD_SIZE, 255)
+        self._depth_buf = bytearray(HEADER_SIZE + max(self.max_depth_records, 1) * DEPTH_RECORD_SIZE)
+        self._depth_view = memoryview(self._depth_buf)
+        self._depth_count = 0
+        self._seq = 0
+        self._source = os.getpid() & 0xFFFFFFFF
+        self._flush_delay_ns = flush_delay_us * 1000
+        self._first_ns = 0
+        self._flush_scheduled = False
+
+        self._sock = None
+        if udp_enabled:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+            self._sock.connect((host, port))
+
+        self._table = None
+        if quote_table_path:
+            from quote_table import QuoteTable
+            self._table = QuoteTable(quote_table_path)
+
+        # Счётчики для статистики
+        self.sent_depth = 0
+        self.sent_records = 0
+        self.sent_datagrams = 0
+        self.dropped_datagrams = 0
+        PUBLISHERS.append(self)
+
+    def publish(
+        self,
+        market_id: int,
+        symbol_id: int,
+        bid: float,
+        ask: float,
+        bid_qty: float = NAN,
+        ask_qty: float = NAN,
+        exch_ts: int = 0,
+        recv_ns: int = 0,
+        flags: int = 0,
+    ) -> None:
+        if not exch_ts:
+            exch_ts = (recv_ns or time.time_ns()) // 1_000_000
+            flags |= FLAG_LOCAL_TS
+        if self._table is not None:
+            self._table.write(
+                self.exchange_id, market_id, symbol_id,
+                bid, ask, bid_qty, ask_qty, exch_ts, recv_ns,
+            )
+        if self._sock is None:
+            return
+
+        count = self._count
+        RECORD.pack_into(
+            self._buf, HEADER_SIZE + count * RECORD_SIZE,
+            self.exchange_id, market_id, flags, symbol_id,
+            bid, ask, bid_qty, ask_qty, exch_ts, recv_ns,
+        )
+        count += 1
+        self._count = count
+
+        if count >= self.max_records:
+            self.flush()
+        elif count == 1:
+            if not self._depth_count:
+                self._first_ns = time.perf_counter_ns()
+            self._schedule_flush()
+        elif time.perf_counter_ns() - self._first_ns >= self._flush_delay_ns:
+            # Длинный фрейм (например, 800 тикеров MEXC) — не держим
+            # первые записи до конца его обработки
+            self.flush()
+
+    def publish_depth(
+        self,
+        market_id: int,
+        symbol_id: int,
+        bids,
+        asks,
+        exch_ts: int = 0,
+        recv_ns: int = 0,
+        flags: int = 0,
+    ) -> None:
+        """
+        Верх стакана: bids/asks — [(цена, объём в базовой монете), ...] от
+        лучшей цены, берутся первые DEPTH_LEVELS уровней.
+        """
+        if self._sock is None or not self.max_depth_records:
+            return
+        if not exch_ts:
+            exch_ts = (recv_ns or time.time_ns()) // 1_000_000
+            flags |= FLAG_LOCAL_TS
+
+        bids = list(bids[:DEPTH_LEVELS])
+        asks = list(asks[:DEPTH_LEVELS])
+        if len(bids) < DEPTH_LEVELS:
+            bids += _EMPTY_LEVELS[:DEPTH_LEVELS - len(bids)]
+        if len(asks) < DEPTH_LEVELS:
+            asks += _EMPTY_LEVELS[:DEPTH_LEVELS - len(asks)]
+
+        count = self._depth_count
+        DEPTH_RECORD.pack_into(
+            self._depth_buf, HEADER_SIZE + count * DEPTH_RECORD_SIZE,
+            self.exchange_id, market_id, flags, symbol_id, exch_ts, recv_ns,
+            *[p for p, _ in bids], *[q for _, q in bids],
+            *[p for p, _ in asks], *[q for _, q in asks],
+        )
+        count += 1
+        self._depth_count = count
+
+        if count >= self.max_depth_records:
+            self.flush()
+        elif count == 1:
+            if not self._count:
+                self._first_ns = time.perf_counter_ns()
+            self._schedule_flush()
+        elif time.perf_counter_ns() - self._first_ns >= self._flush_delay_ns:
+            self.flush()
+
+    def flush(self) -> None:
+        count = self._count
+        if count:
+            self._count = 0
+            if self._send(self._view, self._buf, MAGIC, count, RECORD_SIZE):
+                self.sent_records += count
+        count = self._depth_count
+        if count:
+            self._depth_count = 0
+            if self._send(self._depth_view, self._depth_buf, DEPTH_MAGIC, count, DEPTH_RECORD_SIZE):
+                self.sent_depth += count
+
+    def _send(self, view: memoryview, buf: bytearray, magic: int, count: int, size: int) -> bool:
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        HEADER.pack_into(buf, 0, magic, VERSION, count, self._source, self._seq)
+        try:
+            self._sock.send(view[:HEADER_SIZE + count * size])
+        except (BlockingIOError, ConnectionRefusedError):
+            # буфер сокета полон / prices.py ещё не запущен
+            self.dropped_datagrams += 1
+            return False
+        self.sent_datagrams += 1
+        return True
+
+    def _schedule_flush(self) -> None:
+        # Внутри event loop: отправить сразу, как только текущий фрейм
+        # обработан и управление вернулось в цикл
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_scheduled = True
+        loop.call_soon(self._scheduled_flush)
+
+    def _scheduled_flush(self) -> None:
+        self._flush_scheduled = False
+        self.flush()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self.flush()
+            self._sock.close()
+        if self._table is not None:
+            self._table.close()
+
+
+# ================== ДЕКОДЕР ==================
+
+def decode_header(data):
+    """
+    Проверяет заголовок бинарной датаграммы.
+    Возвращает (source, seq, count) или None, если это не наш формат
+    (например, старая CSV-строка). Записи начинаются с HEADER_SIZE.
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+    magic, version, count, source, seq = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        return None
+    if len(data) < HEADER_SIZE + count * RECORD_SIZE:
+        return None
+    return source, seq, count
+
+
+def decode_datagram(data):
+    """
+    Разбирает бинарную датаграмму.
+    Возвращает (source, seq, записи) или None, если это не наш формат.
+    Записи — кортежи в порядке полей RECORD.
+    """
+    header = decode_header(data)
+    if header is None:
+        return None
+    source, seq, count = header
+    end = HEADER_SIZE + count * RECORD_SIZE
+    return source, seq, RECORD.iter_unpack(memoryview(data)[HEADER_SIZE:end])
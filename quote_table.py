@@ -0,0 +1,180 @@
+"""
+Общая таблица котировок в shared memory (mmap-файл).
+
+Один слот на (биржа, рынок, id символа), слоты фиксированного размера
+(64 байта — одна кэш-линия), так что адрес слота вычисляется арифметикой,
+без словарей и без сокета между процессами.
+
+Коллекторы пишут свои слоты напрямую (Publisher с quote_table_path),
+любое число стратегий/мониторов читает их из своих процессов.
+Порванных значений читатель не видит благодаря seqlock:
+
+    писатель:  seq += 1 (нечётный) → данные → seq += 1 (чётный)
+    читатель:  seq1 → данные → seq2; если seq1 нечётный или seq1 != seq2 — повтор
+
+Каждым слотом владеет ровно один писатель (процесс коллектора своей биржи).
+
+Запуск как монитор:
+    python quote_table.py BTCUSDT
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from publisher import EXCHANGES, MARKETS, NAN, load_symbol_ids
+
+# ================== НАСТРОЙКИ ==================
+
+# /dev/shm — память, не диск. Если его нет (не Linux) — временная папка.
+DEFAULT_PATH = (
+    "/dev/shm/tradebot_quotes"
+    if os.path.isdir("/dev/shm")
+    else os.path.join(tempfile.gettempdir(), "tradebot_quotes")
+)
+
+# Ёмкость по символам на каждую пару (биржа, рынок)
+MAX_SYMBOLS = 4096
+
+# Сколько раз читатель повторяет чтение слота, который сейчас пишется
+READ_RETRIES = 100
+
+# ================== РАСКЛАДКА ==================
+
+MAGIC = 0x51544231  # "QTB1"
+
+# magic, n_exchanges, n_markets, max_symbols, slot_size
+HEADER = struct.Struct("<IIIII")
+HEADER_SIZE = 64
+
+SEQ = struct.Struct("<Q")
+# bid, ask, bid_qty, ask_qty, exch_ts, recv_ns
+DATA = struct.Struct("<ddddqq")
+SLOT_SIZE = 64  # 8 (seq) + 48 (данные) + 8 (выравнивание)
+
+
+class QuoteTable:
+    """
+    mmap-таблица слотов. Открывается одинаково писателями и читателями:
+    файл создаётся при первом открытии, дальше все проецируют тот же.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_symbols: int = MAX_SYMBOLS):
+        self.path = path
+        self.n_exchanges = len(EXCHANGES)
+        self.n_markets = len(MARKETS)
+        self.max_symbols = max_symbols
+        self.n_slots = self.n_exchanges * self.n_markets * max_symbols
+        size = HEADER_SIZE + self.n_slots * SLOT_SIZE
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, n_ex, n_mk, n_sym, slot_size = HEADER.unpack_from(self._mm, 0)
+        if magic == 0:
+            HEADER.pack_into(self._mm, 0, MAGIC, self.n_exchanges, self.n_markets, max_symbols, SLOT_SIZE)
+        elif (magic, n_ex, n_mk, n_sym, slot_size) != (
+            MAGIC, self.n_exchanges, self.n_markets, max_symbols, SLOT_SIZE
+        ):
+            raise ValueError(f"{path}: другая раскладка таблицы, удалите файл и перезапустите коллекторы")
+
+    def slot_offset(self, exchange_id: int, market_id: int, symbol_id: int) -> int:
+        if symbol_id >= self.max_symbols:
+            raise IndexError(f"symbol_id={symbol_id} >= MAX_SYMBOLS={self.max_symbols}")
+        return HEADER_SIZE + (
+            (exchange_id * self.n_markets + market_id) * self.max_symbols + symbol_id
+        ) * SLOT_SIZE
+
+    # ---------- запись ----------
+
+    def write(
+        self,
+        exchange_id: int,
+        market_id: int,
+        symbol_id: int,
+        bid: float,
+        ask: float,
+        bid_qty: float = NAN,
+        ask_qty: float = NAN,
+        exch_ts: int = 0,
+        recv_ns: int = 0,
+    ) -> None:
+        mm = self._mm
+        off = self.slot_offset(exchange_id, market_id, symbol_id)
+        seq = SEQ.unpack_from(mm, off)[0]
+        if seq & 1:
+            # предыдущая запись оборвалась (процесс упал посреди неё)
+            seq += 1
+        SEQ.pack_into(mm, off, seq + 1)
+        DATA.pack_into(mm, off + 8, bid, ask, bid_qty, ask_qty, exch_ts, recv_ns)
+        SEQ.pack_into(mm, off, seq + 2)
+
+    # ---------- чтение ----------
+
+    def read(self, exchange_id: int, market_id: int, symbol_id: int):
+        """
+        Согласованный снимок слота: (bid, ask, bid_qty, ask_qty, exch_ts, recv_ns),
+        или None, если слот ни разу не писался / писатель завис посреди записи.
+        """
+        return self._read_at(self.slot_offset(exchange_id, market_id, symbol_id))
+
+    def _read_at(self, off: int):
+        mm = self._mm
+        for _ in range(READ_RETRIES):
+            seq1 = SEQ.unpack_from(mm, off)[0]
+            if seq1 == 0:
+                return None
+            if seq1 & 1:
+                continue
+            data = DATA.unpack_from(mm, off + 8)
+            if SEQ.unpack_from(mm, off)[0] == seq1:
+                return data
+        return None
+
+    def read_symbol(self, symbol_id: int) -> dict:
+        """
+        Все биржи/рынки по одному символу: {(exchange_id, market_id): snapshot}.
+        """
+        out = {}
+        for ex in range(self.n_exchanges):
+            for mk in range(self.n_markets):
+                snap = self._read_at(self.slot_offset(ex, mk, symbol_id))
+                if snap is not None:
+                    out[(ex, mk)] = snap
+        return out
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+# ================== МОНИТОР ==================
+
+def main() -> None:
+    symbol = sys.argv[1].upper() if len(sys.argv) > 1 else "BTCUSDT"
+    symbol_ids = load_symbol_ids()
+    if symbol not in symbol_ids:
+        print(f"{symbol} нет в общей таблице символов")
+        return
+
+    table = QuoteTable()
+    symbol_id = symbol_ids[symbol]
+    print(f"Читаю {table.path}, символ {symbol} (id={symbol_id})\n")
+
+    while True:
+        now_ms = int(time.time() * 1000)
+        for (ex, mk), (bid, ask, _, _, ts, _) in sorted(table.read_symbol(symbol_id).items()):
+            print(f"  {EXCHANGES[ex]:7} {MARKETS[mk]:7} {bid} / {ask}  ({now_ms - ts} мс)")
+        print()
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Пакетный приём датаграмм для prices.py.
+
+Вместо одного блокирующего recvfrom на датаграмму сокет неблокирующий:
+по одному пробуждению (select) вычитываем всё, что накопилось в ядре,
+прямо в заранее выделенный буфер. Заголовки бинарных датаграмм
+выкидываются, записи сдвигаются вплотную друг к другу, так что вся
+пачка — это один массив RECORD_DTYPE и обрабатывается за один шаг.
+
+Потери считаются, а не прячутся:
+    kernel_drops()  — счётчик drops сокета из /proc/net/udp (переполнение SO_RCVBUF),
+                      в режиме timestamps — из SO_RXQ_OVFL
+    seq_gaps        — пропуски в seq по каждому отправителю (сюда же попадают
+                      датаграммы, которые publisher не смог отправить)
+
+С timestamps=True приём идёт через recvmsg_into, и ядро прикладывает к
+каждой датаграмме время её приёма (SO_TIMESTAMPNS) — для гистограмм
+задержек (latency.py). Это дороже recv_into, поэтому отключаемо.
+"""
+
+import os
+import selectors
+import socket
+import struct
+
+import numpy as np
+
+from price_store import DEPTH_DTYPE, RECORD_DTYPE
+from publisher import DEPTH_MAGIC, DEPTH_RECORD_SIZE, HEADER, HEADER_SIZE, MAGIC, RECORD_SIZE, VERSION
+
+# ================== НАСТРОЙКИ ==================
+
+# Желаемый размер приёмного буфера ядра. Без root ограничен
+# net.core.rmem_max — тогда стоит поднять его через sysctl.
+RCVBUF_BYTES = 32 * 1024 * 1024
+
+# Сколько байт записей вычитывать за одно пробуждение
+BATCH_BYTES = 4 * 1024 * 1024
+
+# Буфер под записи стаканов (publish_depth) за одно пробуждение
+DEPTH_BATCH_BYTES = 1024 * 1024
+
+# Максимальный размер одной UDP-датаграммы
+MAX_DATAGRAM = 65535
+
+SO_RCVBUFFORCE = getattr(socket, "SO_RCVBUFFORCE", 33)
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40)
+
+TIMESPEC = struct.Struct("@qq")
+OVFL = struct.Struct("@I")
+ANCBUF_SIZE = socket.CMSG_SPACE(TIMESPEC.size) + socket.CMSG_SPACE(OVFL.size)
+
+
+# Все BatchReceiver процесса — счётчики для supervisor.py
+RECEIVERS: list["BatchReceiver"] = []
+
+
+class BatchReceiver:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        rcvbuf: int = RCVBUF_BYTES,
+        batch_bytes: int = BATCH_BYTES,
+        timestamps: bool = False,
+    ):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._set_rcvbuf(rcvbuf)
+        self.timestamps = timestamps
+        self._ovfl = None
+        if timestamps:
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            except OSError:
+                pass
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+
+        self._arena = np.empty(batch_bytes + MAX_DATAGRAM, dtype=np.uint8)
+        self._view = memoryview(self._arena)
+        # время приёма ядром для каждой записи пачки (режим timestamps)
+        self._kernel_ns = np.zeros((batch_bytes + MAX_DATAGRAM) // RECORD_SIZE, dtype=np.int64)
+        self._batch_bytes = batch_bytes
+        self._depth_arena = np.empty(DEPTH_BATCH_BYTES, dtype=np.uint8)
+        self._inode = os.fstat(self.sock.fileno()).st_ino
+        self._last_seq: dict[int, int] = {}
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.sock, selectors.EVENT_READ)
+
+        # Счётчики
+        self.batches = 0
+        self.datagrams = 0
+        self.records = 0
+        self.seq_gaps = 0
+        self.depth_records = 0
+        self.depth_overflow = 0   # стаканы, не поместившиеся в DEPTH_BATCH_BYTES
+        RECEIVERS.append(self)
+
+    def _set_rcvbuf(self, size: int) -> None:
+        # SO_RCVBUFFORCE игнорирует rmem_max, но требует CAP_NET_ADMIN
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+        except OSError:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+
+    @property
+    def rcvbuf(self) -> int:
+        return self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+    def wait(self, timeout: float | None) -> bool:
+        """
+        Ждём, пока в сокете что-то появится. False — вышел таймаут.
+        """
+        return bool(self._selector.select(timeout))
+
+    def drain(self):
+        """
+        Вычитывает всё, что есть в сокете (но не больше BATCH_BYTES записей).
+        Возвращает (records, kernel_ns, depth, other):
+            records   — массив RECORD_DTYPE по всем бинарным датаграммам пачки,
+                        действителен до следующего вызова drain()
+            kernel_ns — время приёма ядром для каждой записи (None без timestamps)
+            depth     — массив DEPTH_DTYPE (стаканы), тоже до следующего drain()
+            other     — прочие датаграммы (CSV-строки) как bytes
+        """
+        arena = self._arena
+        view = self._view
+        sock = self.sock
+        last_seq = self._last_seq
+        timestamps = self.timestamps
+        kernel_ns = self._kernel_ns
+        depth_arena = self._depth_arena
+        depth_pos = 0
+        stamp = 0
+        pos = 0
+        n_datagrams = 0
+        other = []
+
+        while pos < self._batch_bytes:
+            try:
+                if timestamps:
+                    n, ancdata, _, _ = sock.recvmsg_into([view[pos:pos + MAX_DATAGRAM]], ANCBUF_SIZE)
+                    stamp = self._parse_ancdata(ancdata)
+                else:
+                    n = sock.recv_into(view[pos:pos + MAX_DATAGRAM])
+            except BlockingIOError:
+                break
+            n_datagrams += 1
+
+            if n >= HEADER_SIZE:
+                magic, version, count, source, seq = HEADER.unpack_from(arena, pos)
+                is_depth = magic == DEPTH_MAGIC
+                size = count * (DEPTH_RECORD_SIZE if is_depth else RECORD_SIZE)
+                if (magic == MAGIC or is_depth) and version == VERSION and n >= HEADER_SIZE + size:
+                    prev = last_seq.get(source)
+                    if prev is not None:
+                        gap = (seq - prev - 1) & 0xFFFFFFFF
+                        if gap < 0x80000000:
+                            self.seq_gaps += gap
+                    last_seq[source] = seq
+                    if is_depth:
+                        # стаканы — в свой буфер, если он не переполнен
+                        if depth_pos + size <= len(depth_arena):
+                            depth_arena[depth_pos:depth_pos + size] = arena[pos + HEADER_SIZE:pos + HEADER_SIZE + size]
+                            depth_pos += size
+                        else:
+                            self.depth_overflow += count
+                        continue
+                    # убираем заголовок: записи пачки идут подряд
+                    arena[pos:pos + size] = arena[pos + HEADER_SIZE:pos + HEADER_SIZE + size]
+                    if timestamps:
+                        first = pos // RECORD_SIZE
+                        kernel_ns[first:first + count] = stamp
+                    pos += size
+                    continue
+
+            other.append(bytes(view[pos:pos + n]))
+
+        records = arena[:pos].view(RECORD_DTYPE)
+        depth = depth_arena[:depth_pos].view(DEPTH_DTYPE)
+        if n_datagrams:
+            self.batches += 1
+            self.datagrams += n_datagrams
+            self.records += len(records)
+            self.depth_records += len(depth)
+        return records, (kernel_ns[:len(records)] if timestamps else None), depth, other
+
+    def _parse_ancdata(self, ancdata) -> int:
+        stamp = 0
+        for level, kind, data in ancdata:
+            if level != socket.SOL_SOCKET:
+                continue
+            if kind == SO_TIMESTAMPNS:
+                sec, nsec = TIMESPEC.unpack_from(data)
+                stamp = sec * 1_000_000_000 + nsec
+            elif kind == SO_RXQ_OVFL:
+                self._ovfl = OVFL.unpack_from(data)[0]
+        return stamp
+
+    def kernel_drops(self) -> int | None:
+        """
+        Сколько датаграмм ядро выбросило для этого сокета (SO_RXQ_OVFL или
+        колонка drops в /proc/net/udp). None — если узнать неоткуда.
+        """
+        if self._ovfl is not None:
+            return self._ovfl
+        try:
+            with open("/proc/net/udp", "r", encoding="ascii") as f:
+                next(f)
+                for line in f:
+                    cols = line.split()
+                    if int(cols[9]) == self._inode:
+                        return int(cols[-1])
+        except (OSError, ValueError, IndexError, StopIteration):
+            return None
+        return None
+
+    def close(self) -> None:
+        self._selector.close()
+        self.sock.close()
@@ -0,0 +1,644 @@
+"""
+Запись всех котировок в бинарные сегменты и чтение диапазонов из них.
+
+Вместо CSV в stdout (mexc_prices.txt) записи RECORD_DTYPE пишутся в
+файл как есть — те же 56 байт, что идут по UDP (биржа, рынок, flags,
+символ, bid/ask, объёмы, exch_ts, recv_ns), без форматирования. Файлы
+режутся на сегменты по времени/числу записей:
+
+    ticks/ticks-20250101-100000-0001.tks
+
+    HEADER  64 байта   magic, версия, размер записи, флаги, время создания,
+                       число записей (пишет seal до того, как дописывать индекс)
+    записи  N × 56     в порядке приёма, файл отображается в память как есть
+    индекс              пишется при закрытии сегмента (seal):
+        zone      на каждый блок INDEX_STRIDE записей — min/max recv_ns
+        blocks    (только сжатый сегмент) смещение и длина каждого блока
+        symbols   id символов сегмента, по возрастанию
+        offsets   начало списка записей символа в postings (CSR)
+        postings  номера записей, сгруппированные по символу
+        names     снимок реестра symbols.py на момент закрытия: имя по id
+    FOOTER              последние байты файла: число записей, смещения секций
+
+id символов в записях — id реестра symbols.py, а он у каждой машины свой
+(порядок прошлых пересборок). Поэтому закрытый сегмент несёт свой снимок
+имён, и query / replay.py переводят id через него, а не через текущий
+реестр: запись читается верно и на другой машине. У незакрытого сегмента
+и сегментов версии 1 снимка нет — для них берётся текущий реестр.
+
+Запрос "BTCUSDT на всех биржах, 10:00–10:05" не сканирует файл:
+сегменты отсекаются по времени из FOOTER, внутри — номера записей
+символа из postings, блоки вне интервала — по zone. Незакрытый сегмент
+(идёт запись или процесс упал) читается полным проходом по записям.
+
+С COMPRESS закрытый сегмент переписывается в .tkz: каждый блок —
+колонки подряд (все bid, потом все ask, ...) и zlib; при чтении
+распаковываются только нужные блоки.
+
+Запись — в отдельном потоке: TickRecorder.submit() только копирует пачку
+в очередь, а если диск не успевает, пачка выбрасывается и считается в
+dropped — приём котировок никогда не ждёт диск. Закрытие сегмента
+(индекс, сжатие) — ещё в одном потоке, чтобы не задерживать запись
+следующего.
+
+    python recorder.py                        приём с UDP_PORT и запись в RECORD_DIR
+    python recorder.py --port 5556 --dir ticks
+    python recorder.py --query BTCUSDT --start 10:00 --end 10:05
+"""
+
+import argparse
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from price_store import RECORD_DTYPE
+from publisher import EXCHANGES, MARKETS, RECORD_SIZE, UDP_PORT
+from symbols import canonical_symbol, load_registry
+
+# ================== НАСТРОЙКИ ==================
+
+RECORD_DIR = "ticks"
+
+# Новый сегмент — раз в столько секунд или по числу записей (~235 МБ)
+SEGMENT_SECONDS = 3600
+SEGMENT_RECORDS = 1 << 22
+
+# Записей в блоке индекса времени (и в блоке сжатия)
+INDEX_STRIDE = 4096
+
+# Сжимать закрытые сегменты (.tks -> .tkz)
+COMPRESS = False
+COMPRESS_LEVEL = 1
+
+# Сколько пачек может ждать записи; дальше — dropped
+QUEUE_BATCHES = 1024
+
+# Буфер файла записи, байт
+WRITE_BUFFER = 1 << 20
+
+UDP_IP = "0.0.0.0"
+STATS_INTERVAL = 5
+
+# ================== ФОРМАТ ==================
+
+MAGIC = b"TKS1"
+FOOTER_MAGIC = b"TKF2"
+VERSION = 2
+
+# magic, version, record_size, flags, created_ns
+HEADER = struct.Struct("<4sHHIq")
+HEADER_SIZE = 64
+
+# Число записей в запасе HEADER: 0 — сегмент пишется. seal ставит его до
+# того, как дописывать индекс, и читатель незакрытого сегмента (seal идёт
+# или прерван) не примет байты индекса за записи
+RECORD_COUNT = struct.Struct("<Q")
+RECORD_COUNT_OFFSET = 24
+
+# magic, version, flags, n_records, n_blocks, stride, n_symbols,
+# start_ns, end_ns, смещения zone / blocks / symbols / offsets / postings / names,
+# длина names
+FOOTER = struct.Struct("<4sHHQIII4xqqQQQQQQQ")
+
+# версия 1 — без снимка имён, только на чтение
+FOOTER_V1_MAGIC = b"TKF1"
+FOOTER_V1 = struct.Struct("<4sHHQIII4xqqQQQQQ")
+
+FLAG_COMPRESSED = 0x0001
+
+RAW_SUFFIX = ".tks"
+COMPRESSED_SUFFIX = ".tkz"
+TEMP_SUFFIX = ".tmp"
+
+_FIELDS = [(name, RECORD_DTYPE[name]) for name in RECORD_DTYPE.names]
+
+
+# ================== ЗАПИСЬ ==================
+
+class TickRecorder:
+    """
+    Фоновая запись пачек RECORD_DTYPE в сегменты.
+    """
+
+    def __init__(
+        self,
+        directory: str = RECORD_DIR,
+        segment_seconds: float = SEGMENT_SECONDS,
+        segment_records: int = SEGMENT_RECORDS,
+        compress: bool = COMPRESS,
+        queue_batches: int = QUEUE_BATCHES,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.segment_records = segment_records
+        self.compress = compress
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_batches)
+        self._file = None
+        self._path: Path | None = None
+        self._opened = 0.0
+        self._count = 0
+        self._serial = 0
+        self._sealers: list[threading.Thread] = []
+
+        # Счётчики
+        self.recorded = 0
+        self.dropped = 0
+        self.segments = 0
+
+        self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: np.ndarray) -> None:
+        """
+        Пачка записей в очередь записи. Массив копируется: буфер приёма
+        (BatchReceiver.drain) перезаписывается следующей пачкой.
+        """
+        if not len(records):
+            return
+        try:
+            self._queue.put_nowait(records.tobytes())
+        except queue.Full:
+            self.dropped += len(records)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        for t in self._sealers:
+            t.join()
+
+    # ---------- поток записи ----------
+
+    def _run(self) -> None:
+        get = self._queue.get
+        while True:
+            try:
+                data = get(timeout=1.0)
+            except queue.Empty:
+                data = b""
+            if data is None:
+                break
+            if self._file is not None and (
+                self._count >= self.segment_records
+                or time.monotonic() - self._opened >= self.segment_seconds
+            ):
+                self._rotate()
+            if not data:
+                continue
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            n = len(data) // RECORD_SIZE
+            self._count += n
+            self.recorded += n
+        self._rotate()
+
+    def _open(self) -> None:
+        self._serial += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._path = self.directory / f"ticks-{stamp}-{self._serial:04d}{RAW_SUFFIX}"
+        self._file = open(self._path, "wb", buffering=WRITE_BUFFER)
+        header = HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, time.time_ns())
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+        self._opened = time.monotonic()
+        self._count = 0
+
+    def _rotate(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        path = self._path
+        self._file = None
+        self._path = None
+        self.segments += 1
+        t = threading.Thread(target=seal, args=(path, self.compress), name="tick-seal")
+        t.start()
+        self._sealers = [s for s in self._sealers if s.is_alive()] + [t]
+
+
+def build_index(records: np.ndarray, stride: int = INDEX_STRIDE) -> dict:
+    """
+    Индекс сегмента: zone (min/max recv_ns по блокам) и postings по символам.
+    """
+    n = len(records)
+    recv = np.ascontiguousarray(records["recv_ns"])
+    starts = np.arange(0, n, stride)
+    if n:
+        zone = np.stack([np.minimum.reduceat(recv, starts), np.maximum.reduceat(recv, starts)], axis=1)
+    else:
+        zone = np.empty((0, 2), dtype=np.int64)
+    symbols = np.ascontiguousarray(records["symbol"])
+    postings = np.argsort(symbols, kind="stable").astype(np.uint32)
+    ids, first = np.unique(symbols[postings], return_index=True)
+    return {
+        "zone": zone.astype(np.int64),
+        "symbols": ids.astype(np.uint32),
+        "offsets": np.append(first, n).astype(np.uint64),
+        "postings": postings,
+        "start_ns": int(zone[:, 0].min()) if n else 0,
+        "end_ns": int(zone[:, 1].max()) if n else 0,
+    }
+
+
+def _compress_block(block: np.ndarray) -> bytes:
+    # колонки подряд: однотипные байты рядом сжимаются в разы лучше записей
+    return zlib.compress(b"".join(block[name].tobytes() for name, _ in _FIELDS), COMPRESS_LEVEL)
+
+
+def _decompress_block(data: bytes, n: int) -> np.ndarray:
+    raw = zlib.decompress(data)
+    out = np.empty(n, dtype=RECORD_DTYPE)
+    pos = 0
+    for name, dtype in _FIELDS:
+        out[name] = np.frombuffer(raw, dtype=dtype, count=n, offset=pos)
+        pos += dtype.itemsize * n
+    return out
+
+
+def _write_aligned(f, data: bytes) -> int:
+    """
+    Пишет секцию с 8-байтовым выравниванием, возвращает её смещение.
+    """
+    pos = f.tell()
+    if pos % 8:
+        f.write(b"\0" * (8 - pos % 8))
+        pos = f.tell()
+    f.write(data)
+    return pos
+
+
+def seal(path, compress: bool = False, names: list[str] | None = None) -> Path:
+    """
+    Закрывает сегмент: дописывает индекс, снимок имён и FOOTER (с compress —
+    переписывает в .tkz). Хвост недописанной записи отрезается. names —
+    имя по id (по умолчанию реестр symbols.py, перечитанный сейчас: id,
+    розданные за время записи сегмента, в нём уже есть). Возвращает путь
+    сегмента.
+    """
+    path = Path(path)
+    if names is None:
+        names = load_registry(refresh=True).names
+    names_data = "\n".join(names).encode("utf-8")
+    size = path.stat().st_size
+    n = max(size - HEADER_SIZE, 0) // RECORD_SIZE
+    with open(path, "r+b") as f:
+        f.seek(RECORD_COUNT_OFFSET)
+        count = RECORD_COUNT.unpack(f.read(RECORD_COUNT.size))[0]
+        if count:
+            # прошлый seal прерван: за записями — часть индекса
+            n = min(n, count)
+        if size != HEADER_SIZE + n * RECORD_SIZE:
+            f.truncate(HEADER_SIZE + n * RECORD_SIZE)
+        f.seek(RECORD_COUNT_OFFSET)
+        f.write(RECORD_COUNT.pack(n))
+    if n:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+    else:
+        records = np.empty(0, dtype=RECORD_DTYPE)
+    index = build_index(records)
+    n_blocks = len(index["zone"])
+    flags = FLAG_COMPRESSED if compress else 0
+
+    if compress:
+        # .tkz появляется под своим именем только целиком: иначе читатель
+        # принял бы недописанный файл за незакрытый сегмент
+        target = path.with_suffix(COMPRESSED_SUFFIX)
+        partial = target.with_name(target.name + TEMP_SUFFIX)
+        f = open(partial, "wb")
+        with open(path, "rb") as src:
+            f.write(src.read(HEADER_SIZE))
+        blocks = np.zeros((n_blocks, 2), dtype=np.uint64)
+        for b in range(n_blocks):
+            data = _compress_block(np.asarray(records[b * INDEX_STRIDE:(b + 1) * INDEX_STRIDE]))
+            blocks[b] = f.tell(), len(data)
+            f.write(data)
+    else:
+        target = path
+        f = open(path, "r+b")
+        f.seek(0, os.SEEK_END)
+        blocks = None
+
+    with f:
+        zone_off = _write_aligned(f, index["zone"].tobytes())
+        blocks_off = _write_aligned(f, blocks.tobytes()) if blocks is not None else 0
+        symbols_off = _write_aligned(f, index["symbols"].tobytes())
+        offsets_off = _write_aligned(f, index["offsets"].tobytes())
+        postings_off = _write_aligned(f, index["postings"].tobytes())
+        names_off = _write_aligned(f, names_data)
+        f.write(FOOTER.pack(
+            FOOTER_MAGIC, VERSION, flags, n, n_blocks, INDEX_STRIDE, len(index["symbols"]),
+            index["start_ns"], index["end_ns"],
+            zone_off, blocks_off, symbols_off, offsets_off, postings_off, names_off, len(names_data),
+        ))
+        # флаг в HEADER — тем, кто читает файл с начала
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, flags, _created_ns(path)))
+
+    del records
+    if compress:
+        os.replace(partial, target)
+        path.unlink()
+    return target
+
+
+def _created_ns(path: Path) -> int:
+    with open(path, "rb") as f:
+        return HEADER.unpack(f.read(HEADER.size))[4]
+
+
+# ================== ЧТЕНИЕ ==================
+
+class Segment:
+    """
+    Один сегмент на чтение: записи через mmap, индекс — виды на тот же mmap.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+        magic, version, record_size, flags, self.created_ns = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"{self.path}: не сегмент котировок")
+
+        self.compressed = False
+        # имя по id на момент записи; None — снимка нет (см. names_or_registry)
+        self.names: list[str] | None = None
+        footer = None
+        for struct_, magic in ((FOOTER, FOOTER_MAGIC), (FOOTER_V1, FOOTER_V1_MAGIC)):
+            if len(self._mm) >= HEADER_SIZE + struct_.size:
+                unpacked = struct_.unpack_from(self._mm, len(self._mm) - struct_.size)
+                if unpacked[0] == magic:
+                    footer = unpacked
+                    break
+        self.sealed = footer is not None
+
+        if self.sealed:
+            (_, _, flags, self.n, n_blocks, self.stride, n_symbols, self.start_ns, self.end_ns,
+             zone_off, blocks_off, symbols_off, offsets_off, postings_off) = footer[:14]
+            if len(footer) > 14:
+                names_off, names_size = footer[14:]
+                data = bytes(self._mm[names_off:names_off + names_size])
+                self.names = data.decode("utf-8").split("\n") if data else []
+            self.compressed = bool(flags & FLAG_COMPRESSED)
+            self.zone = self._view(zone_off, np.int64, 2 * n_blocks).reshape(n_blocks, 2)
+            self.blocks = self._view(blocks_off, np.uint64, 2 * n_blocks).reshape(n_blocks, 2) if self.compressed else None
+            self.symbols = self._view(symbols_off, np.uint32, n_symbols)
+            self.offsets = self._view(offsets_off, np.uint64, n_symbols + 1)
+            self.postings = self._view(postings_off, np.uint32, self.n)
+        else:
+            # пишется сейчас, идёт seal или процесс упал — без индекса
+            self.n = (len(self._mm) - HEADER_SIZE) // RECORD_SIZE
+            count = RECORD_COUNT.unpack_from(self._mm, RECORD_COUNT_OFFSET)[0]
+            if count:
+                self.n = min(self.n, count)
+            self.stride = INDEX_STRIDE
+            recv = self.records()["recv_ns"]
+            self.start_ns = int(recv.min()) if self.n else 0
+            self.end_ns = int(recv.max()) if self.n else 0
+
+    def _view(self, offset: int, dtype, count: int) -> np.ndarray:
+        size = np.dtype(dtype).itemsize * count
+        return self._mm[offset:offset + size].view(dtype)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def names_or_registry(self) -> list[str]:
+        """
+        Снимок имён сегмента, а без него — текущий реестр (верно только на
+        машине, где сегмент записан).
+        """
+        return self.names if self.names is not None else load_registry().names
+
+    def block(self, b: int) -> np.ndarray:
+        start = b * self.stride
+        count = min(self.stride, self.n - start)
+        if self.compressed:
+            offset, length = (int(x) for x in self.blocks[b])
+            return _decompress_block(self._mm[offset:offset + length].tobytes(), count)
+        return self.records()[start:start + count]
+
+    def records(self) -> np.ndarray:
+        """
+        Все записи сегмента (у несжатого — вид на mmap, без копирования).
+        """
+        if self.compressed:
+            n_blocks = len(self.blocks)
+            return np.concatenate([self.block(b) for b in range(n_blocks)]) if n_blocks else np.empty(0, RECORD_DTYPE)
+        return self._mm[HEADER_SIZE:HEADER_SIZE + self.n * RECORD_SIZE].view(RECORD_DTYPE)
+
+    def read(self, symbol_ids=None, start_ns: int | None = None, end_ns: int | None = None) -> np.ndarray:
+        """
+        Записи символов symbol_ids (None — все) с recv_ns в [start_ns, end_ns).
+        """
+        lo = start_ns if start_ns is not None else np.iinfo(np.int64).min
+        hi = end_ns if end_ns is not None else np.iinfo(np.int64).max
+        if not self.n or self.end_ns < lo or self.start_ns >= hi:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        if not self.sealed:
+            out = self.records()
+            mask = (out["recv_ns"] >= lo) & (out["recv_ns"] < hi)
+            if symbol_ids is not None:
+                mask &= np.isin(out["symbol"], np.asarray(symbol_ids, dtype=np.uint32))
+            return out[mask]
+
+        live = (self.zone[:, 1] >= lo) & (self.zone[:, 0] < hi)
+        if symbol_ids is None:
+            parts = [self.block(b) for b in np.flatnonzero(live)]
+        else:
+            index = self._postings(symbol_ids)
+            index = index[live[index // self.stride]]
+            if self.compressed:
+                parts = []
+                blocks = index // self.stride
+                for b in np.unique(blocks):
+                    parts.append(self.block(int(b))[index[blocks == b] - b * self.stride])
+            else:
+                parts = [self.records()[index]]
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        out = np.concatenate(parts)
+        return out[(out["recv_ns"] >= lo) & (out["recv_ns"] < hi)]
+
+    def _postings(self, symbol_ids) -> np.ndarray:
+        ids = np.asarray(symbol_ids, dtype=np.uint32)
+        pos = np.searchsorted(self.symbols, ids)
+        parts = []
+        for i, p in zip(ids, pos):
+            if p < len(self.symbols) and self.symbols[p] == i:
+                parts.append(self.postings[int(self.offsets[p]):int(self.offsets[p + 1])])
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts)).astype(np.int64)
+
+
+def segment_paths(directory: str = RECORD_DIR) -> list[Path]:
+    """
+    Сегменты папки в порядке записи (имя начинается со времени создания).
+    Недописанный .tkz (.tkz.tmp) не сегмент; .tks, у которого уже есть
+    .tkz, — копия, которую seal вот-вот удалит.
+    """
+    d = Path(directory)
+    paths = [p for p in d.glob("ticks-*") if p.suffix in (RAW_SUFFIX, COMPRESSED_SUFFIX)]
+    compressed = {p.stem for p in paths if p.suffix == COMPRESSED_SUFFIX}
+    return sorted(p for p in paths if not (p.suffix == RAW_SUFFIX and p.stem in compressed))
+
+
+def _segments(directory: str):
+    for path in segment_paths(directory):
+        try:
+            yield Segment(path)
+        except ValueError:
+            continue
+
+
+def _by_time(parts: list[np.ndarray]) -> np.ndarray:
+    if not parts:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    out = np.concatenate(parts)
+    return out[np.argsort(out["recv_ns"], kind="stable")]
+
+
+def read_range(
+    directory: str = RECORD_DIR,
+    symbol_ids=None,
+    start_ns: int | None = None,
+    end_ns: int | None = None,
+) -> np.ndarray:
+    """
+    Записи всех сегментов папки по символам и интервалу recv_ns,
+    упорядоченные по recv_ns. id — как записаны в сегментах, без перевода
+    (сегменты одной машины); по именам — read_named.
+    """
+    parts = []
+    for segment in _segments(directory):
+        part = segment.read(symbol_ids, start_ns, end_ns)
+        if len(part):
+            parts.append(part)
+    return _by_time(parts)
+
+
+def read_named(
+    directory: str,
+    symbol_ids: dict[str, int],
+    symbols=None,
+    start_ns: int | None = None,
+    end_ns: int | None = None,
+) -> np.ndarray:
+    """
+    Как read_range, но символы — по именам: id каждого сегмента переводятся
+    через его снимок имён в таблицу symbol_ids (канонический символ -> id,
+    например текущий реестр). symbols — имена (None — все); записи символов,
+    которых нет в symbol_ids, пропускаются.
+    """
+    wanted = [canonical_symbol(s) for s in symbols] if symbols is not None else None
+    parts = []
+    skipped = 0
+    for segment in _segments(directory):
+        names = segment.names_or_registry()
+        if wanted is None:
+            ids = None
+        else:
+            local = {name: i for i, name in enumerate(names)}
+            ids = [local[name] for name in wanted if name in local]
+            if not ids:
+                continue
+        part = segment.read(ids, start_ns, end_ns)
+        if not len(part):
+            continue
+        # id сегмента -> id таблицы; -1 — имени нет в таблице (или в снимке)
+        table = np.array([symbol_ids.get(name, -1) for name in names] + [-1], dtype=np.int64)
+        local_ids = np.minimum(part["symbol"].astype(np.int64), len(names))
+        mapped = table[local_ids]
+        keep = mapped >= 0
+        skipped += len(part) - int(np.count_nonzero(keep))
+        part = part[keep]
+        part["symbol"] = mapped[keep]
+        parts.append(part)
+    if skipped:
+        print(f"[RECORDER] {directory}: пропущено записей символов вне таблицы {skipped}")
+    return _by_time(parts)
+
+
+# ================== ЗАПУСК ==================
+
+def parse_time(text: str) -> int:
+    """
+    "10:00", "10:00:30" (сегодня, местное время) или ISO-дата -> нс.
+    """
+    if len(text) <= 8 and ":" in text:
+        day = datetime.now().strftime("%Y-%m-%d")
+        text = f"{day}T{text}"
+    return int(datetime.fromisoformat(text).timestamp() * 1e9)
+
+
+def query(args) -> None:
+    # id в ответе — номер в списке запроса: реестр этой машины не нужен
+    names = list(dict.fromkeys(canonical_symbol(name) for name in args.query.split(",")))
+    start = parse_time(args.start) if args.start else None
+    end = parse_time(args.end) if args.end else None
+
+    t0 = time.perf_counter()
+    records = read_named(args.dir, {name: i for i, name in enumerate(names)}, names, start, end)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(records)} записей за {elapsed * 1e3:.1f} мс")
+    for ex, mk, sym in sorted(set(zip(records["exchange"].tolist(), records["market"].tolist(), records["symbol"].tolist()))):
+        rows = records[(records["exchange"] == ex) & (records["market"] == mk) & (records["symbol"] == sym)]
+        last = rows[-1]
+        print(f"  {EXCHANGES[ex]:7} {MARKETS[mk]:7} {names[sym]:12} {len(rows):8} записей,"
+              f" последняя {last['bid']} / {last['ask']}")
+
+
+def record(args) -> None:
+    from receiver import BatchReceiver
+
+    receiver = BatchReceiver(UDP_IP, args.port)
+    recorder = TickRecorder(args.dir, compress=args.compress)
+    print(f"Запись котировок {UDP_IP}:{args.port} → {args.dir}/, SO_RCVBUF={receiver.rcvbuf}")
+    last_print = time.time()
+    last_recorded = 0
+    try:
+        while True:
+            if receiver.wait(timeout=1.0):
+                records, _, _, _ = receiver.drain()
+                recorder.submit(records)
+            now = time.time()
+            if now - last_print >= STATS_INTERVAL:
+                rate = (recorder.recorded - last_recorded) / (now - last_print)
+                last_recorded = recorder.recorded
+                last_print = now
+                print(f"записано {recorder.recorded:,} ({rate:,.0f}/с), сегментов {recorder.segments},"
+                      f" выброшено {recorder.dropped} | потери: ядро {receiver.kernel_drops()}, seq {receiver.seq_gaps}")
+    except KeyboardInterrupt:
+        print("Остановка, закрываем сегмент...")
+    finally:
+        recorder.close()
+        receiver.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=RECORD_DIR)
+    parser.add_argument("--port", type=int, default=UDP_PORT, help="UDP-порт приёма (как у prices.py)")
+    parser.add_argument("--compress", action="store_true", default=COMPRESS, help="сжимать закрытые сегменты")
+    parser.add_argument("--query", help="символы через запятую: прочитать диапазон вместо записи")
+    parser.add_argument("--start", help="начало диапазона: 10:00, 10:00:30 или ISO")
+    parser.add_argument("--end", help="конец диапазона (не включая)")
+    args = parser.parse_args()
+    if args.query:
+        query(args)
+    else:
+        record(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Горячий резерв: N одинаковых WS-соединений, наружу — первая копия.
+
+Коллектор держит несколько реплик одного потока (одинаковая подписка,
+по возможности — на разные IP биржи) и вместо Publisher отдаёт каждой
+реплике FirstArrivalMerge.replica(i). Интерфейс у реплики тот же
+(publish / publish_depth / flush), поэтому для слияния функции
+соединений коллекторов менять не нужно; чтобы реплики шли на разные
+IP, они принимают connect_kwargs из replica_connect_kwargs.
+
+Слияние по (рынок, символ) и версии обновления:
+
+    exch_ts больше последнего      новое обновление — публикуется, реплике win
+    exch_ts равен, цены/объёмы     в одну мс у биржи бывает несколько
+      новые                        обновлений — тоже новое
+    (exch_ts, значение) среди      копия — не публикуется, реплике duplicate
+      HISTORY последних версий     и задержка относительно первой копии
+    exch_ts меньше, версии нет     реплика сильно отстала — stale
+
+Без exch_ts (биржа не прислала время) копия распознаётся только по
+совпадению значения с одной из последних версий.
+
+Если реплика отвалилась, остальные продолжают поток без паузы —
+переподключение идёт в фоне. Статистика (summary / format_summary):
+доля побед каждой реплики и квантили её отставания, по ним видно,
+какой IP/маршрут быстрее и нужен ли вообще резерв.
+"""
+
+import socket
+import time
+from array import array
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from latency import Histogram
+from publisher import NAN
+
+# ================== НАСТРОЙКИ ==================
+
+# Сколько отставаний копить до переноса в гистограмму
+LAG_BUFFER = 4096
+
+# Сколько последних версий помнить на символ: копия, отставшая больше
+# чем на столько обновлений, считается stale без замера задержки
+HISTORY = 16
+
+
+class ReplicaStats:
+    __slots__ = ("wins", "duplicates", "stale", "last_recv_ns", "lags", "hist")
+
+    def __init__(self):
+        self.wins = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.last_recv_ns = 0
+        self.lags = array("q")
+        self.hist = Histogram()
+
+    def fold(self) -> None:
+        if self.lags:
+            self.hist.record_many(np.frombuffer(self.lags, dtype=np.int64))
+            self.lags = array("q")
+
+
+class Replica:
+    """
+    Publisher одной реплики: публикует только то, что пришло первым.
+    """
+
+    __slots__ = ("merge", "index", "stats")
+
+    def __init__(self, merge: "FirstArrivalMerge", index: int):
+        self.merge = merge
+        self.index = index
+        self.stats = ReplicaStats()
+
+    def publish(
+        self,
+        market_id: int,
+        symbol_id: int,
+        bid: float,
+        ask: float,
+        bid_qty: float = NAN,
+        ask_qty: float = NAN,
+        exch_ts: int = 0,
+        recv_ns: int = 0,
+        flags: int = 0,
+    ) -> None:
+        if self.merge.first(self, market_id, symbol_id, (bid, ask, bid_qty, ask_qty), exch_ts, recv_ns):
+            self.merge.publisher.publish(
+                market_id, symbol_id, bid, ask, bid_qty, ask_qty,
+                exch_ts=exch_ts, recv_ns=recv_ns, flags=flags,
+            )
+
+    def publish_depth(
+        self,
+        market_id: int,
+        symbol_id: int,
+        bids,
+        asks,
+        exch_ts: int = 0,
+        recv_ns: int = 0,
+        flags: int = 0,
+    ) -> None:
+        # у стаканов свои ключи (~market_id): обновление стакана и котировки
+        # с одним exch_ts — разные обновления
+        value = (tuple(map(tuple, bids[:2])), tuple(map(tuple, asks[:2])), len(bids), len(asks))
+        if self.merge.first(self, ~market_id, symbol_id, value, exch_ts, recv_ns):
+            self.merge.publisher.publish_depth(market_id, symbol_id, bids, asks, exch_ts, recv_ns, flags)
+
+    def flush(self) -> None:
+        self.merge.publisher.flush()
+
+
+class FirstArrivalMerge:
+    """
+    Слияние N реплик одного потока поверх общего Publisher.
+    """
+
+    def __init__(self, publisher, name: str, n_replicas: int = 2):
+        self.publisher = publisher
+        self.name = name
+        self.replicas = [Replica(self, i) for i in range(n_replicas)]
+        # (рынок, символ) -> [последний exch_ts, {(exch_ts, значение): recv_ns первой копии}]
+        self._last: dict[tuple[int, int], list] = {}
+
+    def replica(self, index: int) -> Replica:
+        return self.replicas[index]
+
+    def first(self, replica: Replica, market_id: int, symbol_id: int, value: tuple, exch_ts: int, recv_ns: int) -> bool:
+        """
+        True, если это первая копия обновления — её надо публиковать.
+        """
+        stats = replica.stats
+        recv_ns = recv_ns or time.time_ns()
+        stats.last_recv_ns = recv_ns
+        key = (market_id, symbol_id)
+        version = (exch_ts, value)
+        last = self._last.get(key)
+        if last is None:
+            self._last[key] = [exch_ts, {version: recv_ns}]
+            stats.wins += 1
+            return True
+
+        seen = last[1]
+        first_ns = seen.get(version)
+        if first_ns is None:
+            if exch_ts < last[0] or (not exch_ts and last[0]):
+                stats.stale += 1
+                return False
+            # новое: exch_ts вырос или в ту же мс пришло другое значение
+            # (без exch_ts — любое значение, которого нет в истории)
+            last[0] = exch_ts
+            seen[version] = recv_ns
+            if len(seen) > HISTORY:
+                del seen[next(iter(seen))]
+            stats.wins += 1
+            return True
+
+        stats.duplicates += 1
+        lags = stats.lags
+        lags.append(recv_ns - first_ns)
+        if len(lags) >= LAG_BUFFER:
+            stats.fold()
+        return False
+
+    def summary(self) -> list[dict]:
+        out = []
+        now = time.time_ns()
+        for replica in self.replicas:
+            s = replica.stats
+            s.fold()
+            seen = s.wins + s.duplicates
+            lag = s.hist.summary()
+            out.append({
+                "replica": replica.index,
+                "wins": s.wins,
+                "duplicates": s.duplicates,
+                "stale": s.stale,
+                "win_rate": s.wins / seen if seen else 0.0,
+                "lag_p50_us": lag["p50"] / 1000,
+                "lag_p99_us": lag["p99"] / 1000,
+                "silent_s": (now - s.last_recv_ns) / 1e9 if s.last_recv_ns else None,
+            })
+        return out
+
+    def reset(self) -> None:
+        for replica in self.replicas:
+            replica.stats = ReplicaStats()
+
+
+def format_summary(merge: FirstArrivalMerge) -> list[str]:
+    lines = []
+    for r in merge.summary():
+        silent = "нет данных" if r["silent_s"] is None else f"тишина {r['silent_s']:.1f} с"
+        lines.append(
+            f"{merge.name}#{r['replica']}: побед {r['win_rate']:6.1%}"
+            f" ({r['wins']}/{r['wins'] + r['duplicates']}), stale {r['stale']},"
+            f" отставание p50 {r['lag_p50_us']:.0f} мкс p99 {r['lag_p99_us']:.0f} мкс, {silent}"
+        )
+    return lines
+
+
+def resolve_addresses(url: str) -> list[str]:
+    """
+    IPv4-адреса хоста из url (wss://host/...) в порядке ответа DNS.
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "wss" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, socket.AF_INET, socket.SOCK_STREAM)
+    except OSError:
+        return []
+    addresses = []
+    for *_, sockaddr in infos:
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+def replica_connect_kwargs(url: str, n_replicas: int, distinct_ips: bool = True) -> list[dict]:
+    """
+    Аргументы websockets.connect для каждой реплики: host=IP, разные по
+    кругу, если DNS отдаёт несколько адресов. SNI и Host остаются из url.
+    """
+    addresses = resolve_addresses(url) if distinct_ips else []
+    if len(addresses) < 2:
+        return [{} for _ in range(n_replicas)]
+    return [{"host": addresses[i % len(addresses)]} for i in range(n_replicas)]
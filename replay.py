@@ -0,0 +1,306 @@
+"""
+Воспроизведение записанных котировок в prices.py без бирж.
+
+Источник — запись recorder.py (папка сегментов) или CSV в формате
+mexc_prices.txt (EXCHANGE,MARKET,SYMBOL,BID,ASK,TS_MS). Записи всех бирж
+сливаются в один поток по времени (recv_ns записи, у CSV — ts биржи;
+сортировка устойчивая, так что порядок при равном времени всегда тот
+же) и уходят в prices.py тем же бинарным протоколом, что у коллекторов
+(publisher.py): записи RECORD_DTYPE и есть записи датаграммы, так что
+датаграмма собирается из среза массива без упаковки по полям.
+
+Темп:
+    --speed 1     как в записи
+    --speed 10    в 10 раз быстрее
+    --speed 0     так быстро, как получается
+
+Время в записях переставляется на момент отправки (recv_ns — сейчас,
+exch_ts — сейчас минус исходная задержка биржа→коллектор): иначе
+prices.py считал бы задержки от времени записи, а PriceStore отбрасывал
+бы повтор (--repeat) как устаревший.
+
+Итог — скорость отправки и потери на стороне prices.py: счётчик drops
+его сокета из /proc/net/udp (переполнение приёмного буфера). Потери по
+seq и собственную скорость приёма prices.py печатает сам.
+
+С --inline UDP не используется: пачки записей идут прямо в
+prices.store_batch в этом же процессе — скорость самого приёма prices.py
+(PriceStore + SpreadEngine + LatencyMonitor) без сети и второго процесса.
+
+    python replay.py mexc_prices.txt --speed 10
+    python replay.py ticks --symbols BTCUSDT,ETHUSDT --start 10:00 --end 10:05 --speed 0
+    python replay.py mexc_prices.txt --speed 0 --repeat 100 --inline
+"""
+
+import argparse
+import os
+import socket
+import time
+
+import numpy as np
+
+from price_store import RECORD_DTYPE
+from publisher import (
+    EXCHANGE_IDS, HEADER, HEADER_SIZE, MAGIC, MARKET_IDS, MAX_DATAGRAM_SIZE, RECORD_SIZE,
+    UDP_HOST, UDP_PORT, VERSION, load_symbol_ids,
+)
+from symbols import canonical_symbol
+
+# ================== НАСТРОЙКИ ==================
+
+# Сколько записей отправлять за один шаг в режиме --speed 0
+BURST = 4096
+
+# Размер пачки для --inline (как одна пачка BatchReceiver.drain)
+INLINE_BATCH = 512
+
+# Как часто печатать прогресс, с
+REPORT_INTERVAL = 5
+
+RECORDS_PER_DATAGRAM = min((MAX_DATAGRAM_SIZE - HEADER_SIZE) // RECORD_SIZE, 255)
+
+
+# ================== ИСТОЧНИКИ ==================
+
+def load_csv(path: str, symbol_ids: dict[str, int]) -> np.ndarray:
+    """
+    CSV EXCHANGE,MARKET,SYMBOL,BID,ASK,TS_MS -> записи RECORD_DTYPE.
+    Объёмов в CSV нет (NaN), время приёма — ts биржи.
+    """
+    rows = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) != 6:
+                skipped += 1
+                continue
+            exchange, market, symbol, bid, ask, ts = parts
+            ex = EXCHANGE_IDS.get(exchange.strip().upper())
+            mk = MARKET_IDS.get(market.strip().lower())
+            sym = symbol_ids.get(canonical_symbol(symbol))
+            if ex is None or mk is None or sym is None:
+                skipped += 1
+                continue
+            try:
+                rows.append((ex, mk, 0, sym, float(bid), float(ask), np.nan, np.nan, int(ts), int(ts) * 1_000_000))
+            except ValueError:
+                skipped += 1
+    if skipped:
+        print(f"[REPLAY] {path}: пропущено строк {skipped}")
+    return np.array(rows, dtype=RECORD_DTYPE)
+
+
+def load_source(source: str, symbol_ids: dict[str, int], symbols=None, start_ns=None, end_ns=None) -> np.ndarray:
+    """
+    Папка recorder.py или CSV -> записи, упорядоченные по времени.
+    """
+    if os.path.isdir(source):
+        # id сегментов — реестра машины, где шла запись: переводятся по именам
+        from recorder import read_named
+        return read_named(source, symbol_ids, symbols or None, start_ns, end_ns)
+
+    records = load_csv(source, symbol_ids)
+    if symbols:
+        names = [canonical_symbol(s) for s in symbols]
+        missing = [s for s, name in zip(symbols, names) if name not in symbol_ids]
+        if missing:
+            print(f"[REPLAY] нет в таблице символов, пропущены: {', '.join(missing)}")
+        ids = np.array([symbol_ids[name] for name in names if name in symbol_ids], dtype=np.uint32)
+        records = records[np.isin(records["symbol"], ids)]
+    if start_ns is not None:
+        records = records[records["recv_ns"] >= start_ns]
+    if end_ns is not None:
+        records = records[records["recv_ns"] < end_ns]
+    return records[np.argsort(records["recv_ns"], kind="stable")]
+
+
+# ================== ПОТЕРИ ==================
+
+def udp_drops(port: int) -> int | None:
+    """
+    Сумма drops всех UDP-сокетов, слушающих port (колонка drops в
+    /proc/net/udp). None — если узнать неоткуда.
+    """
+    suffix = f":{port:04X}"
+    total = None
+    try:
+        with open("/proc/net/udp", "r", encoding="ascii") as f:
+            next(f)
+            for line in f:
+                cols = line.split()
+                if cols[1].endswith(suffix):
+                    total = (total or 0) + int(cols[-1])
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+    return total
+
+
+# ================== ОТПРАВКА ==================
+
+class Replayer:
+    """
+    Отправляет записи пачками по расписанию исходного времени.
+    """
+
+    def __init__(self, records: np.ndarray, speed: float = 1.0, host: str = UDP_HOST, port: int = UDP_PORT):
+        self.records = records
+        self.speed = speed
+        self.port = port
+        # исходное время записи и задержка биржа→коллектор, мс
+        self.times = records["recv_ns"].astype(np.int64)
+        self.lag_ms = np.maximum(self.times // 1_000_000 - records["exch_ts"], 0)
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.connect((host, port))
+        self._buf = bytearray(HEADER_SIZE + RECORDS_PER_DATAGRAM * RECORD_SIZE)
+        self._view = memoryview(self._buf)
+        self._source = os.getpid() & 0xFFFFFFFF
+        self._seq = 0
+
+        # Счётчики
+        self.sent_records = 0
+        self.sent_datagrams = 0
+        self.failed_datagrams = 0
+
+    def run(self, repeat: int = 1) -> float:
+        """
+        Весь поток repeat раз подряд. Возвращает время отправки, с.
+        """
+        n = len(self.records)
+        times = self.times
+        t0 = time.perf_counter()
+        last_report = t0
+        for _ in range(repeat):
+            start_ns = time.perf_counter_ns()
+            first = int(times[0]) if n else 0
+            i = 0
+            while i < n:
+                if self.speed > 0:
+                    due = start_ns + (int(times[i]) - first) / self.speed
+                    wait = due - time.perf_counter_ns()
+                    if wait > 0:
+                        time.sleep(wait / 1e9)
+                    # всё, что по расписанию уже должно было уйти
+                    now = first + (time.perf_counter_ns() - start_ns) * self.speed
+                    j = max(int(np.searchsorted(times, now, side="right")), i + 1)
+                else:
+                    j = min(n, i + BURST)
+                self._emit(i, j)
+                i = j
+
+                if time.perf_counter() - last_report >= REPORT_INTERVAL:
+                    last_report = time.perf_counter()
+                    print(f"[REPLAY] отправлено {self.sent_records:,} записей,"
+                          f" {self.sent_records / (last_report - t0):,.0f}/с")
+        return time.perf_counter() - t0
+
+    def _emit(self, i: int, j: int) -> None:
+        chunk = self.records[i:j].copy()
+        now_ns = time.time_ns()
+        chunk["recv_ns"] = now_ns
+        chunk["exch_ts"] = now_ns // 1_000_000 - self.lag_ms[i:j]
+        data = chunk.tobytes()
+        buf = self._buf
+        m = j - i
+        for k in range(0, m, RECORDS_PER_DATAGRAM):
+            count = min(RECORDS_PER_DATAGRAM, m - k)
+            size = count * RECORD_SIZE
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            HEADER.pack_into(buf, 0, MAGIC, VERSION, count, self._source, self._seq)
+            buf[HEADER_SIZE:HEADER_SIZE + size] = data[k * RECORD_SIZE:k * RECORD_SIZE + size]
+            try:
+                self._sock.send(self._view[:HEADER_SIZE + size])
+            except (BlockingIOError, ConnectionRefusedError):
+                # буфер сокета полон / prices.py не запущен
+                self.failed_datagrams += 1
+                continue
+            self.sent_datagrams += 1
+            self.sent_records += count
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def run_inline(records: np.ndarray, repeat: int = 1, batch: int = INLINE_BATCH) -> None:
+    """
+    Пачки записей прямо в prices.store_batch, без UDP.
+    """
+    import prices
+
+    n = len(records)
+    lag_ms = np.maximum(records["recv_ns"] // 1_000_000 - records["exch_ts"], 0)
+    total = 0
+    spent = 0.0
+    for _ in range(repeat):
+        for i in range(0, n, batch):
+            chunk = records[i:i + batch].copy()
+            now_ns = time.time_ns()
+            chunk["recv_ns"] = now_ns
+            chunk["exch_ts"] = now_ns // 1_000_000 - lag_ms[i:i + batch]
+            t0 = time.perf_counter()
+            prices.store_batch(chunk)
+            spent += time.perf_counter() - t0
+            total += len(chunk)
+    print(f"[REPLAY] inline: {total:,} записей пачками по {batch}, {spent:.2f} с в store_batch"
+          f" → {total / spent:,.0f} записей/с, {spent / total * 1e6:.2f} мкс/запись")
+    print(f"[REPLAY] активных инструментов {prices.store.active_count()}, ног с обоими котировками"
+          f" {int(np.count_nonzero(~np.isnan(prices.spreads.entry)))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="папка сегментов recorder.py или CSV как mexc_prices.txt")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 — как в записи, N — в N раз быстрее, 0 — без пауз")
+    parser.add_argument("--repeat", type=int, default=1, help="прогнать запись столько раз подряд")
+    parser.add_argument("--symbols", help="только эти символы, через запятую")
+    parser.add_argument("--start", help="начало интервала: 10:00, 10:00:30 или ISO")
+    parser.add_argument("--end", help="конец интервала (не включая)")
+    parser.add_argument("--host", default=UDP_HOST)
+    parser.add_argument("--port", type=int, default=UDP_PORT)
+    parser.add_argument("--inline", action="store_true", help="без UDP: прямо в prices.store_batch")
+    args = parser.parse_args()
+
+    from recorder import parse_time
+
+    symbol_ids = load_symbol_ids()
+    symbols = args.symbols.split(",") if args.symbols else None
+    start = parse_time(args.start) if args.start else None
+    end = parse_time(args.end) if args.end else None
+    records = load_source(args.source, symbol_ids, symbols, start, end)
+    if not len(records):
+        raise SystemExit("нет записей для воспроизведения")
+    span = (int(records["recv_ns"][-1]) - int(records["recv_ns"][0])) / 1e9
+    print(f"[REPLAY] {len(records):,} записей за {span:.1f} с записи, скорость"
+          f" {'максимальная' if args.speed <= 0 else f'x{args.speed:g}'}, повторов {args.repeat}")
+
+    if args.inline:
+        run_inline(records, args.repeat)
+        return
+
+    replayer = Replayer(records, args.speed, args.host, args.port)
+    drops_before = udp_drops(args.port)
+    try:
+        elapsed = replayer.run(args.repeat)
+    except KeyboardInterrupt:
+        elapsed = None
+    finally:
+        replayer.close()
+    # prices.py вычитывает сокет раз в пробуждение — даём ему дочитать
+    time.sleep(0.5)
+    drops_after = udp_drops(args.port)
+
+    line = (f"[REPLAY] отправлено {replayer.sent_records:,} записей в {replayer.sent_datagrams:,} датаграммах,"
+            f" не отправлено датаграмм {replayer.failed_datagrams}")
+    if elapsed:
+        line += f", {replayer.sent_records / elapsed:,.0f} записей/с"
+    print(line)
+    if drops_before is None or drops_after is None:
+        print(f"[REPLAY] сокет :{args.port} не найден в /proc/net/udp — prices.py запущен?")
+    else:
+        print(f"[REPLAY] потери в приёмном буфере prices.py: {drops_after - drops_before} датаграмм")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Раскладка символов по WS-соединениям по наблюдаемому потоку сообщений.
+
+Делить список символов пополам по позиции в файле плохо: горячие пары
+(BTC, ETH, мемы дня) могут оказаться в одной половине и забить одно
+соединение, пока второе простаивает. Здесь каждый коллектор считает
+сообщения по символам (RateBook.observe), периодически сохраняет
+сглаженные частоты в rates/<exchange>_<market>.json, а при следующем
+старте shard_by_rate раскладывает символы жадно — самый горячий символ
+в наименее загруженное соединение (LPT).
+"""
+
+import heapq
+import json
+import os
+import time
+from pathlib import Path
+
+# ================== НАСТРОЙКИ ==================
+
+RATES_DIR = "rates"
+
+# Вес новой оценки частоты при сохранении (EWMA)
+RATE_ALPHA = 0.3
+
+
+class RateBook:
+    """
+    Частоты сообщений по символам одного рынка одной биржи, сообщений/с.
+    """
+
+    def __init__(self, exchange: str, market: str, directory: str = RATES_DIR):
+        self.path = Path(directory) / f"{exchange.lower()}_{market.lower()}.json"
+        self.rates: dict[str, float] = self._load()
+        self.counts: dict[str, int] = {}
+        self._since = time.monotonic()
+
+    def _load(self) -> dict[str, float]:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {str(k): float(v) for k, v in data.items()}
+
+    def observe(self, symbol: str) -> None:
+        counts = self.counts
+        counts[symbol] = counts.get(symbol, 0) + 1
+
+    def save(self) -> None:
+        """
+        Сворачивает накопленные счётчики в частоты и пишет файл атомарно.
+        """
+        now = time.monotonic()
+        elapsed = now - self._since
+        if elapsed <= 0:
+            return
+        counts, self.counts = self.counts, {}
+        self._since = now
+
+        rates = self.rates
+        for symbol in set(rates) | set(counts):
+            fresh = counts.get(symbol, 0) / elapsed
+            old = rates.get(symbol)
+            rates[symbol] = fresh if old is None else old + RATE_ALPHA * (fresh - old)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(rates, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def shard_by_rate(
+    symbols: list[str],
+    rates: dict[str, float],
+    n_shards: int,
+    max_per_shard: int | None = None,
+) -> list[list[str]]:
+    """
+    Делит символы на n_shards групп с примерно равной суммарной частотой.
+    Символам без истории даётся медианная частота. Если задан max_per_shard,
+    шардов становится столько, чтобы лимит соблюдался.
+    """
+    if not symbols:
+        return []
+    if max_per_shard:
+        n_shards = max(n_shards, -(-len(symbols) // max_per_shard))
+    n_shards = max(1, min(n_shards, len(symbols)))
+
+    known = sorted(rates[s] for s in symbols if s in rates)
+    default = known[len(known) // 2] if known else 1.0
+
+    ordered = sorted(symbols, key=lambda s: rates.get(s, default), reverse=True)
+    shards: list[list[str]] = [[] for _ in range(n_shards)]
+    # (нагрузка, число символов, номер шарда)
+    heap = [(0.0, 0, i) for i in range(n_shards)]
+    full: list[tuple[float, int, int]] = []
+    for symbol in ordered:
+        load, size, i = heapq.heappop(heap)
+        while max_per_shard and size >= max_per_shard:
+            full.append((load, size, i))
+            load, size, i = heapq.heappop(heap)
+        shards[i].append(symbol)
+        heapq.heappush(heap, (load + rates.get(symbol, default), size + 1, i))
+    return [shard for shard in shards if shard]
@@ -0,0 +1,347 @@
+"""
+Инкрементальный расчёт спредов спот(A) × фьючерс(B) по файлам
+unique pairs/*_s_*_f.txt (их пишет overlap.py, обычно из universe.py).
+
+Каждая строка файла — одна нога (leg): символ, спот-биржа, фьючерс-биржа.
+Для ноги считаются два спреда, в процентах:
+
+    entry = (fut_bid - spot_ask) / spot_ask * 100   купить спот, шортить фьючерс
+    exit  = (fut_ask - spot_bid) / spot_bid * 100   закрыть: продать спот, откупить фьючерс
+
+Обратный индекс слот PriceStore → ноги хранится в CSR-виде (indptr/indices),
+так что на каждую пачку обновлённых слотов пересчитываются только
+затронутые ноги — O(число затронутых ног), одной векторной операцией.
+Полного пересканирования таблицы нет.
+
+Лучшие ноги по entry поддерживаются в Leaderboard (индексированная куча),
+запрос top(k) не сортирует таблицу.
+
+Исполнимый спред. Верх стакана не говорит, сколько по этой цене можно
+взять. Если коллекторы шлют стаканы (publish_depth -> DepthStore), для
+ноги считаются средние цены исполнения (VWAP) на сумму EXEC_NOTIONAL
+в USDT — проход по уровням стакана, векторно по всем затронутым ногам:
+
+    exec_entry = (VWAP продажи фьючерса по bid - VWAP покупки спота по ask) / VWAP спота * 100
+    exec_exit  = (VWAP покупки фьючерса по ask - VWAP продажи спота по bid) / VWAP спота * 100
+
+Если глубины стакана не хватает на всю сумму — NaN.
+
+Новые листинги без перезапуска: overlap.py переписывает файлы пар,
+refresh() замечает это (размер/mtime) и перестраивает ноги; спреды
+пересчитываются из текущих котировок PriceStore, состояние хранилища
+не теряется. Перекладка колонок PriceStore (кончился запас id) тоже
+перестраивает ноги — их слоты меняются.
+"""
+
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from leaderboard import Leaderboard
+from price_store import DepthStore, PriceStore
+from publisher import EXCHANGE_IDS, EXCHANGES, FUTURES, SPOT
+from symbols import canonical_symbol
+
+# ================== НАСТРОЙКИ ==================
+
+PAIRS_DIR = "unique pairs"
+
+# binance_s_bybit_f.txt -> ("binance", "bybit")
+PAIR_FILE_RE = re.compile(r"^([a-z]+)_s_([a-z]+)_f\.txt$")
+
+# Сумма сделки для исполнимого спреда, USDT
+EXEC_NOTIONAL = 1000.0
+
+
+def pair_files_stamp(directory: str = PAIRS_DIR) -> tuple:
+    """
+    (имя, размер, mtime) файлов пар: изменился хоть один — ноги устарели.
+    """
+    out = []
+    for path in sorted(Path(directory).glob("*_s_*_f.txt")):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        out.append((path.name, st.st_size, st.st_mtime_ns))
+    return tuple(out)
+
+
+def load_pair_files(directory: str = PAIRS_DIR) -> list[tuple[str, str, str]]:
+    """
+    Все ноги из файлов пар: [(SYMBOL, SPOT_EXCHANGE, FUTURES_EXCHANGE), ...].
+    """
+    legs = []
+    for path in sorted(Path(directory).glob("*_s_*_f.txt")):
+        m = PAIR_FILE_RE.match(path.name)
+        if not m:
+            continue
+        spot_ex, fut_ex = m.group(1).upper(), m.group(2).upper()
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                s = line.strip()
+                if s:
+                    legs.append((s, spot_ex, fut_ex))
+    return legs
+
+
+def vwap_prices(px: np.ndarray, qty: np.ndarray, notional: float) -> np.ndarray:
+    """
+    Средняя цена исполнения на сумму notional для каждой строки.
+    px, qty — (n, уровни), уровни от лучшей цены, пустые — px NaN / qty 0.
+    NaN, если суммарной глубины меньше notional.
+    """
+    value = np.nan_to_num(px * qty)                 # объём уровня в USDT
+    before = np.cumsum(value, axis=1) - value       # сколько взято до уровня
+    take = np.clip(notional - before, 0.0, value)   # сколько USDT берём с уровня
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base = np.where(take > 0.0, take / px, 0.0).sum(axis=1)
+        vwap = notional / base
+    vwap[value.sum(axis=1) < notional] = np.nan
+    return vwap
+
+
+class SpreadEngine:
+    """
+    Таблица спредов по всем ногам, пересчитываемая по мере прихода котировок.
+    """
+
+    def __init__(
+        self,
+        store: PriceStore,
+        legs: list[tuple[str, str, str]],
+        leaderboard: bool = True,
+        depth: DepthStore | None = None,
+        notional: float = EXEC_NOTIONAL,
+    ):
+        self.store = store
+        self.depth = depth
+        self.notional = notional
+        self.use_leaderboard = leaderboard
+        # откуда ноги (from_pair_files) — для refresh
+        self.directory: str | None = None
+        self.stamp: tuple = ()
+
+        self.recalculated = 0
+        self.recalculated_exec = 0
+
+        self._build(legs)
+        store.on_resize.append(lambda old_n_symbols: self.rebuild())
+
+    def _build(self, legs: list[tuple[str, str, str]]) -> None:
+        store = self.store
+        self.legs = legs
+        self.built_symbols = len(store.symbol_names)
+        spot_slots, fut_slots, symbols, spot_exs, fut_exs = [], [], [], [], []
+        self.skipped = 0
+        for symbol, spot_ex, fut_ex in legs:
+            sym_id = store.symbol_ids.get(canonical_symbol(symbol))
+            spot_id = EXCHANGE_IDS.get(spot_ex)
+            fut_id = EXCHANGE_IDS.get(fut_ex)
+            if sym_id is None or spot_id is None or fut_id is None:
+                self.skipped += 1
+                continue
+            spot_slots.append(store.slot(spot_id, SPOT, sym_id))
+            fut_slots.append(store.slot(fut_id, FUTURES, sym_id))
+            symbols.append(sym_id)
+            spot_exs.append(spot_id)
+            fut_exs.append(fut_id)
+
+        self.n_legs = len(spot_slots)
+        self.leg_symbol = np.array(symbols, dtype=np.int64)
+        self.leg_spot_exchange = np.array(spot_exs, dtype=np.int64)
+        self.leg_fut_exchange = np.array(fut_exs, dtype=np.int64)
+        self.leg_spot_slot = np.array(spot_slots, dtype=np.int64)
+        self.leg_fut_slot = np.array(fut_slots, dtype=np.int64)
+
+        self.entry = np.full(self.n_legs, np.nan)
+        self.exit = np.full(self.n_legs, np.nan)
+        self.exec_entry = np.full(self.n_legs, np.nan)
+        self.exec_exit = np.full(self.n_legs, np.nan)
+
+        # Обратный индекс слот -> ноги (CSR): ноги слота s —
+        # leg_index[indptr[s]:indptr[s + 1]]
+        leg_ids = np.arange(self.n_legs, dtype=np.int64)
+        owner = np.concatenate([self.leg_spot_slot, self.leg_fut_slot])
+        legs_of = np.concatenate([leg_ids, leg_ids])
+        order = np.argsort(owner, kind="stable")
+        self.leg_index = legs_of[order]
+        counts = np.bincount(owner, minlength=store.n_slots)
+        self.indptr = np.zeros(store.n_slots + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+
+        self.leaderboard = Leaderboard(self.n_legs) if self.use_leaderboard else None
+
+    @classmethod
+    def from_pair_files(
+        cls,
+        store: PriceStore,
+        directory: str = PAIRS_DIR,
+        depth: DepthStore | None = None,
+    ) -> "SpreadEngine":
+        stamp = pair_files_stamp(directory)
+        engine = cls(store, load_pair_files(directory), depth=depth)
+        engine.directory = directory
+        engine.stamp = stamp
+        return engine
+
+    def rebuild(self, legs: list[tuple[str, str, str]] | None = None) -> None:
+        """
+        Ноги заново (по умолчанию — те же, под текущие слоты и символы
+        хранилища), спреды всех ног — из текущих котировок.
+        """
+        self._build(self.legs if legs is None else legs)
+        everything = np.arange(self.n_legs)
+        if self.n_legs:
+            self.recalc(everything)
+            if self.depth is not None:
+                self.recalc_exec(everything)
+
+    def refresh(self) -> bool:
+        """
+        Файлы пар изменились (overlap.py) или в хранилище появились символы,
+        ноги которых пропускались, — перестроить. True — перестроено.
+        """
+        if self.directory is None:
+            return False
+        stamp = pair_files_stamp(self.directory)
+        changed = stamp != self.stamp
+        if changed:
+            # отпечаток — до чтения, как в symbols.py
+            self.stamp = stamp
+            self.legs = load_pair_files(self.directory)
+        n_symbols = self.store.n_symbols
+        self.store.sync()
+        if self.store.n_symbols != n_symbols:
+            # колонки переложены — on_resize уже перестроил ноги
+            return True
+        if changed or (self.skipped and len(self.store.symbol_names) != self.built_symbols):
+            self.rebuild()
+            return True
+        return False
+
+    # ---------- обновление ----------
+
+    def legs_for_slots(self, slots) -> np.ndarray:
+        """
+        Все ноги, у которых спот- или фьючерс-слот входит в slots (без повторов).
+        """
+        slots = np.unique(np.asarray(slots, dtype=np.int64))
+        starts = self.indptr[slots]
+        lengths = self.indptr[slots + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # позиции в leg_index: starts[i] + 0..lengths[i]-1 для каждого слота
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = offsets + np.arange(total)
+        return np.unique(self.leg_index[positions])
+
+    def recalc(self, legs: np.ndarray) -> None:
+        store = self.store
+        spot = self.leg_spot_slot[legs]
+        fut = self.leg_fut_slot[legs]
+        spot_bid, spot_ask = store.bid[spot], store.ask[spot]
+        fut_bid, fut_ask = store.bid[fut], store.ask[fut]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.entry[legs] = (fut_bid - spot_ask) / spot_ask * 100.0
+            self.exit[legs] = (fut_ask - spot_bid) / spot_bid * 100.0
+        if self.leaderboard is not None:
+            self.leaderboard.update_many(legs.tolist(), self.entry[legs].tolist())
+        self.recalculated += len(legs)
+
+    def on_slots(self, slots) -> np.ndarray:
+        """
+        Вызывается после обновления PriceStore. Возвращает пересчитанные ноги.
+        """
+        legs = self.legs_for_slots(slots)
+        if len(legs):
+            self.recalc(legs)
+        return legs
+
+    def on_slot(self, slot: int) -> np.ndarray:
+        legs = self.leg_index[self.indptr[slot]:self.indptr[slot + 1]]
+        if len(legs):
+            self.recalc(legs)
+        return legs
+
+    def recalc_exec(self, legs: np.ndarray) -> None:
+        depth = self.depth
+        notional = self.notional
+        spot = self.leg_spot_slot[legs]
+        fut = self.leg_fut_slot[legs]
+        spot_buy = vwap_prices(depth.ask_px[spot], depth.ask_qty[spot], notional)
+        spot_sell = vwap_prices(depth.bid_px[spot], depth.bid_qty[spot], notional)
+        fut_sell = vwap_prices(depth.bid_px[fut], depth.bid_qty[fut], notional)
+        fut_buy = vwap_prices(depth.ask_px[fut], depth.ask_qty[fut], notional)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.exec_entry[legs] = (fut_sell - spot_buy) / spot_buy * 100.0
+            self.exec_exit[legs] = (fut_buy - spot_sell) / spot_sell * 100.0
+        self.recalculated_exec += len(legs)
+
+    def on_depth_slots(self, slots) -> np.ndarray:
+        """
+        Вызывается после обновления DepthStore. Возвращает пересчитанные ноги.
+        """
+        if self.depth is None:
+            return np.empty(0, dtype=np.int64)
+        legs = self.legs_for_slots(slots)
+        if len(legs):
+            self.recalc_exec(legs)
+        return legs
+
+    # ---------- таблица ----------
+
+    def describe_leg(self, leg: int) -> tuple[str, str, str]:
+        return (
+            self.store.symbol_names[self.leg_symbol[leg]],
+            EXCHANGES[self.leg_spot_exchange[leg]],
+            EXCHANGES[self.leg_fut_exchange[leg]],
+        )
+
+    def row(self, leg: int) -> dict:
+        symbol, spot_ex, fut_ex = self.describe_leg(leg)
+        store = self.store
+        spot, fut = self.leg_spot_slot[leg], self.leg_fut_slot[leg]
+        return {
+            "symbol": symbol,
+            "spot": spot_ex,
+            "futures": fut_ex,
+            "spot_bid": float(store.bid[spot]),
+            "spot_ask": float(store.ask[spot]),
+            "fut_bid": float(store.bid[fut]),
+            "fut_ask": float(store.ask[fut]),
+            "entry": float(self.entry[leg]),
+            "exit": float(self.exit[leg]),
+            "exec_entry": float(self.exec_entry[leg]),
+            "exec_exit": float(self.exec_exit[leg]),
+            "notional": self.notional,
+        }
+
+    def table(self, only_live: bool = True) -> list[dict]:
+        """
+        Текущая таблица спредов (по ногам с обеими котировками), по убыванию entry.
+        Для регулярных запросов «лучшие N» — top(), он не сортирует таблицу.
+        """
+        legs = np.flatnonzero(~np.isnan(self.entry)) if only_live else np.arange(self.n_legs)
+        legs = legs[np.argsort(-np.nan_to_num(self.entry[legs], nan=-np.inf), kind="stable")]
+        return [self.row(leg) for leg in legs]
+
+    def top(self, k: int = 10, now_ms: int | None = None) -> list[dict]:
+        """
+        k лучших ног по entry из лидерборда, с возрастом котировок каждой ноги, мс.
+        """
+        if self.leaderboard is None:
+            return self.table()[:k]
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        ts = self.store.ts
+        rows = []
+        for leg, _ in self.leaderboard.top(k):
+            row = self.row(leg)
+            row["spot_age_ms"] = now_ms - int(ts[self.leg_spot_slot[leg]])
+            row["fut_age_ms"] = now_ms - int(ts[self.leg_fut_slot[leg]])
+            rows.append(row)
+        return rows
@@ -0,0 +1,292 @@
+"""
+Горячая перезагрузка списков символов в работающих коллекторах.
+
+Раньше *_all.txt читались один раз на старте: новый листинг попадал в
+поток только после перезапуска коллектора — минуты без котировок по
+всем символам ради одного нового. Теперь:
+
+    SymbolWatch    следит за файлами списков (mtime/размер раз в
+                   WATCH_INTERVAL, сразу — по RELOAD_SIGNAL) и отдаёт
+                   коллектору разницу: добавленные и удалённые символы
+    refresh_lookup дополняет таблицу raw -> id коллектора из реестра
+                   (новые символы получают следующие id, старые не меняются)
+    LiveShards     символы рынка по соединениям: добавленные — подпиской в
+                   уже открытое соединение (наименее нагруженное по RateBook,
+                   где есть место), удалённые — отпиской там, где они были;
+                   новое соединение открывается, только когда место кончилось
+                   (лимит биржи на соединение), опустевшее — закрывается
+
+Подписка на старте и при переподключении (subscribe у WarmConnection)
+читает текущий список шарда, поэтому после перезагрузки переподключение
+подписывает уже новый набор.
+
+    kill -HUP <pid коллектора>      # перечитать списки сейчас
+"""
+
+import asyncio
+import signal
+import time
+from pathlib import Path
+
+from symbols import load_registry, read_symbols
+
+# ================== НАСТРОЙКИ ==================
+
+# Как часто проверять файлы списков, с
+WATCH_INTERVAL = 2.0
+
+# Сигнал «перечитать списки сейчас» (на Windows его нет — только опрос)
+RELOAD_SIGNAL = getattr(signal, "SIGHUP", None)
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Watched:
+    __slots__ = ("path", "reader", "stamp", "symbols", "apply")
+
+    def __init__(self, path: Path, reader, symbols, apply):
+        self.path = path
+        self.reader = reader
+        self.stamp = file_stamp(path)
+        self.symbols = list(symbols)
+        self.apply = apply
+
+
+class SymbolWatch:
+    """
+    Файлы списков одного процесса. apply(added, removed) — корутина
+    коллектора, вызывается, когда состав списка изменился.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self.files: list[Watched] = []
+        self.reloads = 0
+        self._wake = asyncio.Event()
+
+    def add(self, path, symbols, apply, reader=None) -> None:
+        """
+        symbols — то, на что коллектор уже подписан; reader(path) — как
+        коллектор читает файл (по умолчанию symbols.read_symbols).
+        """
+        path = Path(path)
+        self.files.append(Watched(path, reader or read_symbols, symbols, apply))
+
+    def reload(self) -> None:
+        """
+        Перечитать все списки, не дожидаясь опроса.
+        """
+        self._wake.set()
+
+    async def run(self) -> None:
+        if not self.files:
+            return
+        loop = asyncio.get_running_loop()
+        if RELOAD_SIGNAL is not None:
+            try:
+                loop.add_signal_handler(RELOAD_SIGNAL, self.reload)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            forced = self._wake.is_set()
+            self._wake.clear()
+            for watched in self.files:
+                await self._check(watched, forced)
+
+    async def _check(self, watched: Watched, forced: bool) -> None:
+        stamp = file_stamp(watched.path)
+        # файл удалён или переименовывается — ждём, пока появится снова
+        if stamp is None or (stamp == watched.stamp and not forced):
+            return
+        watched.stamp = stamp
+        try:
+            fresh = list(watched.reader(watched.path))
+        except OSError as e:
+            print(f"[RELOAD] {watched.path.name}: не удалось прочитать: {e!r}")
+            return
+        if not fresh:
+            # пустой файл — скорее обрезанная запись, чем делистинг всего рынка
+            print(f"[RELOAD] {watched.path.name}: список пуст, оставляю прежний")
+            return
+        before = set(watched.symbols)
+        after = set(fresh)
+        added = [s for s in fresh if s not in before]
+        removed = [s for s in watched.symbols if s not in after]
+        if not added and not removed:
+            watched.symbols = fresh
+            return
+        t0 = time.perf_counter()
+        try:
+            await watched.apply(added, removed)
+        except Exception as e:
+            # прежний список остаётся: разница повторится при следующей проверке
+            watched.stamp = None
+            print(f"[RELOAD] {watched.path.name}: ошибка применения: {e!r}")
+            return
+        watched.symbols = fresh
+        self.reloads += 1
+        print(f"[RELOAD] {watched.path.name}: +{len(added)} -{len(removed)}"
+              f" за {(time.perf_counter() - t0) * 1e3:.1f} мс")
+
+
+def refresh_lookup(lookup: dict[str, int], exchange: str, market: str,
+                   added: list[str], removed: list[str]) -> list[str]:
+    """
+    Таблица raw -> id коллектора после изменения списка, на месте (тот же
+    dict, что читает горячий цикл). Удалённые убираются сразу — их кадры,
+    пришедшие до отписки, отбрасываются; добавленные появляются до
+    подписки. Возвращает добавленные символы, которые есть в реестре.
+    """
+    for raw in removed:
+        lookup.pop(raw, None)
+    fresh = load_registry(refresh=True).lookup(exchange, market, added) if added else {}
+    lookup.update(fresh)
+    return [s for s in added if s in fresh]
+
+
+class Shard:
+    """
+    Символы одного соединения (или его реплик) и то, что его обслуживает.
+    symbols — живой список: его читает subscribe при каждом подключении.
+    """
+
+    __slots__ = ("index", "symbols", "conns", "tasks")
+
+    def __init__(self, index: int, symbols):
+        self.index = index
+        self.symbols = list(symbols)
+        self.conns = []   # WarmConnection шарда (реплики — несколько)
+        self.tasks = []   # задачи, запущенные start
+
+    async def send(self, message: str) -> int:
+        sent = 0
+        for conn in self.conns:
+            sent += await conn.send(message)
+        return sent
+
+    def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+
+
+class LiveShards:
+    """
+    Раскладка символов рынка по соединениям с лимитом на соединение.
+
+        start(shard)                  запустить соединения шарда (задачи — в shard.tasks)
+        subscribe(shard, symbols)     корутина: подписать символы в открытых соединениях шарда
+        unsubscribe(shard, symbols)   корутина: отписать
+        capacity, cost                лимит соединения: sum(cost(s)) <= capacity
+                                      (cost по умолчанию 1 — число символов; None — без лимита)
+        rates                         частоты символов (RateBook.rates) — добавленные идут
+                                      в наименее нагруженный шард, где есть место
+    """
+
+    def __init__(self, name: str, groups, start, subscribe, unsubscribe, *,
+                 capacity: float | None = None, cost=None, rates: dict[str, float] | None = None):
+        self.name = name
+        self.shards = [Shard(i, group) for i, group in enumerate(groups) if group]
+        self.start = start
+        self.subscribe = subscribe
+        self.unsubscribe = unsubscribe
+        self.capacity = capacity
+        self.cost = cost or (lambda symbol: 1)
+        self.rates = rates if rates is not None else {}
+        self._next = len(self.shards)
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def start_all(self) -> None:
+        for shard in self.shards:
+            self.start(shard)
+
+    def _rate(self, default: float):
+        rates = self.rates
+        return lambda symbol: rates.get(symbol, default)
+
+    async def apply(self, added: list[str], removed: list[str]) -> None:
+        owner = {s: shard for shard in self.shards for s in shard.symbols}
+
+        unsub: dict[Shard, list[str]] = {}
+        for s in removed:
+            shard = owner.pop(s, None)
+            if shard is not None:
+                shard.symbols.remove(s)
+                unsub.setdefault(shard, []).append(s)
+
+        # опустевшие закрываются, а не ловят добавленные: те уместятся в остальные
+        closed = [shard for shard in unsub if not shard.symbols]
+        for shard in closed:
+            self.shards.remove(shard)
+
+        known = sorted(self.rates[s] for s in owner if s in self.rates)
+        rate = self._rate(known[len(known) // 2] if known else 1.0)
+        cost = self.cost
+        load = {shard: sum(rate(s) for s in shard.symbols) for shard in self.shards}
+        used = {shard: sum(cost(s) for s in shard.symbols) for shard in self.shards}
+
+        sub: dict[Shard, list[str]] = {}
+        opened: list[Shard] = []
+        # горячие первыми, как в shard_by_rate
+        for s in sorted((s for s in added if s not in owner), key=rate, reverse=True):
+            fits = [shard for shard in self.shards
+                    if self.capacity is None or used[shard] + cost(s) <= self.capacity]
+            if fits:
+                target = min(fits, key=load.__getitem__)
+            else:
+                target = Shard(self._next, [])
+                self._next += 1
+                self.shards.append(target)
+                opened.append(target)
+                load[target] = used[target] = 0
+            target.symbols.append(s)
+            owner[s] = target
+            load[target] += rate(s)
+            used[target] += cost(s)
+            if target not in opened:
+                sub.setdefault(target, []).append(s)
+
+        # сначала отписка: у биржи освобождается место под новые подписки
+        for shard, symbols in unsub.items():
+            if shard.symbols:
+                await self.unsubscribe(shard, symbols)
+        for shard in closed:
+            shard.stop()
+        for shard, symbols in sub.items():
+            await self.subscribe(shard, symbols)
+        for shard in opened:
+            self.start(shard)
+
+        print(f"[{self.name}] подписано {sum(map(len, sub.values()))} в {len(sub)} соединений,"
+              f" отписано {sum(map(len, unsub.values()))}; соединений +{len(opened)} -{len(closed)},"
+              f" всего {len(self.shards)}")
+
+
+def pack(symbols: list[str], capacity: float, cost=None) -> list[list[str]]:
+    """
+    Символы подряд в группы, где sum(cost) <= capacity (лимит не в штуках,
+    а, например, в длине аргументов подписки).
+    """
+    cost = cost or (lambda symbol: 1)
+    groups: list[list[str]] = []
+    used = capacity
+    for s in symbols:
+        c = cost(s)
+        if used + c > capacity:
+            groups.append([])
+            used = 0
+        groups[-1].append(s)
+        used += c
+    return groups
@@ -0,0 +1,432 @@
+"""
+Все ленты одной командой: коллекторы и prices.py — дочерними процессами.
+
+    python supervisor.py                              # всё из PROCESSES
+    python supervisor.py --only prices,binance,okx    # часть
+    python supervisor.py --pin                        # по процессу на ядро, с PIN_FROM
+    python supervisor.py --pin --uvloop --gc-freeze 30
+    kill -HUP <pid supervisor>                        # перечитать списки символов в коллекторах
+
+Раньше каждый скрипт запускался руками в своём терминале: без
+перезапуска, без привязки к ядрам, без общей остановки. Здесь процесс
+стартует через этот же файл в режиме --worker, который до запуска
+скрипта:
+
+    ядра      os.sched_setaffinity — процесс только на своих ядрах: всплеск
+              одной ленты (кадры MEXC по 800 элементов) не отнимает ядро
+              у остальных и у prices.py
+    uvloop    цикл событий uvloop, если установлен (pip install uvloop)
+    gc        через --gc-freeze с после старта gc.collect() + gc.freeze():
+              всё созданное на прогреве (таблицы символов, стаканы, буферы)
+              уходит из поколений сборщика, и полные проходы GC в горячем
+              цикле больше его не обходят
+
+Упавший процесс перезапускается с экспоненциальной паузой (сбрасывается,
+если он проработал HEALTHY_AFTER). Раз в REPORT_INTERVAL — сводка:
+CPU (% одного ядра, /proc/<pid>/stat), RSS, сообщений/с (у коллектора —
+записей, отправленных publisher, у prices.py — принятых) и перезапуски.
+Вывод процессов — в LOG_DIR/<имя>.log. Ctrl+C или SIGTERM останавливает
+коллекторы, затем prices.py.
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import runpy
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# ================== НАСТРОЙКИ ==================
+
+# Процессы по порядку запуска (остановка — в обратном): скрипт и ядра
+# ("2", "2,3", "2-3"; None — без привязки, или --pin). enabled=False —
+# запускается только через --only.
+PROCESSES = {
+    "prices": {"script": "prices.py", "cpus": None},
+    "binance": {"script": "binance.py", "cpus": None},
+    "bybit": {"script": "bybit.py", "cpus": None},
+    "okx": {"script": "okx.py", "cpus": None},
+    "bingx": {"script": "bingx.py", "cpus": None},
+    "mexc": {"script": "mexc.py", "cpus": None},
+    # all-market потоки MEXC — вместо mexc, не вместе с ним
+    "mexc2-0": {"script": "mexc2-0.py", "cpus": None, "enabled": False},
+}
+
+# --pin: процессы без своих ядер раскладываются по одному, начиная с этого
+# ядра (0 остаётся системе и прерываниям сетевой карты)
+PIN_FROM = 1
+
+# Цикл uvloop в процессах (если установлен)
+UVLOOP = False
+
+# Через сколько секунд после старта процесса gc.freeze(); 0 — не делать
+GC_FREEZE_AFTER = 0.0
+
+# Куда писать вывод процессов; пусто — в терминал supervisor'а
+LOG_DIR = "logs"
+
+# Сводка по процессам, с
+REPORT_INTERVAL = 30
+
+# Как часто процесс отдаёт supervisor'у счётчик сообщений, с
+STATS_INTERVAL = 5
+
+# Перезапуск: пауза BACKOFF_BASE * 2^(n-1) до BACKOFF_MAX после n падений подряд;
+# процесс, проработавший HEALTHY_AFTER, считается здоровым
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+HEALTHY_AFTER = 60.0
+
+# Сколько ждать процессы после SIGINT, прежде чем убить
+STOP_TIMEOUT = 5.0
+
+POLL_INTERVAL = 0.5
+
+ROOT = Path(__file__).resolve().parent
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def parse_cpus(spec) -> set[int] | None:
+    """
+    "2" / "2,3" / "0-3" / [2, 3] -> {2, 3}; None или "" — без привязки.
+    """
+    if spec is None or spec == "":
+        return None
+    if isinstance(spec, int):
+        return {spec}
+    if isinstance(spec, (list, tuple, set)):
+        return {int(c) for c in spec}
+    cpus = set()
+    for part in str(spec).split(","):
+        lo, _, hi = part.strip().partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def format_cpus(cpus: set[int] | None) -> str:
+    return ",".join(map(str, sorted(cpus))) if cpus else "любые"
+
+
+# ================== ПРОЦЕСС (--worker) ==================
+
+def message_count() -> int:
+    """
+    Сообщений через процесс: записи всех Publisher (коллектор) и
+    BatchReceiver (prices.py). Модули ищутся среди уже импортированных —
+    скрипт, который их не использует, ничего не платит.
+    """
+    total = 0
+    publisher = sys.modules.get("publisher")
+    if publisher is not None:
+        total += sum(p.sent_records for p in publisher.PUBLISHERS)
+    receiver = sys.modules.get("receiver")
+    if receiver is not None:
+        total += sum(r.records for r in receiver.RECEIVERS)
+    return total
+
+
+def stats_loop(fd: int, interval: float) -> None:
+    with os.fdopen(fd, "w", buffering=1) as out:
+        while True:
+            time.sleep(interval)
+            try:
+                out.write(f"{time.monotonic():.3f} {message_count()}\n")
+            except OSError:
+                return
+
+
+def freeze_after(delay: float) -> None:
+    time.sleep(delay)
+    gc.collect()
+    gc.freeze()
+    print(f"[WORKER] gc.freeze: {gc.get_freeze_count():,} объектов вне сборки", flush=True)
+
+
+def die_with_parent() -> None:
+    """
+    SIGTERM процессу, если supervisor умер (Linux, prctl PR_SET_PDEATHSIG):
+    без него после kill -9 supervisor'а ленты остались бы сиротами.
+    """
+    try:
+        import ctypes
+        ctypes.CDLL(None, use_errno=True).prctl(1, signal.SIGTERM)  # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+
+def run_worker(script: str, cpus: set[int] | None, use_uvloop: bool, gc_freeze: float, stats_fd: int | None) -> None:
+    die_with_parent()
+    # supervisor останавливает процессы SIGINT'ом, даже если его самого
+    # запустили с игнорируемым SIGINT (фоном из скрипта, nohup)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    if hasattr(signal, "SIGHUP"):
+        # SIGHUP — «перечитать списки» (subscriptions.py ставит свой обработчик);
+        # процесс без обработчика не должен от него падать
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            print("[WORKER] uvloop не установлен (pip install uvloop), обычный asyncio", flush=True)
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    if gc_freeze:
+        threading.Thread(target=freeze_after, args=(gc_freeze,), daemon=True).start()
+    if stats_fd is not None:
+        threading.Thread(target=stats_loop, args=(stats_fd, STATS_INTERVAL), daemon=True).start()
+
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except KeyboardInterrupt:
+        pass
+
+
+# ================== SUPERVISOR ==================
+
+def cpu_seconds(pid: int) -> float:
+    """
+    user + system время процесса (всех потоков), с.
+    """
+    with open(f"/proc/{pid}/stat", "r", encoding="ascii") as f:
+        fields = f.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm", "r", encoding="ascii") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+class Child:
+    """
+    Один дочерний процесс: запуск, перезапуск с паузой, счётчики для сводки.
+    """
+
+    def __init__(self, name: str, script: str, cpus: set[int] | None, options: argparse.Namespace):
+        self.name = name
+        self.script = script
+        self.cpus = cpus
+        self.options = options
+        self.proc: subprocess.Popen | None = None
+        self.started = 0.0
+        self.next_start = 0.0
+        self.failures = 0
+        self.restarts = 0
+        self._stats_fd: int | None = None
+        self._pending = b""
+        # (время, сообщений) — последний отчёт процесса и тот, что был на прошлой сводке
+        self._last: tuple[float, int] | None = None
+        self._reported: tuple[float, int] | None = None
+        self._cpu: tuple[float, float] | None = None
+
+    def start(self) -> None:
+        read_fd, write_fd = os.pipe()
+        cmd = [sys.executable, str(ROOT / "supervisor.py"), "--worker", self.script,
+               "--stats-fd", str(write_fd), "--gc-freeze", str(self.options.gc_freeze)]
+        if self.cpus:
+            cmd += ["--cpus", format_cpus(self.cpus)]
+        if self.options.uvloop:
+            cmd.append("--uvloop")
+        log = None
+        if self.options.log_dir:
+            Path(self.options.log_dir).mkdir(parents=True, exist_ok=True)
+            log = open(Path(self.options.log_dir) / f"{self.name}.log", "ab")
+        try:
+            self.proc = subprocess.Popen(
+                cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT if log else None,
+                pass_fds=(write_fd,), env=dict(os.environ, PYTHONUNBUFFERED="1"),
+                # Ctrl+C терминала приходит только supervisor'у: он гасит процессы по порядку
+                start_new_session=True,
+            )
+        finally:
+            os.close(write_fd)
+            if log is not None:
+                log.close()
+        os.set_blocking(read_fd, False)
+        self._stats_fd = read_fd
+        self._pending = b""
+        self._last = self._reported = None
+        self.started = time.monotonic()
+        # первая сводка — CPU в среднем с запуска
+        self._cpu = (self.started, 0.0)
+        print(f"[SUP] {self.name}: pid {self.proc.pid}, ядра {format_cpus(self.cpus)}", flush=True)
+
+    def poll(self, now: float) -> None:
+        if self.proc is None:
+            if now >= self.next_start:
+                if self.failures:
+                    self.restarts += 1
+                self.start()
+            return
+        self._read_stats()
+        code = self.proc.poll()
+        if code is None:
+            return
+        self._close_stats()
+        self.proc = None
+        ran = now - self.started
+        if ran > HEALTHY_AFTER:
+            self.failures = 0
+        self.failures += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+        self.next_start = now + delay
+        print(f"[SUP] {self.name}: завершился с кодом {code} через {ran:.0f} с,"
+              f" перезапуск через {delay:.0f} с", flush=True)
+
+    def send_signal(self, signum: int) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.send_signal(signum)
+
+    def stop(self, deadline: float) -> None:
+        if self.proc is None:
+            return
+        try:
+            self.proc.wait(max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            print(f"[SUP] {self.name}: не остановился за {STOP_TIMEOUT:.0f} с, kill", flush=True)
+            self.proc.kill()
+            self.proc.wait()
+        self._close_stats()
+        self.proc = None
+
+    def report(self, now: float) -> str:
+        if self.proc is None:
+            return f"{self.name:8} перезапуск через {max(0.0, self.next_start - now):.0f} с, перезапусков {self.restarts}"
+        pid = self.proc.pid
+        try:
+            cpu = cpu_seconds(pid)
+            rss = rss_bytes(pid)
+        except (OSError, IndexError, ValueError):
+            cpu, rss = None, None
+        cpu_pct = None
+        if cpu is not None:
+            if self._cpu is not None and now > self._cpu[0]:
+                cpu_pct = (cpu - self._cpu[1]) / (now - self._cpu[0]) * 100
+            self._cpu = (now, cpu)
+        rate = None
+        if self._last is not None and self._reported is not None and self._last[0] > self._reported[0]:
+            rate = (self._last[1] - self._reported[1]) / (self._last[0] - self._reported[0])
+        if self._last is not None:
+            self._reported = self._last
+        return (
+            f"{self.name:8} pid {pid:<7} ядра {format_cpus(self.cpus):6}"
+            f" CPU {'—' if cpu_pct is None else f'{cpu_pct:5.1f}%'}"
+            f" RSS {'—' if rss is None else f'{rss / 2**20:6.1f} МБ'}"
+            f" {'—' if rate is None else f'{rate:,.0f}'} сообщ/с"
+            f" перезапусков {self.restarts}"
+        )
+
+    def _read_stats(self) -> None:
+        if self._stats_fd is None:
+            return
+        try:
+            data = os.read(self._stats_fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            return
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            try:
+                t, n = line.split()
+                sample = (float(t), int(n))
+            except ValueError:
+                continue
+            if self._reported is None:
+                self._reported = sample
+            self._last = sample
+
+    def _close_stats(self) -> None:
+        if self._stats_fd is not None:
+            os.close(self._stats_fd)
+            self._stats_fd = None
+
+
+def _terminate(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def supervise(children: list[Child], report_interval: float) -> None:
+    print(f"[SUP] pid {os.getpid()}: {', '.join(c.name for c in children)}"
+          f" | kill -HUP {os.getpid()} — перечитать списки символов", flush=True)
+    # запущенный в фоне из shell процесс наследует игнорируемый SIGINT
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, _terminate)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: [c.send_signal(signal.SIGHUP) for c in children])
+    last_report = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            for child in children:
+                child.poll(now)
+            if report_interval and now - last_report >= report_interval:
+                last_report = now
+                for child in children:
+                    print(f"[SUP] {child.report(now)}", flush=True)
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # сначала коллекторы, последним prices.py — данные в пути ему ещё достаются
+        for child in reversed(children):
+            child.send_signal(signal.SIGINT)
+            child.stop(time.monotonic() + STOP_TIMEOUT)
+        print("[SUP] все процессы остановлены", flush=True)
+
+
+def build_children(options: argparse.Namespace) -> list[Child]:
+    names = [n for n in options.only.split(",") if n] if options.only else [
+        name for name, spec in PROCESSES.items() if spec.get("enabled", True)
+    ]
+    unknown = [n for n in names if n not in PROCESSES]
+    if unknown:
+        raise SystemExit(f"неизвестные процессы: {', '.join(unknown)}; есть {', '.join(PROCESSES)}")
+    n_cpus = os.cpu_count() or 1
+    children = []
+    for i, name in enumerate(n for n in PROCESSES if n in names):
+        spec = PROCESSES[name]
+        cpus = parse_cpus(spec.get("cpus"))
+        if cpus is None and options.pin:
+            cpus = {(options.pin_from + i) % n_cpus}
+        children.append(Child(name, spec["script"], cpus, options))
+    return children
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="процессы через запятую (по умолчанию все enabled из PROCESSES)")
+    parser.add_argument("--pin", action="store_true", help="процессам без ядер в PROCESSES — по ядру, с --pin-from")
+    parser.add_argument("--pin-from", type=int, default=PIN_FROM)
+    parser.add_argument("--uvloop", action="store_true", default=UVLOOP)
+    parser.add_argument("--gc-freeze", type=float, default=GC_FREEZE_AFTER, metavar="SEC",
+                        help="gc.freeze() через SEC с после старта процесса (0 — нет)")
+    parser.add_argument("--log-dir", default=LOG_DIR, help="пусто — вывод процессов в этот терминал")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL)
+    # режим дочернего процесса
+    parser.add_argument("--worker", metavar="SCRIPT", help=argparse.SUPPRESS)
+    parser.add_argument("--cpus", help=argparse.SUPPRESS)
+    parser.add_argument("--stats-fd", type=int, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        run_worker(options.worker, parse_cpus(options.cpus), options.uvloop, options.gc_freeze, options.stats_fd)
+        return
+    supervise(build_children(options), options.report_interval)
+
+
+if __name__ == "__main__":
+    main()
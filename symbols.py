@@ -0,0 +1,342 @@
+"""
+Реестр символов: символ в написании биржи -> целый id канонического символа.
+
+    BTCUSDT (Binance, Bybit, MEXC spot)
+    BTC-USDT (OKX spot, BingX)          ->  BTCUSDT  ->  id
+    BTC-USDT-SWAP (OKX swap)
+    BTC_USDT (MEXC futures)
+
+Коллектор на старте получает таблицу raw -> id своей площадки
+(registry.lookup; при горячей перезагрузке списков — subscriptions.py —
+дополняется на лету) и дальше в горячем цикле делает только поиск в
+словаре, без строковых операций; в датаграмме, PriceStore, SpreadEngine и
+сегментах recorder.py символ — это уже целое число.
+
+Реестр собирается из <exchange>_<market>_all.txt в SYMBOLS_DIR и
+сохраняется рядом скомпилированным (REGISTRY_FILE, marshal): загрузка —
+1-2 мс вместо чтения и нормализации всех списков (~10 мс). Если списки
+изменились (размер/mtime), реестр пересобирается при следующей загрузке,
+причём id уже известных символов сохраняются, а новые получают следующие
+номера. Поэтому id в записанных сегментах и у процессов, запущенных до и
+после обновления списков, означают одно и то же. Удалённый из списков
+символ id не теряет и повторно его не отдаёт.
+
+    python symbols.py                     # собрать/обновить, сводка
+    python symbols.py BTC-USDT-SWAP ETHUSDT   # id и написание по площадкам
+"""
+
+import marshal
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ================== НАСТРОЙКИ ==================
+
+# Списки символов по площадкам: <exchange>_<market>_all.txt
+SYMBOLS_DIR = "dif type of pairs/actually all pomenshe"
+
+# Скомпилированный реестр, рядом со списками
+REGISTRY_FILE = "symbols.reg"
+
+MAGIC = b"SYM1"
+VERSION = 1
+
+# Написание символа на площадке из канонического: (разделитель, суффикс).
+# Площадок нет в таблице — пишут слитно (BTCUSDT).
+NATIVE_FORMATS = {
+    ("OKX", "spot"): ("-", ""),
+    ("OKX", "futures"): ("-", "-SWAP"),
+    ("BINGX", "spot"): ("-", ""),
+    ("BINGX", "futures"): ("-", ""),
+    ("MEXC", "futures"): ("_", ""),
+}
+
+# Котируемые валюты, по которым канонический символ делится на base/quote
+QUOTES = ("USDT", "USDC")
+
+
+def canonical_symbol(raw: str) -> str:
+    """
+    BTC-USDT-SWAP / BTC_USDT / BTC-USDT / btcusdt -> BTCUSDT.
+    Вызывается один раз на символ при построении таблиц, не на каждое сообщение.
+    """
+    s = raw.strip().upper()
+    s = s.replace("-SWAP", "").replace("_SWAP", "").replace("_", "").replace("-", "")
+    return s
+
+
+def native_symbol(exchange: str, market: str, canonical: str) -> str:
+    """
+    BTCUSDT -> написание площадки (BTC-USDT-SWAP, BTC_USDT, ...) по NATIVE_FORMATS.
+    """
+    sep, suffix = NATIVE_FORMATS.get((exchange.upper(), market.lower()), ("", ""))
+    if not sep and not suffix:
+        return canonical
+    for quote in QUOTES:
+        if canonical.endswith(quote) and len(canonical) > len(quote):
+            return f"{canonical[:-len(quote)]}{sep}{quote}{suffix}"
+    return canonical
+
+
+def read_symbols(path: Path) -> list[str]:
+    with path.open("r", encoding="utf-8") as f:
+        return [s for s in (line.strip() for line in f) if s and not s.startswith("#")]
+
+
+def write_symbols(path: Path, symbols) -> bool:
+    """
+    По символу в строке; файл не трогается, если содержимое то же
+    (mtime не меняется — реестр не пересобирается). True — записан.
+    """
+    data = "".join(s + "\n" for s in symbols).encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def venue_files(directory: str = SYMBOLS_DIR) -> dict[tuple[str, str], Path]:
+    """
+    (EXCHANGE, market) -> путь к списку.
+    """
+    files = {}
+    for path in sorted(Path(directory).glob("*_all.txt")):
+        exchange, _, market = path.name[:-len("_all.txt")].rpartition("_")
+        if exchange:
+            files[(exchange.upper(), market.lower())] = path
+    return files
+
+
+def source_fingerprint(directory: str = SYMBOLS_DIR) -> tuple:
+    """
+    (имя, размер, mtime) всех списков: изменился хоть один — реестр устарел.
+    """
+    out = []
+    for path in venue_files(directory).values():
+        st = path.stat()
+        out.append((path.name, st.st_size, st.st_mtime_ns))
+    return tuple(out)
+
+
+class SymbolRegistry:
+    """
+    names[id] -> канонический символ, ids — обратно,
+    venues[(EXCHANGE, market)] -> {символ как у биржи: id}.
+    """
+
+    def __init__(self, names: list[str], venues: dict[tuple[str, str], dict[str, int]], fingerprint: tuple = ()):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.venues = venues
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def build(cls, directory: str = SYMBOLS_DIR, previous: "SymbolRegistry | None" = None) -> "SymbolRegistry":
+        """
+        Из списков площадок. С previous id уже известных символов не меняются,
+        новые идут следом по алфавиту; без него — все по алфавиту.
+        """
+        # отпечаток — до чтения: список, переписанный во время сборки,
+        # оставит реестр устаревшим, и следующая загрузка соберёт его снова
+        fingerprint = source_fingerprint(directory)
+        raw_by_venue = {venue: read_symbols(path) for venue, path in venue_files(directory).items()}
+        names = list(previous.names) if previous is not None else []
+        known = set(names)
+        fresh = {canonical_symbol(raw) for raws in raw_by_venue.values() for raw in raws} - known
+        names.extend(sorted(fresh))
+        # одинаковые строки — один объект: marshal пишет повтор ссылкой,
+        # BTCUSDT у пяти площадок хранится в файле один раз
+        names = [sys.intern(name) for name in names]
+        registry = cls(names, {}, fingerprint)
+        ids = registry.ids
+        registry.venues = {
+            venue: {sys.intern(raw): ids[canonical_symbol(raw)] for raw in raws}
+            for venue, raws in raw_by_venue.items()
+        }
+        return registry
+
+    # ---------- артефакт ----------
+
+    def save(self, path: str | Path) -> None:
+        """
+        Атомарно: процессы, которые как раз загружают реестр, видят старый или новый файл целиком.
+        """
+        path = Path(path)
+        venues = {f"{ex}/{mk}": table for (ex, mk), table in self.venues.items()}
+        payload = marshal.dumps((VERSION, self.fingerprint, self.names, venues))
+        # свой временный файл у каждого процесса: общий они обрезали бы друг другу
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with tmp.open("wb") as f:
+                f.write(MAGIC + payload)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SymbolRegistry | None":
+        """
+        None — файла нет, он битый или другой версии.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:4] != MAGIC:
+                return None
+            version, fingerprint, names, venues = marshal.loads(data[4:])
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != VERSION:
+            return None
+        registry = cls(names, {}, tuple(tuple(x) for x in fingerprint))
+        registry.venues = {tuple(key.split("/", 1)): table for key, table in venues.items()}
+        return registry
+
+    # ---------- поиск ----------
+
+    def id(self, symbol: str, exchange: str | None = None, market: str | None = None) -> int | None:
+        """
+        id символа в любом написании; с площадкой сначала ищется точное написание биржи.
+        """
+        if exchange is not None and market is not None:
+            sid = self.venues.get((exchange.upper(), market.lower()), {}).get(symbol)
+            if sid is not None:
+                return sid
+        return self.ids.get(canonical_symbol(symbol))
+
+    def lookup(self, exchange: str, market: str, raw_symbols=None) -> dict[str, int]:
+        """
+        Таблица raw -> id для коллектора площадки. raw_symbols — символы,
+        на которые он подписывается (None — весь список площадки); символы
+        не из реестра пропускаются.
+        """
+        venue = self.venues.get((exchange.upper(), market.lower()), {})
+        if raw_symbols is None:
+            return dict(venue)
+        out = {}
+        for raw in raw_symbols:
+            sid = venue.get(raw)
+            if sid is None:
+                sid = self.ids.get(canonical_symbol(raw))
+            if sid is not None:
+                out[raw] = sid
+        return out
+
+    def native(self, exchange: str, market: str, symbol_id: int) -> str | None:
+        """
+        Как символ пишется на площадке; None — площадка им не торгует.
+        """
+        for raw, sid in self.venues.get((exchange.upper(), market.lower()), {}).items():
+            if sid == symbol_id:
+                return raw
+        return None
+
+
+_REGISTRIES: dict[str, SymbolRegistry] = {}
+
+
+def _lock(path: Path):
+    """
+    Эксклюзивная блокировка реестра (файл <реестр>.lock рядом) на время
+    пересборки; без fcntl (Windows) — без блокировки.
+    """
+    if fcntl is None:
+        return None
+    try:
+        f = open(path.with_name(path.name + ".lock"), "a")
+    except OSError:
+        # папка только на чтение — файл реестра тогда тоже не записать
+        return None
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+def load_registry(directory: str = SYMBOLS_DIR, path: str | Path | None = None, refresh: bool = False) -> SymbolRegistry:
+    """
+    Реестр процесса: скомпилированный файл, если он свежий, иначе
+    пересборка (с сохранением прежних id) и запись файла.
+    refresh — списки могли измениться после первой загрузки (горячая
+    перезагрузка в коллекторах): проверить и при необходимости обновить.
+
+    id раздаёт только файл: пересборка идёт под блокировкой файла и от
+    реестра, перечитанного под ней, а не от копии в памяти процесса.
+    Иначе два коллектора, увидевшие разные части переписанных списков,
+    дали бы одному новому символу разные id.
+    """
+    path = Path(path) if path is not None else Path(directory) / REGISTRY_FILE
+    key = str(path)
+    registry = _REGISTRIES.get(key)
+    if registry is not None and not (refresh and registry.fingerprint != source_fingerprint(directory)):
+        return registry
+    # файл мог обновить другой процесс
+    loaded = SymbolRegistry.load(path)
+    if loaded is None or loaded.fingerprint != source_fingerprint(directory):
+        lock = _lock(path)
+        try:
+            loaded = SymbolRegistry.load(path)
+            if loaded is None or loaded.fingerprint != source_fingerprint(directory):
+                loaded = SymbolRegistry.build(directory, previous=loaded or registry)
+                try:
+                    loaded.save(path)
+                except OSError as e:
+                    # работаем и без файла, но id новых символов тогда держатся только в памяти
+                    print(f"[SYMBOLS] Не удалось сохранить {path}: {e!r}")
+        finally:
+            if lock is not None:
+                lock.close()
+    _REGISTRIES[key] = loaded
+    return loaded
+
+
+def main() -> None:
+    t0 = time.perf_counter()
+    registry = load_registry()
+    loaded = time.perf_counter() - t0
+    path = Path(SYMBOLS_DIR) / REGISTRY_FILE
+    t0 = time.perf_counter()
+    SymbolRegistry.load(path)
+    compiled = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    SymbolRegistry.build()
+    built = time.perf_counter() - t0
+
+    if len(sys.argv) > 1:
+        for symbol in sys.argv[1:]:
+            sid = registry.id(symbol)
+            if sid is None:
+                print(f"{symbol}: нет в реестре")
+                continue
+            venues = ", ".join(
+                f"{ex} {mk}: {registry.native(ex, mk, sid)}"
+                for ex, mk in sorted(registry.venues) if registry.native(ex, mk, sid) is not None
+            )
+            print(f"{symbol} -> {registry.names[sid]} id {sid} | {venues or 'ни одной площадки'}")
+        return
+
+    listed = {sid for table in registry.venues.values() for sid in table.values()}
+    print(f"{path}: символов {len(registry)} (вне списков {len(registry) - len(listed)}),"
+          f" площадок {len(registry.venues)}, {path.stat().st_size / 1024:.0f} КБ")
+    for (ex, mk), table in sorted(registry.venues.items()):
+        print(f"  {ex:8} {mk:8} {len(table):6}")
+    print(f"загрузка: скомпилированный {compiled * 1e3:.2f} мс, сборка из списков {built * 1e3:.2f} мс"
+          f" (первый вызов в этом процессе {loaded * 1e3:.2f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""
+Списки торгуемых символов всех площадок (<exchange>_<market>_all.txt).
+
+    python universe.py                    # обновить все 10 списков
+    python universe.py --only okx,bingx   # только эти биржи
+    python universe.py --ttl 0            # не верить кэшу по возрасту
+    python universe.py --no-overlap       # только скачать списки
+
+После скачивания запускается overlap.run(): файлы пар, списки подписки
+коллекторов и реестр symbols.py — весь путь от бирж до коллекторов
+одной командой.
+
+Все списки качаются одновременно (asyncio), запросы к одному хосту идут
+по одному keep-alive соединению (HttpPool) с общим TLS-контекстом
+connection.ssl_context(), поэтому обновление занимает примерно один
+сетевой круг до самой медленной биржи, а не сумму всех запросов.
+
+Ответы бирж кэшируются в CACHE_DIR: моложе CACHE_TTL — берутся из кэша
+без сети, старше — запрос с If-None-Match / If-Modified-Since, и на 304
+берётся кэш. Если биржа недоступна, используется кэш любой давности,
+а если нет и его — ccxt (импортируется только здесь, если установлен).
+
+Файл переписывается, только если список изменился: mtime остаётся
+прежним, и реестр symbols.py не пересобирается зря.
+
+Для проверки без бирж:
+    python -m bench.universe_stub --delay 0.2
+    HTTP_OVERRIDE=http://127.0.0.1:9100 python universe.py --out /tmp/universe --no-overlap
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import overlap
+from connection import ResumingSSLContext, override_url, ssl_context
+from symbols import SYMBOLS_DIR, write_symbols
+
+# ================== НАСТРОЙКИ ==================
+
+# Полные списки бирж; урезанные для коллекторов пишет overlap.py в symbols.SYMBOLS_DIR
+OUTPUT_DIR = overlap.RAW_DIR
+
+# Кэш сырых ответов: <sha1(url)>.body + .json (ETag, Last-Modified, время)
+CACHE_DIR = ".universe_cache"
+CACHE_TTL = 15 * 60
+
+# Таймаут одного запроса, с
+TIMEOUT = 15
+
+USER_AGENT = "universe/1.0"
+
+# Все REST-адреса — на локальную подставку, по аналогии с WS_OVERRIDE:
+#   HTTP_OVERRIDE=http://127.0.0.1:9100 python universe.py
+# https://api.bybit.com/v5/... -> http://127.0.0.1:9100/api.bybit.com/v5/...
+HTTP_OVERRIDE = os.environ.get("HTTP_OVERRIDE", "")
+
+BINANCE_SPOT_URL = "https://api.binance.com/api/v3/exchangeInfo"
+BINANCE_FUTURES_URL = "https://fapi.binance.com/fapi/v1/exchangeInfo"
+BYBIT_URL = "https://api.bybit.com/v5/market/instruments-info?category={}&limit=1000"
+OKX_URL = "https://www.okx.com/api/v5/public/instruments?instType={}"
+BINGX_SPOT_URL = "https://open-api.bingx.com/openApi/spot/v1/common/symbols"
+BINGX_FUTURES_URL = "https://open-api.bingx.com/openApi/swap/v2/quote/contracts"
+MEXC_SPOT_URL = "https://api.mexc.com/api/v3/exchangeInfo"
+MEXC_FUTURES_URL = "https://contract.mexc.com/api/v1/contract/detail"
+
+# ccxt на случай, если биржа не отвечает и кэша нет: (класс, рынок)
+CCXT_FALLBACK = {
+    ("BINANCE", "spot"): ("binance", "spot"),
+    ("BINANCE", "futures"): ("binanceusdm", "contract"),
+    ("BYBIT", "spot"): ("bybit", "spot"),
+    ("BYBIT", "futures"): ("bybit", "contract"),
+    ("OKX", "spot"): ("okx", "spot"),
+    ("OKX", "futures"): ("okx", "contract"),
+    ("BINGX", "spot"): ("bingx", "spot"),
+    ("BINGX", "futures"): ("bingx", "contract"),
+    ("MEXC", "spot"): ("mexc", "spot"),
+    ("MEXC", "futures"): ("mexc", "contract"),
+}
+
+
+class HttpError(Exception):
+    pass
+
+
+# ================== HTTP ==================
+
+class HttpPool:
+    """
+    Минимальный асинхронный HTTP/1.1 клиент: GET, keep-alive соединения
+    по (схема, хост, порт), gzip и chunked в ответах. Больше спискам
+    символов ничего не нужно, а aiohttp/requests в окружении коллекторов
+    нет.
+    """
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self.timeout = timeout
+        self._idle: dict[tuple[str, str, int], list] = {}
+        self.opened = 0
+        self.requests = 0
+
+    async def get(self, url: str, headers: dict[str, str] | None = None) -> tuple[int, dict[str, str], bytes]:
+        """
+        (статус, заголовки в нижнем регистре, тело). Соединение из пула,
+        которое сервер успел закрыть, заменяется новым один раз.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {USER_AGENT}",
+                 "Accept: application/json", "Accept-Encoding: gzip", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        for attempt in (0, 1):
+            conn, reused = await self._acquire(key)
+            try:
+                return await asyncio.wait_for(self._exchange(key, conn, request), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                conn[1].close()
+                if not reused or attempt:
+                    raise HttpError(f"{url}: {e!r}") from e
+            except BaseException:
+                conn[1].close()
+                raise
+        raise AssertionError("unreachable")
+
+    async def _acquire(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        ctx = ssl_context() if scheme == "https" else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ctx, server_hostname=host if ctx else None), self.timeout,
+        )
+        if isinstance(ctx, ResumingSSLContext):
+            ssl_object = writer.get_extra_info("ssl_object")
+            if ssl_object is not None:
+                ctx.remember(host, ssl_object.session)
+        self.opened += 1
+        return (reader, writer), False
+
+    async def _exchange(self, key, conn, request: bytes):
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        self.requests += 1
+
+        status_line = await reader.readuntil(b"\r\n")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise HttpError(f"плохая строка статуса: {status_line[:80]!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if size == 0:
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        if headers.get("content-encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        if keep_alive:
+            self._idle.setdefault(key, []).append(conn)
+        else:
+            writer.close()
+        return status, headers, body
+
+    def close(self) -> None:
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+# ================== КЭШ ==================
+
+class ResponseCache:
+    """
+    Тела ответов по url на диске с метаданными для условных запросов.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = CACHE_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f"{name}.json", self.directory / f"{name}.body"
+
+    def load(self, url: str) -> tuple[dict, bytes] | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta, body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, headers: dict[str, str], body: bytes | None) -> None:
+        """
+        body=None — ответ 304: тело прежнее, обновляется только время.
+        """
+        meta_path, body_path = self._paths(url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "fetched": time.time(),
+        }
+        if body is not None:
+            _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode())
+
+
+class Fetcher:
+    """
+    GET с кэшем: свежий кэш -> без сети, иначе условный запрос;
+    при ошибке сети — кэш любой давности. В .sources — откуда взят каждый url.
+    """
+
+    def __init__(self, pool: HttpPool, cache: ResponseCache):
+        self.pool = pool
+        self.cache = cache
+        self.sources: dict[str, str] = {}
+
+    async def get_json(self, url: str):
+        # ключ кэша — настоящий адрес запроса: ответы подставки не смешиваются с биржевыми
+        url = override_url(url, HTTP_OVERRIDE)
+        cached = self.cache.load(url)
+        if cached is not None and time.time() - cached[0].get("fetched", 0) < self.cache.ttl:
+            self.sources[url] = "кэш"
+            return json.loads(cached[1])
+
+        headers = {}
+        if cached is not None:
+            if cached[0].get("etag"):
+                headers["If-None-Match"] = cached[0]["etag"]
+            if cached[0].get("last_modified"):
+                headers["If-Modified-Since"] = cached[0]["last_modified"]
+        try:
+            status, resp_headers, body = await self.pool.get(url, headers)
+            if status == 304 and cached is not None:
+                self.cache.store(url, {"etag": cached[0].get("etag"),
+                                       "last_modified": cached[0].get("last_modified"), **resp_headers}, None)
+                self.sources[url] = "304"
+                return json.loads(cached[1])
+            if status != 200:
+                raise HttpError(f"{url}: HTTP {status} {body[:200]!r}")
+            payload = json.loads(body)
+        except (OSError, asyncio.TimeoutError, HttpError, ValueError) as e:
+            if cached is None:
+                raise
+            age = time.time() - cached[0].get("fetched", 0)
+            print(f"[UNIVERSE] {url}: {e!r}, беру кэш {age / 60:.0f} мин давности")
+            self.sources[url] = "кэш (ошибка)"
+            return json.loads(cached[1])
+
+        if "last-modified" not in resp_headers and "date" in resp_headers:
+            # без Last-Modified спрашиваем «изменилось ли с момента ответа»
+            resp_headers["last-modified"] = resp_headers["date"]
+        self.cache.store(url, resp_headers, body)
+        self.sources[url] = "200"
+        return payload
+
+
+# ================== ПЛОЩАДКИ ==================
+
+async def binance_spot(fetcher: Fetcher) -> list[str]:
+    payload = await fetcher.get_json(BINANCE_SPOT_URL)
+    return sorted({
+        s["symbol"] for s in payload.get("symbols") or ()
+        if s.get("status") == "TRADING" and s.get("isSpotTradingAllowed", True)
+    })
+
+
+async def binance_futures(fetcher: Fetcher) -> list[str]:
+    # и бессрочные, и квартальные (BTCUSDT_250627) — одной парой BTCUSDT
+    payload = await fetcher.get_json(BINANCE_FUTURES_URL)
+    return sorted({
+        s.get("pair") or s["symbol"] for s in payload.get("symbols") or ()
+        if s.get("status") == "TRADING"
+    })
+
+
+async def bybit_category(fetcher: Fetcher, category: str) -> list[str]:
+    out = []
+    url = BYBIT_URL.format(category)
+    cursor = ""
+    while True:
+        payload = await fetcher.get_json(url + (f"&cursor={cursor}" if cursor else ""))
+        result = payload.get("result") or {}
+        out += [item["symbol"] for item in result.get("list") or ()]
+        cursor = result.get("nextPageCursor")
+        if not cursor:
+            return out
+
+
+async def bybit_spot(fetcher: Fetcher) -> list[str]:
+    return await bybit_category(fetcher, "spot")
+
+
+async def bybit_futures(fetcher: Fetcher) -> list[str]:
+    # linear (USDT/USDC) + inverse (coin-m)
+    linear, inverse = await asyncio.gather(bybit_category(fetcher, "linear"), bybit_category(fetcher, "inverse"))
+    return linear + inverse
+
+
+async def okx_instruments(fetcher: Fetcher, inst_type: str) -> list[str]:
+    payload = await fetcher.get_json(OKX_URL.format(inst_type))
+    if payload.get("code") != "0":
+        raise HttpError(f"OKX error: {payload.get('code')} {payload.get('msg')}")
+    return [item["instId"] for item in payload.get("data") or () if item.get("state") == "live"]
+
+
+async def okx_spot(fetcher: Fetcher) -> list[str]:
+    return await okx_instruments(fetcher, "SPOT")
+
+
+async def okx_futures(fetcher: Fetcher) -> list[str]:
+    # SWAP + датированные FUTURES
+    swap, dated = await asyncio.gather(okx_instruments(fetcher, "SWAP"), okx_instruments(fetcher, "FUTURES"))
+    return swap + dated
+
+
+async def bingx_spot(fetcher: Fetcher) -> list[str]:
+    payload = await fetcher.get_json(BINGX_SPOT_URL)
+    return [item["symbol"] for item in (payload.get("data") or {}).get("symbols") or ()]
+
+
+async def bingx_futures(fetcher: Fetcher) -> list[str]:
+    payload = await fetcher.get_json(BINGX_FUTURES_URL)
+    return [item["symbol"] for item in payload.get("data") or ()]
+
+
+async def mexc_spot(fetcher: Fetcher) -> list[str]:
+    payload = await fetcher.get_json(MEXC_SPOT_URL)
+    return [
+        s["symbol"] for s in payload.get("symbols") or ()
+        # status "1" — онлайн, торговля спотом разрешена
+        if s.get("status") == "1" and s.get("isSpotTradingAllowed", False) and "SPOT" in (s.get("permissions") or ())
+    ]
+
+
+async def mexc_futures(fetcher: Fetcher) -> list[str]:
+    payload = await fetcher.get_json(MEXC_FUTURES_URL)
+    data = payload.get("data")
+    if isinstance(data, dict):
+        data = [data] if "symbol" in data else list(data.values())
+    # state: 0 enabled, 1 delivery, 2 delivered, 3 offline, 4 paused; без фильтра по apiAllowed
+    return [c["symbol"] for c in data or () if c.get("symbol") and c.get("state") != 3]
+
+
+VENUES = {
+    ("BINANCE", "spot"): binance_spot,
+    ("BINANCE", "futures"): binance_futures,
+    ("BYBIT", "spot"): bybit_spot,
+    ("BYBIT", "futures"): bybit_futures,
+    ("OKX", "spot"): okx_spot,
+    ("OKX", "futures"): okx_futures,
+    ("BINGX", "spot"): bingx_spot,
+    ("BINGX", "futures"): bingx_futures,
+    ("MEXC", "spot"): mexc_spot,
+    ("MEXC", "futures"): mexc_futures,
+}
+
+
+def ccxt_symbols(exchange: str, market: str) -> list[str]:
+    """
+    Запасной путь через ccxt.load_markets(): медленно (импорт и все рынки
+    биржи), поэтому только если REST и кэш не помогли.
+    """
+    import ccxt  # pip install ccxt
+
+    class_name, kind = CCXT_FALLBACK[(exchange, market)]
+    markets = getattr(ccxt, class_name)().load_markets()
+    out = []
+    for m in markets.values():
+        if not m.get(kind) or m.get("active") is False:
+            continue
+        info = m.get("info") or {}
+        out.append(info.get("pair") if exchange == "BINANCE" and kind == "contract" else m["id"])
+    return sorted({s for s in out if s})
+
+
+async def fetch_venue(fetcher: Fetcher, exchange: str, market: str) -> tuple[list[str], str]:
+    """
+    (символы, откуда): REST/кэш, при неудаче — ccxt.
+    """
+    try:
+        return await VENUES[(exchange, market)](fetcher), "rest"
+    except Exception as e:
+        try:
+            symbols = await asyncio.to_thread(ccxt_symbols, exchange, market)
+        except ImportError:
+            raise e from None
+        print(f"[UNIVERSE] {exchange} {market}: {e!r}, список из ccxt")
+        return symbols, "ccxt"
+
+
+async def fetch_universe(venues=None, fetcher: Fetcher | None = None) -> dict[tuple[str, str], list[str]]:
+    """
+    Списки всех площадок (или venues) одновременно: {(EXCHANGE, market): [символ как у биржи]}.
+    """
+    venues = list(venues or VENUES)
+    fetcher = fetcher or Fetcher(HttpPool(), ResponseCache())
+    try:
+        results = await asyncio.gather(*(fetch_venue(fetcher, ex, mk) for ex, mk in venues), return_exceptions=True)
+    finally:
+        fetcher.pool.close()
+    out = {}
+    for venue, result in zip(venues, results):
+        if isinstance(result, BaseException):
+            print(f"[UNIVERSE] {venue[0]} {venue[1]}: не получен ({result!r}), файл не трогаю")
+            continue
+        out[venue] = result[0]
+    return out
+
+
+# ================== ФАЙЛЫ ==================
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_list(directory: str | Path, exchange: str, market: str, symbols: list[str]) -> bool:
+    """
+    <exchange>_<market>_all.txt. True — файл изменился.
+    """
+    return write_symbols(Path(directory) / f"{exchange.lower()}_{market}_all.txt", symbols)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="биржи через запятую (binance,okx,...)")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="куда писать *_all.txt")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL, help="сколько секунд кэш считается свежим")
+    parser.add_argument("--pairs-dir", default=overlap.PAIRS_DIR)
+    parser.add_argument("--symbols-dir", default=SYMBOLS_DIR)
+    parser.add_argument("--no-overlap", action="store_true", help="не пересчитывать пары и списки коллекторов")
+    args = parser.parse_args()
+
+    venues = list(VENUES)
+    if args.only:
+        wanted = {x.strip().upper() for x in args.only.split(",")}
+        venues = [v for v in venues if v[0] in wanted]
+
+    fetcher = Fetcher(HttpPool(), ResponseCache(args.cache_dir, args.ttl))
+    t0 = time.perf_counter()
+    universe = asyncio.run(fetch_universe(venues, fetcher))
+    elapsed = time.perf_counter() - t0
+
+    for (exchange, market), symbols in universe.items():
+        changed = write_list(args.out, exchange, market, symbols)
+        print(f"  {exchange:8} {market:8} {len(symbols):6}  {'обновлён' if changed else 'без изменений'}")
+    sources = Counter(fetcher.sources.values())
+    print(f"{len(universe)}/{len(venues)} списков за {elapsed:.2f} с -> {args.out}; запросов"
+          f" {fetcher.pool.requests} по {fetcher.pool.opened} соединениям,"
+          f" ответы: {', '.join(f'{k} {v}' for k, v in sorted(sources.items())) or '-'}")
+    if not args.no_overlap:
+        overlap.run(args.out, args.pairs_dir, args.symbols_dir)
+
+
+if __name__ == "__main__":
+    main()